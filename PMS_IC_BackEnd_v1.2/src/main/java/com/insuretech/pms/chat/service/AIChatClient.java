@@ -7,7 +7,9 @@ import lombok.extern.slf4j.Slf4j;
 import org.springframework.beans.factory.annotation.Value;
 import org.springframework.stereotype.Service;
 import org.springframework.web.reactive.function.client.WebClient;
+import org.springframework.web.reactive.function.client.WebClientResponseException;
 
+import java.time.Duration;
 import java.util.ArrayList;
 import java.util.HashMap;
 import java.util.List;
@@ -18,6 +20,9 @@ import java.util.Map;
 @RequiredArgsConstructor
 public class AIChatClient {
 
+    // LLM 서비스가 요청 데드라인에 맞춰 잘린 답변을 돌려보낼 수 있도록 응답 대기에 더하는 여유 시간
+    private static final long TIMEOUT_GRACE_MS = 2000;
+
     private final WebClient.Builder webClientBuilder;
 
     @Value("${ai.service.url}")
@@ -29,8 +34,15 @@ public class AIChatClient {
     @Value("${ai.service.model:llama3}")
     private String aiModel;
 
-    public ChatResponse chat(String userId, String message, List<ChatMessage> context) {
+    // 채팅 한 번(세션 404 재시도 포함)에 허용할 전체 시간, 0이면 제한 없음 (헤더를 보내지 않고 응답을 끝까지 기다림)
+    @Value("${ai.service.chat-deadline-ms:0}")
+    private long chatDeadlineMs;
+
+    public ChatResponse chat(String userId, String sessionId, String message, List<ChatMessage> context) {
         try {
+            if (sessionId != null) {
+                return callSession(sessionId, message, context);
+            }
             return callOllama(message, context);
         } catch (Exception e) {
             log.warn("Primary AI service call failed, falling back to mock: {}", e.getMessage());
@@ -46,7 +58,61 @@ public class AIChatClient {
         }
     }
 
+    /**
+     * LLM 서비스의 세션 API 호출: 히스토리는 서버가 보관하므로 새 메시지만 전송한다.
+     * LLM 서비스가 세션을 모르면(첫 턴 또는 서비스 재시작) 404를 받고 기존 히스토리와 함께 다시 보낸다.
+     */
+    private ChatResponse callSession(String sessionId, String message, List<ChatMessage> context) {
+        WebClient webClient = webClientBuilder.baseUrl(aiServiceUrl).build();
+        String uri = "/api/sessions/" + sessionId + "/chat";
+
+        Map<String, Object> request = new HashMap<>();
+        request.put("message", message);
+
+        // 재시도는 첫 요청이 쓰고 남은 시간 안에서만 보낸다
+        long deadlineAt = deadlineAt();
+        Map<String, Object> response;
+        try {
+            response = post(webClient, uri, request, deadlineAt);
+        } catch (WebClientResponseException.NotFound e) {
+            log.info("AI session {} not found, starting it with {} context messages", sessionId, context.size());
+            request.put("context", toContextList(context));
+            response = post(webClient, uri, request, deadlineAt);
+        }
+
+        return toChatResponse(response);
+    }
+
+    /**
+     * LLM 서비스의 세션과 KV 스냅샷 해제 (실패해도 무시, 서버 측 TTL로 정리됨)
+     */
+    public void endSession(String sessionId) {
+        try {
+            webClientBuilder.baseUrl(aiServiceUrl).build()
+                    .delete()
+                    .uri("/api/sessions/" + sessionId)
+                    .retrieve()
+                    .toBodilessEntity()
+                    .block();
+        } catch (WebClientResponseException.NotFound e) {
+            // 이미 만료된 세션
+        } catch (Exception e) {
+            log.warn("Failed to end AI session {}: {}", sessionId, e.getMessage());
+        }
+    }
+
     private ChatResponse callOllama(String message, List<ChatMessage> context) {
+        Map<String, Object> request = new HashMap<>();
+        request.put("message", message);
+        request.put("context", toContextList(context));
+        request.put("retrieved_docs", List.of());  // Empty for now, RAG will be populated by the service
+
+        WebClient webClient = webClientBuilder.baseUrl(aiServiceUrl).build();
+
+        return toChatResponse(post(webClient, "/api/chat", request, deadlineAt()));
+    }
+
+    private List<Map<String, String>> toContextList(List<ChatMessage> context) {
         // Convert context to the format expected by the LLM service
         List<Map<String, String>> contextList = new ArrayList<>();
         for (ChatMessage msg : context) {
@@ -55,21 +121,40 @@ public class AIChatClient {
                     "content", msg.getContent()
             ));
         }
+        return contextList;
+    }
 
-        Map<String, Object> request = new HashMap<>();
-        request.put("message", message);
-        request.put("context", contextList);
-        request.put("retrieved_docs", List.of());  // Empty for now, RAG will be populated by the service
+    /**
+     * 채팅 데드라인 시각(epoch ms), ai.service.chat-deadline-ms가 0 이하이면 0 (제한 없음)
+     */
+    private long deadlineAt() {
+        return chatDeadlineMs > 0 ? System.currentTimeMillis() + chatDeadlineMs : 0;
+    }
 
-        WebClient webClient = webClientBuilder.baseUrl(aiServiceUrl).build();
+    /**
+     * 데드라인이 있으면 남은 시간을 X-Request-Timeout-Ms 헤더로 전달해, 응답을 포기한 뒤에도 LLM 서비스가 계속 생성하지 않게 한다.
+     */
+    private Map<String, Object> post(WebClient webClient, String uri, Map<String, Object> request, long deadlineAt) {
+        WebClient.RequestBodySpec spec = webClient.post().uri(uri);
+        if (deadlineAt <= 0) {
+            return spec.bodyValue(request)
+                    .retrieve()
+                    .bodyToMono(Map.class)
+                    .block();
+        }
 
-        Map<String, Object> response = webClient.post()
-                .uri("/api/chat")
+        long remainingMs = deadlineAt - System.currentTimeMillis();
+        if (remainingMs <= 0) {
+            throw new IllegalStateException("AI chat deadline exceeded before " + uri);
+        }
+        return spec.header("X-Request-Timeout-Ms", String.valueOf(remainingMs))
                 .bodyValue(request)
                 .retrieve()
                 .bodyToMono(Map.class)
-                .block();
+                .block(Duration.ofMillis(remainingMs + TIMEOUT_GRACE_MS));
+    }
 
+    private ChatResponse toChatResponse(Map<String, Object> response) {
         if (response == null) {
             throw new IllegalStateException("AI service returned null response");
         }
@@ -72,7 +72,7 @@ public class ChatService {
         List<ChatMessage> recentMessages = getRecentMessages(session.getId(), 10);
 
         // AI 서비스 호출
-        ChatResponse aiResponse = aiChatClient.chat(userId, request.getMessage(), recentMessages);
+        ChatResponse aiResponse = aiChatClient.chat(userId, session.getId(), request.getMessage(), recentMessages);
 
         // AI 응답 저장
         ChatMessage assistantMessage = ChatMessage.builder()
@@ -118,5 +118,8 @@ public class ChatService {
         // Redis에서도 삭제
         String redisKey = "chat:session:" + sessionId;
         redisTemplate.delete(redisKey);
+
+        // LLM 서비스의 세션 히스토리/KV 스냅샷 해제
+        aiChatClient.endSession(sessionId);
     }
 }
\ No newline at end of file
@@ -78,6 +78,16 @@ public class LlmService {
                             .build();
                 }
 
+                // 모델 교체는 LLM 서비스에서 백그라운드로 진행됨 (진행 상황은 /api/model/current의 status로 확인)
+                if (response != null && "accepted".equals(response.get("status"))) {
+                    log.info("Model change to {} started (job: {})", resolvedModelPath, response.get("jobId"));
+                    return ModelInfoResponse.builder()
+                            .currentModel(normalizeModelName((String) response.get("targetModel")))
+                            .status("switching")
+                            .timestamp(System.currentTimeMillis())
+                            .build();
+                }
+
                 String errorMessage = response != null ? 
                         (String) response.getOrDefault("message", response.getOrDefault("error", "Unknown error")) :
                         "No response from LLM service";
@@ -126,6 +126,13 @@ public class RAGIndexingService {
             @SuppressWarnings("unchecked")
             Map<String, Object> response = restTemplate.postForObject(url, request, Map.class);
 
+            // LLM 서비스는 인덱싱 작업을 등록하고 job_id를 바로 반환 (진행 상태: /api/documents/jobs/{job_id})
+            Object jobStatus = response != null ? response.get("status") : null;
+            if ("queued".equals(jobStatus) || "running".equals(jobStatus)) {
+                log.info("Document queued for indexing: {} (job_id={})", documentId, response.get("job_id"));
+                return true;
+            }
+
             if (response != null && response.containsKey("success_count")) {
                 Integer successCount = (Integer) response.get("success_count");
                 log.info("Document indexed successfully: {} (success_count={})", documentId, successCount);
@@ -0,0 +1,200 @@
+"""
+의미 기반 답변 캐시
+스크럼, XP, 스프린트 계획, 리스크처럼 반복되는 질문은 매번 RAG 검색과 LLM 생성을 거치지 않고,
+질문의 query 임베딩(e5)이 이전 질문과 충분히 가까우면 저장된 답변을 돌려줍니다.
+
+항목마다 답변 생성에 쓰인 문서/청크 ID를 보관하므로, add_document/delete_document로
+해당 문서가 바뀌면 그 문서로 만든 답변은 무효화됩니다.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+# 코사인 유사도 임계값 (e5는 무관한 문장끼리도 0.7~0.8이 나오므로 높게 설정)
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+
+
+@dataclass
+class CacheEntry:
+    question: str
+    embedding: np.ndarray  # 정규화된 query 임베딩
+    result: Dict[str, Any]
+    model_key: Optional[str]
+    doc_ids: List[str] = field(default_factory=list)
+    chunk_ids: List[str] = field(default_factory=list)
+    latency_ms: float = 0.0  # 원래 답변을 만드는 데 걸린 시간
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+class SemanticAnswerCache:
+    """query 임베딩 유사도로 조회하는 LRU 답변 캐시"""
+
+    def __init__(self, threshold: float = ANSWER_CACHE_THRESHOLD,
+                 max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+                 enabled: bool = ANSWER_CACHE_ENABLED):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._next_id = 0
+        # 조회용 임베딩 행렬 (항목이 바뀔 때만 다시 만듦)
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[int] = []
+
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.latency_saved_ms = 0.0
+
+    @staticmethod
+    def _normalize(embedding: Iterable[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding: Iterable[float], model_key: Optional[str] = None) -> Optional[Tuple[CacheEntry, float]]:
+        """임계값 이상으로 가장 비슷한 이전 질문의 항목
+
+        Returns:
+            (항목, 유사도) 또는 None
+        """
+        if not self.enabled:
+            return None
+
+        started = time.perf_counter()
+        query = self._normalize(embedding)
+
+        with self._lock:
+            self.lookups += 1
+            self._expire()
+            if not self._entries:
+                return None
+
+            if self._matrix is None:
+                self._matrix_ids = list(self._entries.keys())
+                self._matrix = np.stack([self._entries[i].embedding for i in self._matrix_ids])
+
+            similarities = self._matrix @ query
+            for index in np.argsort(-similarities):
+                similarity = float(similarities[index])
+                if similarity < self.threshold:
+                    break
+                entry_id = self._matrix_ids[index]
+                entry = self._entries[entry_id]
+                if entry.model_key != model_key:
+                    continue
+
+                self._entries.move_to_end(entry_id)
+                entry.hits += 1
+                self.hits += 1
+                lookup_ms = (time.perf_counter() - started) * 1000
+                self.latency_saved_ms += max(0.0, entry.latency_ms - lookup_ms)
+                return entry, similarity
+
+            return None
+
+    def store(self, question: str, embedding: Iterable[float], result: Dict[str, Any],
+              model_key: Optional[str] = None, doc_ids: Iterable[str] = (),
+              chunk_ids: Iterable[str] = (), latency_ms: float = 0.0):
+        """답변 저장 (가장 오래 안 쓴 항목부터 밀어냄)"""
+        if not self.enabled:
+            return
+
+        entry = CacheEntry(
+            question=question,
+            embedding=self._normalize(embedding),
+            result=result,
+            model_key=model_key,
+            doc_ids=[d for d in doc_ids if d],
+            chunk_ids=[c for c in chunk_ids if c],
+            latency_ms=latency_ms,
+        )
+        with self._lock:
+            self._entries[self._next_id] = entry
+            self._next_id += 1
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def invalidate_document(self, doc_id: str, action: str = "write"):
+        """문서가 추가/수정/삭제되면 그 문서로 만든 답변을 무효화
+
+        문서를 추가하면 근거 문서 없이 만든 답변(범위 밖 안내)도 이제는 답할 수 있을 수 있으므로 함께 버립니다.
+        """
+        with self._lock:
+            stale = [
+                entry_id for entry_id, entry in self._entries.items()
+                if doc_id in entry.doc_ids or (action == "add" and not entry.doc_ids)
+            ]
+            for entry_id in stale:
+                del self._entries[entry_id]
+            if stale:
+                self._matrix = None
+                self.invalidations += len(stale)
+                logger.info(f"Answer cache: invalidated {len(stale)} entries after {action} of document {doc_id}")
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._matrix = None
+
+    def _expire(self):
+        if self.ttl_seconds <= 0:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        expired = [entry_id for entry_id, entry in self._entries.items() if entry.created_at < cutoff]
+        for entry_id in expired:
+            del self._entries[entry_id]
+        if expired:
+            self._matrix = None
+            self.evictions += len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                "latency_saved_ms": round(self.latency_saved_ms, 1),
+                "stores": self.stores,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+
+_cache: Optional[SemanticAnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """프로세스 전역 답변 캐시 (항목은 model_key로 모델별로 구분)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticAnswerCache()
+        return _cache
@@ -3,13 +3,34 @@
 llama-cpp-python을 사용하여 GGUF 모델을 실행합니다.
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from llama_cpp import Llama
 from rag_service_neo4j import RAGServiceNeo4j  # Neo4j 기반 GraphRAG 서비스 사용
 from chat_workflow import ChatWorkflow
+from inference_scheduler import PRIORITY_HIGH, InferenceScheduler, QueueFullError, QueueTimeoutError
+from llama_worker_pool import LlamaWorkerPool
+from prompt_cache import complete_with_prefix_cache, get_prefix_cache
+from response_cleaner import clean_response
+from session_store import get_session_store
+from answer_cache import get_answer_cache
+from deadline import Deadline
+from ingestion_jobs import IngestionJob, IngestionJobManager
+from document_upload import UPLOAD_CHUNK_BYTES, StreamingUpload, UploadError
+from model_swap import ModelSwapManager, SwapInProgressError
+from model_manager import ModelManager, ModelSelectionError
+import speculative
+from model_registry import (MODEL_MEMORY_HEADROOM_MB, GGUFFormatError, InsufficientMemoryError,
+                            available_memory_bytes, get_model_registry)
+from startup import StartupTracker
+import metrics
 import os
+import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 app = Flask(__name__)
 CORS(app)
@@ -24,14 +45,124 @@ MAX_TOKENS = int(os.getenv("MAX_TOKENS", "256"))  # Gemma 3는 더 긴 응답 
 TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
 TOP_P = float(os.getenv("TOP_P", "0.9"))
 
+# 추론 스케줄러 설정 (대기열 길이, 대기 제한 시간)
+SCHEDULER_MAX_QUEUE = int(os.getenv("SCHEDULER_MAX_QUEUE", "16"))
+SCHEDULER_QUEUE_TIMEOUT = float(os.getenv("SCHEDULER_QUEUE_TIMEOUT", "120"))
+
+# /api/chat/batch 한 번에 받을 최대 메시지 수
+CHAT_BATCH_MAX_MESSAGES = int(os.getenv("CHAT_BATCH_MAX_MESSAGES", "64"))
+# /api/documents/search의 queries 배열 최대 길이
+SEARCH_BATCH_MAX_QUERIES = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "64"))
+
+# 모델 교체 시 이전 모델 스케줄러가 비기를 기다리는 최대 시간(초)과, 비었다고 판단할 유휴 시간(초)
+MODEL_SWAP_DRAIN_TIMEOUT = float(os.getenv("MODEL_SWAP_DRAIN_TIMEOUT", "600"))
+MODEL_SWAP_DRAIN_GRACE = float(os.getenv("MODEL_SWAP_DRAIN_GRACE", "1.0"))
+
+# 시작 시 더미 prefill/encode로 모델 워밍업 (첫 요청의 초기화 비용 선지불)
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+
+# 다중 모델 상주: 활성 모델 포함 상주 모델 전체의 RAM 예산(MB, 0이면 활성 모델만 사용)
+MODEL_RAM_BUDGET_MB = float(os.getenv("MODEL_RAM_BUDGET_MB", "0"))
+# 의도별 모델 라우팅 규칙 (JSON, 예: {"casual": "small.gguf"}) — 요청에 model 필드가 없을 때 사용
+MODEL_ROUTES = json.loads(os.getenv("MODEL_ROUTES", "{}") or "{}")
+
+# 워커 풀 모드: 1보다 크면 독립 프로세스 레플리카 N개로 추론 (레플리카마다 LLM_N_THREADS 사용)
+LLM_WORKER_REPLICAS = int(os.getenv("LLM_WORKER_REPLICAS", "1"))
+
 # 전역 모델 인스턴스
 llm = None
 rag_service = None
 chat_workflow = None
 current_model_path = DEFAULT_MODEL_PATH
+# 전역 모델/워크플로우 전환 보호 (초기 로드와 모델 교체가 겹치지 않도록)
+model_lock = threading.RLock()
+
+# 시작 단계 컴포넌트 로드 상태 (/health/ready)
+startup = StartupTracker()
+service_started_at = time.time()
+
+# 모델 경로별 추론 스케줄러 (모델당 전용 워커 스레드)
+schedulers = {}
+schedulers_lock = threading.Lock()
+
+def create_llm(model_path: str):
+    """설정된 파라미터로 Llama 인스턴스 생성 (워커 풀 모드이면 레플리카 풀)"""
+    n_ctx = int(os.getenv("LLM_N_CTX", "4096"))
+    n_threads = int(os.getenv("LLM_N_THREADS", "6"))
+    n_gpu_layers = int(os.getenv("LLM_N_GPU_LAYERS", "0"))
+
+    if LLM_WORKER_REPLICAS > 1:
+        # 투기적 디코딩 draft 모델은 레플리카 프로세스가 각자 만듦
+        logger.info(f"Starting Llama worker pool: {LLM_WORKER_REPLICAS} replicas x {n_threads} threads")
+        return LlamaWorkerPool(
+            model_path,
+            replicas=LLM_WORKER_REPLICAS,
+            llama_kwargs={
+                "n_ctx": n_ctx,
+                "n_threads": n_threads,
+                "n_gpu_layers": n_gpu_layers,
+                "verbose": False,
+            },
+        )
+
+    return Llama(
+        model_path=model_path,
+        n_ctx=n_ctx,  # Gemma 3는 더 긴 컨텍스트 지원 (최대 8192)
+        n_threads=n_threads,  # Gemma 3 12B는 더 많은 스레드 활용 가능
+        verbose=True,  # 디버깅을 위해 True로 변경
+        n_gpu_layers=n_gpu_layers,  # GPU 사용 시 양수 또는 -1
+        # SPECULATIVE_DECODING / SPECULATIVE_MODELS 설정 시 draft_model 추가
+        **speculative.llama_kwargs(model_path, n_ctx, n_threads, n_gpu_layers)
+    )
+
+
+def llm_memory_params(model_path: str) -> dict:
+    """create_llm과 같은 설정(투기적 디코딩 포함)으로 메모리를 추정하기 위한 파라미터"""
+    params = {
+        "n_ctx": int(os.getenv("LLM_N_CTX", "4096")),
+        "n_gpu_layers": int(os.getenv("LLM_N_GPU_LAYERS", "0")),
+        "replicas": LLM_WORKER_REPLICAS,
+    }
+    config = speculative.speculative_config(model_path)
+    if config is not None:
+        # draft_model을 쓰면 llama-cpp-python이 logits_all=True로 전환
+        params["logits_all"] = True
+        if config["mode"] == "draft":
+            params["draft_bytes"] = get_model_registry().get(config["draft_model"]).estimate_memory(
+                params["n_ctx"], n_gpu_layers=params["n_gpu_layers"]).total_bytes
+    return params
+
+
+def check_model_memory(model_path: str):
+    """현재 로드 설정으로 모델을 올려도 메모리가 남는지 헤더만 읽어 확인 (Llama() 생성 전)
+
+    Raises:
+        InsufficientMemoryError: 가용 메모리 부족
+        GGUFFormatError: GGUF 헤더를 읽을 수 없음
+    """
+    return get_model_registry().check_fits(model_path, **llm_memory_params(model_path))
+
+
+def estimate_model_bytes(model_path: str) -> int:
+    return get_model_registry().get(model_path).estimate_memory(**llm_memory_params(model_path)).total_bytes
+
+
+def release_llm(model):
+    """모델 해제 (워커 풀이면 레플리카 프로세스 종료)"""
+    if isinstance(model, LlamaWorkerPool):
+        model.close()
+
 
 def load_model(model_path=None):
     """모델 및 RAG 서비스 로드"""
+    # 시작 단계 병렬 로드가 진행 중이면 끝날 때까지 대기 (같은 모델을 중복 로드하지 않도록)
+    if startup.in_progress:
+        startup.core_done.wait()
+    with model_lock:
+        return _load_model(model_path)
+
+
+def _load_model(model_path=None):
     global llm, rag_service, chat_workflow, current_model_path
 
     if model_path is None:
@@ -51,6 +182,7 @@ def load_model(model_path=None):
             if llm is not None:
                 logger.info("Unloading previous model...")
                 try:
+                    release_llm(llm)
                     del llm
                 except Exception as del_error:
                     logger.warning(f"Error deleting old model: {del_error}")
@@ -58,17 +190,9 @@ def load_model(model_path=None):
 
             # 새 모델 로드
             logger.info(f"Initializing Llama model: {model_path}")
-            n_ctx = int(os.getenv("LLM_N_CTX", "4096"))
-            n_threads = int(os.getenv("LLM_N_THREADS", "6"))
-            n_gpu_layers = int(os.getenv("LLM_N_GPU_LAYERS", "0"))
-            llm = Llama(
-                model_path=model_path,
-                n_ctx=n_ctx,  # Gemma 3는 더 긴 컨텍스트 지원 (최대 8192)
-                n_threads=n_threads,  # Gemma 3 12B는 더 많은 스레드 활용 가능
-                verbose=True,  # 디버깅을 위해 True로 변경
-                n_gpu_layers=n_gpu_layers  # GPU 사용 시 양수 또는 -1
-            )
+            llm = create_llm(model_path)
             current_model_path = model_path
+            model_manager.set_active(current_model_path, llm, None)
             logger.info(f"Model loaded successfully: {model_path}")
         except Exception as e:
             logger.error(f"Failed to load model: {e}", exc_info=True)
@@ -95,6 +219,7 @@ def load_model(model_path=None):
             if llm is None:
                 raise RuntimeError("Cannot initialize workflow: model is None")
             chat_workflow = ChatWorkflow(llm, rag_service, model_path=current_model_path)
+            model_manager.set_active(current_model_path, llm, chat_workflow)
             logger.info("Chat workflow initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize chat workflow: {e}", exc_info=True)
@@ -103,15 +228,342 @@ def load_model(model_path=None):
 
     return llm, rag_service, chat_workflow
 
+
+def load_swap_model(model_path: str):
+    """교체할 모델과 워크플로우를 백그라운드에서 준비 (전역 상태는 바꾸지 않음)
+
+    요청 라우팅용 추가 모델 로드(model_manager)에도 사용. 이미 추가 모델로 상주 중이면 그대로 넘겨받음
+    """
+    global rag_service
+
+    resident = model_manager.take(model_path)
+    if resident is not None:
+        logger.info(f"Promoting resident model {model_path} without reloading")
+        return resident.model, resident.workflow
+
+    logger.info(f"Loading new model in background: {model_path} "
+                f"({os.path.getsize(model_path) / (1024 ** 3):.2f} GB)")
+    # 요청 접수 후 메모리 상황이 바뀌었을 수 있으므로 로드 직전에 다시 확인
+    check_model_memory(model_path)
+    new_llm = create_llm(model_path)
+
+    with model_lock:
+        if rag_service is None:
+            try:
+                logger.info("Loading RAG service with Neo4j (vector + graph)...")
+                rag_service = RAGServiceNeo4j()
+            except Exception as e:
+                logger.error(f"Failed to load RAG service: {e}", exc_info=True)
+        rag = rag_service
+
+    try:
+        workflow = ChatWorkflow(new_llm, rag, model_path=model_path)
+    except Exception as e:
+        # 워크플로우 실패는 치명적이지 않음 (레거시 모드 사용 가능)
+        logger.error(f"Failed to initialize chat workflow for {model_path}: {e}", exc_info=True)
+        workflow = None
+    return new_llm, workflow
+
+
+def activate_model(model_path: str, new_llm, workflow):
+    """새 모델/워크플로우로 전역 상태를 한 번에 전환하고 (이전 모델, 이전 경로) 반환"""
+    global llm, chat_workflow, current_model_path
+    with model_lock:
+        old_llm, old_model_path = llm, current_model_path
+        llm, chat_workflow, current_model_path = new_llm, workflow, model_path
+        model_manager.set_active(model_path, new_llm, workflow)
+    return old_llm, old_model_path
+
+
+def drain_scheduler(model_path: str):
+    """이전 모델 스케줄러에 남은 요청이 모두 끝나면 스케줄러를 정리"""
+    with schedulers_lock:
+        scheduler = schedulers.get(model_path)
+    if scheduler is None:
+        return
+
+    deadline = time.monotonic() + MODEL_SWAP_DRAIN_TIMEOUT
+    idle_since = None
+    while time.monotonic() < deadline:
+        stats = scheduler.stats()
+        if stats["queue_depth"] == 0 and stats["in_flight"] == 0:
+            # 전환 직전에 이전 워크플로우를 받아 간 요청이 제출될 시간을 둠
+            idle_since = idle_since or time.monotonic()
+            if time.monotonic() - idle_since >= MODEL_SWAP_DRAIN_GRACE:
+                break
+        else:
+            idle_since = None
+        time.sleep(0.1)
+    else:
+        logger.warning(f"Scheduler for {model_path} still busy after {MODEL_SWAP_DRAIN_TIMEOUT:.0f}s, releasing anyway")
+
+    scheduler.shutdown()
+    with schedulers_lock:
+        if schedulers.get(model_path) is scheduler:
+            del schedulers[model_path]
+
+
+model_swaps = ModelSwapManager(load=load_swap_model, activate=activate_model,
+                               drain=drain_scheduler, release=release_llm)
+
+
+def release_resident_model(model_path: str, model):
+    """LRU로 밀려난 추가 모델: 남은 요청을 처리한 뒤 해제"""
+    drain_scheduler(model_path)
+    release_llm(model)
+
+
+model_manager = ModelManager(load=load_swap_model, release=release_resident_model,
+                             estimate=estimate_model_bytes, budget_bytes=int(MODEL_RAM_BUDGET_MB * 1024 * 1024))
+
+
+def resolve_model_name(name: str) -> str:
+    """모델 파일명 또는 경로 → 모델 경로 (파일명이면 ./models 아래)"""
+    return name if os.path.dirname(name) else os.path.join("./models", name)
+
+
+def select_workflow(data: dict, workflow, message: str = None):
+    """요청의 model 필드, 없으면 MODEL_ROUTES 의도 규칙으로 모델을 골라 그 워크플로우 반환
+
+    model 필드가 없거나 활성 모델이면 workflow를 그대로 반환합니다.
+    라우팅 규칙으로 고른 모델을 쓸 수 없으면 활성 모델로 처리합니다.
+
+    Raises:
+        ModelSelectionError: model 필드로 지정한 모델을 사용할 수 없는 경우
+    """
+    name = data.get("model")
+    routed = False
+    if not name and MODEL_ROUTES and message and workflow is not None:
+        intent = workflow.classify_casual_only(message)
+        name = MODEL_ROUTES.get(intent) or MODEL_ROUTES.get("default")
+        routed = name is not None
+    if not name:
+        return workflow
+
+    model_path = resolve_model_name(name)
+    if os.path.abspath(model_path) == os.path.abspath(current_model_path):
+        return workflow
+
+    try:
+        return resident_workflow(model_path)
+    except ModelSelectionError as e:
+        if not routed:
+            raise
+        logger.warning(f"Model route to {model_path} unavailable, using active model: {e}")
+        return workflow
+
+
+def resident_workflow(model_path: str):
+    if not os.path.exists(model_path):
+        raise ModelSelectionError(f"Model file not found: {model_path}", "MODEL_NOT_FOUND", 404)
+    try:
+        resident = model_manager.get(model_path)
+    except ModelSelectionError:
+        raise
+    except InsufficientMemoryError as e:
+        raise ModelSelectionError(str(e), "INSUFFICIENT_MEMORY", 507) from e
+    except GGUFFormatError as e:
+        raise ModelSelectionError(str(e), "INVALID_MODEL", 400) from e
+    except Exception as e:
+        logger.error(f"Failed to load resident model {model_path}: {e}", exc_info=True)
+        raise ModelSelectionError(f"Failed to load model {model_path}: {e}", "MODEL_LOAD_FAILED", 503) from e
+    if resident.workflow is None:
+        raise ModelSelectionError(f"Chat workflow not available for {model_path}", "WORKFLOW_UNAVAILABLE", 503)
+    return resident.workflow
+
+
+def model_selection_body(error: ModelSelectionError) -> dict:
+    return {
+        "error": str(error),
+        "error_type": error.error_type,
+        "message": f"요청한 모델을 사용할 수 없습니다: {error}",
+        "reply": "죄송합니다. 요청한 모델을 사용할 수 없습니다."
+    }
+
+
+def model_selection_response(error: ModelSelectionError):
+    return jsonify(model_selection_body(error)), error.status_code
+
+
+def get_scheduler(model_path=None) -> InferenceScheduler:
+    """모델 경로에 해당하는 추론 스케줄러 반환 (없으면 생성)"""
+    model_path = model_path or current_model_path
+    with schedulers_lock:
+        scheduler = schedulers.get(model_path)
+        if scheduler is None:
+            scheduler = InferenceScheduler(
+                name=model_path,
+                max_queue_size=SCHEDULER_MAX_QUEUE,
+                queue_timeout=SCHEDULER_QUEUE_TIMEOUT,
+                # 워커 풀 모드이면 레플리카 수만큼 동시에 처리
+                num_workers=max(1, LLM_WORKER_REPLICAS),
+            )
+            schedulers[model_path] = scheduler
+        return scheduler
+
+
+def existing_scheduler_stats(model_path=None) -> Optional[dict]:
+    """현재 모델 스케줄러 통계 (헬스 체크용 — 스케줄러가 없으면 만들지 않고 None)"""
+    model_path = model_path or current_model_path
+    with schedulers_lock:
+        scheduler = schedulers.get(model_path)
+    return scheduler.stats() if scheduler is not None else None
+
+
+def scheduler_for(workflow) -> InferenceScheduler:
+    """워크플로우가 쓰는 모델의 스케줄러 (모델 교체 중에도 이전 워크플로우 요청은 이전 모델 스케줄러로)"""
+    return get_scheduler(workflow.model_path if workflow is not None else None)
+
+
+def scheduler_gauge(field: str):
+    """스케줄러별 stats() 값을 스크랩 시점에 읽는 게이지 수집 함수"""
+    def collect():
+        with schedulers_lock:
+            current = list(schedulers.values())
+        return {(scheduler.name,): scheduler.stats()[field] for scheduler in current}
+    return collect
+
+
+metrics.QUEUE_DEPTH.set_collector(scheduler_gauge("queue_depth"))
+metrics.QUEUE_IN_FLIGHT.set_collector(scheduler_gauge("in_flight"))
+
+
+def chat_busy() -> bool:
+    """채팅 추론이 실행/대기 중인지 (백그라운드 문서 인덱싱이 양보)"""
+    with schedulers_lock:
+        current = list(schedulers.values())
+    return any(scheduler.busy() for scheduler in current)
+
+
+# 비동기 문서 인덱싱 작업 (/api/documents → /api/documents/jobs/<job_id>)
+ingestion_jobs = IngestionJobManager(lambda: load_model()[1], busy=chat_busy)
+metrics.INGEST_PENDING.set_collector(lambda: {(): ingestion_jobs.pending_documents()})
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """라우트별 요청 수/지연 기록 (라우트 템플릿 기준이라 세션 ID 등은 라벨에 들어가지 않음)"""
+    started = getattr(g, "request_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        metrics.HTTP_REQUESTS.inc(route=route, method=request.method, status=str(response.status_code))
+        metrics.HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, route=route, method=request.method)
+    return response
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus 텍스트 노출 형식 메트릭 (스크랩용)"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+def queue_full_body(error: QueueFullError) -> dict:
+    """대기열 포화 시 429 응답 본문 (Flask/ASGI 공용)"""
+    logger.warning(f"Rejecting chat request: {error}")
+    return {
+        "error": "Too many requests",
+        "message": str(error),
+        "queue_depth": error.queue_depth,
+        "retry_after": error.retry_after,
+        "reply": "죄송합니다. 현재 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요."
+    }
+
+
+def queue_full_response(error: QueueFullError):
+    """대기열 포화 시 429 응답"""
+    response = jsonify(queue_full_body(error))
+    response.status_code = 429
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
 @app.route("/health", methods=["GET"])
 def health():
     """헬스 체크"""
-    return jsonify({
+    return jsonify(health_status())
+
+
+@app.route("/health/live", methods=["GET"])
+def health_live():
+    """liveness: 프로세스가 요청을 받을 수 있는지 (모델 로드 여부와 무관)"""
+    return jsonify(liveness_status())
+
+
+def readiness_status() -> dict:
+    """readiness 본문 (Flask/ASGI 공용) — 워커 풀 모드에서는 살아 있는 레플리카가 없으면 준비 안 됨"""
+    body = startup.readiness()
+    if isinstance(llm, LlamaWorkerPool):
+        pool_stats = llm.stats()
+        body["worker_pool"] = {
+            "live_replicas": pool_stats["live_replicas"],
+            "replicas": len(pool_stats["replicas"]),
+            "restarts": pool_stats["restarts"],
+        }
+        if pool_stats["live_replicas"] == 0:
+            body["ready"] = False
+    return body
+
+
+@app.route("/health/ready", methods=["GET"])
+def health_ready():
+    """readiness: 필수 컴포넌트가 모두 로드되고 워밍업이 끝났는지 (아니면 503)"""
+    body = readiness_status()
+    return jsonify(body), 200 if body["ready"] else 503
+
+
+def liveness_status() -> dict:
+    return {"status": "alive", "uptime_s": round(time.time() - service_started_at, 1)}
+
+
+def health_status() -> dict:
+    """헬스 체크 응답 본문 (Flask/ASGI 공용)"""
+    readiness = readiness_status()
+    return {
         "status": "healthy",
+        "ready": readiness["ready"],
+        "components": readiness["components"],
         "model_loaded": llm is not None,
         "rag_service_loaded": rag_service is not None,
-        "chat_workflow_loaded": chat_workflow is not None
-    })
+        "chat_workflow_loaded": chat_workflow is not None,
+        "scheduler": existing_scheduler_stats(),
+        "worker_pool": llm.stats() if isinstance(llm, LlamaWorkerPool) else None,
+        "prompt_cache": get_prefix_cache(llm).stats() if isinstance(llm, Llama) else None,
+        "answer_cache": get_answer_cache().stats(),
+        "embedding_cache": rag_service.embedding_cache.stats() if rag_service is not None else None,
+        "ingestion": ingestion_jobs.stats()
+    }
+
+
+@app.route("/api/scheduler/stats", methods=["GET"])
+def scheduler_stats():
+    """모델별 추론 대기열 통계 (대기열 깊이, 대기/처리 시간)"""
+    with schedulers_lock:
+        stats = [scheduler.stats() for scheduler in schedulers.values()]
+    return jsonify({"schedulers": stats})
+
+
+@app.route("/api/model/resident", methods=["GET"])
+def resident_models():
+    """상주 모델 목록과 적중/로드/퇴출 통계, 라우팅 규칙"""
+    return jsonify({**model_manager.stats(), "routes": MODEL_ROUTES})
+
+
+@app.route("/api/answer-cache/stats", methods=["GET"])
+def answer_cache_stats():
+    """의미 기반 답변 캐시 통계 (적중률, 절약된 지연 시간)"""
+    return jsonify(get_answer_cache().stats())
+
+
+@app.route("/api/answer-cache", methods=["DELETE"])
+def clear_answer_cache():
+    """답변 캐시 전체 비우기"""
+    get_answer_cache().clear()
+    return jsonify({"status": "cleared"})
 
 @app.route("/api/chat", methods=["POST"])
 def chat():
@@ -125,6 +577,12 @@ def chat():
         if not message:
             return jsonify({"error": "Message is required"}), 400
 
+        # 호출자가 기다릴 시간 (지나면 검색/재시도/생성을 줄이거나 멈추고 잘린 답변을 반환)
+        try:
+            deadline = Deadline.from_request(request.headers, data)
+        except ValueError as deadline_error:
+            return jsonify({"error": "Invalid deadline", "message": str(deadline_error)}), 400
+
         # 모델 및 워크플로우 로드
         try:
             model, rag, workflow = load_model()
@@ -145,11 +603,23 @@ def chat():
                 "reply": "죄송합니다. 현재 AI 모델을 사용할 수 없습니다. 잠시 후 다시 시도해주세요."
             }), 503
 
+        # 요청의 model 필드 또는 의도 라우팅으로 모델 선택 (레거시 폴백도 같은 모델 사용)
+        try:
+            selected = select_workflow(data, workflow, message)
+        except ModelSelectionError as selection_error:
+            return model_selection_response(selection_error)
+        if selected is not workflow:
+            model, workflow = selected.llm, selected
+
+        scheduler = scheduler_for(workflow)
+
         if workflow is None:
             # LangGraph가 없으면 기존 방식 사용
             logger.warning("LangGraph not available, using legacy chat")
             try:
-                return chat_legacy(message, context, model, rag, retrieved_docs)
+                return chat_legacy(message, context, model, rag, retrieved_docs, scheduler, deadline)
+            except QueueFullError as queue_error:
+                return queue_full_response(queue_error)
             except Exception as legacy_error:
                 logger.error(f"Legacy chat failed: {legacy_error}", exc_info=True)
                 return jsonify({
@@ -161,29 +631,25 @@ def chat():
         # LangGraph 워크플로우 실행
         logger.info(f"Processing chat with LangGraph: {message[:50]}...")
         try:
-            result = workflow.run(message, context, retrieved_docs)
-            
-            reply = result.get("reply")
-            if not reply or reply.strip() == "":
-                logger.warning("Workflow returned empty reply")
-                reply = "죄송합니다. 응답을 생성할 수 없습니다."
-            
+            result = scheduler.submit(workflow.run, message, context, retrieved_docs, deadline=deadline).result()
+            return jsonify(chat_response_body(result))
+        except QueueFullError as queue_error:
+            return queue_full_response(queue_error)
+        except QueueTimeoutError as timeout_error:
+            logger.error(f"Chat request expired in queue: {timeout_error}")
             return jsonify({
-                "reply": reply,
-                "confidence": result.get("confidence", 0.85),
-                "suggestions": [],
-                "metadata": {
-                    "intent": result.get("intent"),
-                    "rag_docs_count": result.get("rag_docs_count", 0),
-                    "workflow": "langgraph"
-                }
-            })
+                "error": "Request timed out in queue",
+                "message": str(timeout_error),
+                "reply": "죄송합니다. 요청 대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요."
+            }), 503
         except Exception as workflow_error:
             logger.error(f"Workflow execution failed: {workflow_error}", exc_info=True)
             # 워크플로우 실패 시 레거시 모드로 폴백
             try:
                 logger.info("Falling back to legacy chat after workflow failure")
-                return chat_legacy(message, context, model, rag, retrieved_docs)
+                return chat_legacy(message, context, model, rag, retrieved_docs, scheduler, deadline)
+            except QueueFullError as queue_error:
+                return queue_full_response(queue_error)
             except Exception as fallback_error:
                 logger.error(f"Fallback to legacy chat also failed: {fallback_error}", exc_info=True)
                 return jsonify({
@@ -201,101 +667,422 @@ def chat():
         }), 500
 
 
-def chat_legacy(message: str, context: list, model: Llama, rag: RAGServiceNeo4j, retrieved_docs: list = None):
-    """레거시 채팅 처리 (LangGraph 없을 때)"""
+def chat_response_body(result: dict) -> dict:
+    """워크플로우 실행 결과 → /api/chat 응답 본문 (Flask/ASGI 공용)"""
+    reply = result.get("reply")
+    if not reply or reply.strip() == "":
+        logger.warning("Workflow returned empty reply")
+        reply = "죄송합니다. 응답을 생성할 수 없습니다."
+
+    return {
+        "reply": reply,
+        "confidence": result.get("confidence", 0.85),
+        "suggestions": [],
+        "metadata": {
+            "intent": result.get("intent"),
+            "rag_docs_count": result.get("rag_docs_count", 0),
+            "workflow": "langgraph",
+            "prompt_cache": result.get("debug_info", {}).get("prompt_cache"),
+            "prompt_budget": result.get("debug_info", {}).get("prompt_budget"),
+            "answer_cache": result.get("debug_info", {}).get("answer_cache"),
+            "timings": result.get("debug_info", {}).get("timings"),
+            "model": result.get("debug_info", {}).get("model"),
+            "deadline": result.get("debug_info", {}).get("deadline")
+        }
+    }
+
+
+def legacy_response_body(reply: str, deadline: Deadline = None) -> dict:
+    """레거시 모드 응답 본문 (Flask/ASGI 공용)"""
+    metadata = {"workflow": "legacy"}
+    if deadline is not None:
+        metadata["deadline"] = deadline.to_dict()
+    return {
+        "reply": reply,
+        "confidence": 0.85,
+        "suggestions": [],
+        "metadata": metadata
+    }
+
+
+@app.route("/api/chat/stream", methods=["POST"])
+def chat_stream():
+    """스트리밍 채팅 (SSE 기본, ?format=ndjson 지원)
+
+    metadata(검색 결과 요약) → token(생성 토큰, 반복) → done(최종 정리된 응답) 순서로 이벤트를 전송합니다.
+    """
+    data = request.json or {}
+    message = data.get("message", "")
+    context = data.get("context", [])
+    retrieved_docs = normalize_retrieved_docs(data.get("retrieved_docs", []))
+    stream_format = request.args.get("format", "sse").lower()
+
+    if not message:
+        return jsonify({"error": "Message is required"}), 400
+
     try:
-        # RAG 검색
-        if not retrieved_docs:
-            retrieved_docs = []
-        if not retrieved_docs and rag:
-            retrieved_docs_objs = rag.search(message, top_k=3)
-            retrieved_docs = [doc['content'] for doc in retrieved_docs_objs]
-            logger.info(f"RAG search found {len(retrieved_docs)} documents")
-
-        # KV 캐시 초기화
-        model.reset()
-
-        # 프롬프트 구성
-        prompt = build_prompt(message, context, retrieved_docs)
-
-        # 모델 추론
-        response = model(
-            prompt,
-            max_tokens=MAX_TOKENS,
-            temperature=TEMPERATURE,
-            top_p=TOP_P,
-            stop=["<end_of_turn>", "<start_of_turn>", "</s>", "<|im_end|>"],
-            echo=False,
-            repeat_penalty=1.1
-        )
+        deadline = Deadline.from_request(request.headers, data)
+    except ValueError as deadline_error:
+        return jsonify({"error": "Invalid deadline", "message": str(deadline_error)}), 400
 
-        reply = response["choices"][0]["text"].strip()
-
-        # 후처리
-        reply = reply.replace("<start_of_turn>", "").replace("<end_of_turn>", "")
-        # im_end 토큰 제거 (깨지는 문자 방지)
-        reply = reply.replace("<|im_end|>", "").replace("|im_end|>", "").replace("<|im_end", "")
-        if reply.startswith("model"):
-            reply = reply[5:].strip()
-        if reply.startswith("assistant"):
-            reply = reply[9:].strip()
-        cleaned_lines = []
-        for line in reply.splitlines():
-            stripped = line.strip()
-            lower = stripped.lower()
-            if lower.startswith("assistant:") or lower.startswith("assistant："):
-                stripped = stripped.split(":", 1)[1].strip() if ":" in stripped else ""
-            elif lower == "assistant":
-                stripped = ""
-            if stripped.endswith("?"):
-                stripped = ""
-            if stripped:
-                cleaned_lines.append(stripped)
-        if cleaned_lines:
-            reply = "\n".join(cleaned_lines)
-        if "<start_of_turn>" in reply:
-            reply = reply.split("<start_of_turn>")[0].strip()
-        # im_end 토큰이 남아있으면 제거
-        if "<|im_end|>" in reply:
-            reply = reply.split("<|im_end|>")[0].strip()
-        if "|im_end|>" in reply:
-            reply = reply.split("|im_end|>")[0].strip()
-        if "\n\n\n" in reply:
-            reply = reply.split("\n\n\n")[0].strip()
-        
-        # 제어 문자 및 깨지는 문자 제거 (인코딩 문제 방지)
-        import string
-        # 인쇄 가능한 문자와 공백만 유지
-        printable_chars = set(string.printable)
-        # 한글, 한자, 일본어 등 유니코드 문자도 허용
-        cleaned_chars = []
-        for char in reply:
-            # 인쇄 가능한 ASCII 문자이거나, 유니코드 문자(한글 등)인 경우만 유지
-            if char in printable_chars or ord(char) > 127:
-                # 제어 문자 제거 (탭, 줄바꿈, 캐리지 리턴은 유지)
-                if ord(char) < 32 and char not in ['\n', '\r', '\t']:
-                    continue
-                cleaned_chars.append(char)
-        reply = ''.join(cleaned_chars)
-        
-        # 앞뒤 공백 정리
-        reply = reply.strip()
+    try:
+        _, _, workflow = load_model()
+    except Exception as load_error:
+        logger.error(f"Failed to load model for stream request: {load_error}", exc_info=True)
+        return jsonify({
+            "error": "Model not available",
+            "message": f"Failed to load model: {str(load_error)}"
+        }), 503
 
+    if workflow is None:
         return jsonify({
-            "reply": reply,
-            "confidence": 0.85,
-            "suggestions": [],
-            "metadata": {"workflow": "legacy"}
-        })
+            "error": "Chat workflow not available",
+            "message": "Streaming requires the LangGraph workflow"
+        }), 503
+
+    try:
+        workflow = select_workflow(data, workflow, message)
+    except ModelSelectionError as selection_error:
+        return model_selection_response(selection_error)
+
+    logger.info(f"Processing streaming chat with LangGraph: {message[:50]}...")
+
+    # 대기열 포화 여부는 스트림 시작 전에 판단해 429로 응답
+    try:
+        events = scheduler_for(workflow).stream(lambda: workflow.stream(message, context, retrieved_docs, deadline))
+    except QueueFullError as queue_error:
+        return queue_full_response(queue_error)
+
+    def generate():
+        try:
+            for event in events:
+                yield format_stream_event(event["event"], event["data"], stream_format)
+        except Exception as stream_error:
+            logger.error(f"Streaming workflow failed: {stream_error}", exc_info=True)
+            yield format_stream_event("error", {
+                "error": "Chat processing failed",
+                "message": str(stream_error),
+                "reply": "죄송합니다. 응답 생성 중 오류가 발생했습니다."
+            }, stream_format)
+
+    mimetype = "application/x-ndjson" if stream_format == "ndjson" else "text/event-stream"
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route("/api/chat/batch", methods=["POST"])
+def chat_batch():
+    """여러 질문을 한 번에 처리하고 완료되는 순서대로 NDJSON으로 전송
+
+    요청: {"messages": ["질문", {"id": "q-2", "message": "질문"}, ...]}
+    질문 임베딩은 encode 한 번, 벡터 검색은 UNWIND 쿼리 한 번으로 미리 처리하고,
+    생성 작업은 스케줄러에 연달아 넣어 모델이 쉬지 않게 합니다.
+    result 이벤트(index, id, message + /api/chat 응답 본문) → done 이벤트(집계) 순서로 전송합니다.
+    """
+    data = request.json or {}
+    items = []
+    for index, entry in enumerate(data.get("messages") or []):
+        if isinstance(entry, dict):
+            items.append({"id": entry.get("id", index), "message": entry.get("message", "")})
+        else:
+            items.append({"id": index, "message": entry})
+
+    if not items:
+        return jsonify({"error": "messages is required"}), 400
+    if any(not isinstance(item["message"], str) or not item["message"] for item in items):
+        return jsonify({"error": "Every message must be a non-empty string"}), 400
+    if len(items) > CHAT_BATCH_MAX_MESSAGES:
+        return jsonify({
+            "error": "Too many messages",
+            "message": f"At most {CHAT_BATCH_MAX_MESSAGES} messages per batch"
+        }), 413
+
+    try:
+        _, rag, workflow = load_model()
+    except Exception as load_error:
+        logger.error(f"Failed to load model for batch request: {load_error}", exc_info=True)
+        return jsonify({
+            "error": "Model not available",
+            "message": f"Failed to load model: {str(load_error)}"
+        }), 503
+
+    if workflow is None:
+        return jsonify({
+            "error": "Chat workflow not available",
+            "message": "Batch chat requires the LangGraph workflow"
+        }), 503
+
+    # 배치 전체에 model 필드 하나만 적용 (질문별 의도 라우팅은 하지 않음)
+    try:
+        workflow = select_workflow(data, workflow)
+    except ModelSelectionError as selection_error:
+        return model_selection_response(selection_error)
+
+    logger.info(f"Processing batch chat with LangGraph: {len(items)} messages")
+
+    def generate():
+        started = time.perf_counter()
+        messages = [item["message"] for item in items]
+
+        # 질문 임베딩과 첫 벡터 검색을 한 번에 처리 (실패하면 질문별로 각자 검색)
+        prefetched = [{} for _ in items]
+        if rag is not None and hasattr(rag, "search_batch"):
+            try:
+                embeddings = rag.embed_queries(messages)
+                for prefetch, embedding in zip(prefetched, embeddings):
+                    prefetch["embedding"] = embedding
+                results = rag.search_batch(messages, top_k=5, embeddings=embeddings)
+                for prefetch, search_results in zip(prefetched, results):
+                    prefetch["results"] = search_results
+            except Exception as prefetch_error:
+                logger.warning(f"Batch prefetch failed, searching per message: {prefetch_error}")
+
+        calls = [
+            lambda message=message, prefetch=prefetch: workflow.run(message, [], [], prefetched=prefetch)
+            for message, prefetch in zip(messages, prefetched)
+        ]
+
+        succeeded = 0
+        for index, future in scheduler_for(workflow).run_batch(calls):
+            item = items[index]
+            try:
+                body = chat_response_body(future.result())
+                succeeded += 1
+                yield format_stream_event("result", {"index": index, "id": item["id"],
+                                                     "message": item["message"], **body}, "ndjson")
+            except Exception as batch_error:
+                logger.error(f"Batch item {index} failed: {batch_error}", exc_info=True)
+                yield format_stream_event("error", {
+                    "index": index,
+                    "id": item["id"],
+                    "message": item["message"],
+                    "error": "Chat processing failed",
+                    "detail": str(batch_error),
+                    "reply": "죄송합니다. 응답 생성 중 오류가 발생했습니다."
+                }, "ndjson")
+
+        yield format_stream_event("done", {
+            "total": len(items),
+            "succeeded": succeeded,
+            "failed": len(items) - succeeded,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }, "ndjson")
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route("/api/sessions/<session_id>/chat", methods=["POST"])
+def session_chat(session_id):
+    """서버 측 세션 채팅 (요청에는 새 메시지만 포함)
+
+    히스토리와 턴별 KV 스냅샷은 서버가 보관하므로 후속 턴은 새 사용자 메시지만 평가합니다.
+    처음 보는 세션이면 404를 반환하며, 클라이언트는 context(기존 히스토리)를 함께 보내 세션을 시작합니다.
+    """
+    data = request.json or {}
+    message = data.get("message", "")
+    retrieved_docs = normalize_retrieved_docs(data.get("retrieved_docs", []))
+
+    if not message:
+        return jsonify({"error": "Message is required"}), 400
+
+    try:
+        deadline = Deadline.from_request(request.headers, data)
+    except ValueError as deadline_error:
+        return jsonify({"error": "Invalid deadline", "message": str(deadline_error)}), 400
+
+    try:
+        session, created = open_session(session_id, data)
+    except ValueError as context_error:
+        return jsonify({"error": "Invalid context", "message": str(context_error)}), 400
+    if session is None:
+        return jsonify(session_not_found_body(session_id)), 404
+
+    try:
+        _, _, workflow = load_model()
+    except Exception as load_error:
+        logger.error(f"Failed to load model for session chat: {load_error}", exc_info=True)
+        return jsonify({
+            "error": "Model not available",
+            "message": f"Failed to load model: {str(load_error)}",
+            "reply": "죄송합니다. 현재 AI 모델을 로드할 수 없습니다. 잠시 후 다시 시도해주세요."
+        }), 503
+
+    if workflow is None:
+        return jsonify({
+            "error": "Chat workflow not available",
+            "message": "Sessions require the LangGraph workflow"
+        }), 503
 
+    try:
+        workflow = select_workflow(data, workflow, message)
+    except ModelSelectionError as selection_error:
+        return model_selection_response(selection_error)
+
+    logger.info(f"Processing session chat {session_id} (turn {session.turns + 1}): {message[:50]}...")
+    try:
+        result = scheduler_for(workflow).submit(workflow.run, message, None, retrieved_docs, session=session,
+                                                deadline=deadline).result()
+    except QueueFullError as queue_error:
+        return queue_full_response(queue_error)
+    except QueueTimeoutError as timeout_error:
+        logger.error(f"Session chat request expired in queue: {timeout_error}")
+        return jsonify({
+            "error": "Request timed out in queue",
+            "message": str(timeout_error),
+            "reply": "죄송합니다. 요청 대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요."
+        }), 503
+    except Exception as workflow_error:
+        logger.error(f"Session chat failed: {workflow_error}", exc_info=True)
+        return jsonify({
+            "error": "Chat processing failed",
+            "message": str(workflow_error),
+            "reply": "죄송합니다. 응답 생성 중 오류가 발생했습니다."
+        }), 500
+
+    body = chat_response_body(result)
+    body["session"] = {**session.to_dict(), "created": created}
+    return jsonify(body)
+
+
+def open_session(session_id: str, data: dict):
+    """세션 조회, 없으면 요청의 context로 시작
+
+    Returns:
+        (세션, 새로 만들었는지) — 세션이 없고 context도 없으면 (None, False)
+
+    Raises:
+        ValueError: context가 {"role", "content"} 메시지 목록이 아닌 경우
+    """
+    store = get_session_store()
+    session = store.get(session_id)
+    if session is not None:
+        return session, False
+    if "context" not in data:
+        return None, False
+
+    context = validate_session_context(data.get("context"))
+    # 클라이언트가 현재 메시지까지 context에 넣어 보내는 경우 제외
+    message = data.get("message", "")
+    if context and context[-1].get("role") == "user" and context[-1].get("content") == message:
+        context = context[:-1]
+    return store.create(session_id, history=context), True
+
+
+def validate_session_context(context) -> list:
+    """세션 시작용 context 검증 ({"role": str, "content": str} 목록, null은 빈 목록)"""
+    if context is None:
+        return []
+    if not isinstance(context, list):
+        raise ValueError("context must be a list of {role, content} messages")
+    for i, item in enumerate(context):
+        if not (isinstance(item, dict) and isinstance(item.get("role"), str)
+                and isinstance(item.get("content"), str)):
+            raise ValueError(f"context[{i}] must be an object with string role and content")
+    return list(context)
+
+
+def session_not_found_body(session_id: str) -> dict:
+    return {
+        "error": "Session not found",
+        "message": f"Unknown session: {session_id}. Resend with context to start it."
+    }
+
+
+@app.route("/api/sessions/<session_id>", methods=["GET"])
+def get_session(session_id):
+    """세션 히스토리 조회"""
+    session = get_session_store().get(session_id)
+    if session is None:
+        return jsonify({"error": "Session not found"}), 404
+    return jsonify(session.to_dict(include_history=True))
+
+
+@app.route("/api/sessions/<session_id>", methods=["DELETE"])
+def delete_session(session_id):
+    """세션과 KV 스냅샷 삭제"""
+    if not get_session_store().delete(session_id):
+        return jsonify({"error": "Session not found"}), 404
+    return jsonify({"status": "deleted", "session_id": session_id})
+
+
+@app.route("/api/sessions/stats", methods=["GET"])
+def session_stats():
+    """세션 수, KV 스냅샷 RAM/디스크 사용량과 적중률"""
+    return jsonify(get_session_store().stats())
+
+
+def format_stream_event(event: str, data: dict, stream_format: str = "sse") -> str:
+    """스트림 이벤트 직렬화 (SSE 또는 NDJSON)"""
+    if stream_format == "ndjson":
+        return json.dumps({"event": event, **data}, ensure_ascii=False) + "\n"
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def chat_legacy(message: str, context: list, model: Llama, rag: RAGServiceNeo4j, retrieved_docs: list = None,
+                scheduler: InferenceScheduler = None, deadline: Deadline = None):
+    """레거시 채팅 처리 (LangGraph 없을 때)"""
+    try:
+        if scheduler is not None:
+            reply = scheduler.submit(generate_legacy_reply, message, context, model, rag, retrieved_docs,
+                                     deadline=deadline).result()
+        else:
+            reply = generate_legacy_reply(message, context, model, rag, retrieved_docs, deadline=deadline)
+
+        return jsonify(legacy_response_body(reply, deadline))
+
+    except QueueFullError:
+        raise
     except Exception as e:
         logger.error(f"Legacy chat error: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
-def build_prompt(message: str, context: list, retrieved_docs: list = None) -> str:
-    """대화 컨텍스트를 프롬프트로 변환 (Gemma 3 포맷, RAG 지원)"""
-    prompt_parts = []
 
+def generate_legacy_reply(message: str, context: list, model: Llama, rag: RAGServiceNeo4j,
+                          retrieved_docs: list = None, deadline: Deadline = None) -> str:
+    """레거시 모드 응답 생성 (RAG 검색 + 추론 + 후처리)"""
+    deadline = deadline or Deadline()
+    # RAG 검색
+    if not retrieved_docs:
+        retrieved_docs = []
+    if not retrieved_docs and rag and not deadline.expired():
+        retrieved_docs_objs = rag.search(message, top_k=3, timeout=deadline.remaining())
+        retrieved_docs = [doc['content'] for doc in retrieved_docs_objs]
+        logger.info(f"RAG search found {len(retrieved_docs)} documents")
+
+    # 프롬프트 구성
+    prompt = build_prompt(message, context, retrieved_docs)
+
+    # 모델 추론 (시스템 프롬프트 접두부 KV 재사용)
+    response, prompt_cache_stats = complete_with_prefix_cache(
+        model,
+        prompt,
+        build_system_prefix(),
+        max_tokens=MAX_TOKENS,
+        temperature=TEMPERATURE,
+        top_p=TOP_P,
+        stop=["<end_of_turn>", "<start_of_turn>", "</s>", "<|im_end|>"],
+        echo=False,
+        repeat_penalty=1.1,
+        stopping_criteria=deadline.stopping_criteria()
+    )
+
+    metrics.observe_generation(prompt_cache_stats)
+    if prompt_cache_stats.get("deadline_stopped"):
+        deadline.mark_truncated()
+    reply = response["choices"][0]["text"].strip()
+
+    # 후처리 (워크플로우와 같은 정리 엔진, 레거시 경로는 질문 줄도 제거)
+    return clean_response(reply, drop_question_lines=True)
+
+def build_system_prefix() -> str:
+    """시스템 프롬프트 접두부 (Gemma 3 포맷, 요청마다 동일하므로 KV 상태를 재사용)"""
     tools_json_schema = "없음"
     system_prompt = f"""당신은 프로젝트 관리 시스템(PMS) 전용 한국어 AI 에이전트입니다.
 모든 답변은 한국어로만 작성하세요. 영문/외국어를 사용하지 마세요.
@@ -314,9 +1101,12 @@ RAG 문서와 제공된 컨텍스트를 최우선으로 사용하고, 근거가
 4. 모르는 내용은 솔직하게 "모르겠습니다"라고 말하세요"""
 
     # Gemma 3 포맷: <start_of_turn>system
-    prompt_parts.append("<start_of_turn>system")
-    prompt_parts.append(system_prompt)
-    prompt_parts.append("<end_of_turn>")
+    return "\n".join(["<start_of_turn>system", system_prompt, "<end_of_turn>"])
+
+
+def build_prompt(message: str, context: list, retrieved_docs: list = None) -> str:
+    """대화 컨텍스트를 프롬프트로 변환 (Gemma 3 포맷, RAG 지원)"""
+    prompt_parts = [build_system_prefix()]
 
     # 컨텍스트 메시지 추가 (최근 5개)
     for msg in context[-5:]:
@@ -372,7 +1162,11 @@ def normalize_retrieved_docs(retrieved_docs: object) -> list:
 
 @app.route("/api/documents", methods=["POST"])
 def add_documents():
-    """문서 추가 API (RAG 인덱싱)"""
+    """문서 추가 API (RAG 인덱싱)
+
+    인덱싱 작업을 등록하고 job_id를 바로 반환합니다 (202). 진행 상태는 /api/documents/jobs/<job_id>.
+    ?wait=true이면 작업이 끝날 때까지 기다려 결과를 반환합니다 (200).
+    """
     try:
         data = request.json
         documents = data.get("documents", [])
@@ -384,18 +1178,98 @@ def add_documents():
         if not rag:
             return jsonify({"error": "RAG service not available"}), 503
 
-        success_count = rag.add_documents(documents)
-
-        return jsonify({
-            "message": f"Successfully added {success_count}/{len(documents)} documents",
-            "success_count": success_count,
-            "total": len(documents)
-        })
+        job = ingestion_jobs.submit(documents)
+        wait = wants_wait(request.args.get("wait"), data)
+        if wait:
+            job.wait()
+        return jsonify(ingestion_job_body(job, finished=wait)), 200 if wait else 202
 
     except Exception as e:
         logger.error(f"Error adding documents: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
+
+def wants_wait(query_value: str, data: dict) -> bool:
+    """?wait=true 또는 본문 wait: true — 인덱싱이 끝날 때까지 기다림 (Flask/ASGI 공용)"""
+    return (query_value or "").lower() == "true" or data.get("wait") is True
+
+
+def ingestion_job_body(job: IngestionJob, finished: bool = False) -> dict:
+    """인덱싱 작업 등록/완료 응답 본문 (Flask/ASGI 공용)"""
+    body = job.to_dict(include_documents=finished)
+    body["status_url"] = f"/api/documents/jobs/{job.job_id}"
+    if finished:
+        body["message"] = f"Successfully added {body['success_count']}/{body['total']} documents"
+    else:
+        body["message"] = f"Queued {body['total']} documents for indexing"
+    return body
+
+
+@app.route("/api/documents/upload", methods=["POST"])
+def upload_documents():
+    """스트리밍 문서 업로드 API (NDJSON 또는 PDF/DOCX/텍스트 원본)
+
+    본문을 UPLOAD_CHUNK_BYTES씩 읽어 문서마다 디스크에 스풀하고, 문서가 끝날 때마다 인덱싱 작업에 넣습니다.
+    응답은 /api/documents와 같은 작업 본문입니다 (202, ?wait=true이면 200).
+    """
+    try:
+        _, rag, _ = load_model()
+    except Exception as e:
+        logger.error(f"Failed to load RAG service for upload: {e}", exc_info=True)
+        rag = None
+    if not rag:
+        return jsonify({"error": "RAG service not available"}), 503
+
+    try:
+        upload = StreamingUpload(ingestion_jobs, request.content_type, request.args)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status_code
+
+    try:
+        for chunk in iter(lambda: request.stream.read(UPLOAD_CHUNK_BYTES), b""):
+            upload.feed(chunk)
+        upload.finish()
+    except UploadError as e:
+        upload.abort()
+        return jsonify(upload_response_body(upload, error=str(e))), e.status_code
+    except Exception as e:
+        upload.abort()
+        logger.error(f"Error receiving document upload: {e}", exc_info=True)
+        return jsonify(upload_response_body(upload, error=str(e))), 500
+
+    wait = wants_wait(request.args.get("wait"), {})
+    if wait:
+        upload.job.wait()
+    return jsonify(upload_response_body(upload, finished=wait)), 200 if wait else 202
+
+
+def upload_response_body(upload: StreamingUpload, finished: bool = False, error: Optional[str] = None) -> dict:
+    """스트리밍 업로드 응답 본문 (Flask/ASGI 공용, 중단된 업로드도 이미 넣은 문서의 작업 정보를 포함)"""
+    body = ingestion_job_body(upload.job, finished=finished)
+    body["bytes_received"] = upload.bytes_received
+    if error is not None:
+        body["error"] = error
+    return body
+
+
+@app.route("/api/documents/jobs", methods=["GET"])
+def list_ingestion_jobs():
+    """인덱싱 작업 목록(문서별 상세 제외)과 워커 통계"""
+    return jsonify({
+        "jobs": [job.to_dict(include_documents=False) for job in ingestion_jobs.list_jobs()],
+        "stats": ingestion_jobs.stats(),
+    })
+
+
+@app.route("/api/documents/jobs/<job_id>", methods=["GET"])
+def get_ingestion_job(job_id):
+    """인덱싱 작업 진행 상태 (문서별 단계, 청크 수, 처리량)"""
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Ingestion job {job_id} not found"}), 404
+    return jsonify(job.to_dict())
+
+
 @app.route("/api/documents/<doc_id>", methods=["DELETE"])
 def delete_document(doc_id):
     """문서 삭제 API"""
@@ -432,19 +1306,36 @@ def get_stats():
 
 @app.route("/api/documents/search", methods=["POST"])
 def search_documents():
-    """문서 검색 API"""
+    """문서 검색 API
+
+    {"query": "..."} 대신 {"queries": [...]}를 보내면 encode 한 번과 UNWIND 벡터 쿼리로 한꺼번에 검색하고
+    질의별로 묶은 결과를 반환합니다.
+    """
     try:
-        data = request.json
+        data = request.json or {}
         query = data.get("query", "")
         top_k = data.get("top_k", 3)
 
-        if not query:
+        if "queries" in data:
+            error = validate_search_queries(data["queries"])
+            if error is not None:
+                return jsonify({"error": error[0]}), error[1]
+        elif not query:
             return jsonify({"error": "Query is required"}), 400
 
         _, rag, _ = load_model()
         if not rag:
             return jsonify({"error": "RAG service not available"}), 503
 
+        if "queries" in data:
+            started = time.perf_counter()
+            try:
+                results = rag.search_batch(data["queries"], top_k=top_k)
+            except Exception as batch_error:
+                logger.warning(f"Batch search failed, searching per query: {batch_error}")
+                results = [rag.search(q, top_k=top_k) for q in data["queries"]]
+            return jsonify(batch_search_body(data["queries"], results, time.perf_counter() - started))
+
         results = rag.search(query, top_k=top_k)
 
         return jsonify({
@@ -457,14 +1348,46 @@ def search_documents():
         logger.error(f"Error searching documents: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
+
+def validate_search_queries(queries) -> Optional[tuple]:
+    """queries 배열 검사 (Flask/ASGI 공용). 문제가 있으면 (오류 메시지, 상태 코드)"""
+    if not isinstance(queries, list) or not queries:
+        return "queries must be a non-empty list", 400
+    if any(not isinstance(q, str) or not q for q in queries):
+        return "Every query must be a non-empty string", 400
+    if len(queries) > SEARCH_BATCH_MAX_QUERIES:
+        return f"At most {SEARCH_BATCH_MAX_QUERIES} queries per request", 413
+    return None
+
+
+def batch_search_body(queries: list, results: list, elapsed: float) -> dict:
+    """다중 질의 검색 응답 본문: 질의 순서대로 {query, results, count}"""
+    return {
+        "results": [
+            {"query": q, "results": query_results, "count": len(query_results)}
+            for q, query_results in zip(queries, results)
+        ],
+        "count": len(queries),
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "per_query_ms": round(elapsed * 1000 / len(queries), 2),
+    }
+
+
 @app.route("/api/model/current", methods=["GET"])
 def get_current_model():
-    """현재 사용 중인 모델 정보 조회"""
-    global current_model_path
+    """현재 사용 중인 모델 정보 조회 (교체 중이면 status=switching)"""
     try:
+        swap = model_swaps.active()
+        if swap is not None and swap.status != "draining":
+            status = "switching"
+        else:
+            status = "active" if llm is not None else "not_loaded"
         return jsonify({
             "currentModel": current_model_path,
-            "status": "active" if llm is not None else "not_loaded",
+            "status": status,
+            "pendingModel": swap.model_path if swap is not None else None,
+            "swapJob": swap.to_dict() if swap is not None else None,
+            "speculative": speculative.speculative_config(current_model_path),
             "timestamp": os.path.getmtime(current_model_path) if os.path.exists(current_model_path) else None
         })
     except Exception as e:
@@ -473,230 +1396,287 @@ def get_current_model():
 
 @app.route("/api/model/change", methods=["PUT"])
 def change_model():
-    """모델 변경 API"""
-    global llm, chat_workflow, current_model_path, rag_service
+    """모델 변경 API (백그라운드 작업으로 실행하고 즉시 202 반환)
 
-    try:
-        # 요청 데이터 로깅
-        logger.info(f"Received model change request: {request.json}")
-        
-        data = request.json
-        if not data:
-            logger.error("Request body is empty or invalid")
-            return jsonify({
-                "status": "error",
-                "error": "Invalid request body",
-                "message": "요청 데이터가 없거나 잘못되었습니다."
-            }), 400
-        
-        new_model_path = data.get("modelPath", "")
-        logger.info(f"Requested model path: {new_model_path}")
-
-        if not new_model_path:
-            logger.error("modelPath is missing in request")
-            return jsonify({
-                "status": "error",
-                "error": "modelPath is required",
-                "message": "모델 경로가 필요합니다."
-            }), 400
-
-        # 모델 파일 존재 확인
-        logger.info(f"Checking if model file exists: {new_model_path}")
-        if not os.path.exists(new_model_path):
-            logger.error(f"Model file not found: {new_model_path}")
-            # 현재 디렉토리와 파일 목록 로깅
-            model_dir = os.path.dirname(new_model_path) if os.path.dirname(new_model_path) else "./models"
-            logger.info(f"Model directory: {model_dir}, exists: {os.path.exists(model_dir)}")
-            if os.path.exists(model_dir):
-                try:
-                    files = os.listdir(model_dir)
-                    logger.info(f"Files in model directory: {files[:10]}")  # 처음 10개만
-                except Exception as e:
-                    logger.error(f"Failed to list directory: {e}")
-            
-            return jsonify({
-                "status": "error",
-                "error": f"Model file not found: {new_model_path}",
-                "message": f"모델 파일을 찾을 수 없습니다: {new_model_path}",
-                "error_type": "FILE_NOT_FOUND"
-            }), 404
-
-        logger.info(f"Changing model from {current_model_path} to {new_model_path}")
-
-        # 기존 모델 및 워크플로우 백업 (복구용)
-        old_llm = llm
-        old_workflow = chat_workflow
-        old_model_path = current_model_path
-        
-        # 새 모델을 먼저 로드 시도 (기존 모델은 유지)
-        new_llm = None
-        try:
-            logger.info(f"Loading new model: {new_model_path}")
-            logger.info(f"Model file exists: {os.path.exists(new_model_path)}")
-            if os.path.exists(new_model_path):
-                file_size = os.path.getsize(new_model_path)
-                logger.info(f"Model file size: {file_size / (1024*1024*1024):.2f} GB")
-            
-            # 새 모델 직접 로드 (전역 변수 변경 없이)
-            try:
-                new_llm = Llama(
-                    model_path=new_model_path,
-                    n_ctx=4096,
-                    n_threads=6,
-                    verbose=True,
-                    n_gpu_layers=0
-                )
-                logger.info(f"New model loaded successfully: {new_model_path}")
-            except Exception as llama_error:
-                logger.error(f"Llama model initialization failed: {llama_error}", exc_info=True)
-                raise RuntimeError(f"모델 초기화 실패: {str(llama_error)}") from llama_error
-            
-            # 새 모델 로드 성공 후에만 기존 모델 해제 및 전역 변수 업데이트
-            if old_llm is not None:
-                try:
-                    logger.info("Unloading previous model...")
-                    del old_llm
-                except Exception as del_error:
-                    logger.warning(f"Error deleting old model: {del_error}")
-            
-            # 전역 변수 업데이트
-            llm = new_llm
-            current_model_path = new_model_path
-            chat_workflow = None  # 워크플로우 재초기화 필요
-            
-            # RAG 서비스 확인
-            if rag_service is None:
-                try:
-                    logger.info("Loading RAG service with Qdrant...")
-                    rag_service = RAGServiceQdrant()
-                    logger.info("RAG service with Qdrant loaded successfully")
-                except Exception as e:
-                    logger.error(f"Failed to load RAG service: {e}", exc_info=True)
-                    rag_service = None
-            
-            # 워크플로우 재초기화
+    새 모델을 LLM_N_CTX/LLM_N_THREADS/LLM_N_GPU_LAYERS 설정으로 로드하고 워크플로우를 만든 뒤 한 번에 전환합니다.
+    그동안 기존 모델이 계속 응답하며, 이전 모델은 남은 요청을 모두 처리한 뒤 해제됩니다.
+    진행 상황은 GET /api/model/change/<jobId>로 확인합니다.
+    """
+    logger.info(f"Received model change request: {request.json}")
+
+    data = request.json
+    if not data:
+        logger.error("Request body is empty or invalid")
+        return jsonify({
+            "status": "error",
+            "error": "Invalid request body",
+            "message": "요청 데이터가 없거나 잘못되었습니다."
+        }), 400
+
+    new_model_path = data.get("modelPath", "")
+    if not new_model_path:
+        logger.error("modelPath is missing in request")
+        return jsonify({
+            "status": "error",
+            "error": "modelPath is required",
+            "message": "모델 경로가 필요합니다."
+        }), 400
+
+    # 모델 파일 존재 확인
+    if not os.path.exists(new_model_path):
+        logger.error(f"Model file not found: {new_model_path}")
+        model_dir = os.path.dirname(new_model_path) or "./models"
+        if os.path.exists(model_dir):
             try:
-                logger.info("Initializing LangGraph chat workflow with new model...")
-                chat_workflow = ChatWorkflow(llm, rag_service, model_path=current_model_path)
-                logger.info("Chat workflow initialized successfully")
-                workflow_initialized = True
+                logger.info(f"Files in model directory {model_dir}: {os.listdir(model_dir)[:10]}")
             except Exception as e:
-                logger.error(f"Failed to initialize chat workflow: {e}", exc_info=True)
-                chat_workflow = None
-                workflow_initialized = False
-            
-            logger.info(f"Model successfully changed to {new_model_path}")
-            
-            return jsonify({
-                "status": "success",
-                "currentModel": current_model_path,
-                "message": f"Model successfully changed to {new_model_path}",
-                "workflow_initialized": workflow_initialized
-            })
-            
-        except Exception as load_error:
-            # 모델 로드 실패 시 새 모델 정리
-            if new_llm is not None:
-                try:
-                    del new_llm
-                except Exception:
-                    pass
-            
-            # 이전 모델이 있었다면 복구
-            if old_llm is not None:
-                logger.info("Restoring previous model...")
-                llm = old_llm
-                chat_workflow = old_workflow
-                current_model_path = old_model_path
-                logger.info("Previous model restored successfully")
-            else:
-                # 이전 모델이 없었으면 None으로 설정
-                llm = None
-                chat_workflow = None
-            
-            logger.error(f"Failed to load new model: {load_error}", exc_info=True)
-            raise load_error
-
-    except FileNotFoundError as e:
-        logger.error(f"Model file not found: {e}", exc_info=True)
+                logger.error(f"Failed to list directory: {e}")
         return jsonify({
             "status": "error",
-            "error": str(e),
-            "message": f"모델 파일을 찾을 수 없습니다: {str(e)}",
+            "error": f"Model file not found: {new_model_path}",
+            "message": f"모델 파일을 찾을 수 없습니다: {new_model_path}",
             "error_type": "FILE_NOT_FOUND"
         }), 404
-    except RuntimeError as e:
-        logger.error(f"Model load error: {e}", exc_info=True)
+
+    if startup.in_progress:
+        # 시작 단계 로드가 끝난 뒤 전역 모델을 덮어쓰지 않도록 교체를 받지 않음
+        response = jsonify({
+            "status": "error",
+            "error": "Service is starting",
+            "message": "서비스 시작 중입니다. 잠시 후 다시 시도하세요.",
+            "error_type": "STARTING",
+            "startup": startup.readiness()
+        })
+        response.status_code = 503
+        response.headers["Retry-After"] = "10"
+        return response
+
+    if new_model_path == current_model_path and llm is not None and model_swaps.active() is None:
+        return jsonify({
+            "status": "success",
+            "currentModel": current_model_path,
+            "message": f"Model {new_model_path} is already active",
+            "workflow_initialized": chat_workflow is not None
+        })
+
+    try:
+        estimate = check_model_memory(new_model_path)
+    except InsufficientMemoryError as e:
+        logger.error(f"Rejecting model change to {new_model_path}: {e}")
         return jsonify({
             "status": "error",
             "error": str(e),
-            "message": f"모델 로드 실패: {str(e)}",
-            "error_type": "LOAD_ERROR"
-        }), 500
-    except Exception as e:
-        logger.error(f"Error changing model: {e}", exc_info=True)
-        import traceback
-        error_trace = traceback.format_exc()
-        logger.error(f"Full traceback: {error_trace}")
+            "message": f"메모리가 부족하여 모델을 로드할 수 없습니다: {e}",
+            "error_type": "INSUFFICIENT_MEMORY",
+            "estimate": e.estimate.to_dict(),
+            "available_mb": round(e.available_bytes / (1024 * 1024), 1)
+        }), 507
+    except GGUFFormatError as e:
+        logger.error(f"Rejecting model change to {new_model_path}: {e}")
         return jsonify({
             "status": "error",
             "error": str(e),
-            "message": f"모델 변경 중 오류 발생: {str(e)}",
-            "error_type": "UNKNOWN_ERROR",
-            "traceback": error_trace if logger.level <= logging.DEBUG else None
-        }), 500
+            "message": f"GGUF 모델 파일이 아닙니다: {new_model_path}",
+            "error_type": "INVALID_MODEL"
+        }), 400
+    logger.info(f"Estimated memory for {new_model_path}: {estimate.to_dict()}")
+
+    try:
+        job = model_swaps.start(new_model_path)
+    except SwapInProgressError as e:
+        logger.warning(f"Rejecting model change: {e}")
+        return jsonify({
+            "status": "error",
+            "error": str(e),
+            "message": f"다른 모델로 교체 중입니다: {e.job.model_path}",
+            "error_type": "SWAP_IN_PROGRESS",
+            "job": e.job.to_dict()
+        }), 409
+
+    logger.info(f"Model change {job.job_id} queued: {current_model_path} -> {new_model_path}")
+    return jsonify({
+        "status": "accepted",
+        "jobId": job.job_id,
+        "currentModel": current_model_path,
+        "targetModel": new_model_path,
+        "statusUrl": f"/api/model/change/{job.job_id}",
+        "message": f"Model change to {new_model_path} started"
+    }), 202
+
+
+@app.route("/api/model/change", methods=["GET"])
+def latest_model_change():
+    """가장 최근 모델 교체 작업 상태"""
+    job = model_swaps.latest()
+    if job is None:
+        return jsonify({"error": "No model change has been requested"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/api/model/change/<job_id>", methods=["GET"])
+def model_change_status(job_id):
+    """모델 교체 작업 상태 (pending → loading → draining → completed | failed)"""
+    job = model_swaps.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Model change job {job_id} not found"}), 404
+    return jsonify(job.to_dict())
 
 @app.route("/api/model/available", methods=["GET"])
 def get_available_models():
-    """사용 가능한 모델 목록 조회"""
+    """사용 가능한 모델 목록 조회 (GGUF 헤더 메타데이터와 메모리 추정치 포함)
+
+    Query:
+        n_ctx: 메모리 추정에 사용할 컨텍스트 길이 (기본값: LLM_N_CTX)
+    """
     try:
         models_dir = "./models"
         if not os.path.exists(models_dir):
             return jsonify({"models": []})
 
+        registry = get_model_registry()
+        n_ctx = request.args.get("n_ctx", type=int)
+        available_bytes = available_memory_bytes()
+
         models = []
-        for file in os.listdir(models_dir):
-            if file.endswith(".gguf"):
-                file_path = os.path.join(models_dir, file)
-                file_size = os.path.getsize(file_path)
-                models.append({
-                    "name": file,
-                    "path": file_path,
-                    "size": file_size,
-                    "size_mb": round(file_size / (1024 * 1024), 2),
-                    "is_current": file_path == current_model_path
-                })
-
-        return jsonify({"models": models})
+        for file_path in registry.list_models(models_dir):
+            file_size = os.path.getsize(file_path)
+            model = {
+                "name": os.path.basename(file_path),
+                "path": file_path,
+                "size": file_size,
+                "size_mb": round(file_size / (1024 * 1024), 2),
+                "is_current": file_path == current_model_path
+            }
+            try:
+                info = registry.get(file_path)
+                params = llm_memory_params(file_path)
+                if n_ctx:
+                    params["n_ctx"] = n_ctx
+                estimate = info.estimate_memory(**params)
+                model["metadata"] = info.to_dict()
+                model["memory_estimate"] = estimate.to_dict()
+                model["fits_in_memory"] = (available_bytes is None or
+                                           estimate.total_bytes + MODEL_MEMORY_HEADROOM_MB * 1024 * 1024
+                                           <= available_bytes)
+            except (OSError, ValueError) as e:
+                # GGUFFormatError 또는 잘못된 투기적 디코딩 설정
+                logger.warning(f"Failed to read GGUF header of {file_path}: {e}")
+                model["metadata"] = None
+                model["metadata_error"] = str(e)
+            models.append(model)
+
+        return jsonify({
+            "models": models,
+            "available_memory_mb": round(available_bytes / (1024 * 1024), 1) if available_bytes is not None else None
+        })
 
     except Exception as e:
         logger.error(f"Error listing models: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
-# 서비스 시작 시 모델 자동 로드 (앱 컨텍스트에서)
+# 서비스 시작 시 컴포넌트 병렬 로드 (HTTP 포트는 먼저 열림)
+def load_startup_llm(model_path: str):
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+    logger.info(f"Loading model from {model_path}")
+    return create_llm(model_path)
+
+
 def init_llm_service():
-    """Initialize LLM service on startup"""
+    """Initialize LLM service on startup
+
+    LLM, 임베딩 모델, MinerU 파서, Neo4j 초기화(제약조건/인덱스)를 동시에 로드하고,
+    모델과 RAG 서비스가 준비되면 워크플로우를 만든 뒤 워밍업합니다.
+    컴포넌트별 상태와 소요 시간은 /health/ready에서 확인합니다.
+    """
+    global llm, rag_service, chat_workflow
+
+    logger.info("=" * 60)
+    logger.info("Initializing LLM service on startup (parallel)...")
+    logger.info(f"Model path: {DEFAULT_MODEL_PATH}")
+    logger.info("=" * 60)
+
+    startup.begin()
+    startup.register("llm")
+    startup.register("embedding_model")
+    startup.register("document_parser", required=False)
+    startup.register("neo4j", required=False)
+    startup.register("chat_workflow")
+    if STARTUP_WARMUP:
+        startup.register("warmup_llm", required=False)
+        startup.register("warmup_embedding", required=False)
+
     try:
-        logger.info("=" * 60)
-        logger.info("Initializing LLM service on startup...")
-        logger.info(f"Model path: {DEFAULT_MODEL_PATH}")
-        logger.info("=" * 60)
-        load_model()
-        logger.info("=" * 60)
-        logger.info("LLM service initialized successfully!")
-        logger.info(f"  - Model loaded: {llm is not None}")
-        logger.info(f"  - RAG service loaded: {rag_service is not None}")
-        logger.info(f"  - Chat workflow loaded: {chat_workflow is not None}")
-        logger.info("=" * 60)
-    except Exception as e:
-        logger.error("=" * 60)
-        logger.error(f"Failed to initialize LLM service on startup: {e}", exc_info=True)
-        logger.warning("Service will start anyway - model will be loaded on first request")
-        logger.error("=" * 60)
+        with ThreadPoolExecutor(max_workers=4, thread_name_prefix="startup") as executor:
+            llm_future = executor.submit(startup.run, "llm", load_startup_llm, DEFAULT_MODEL_PATH)
+            try:
+                # 드라이버 생성은 연결을 열지 않으므로 즉시 반환
+                rag = RAGServiceNeo4j(defer_init=True)
+            except Exception as e:
+                logger.error(f"Failed to create RAG service: {e}", exc_info=True)
+                rag = None
+                for name in ("embedding_model", "document_parser", "neo4j"):
+                    startup.fail(name, f"RAG service unavailable: {e}")
+
+            if rag is not None:
+                embedding_future = executor.submit(startup.run, "embedding_model", rag.load_embedding_model)
+                parser_future = executor.submit(startup.run, "document_parser", rag.load_parser)
+                executor.submit(startup.run, "neo4j", rag.initialize_database)
+
+                try:
+                    embedding_future.result()
+                    if STARTUP_WARMUP:
+                        executor.submit(startup.run, "warmup_embedding", rag.warmup)
+                    parser_future.exception()
+                    with model_lock:
+                        rag_service = rag
+                except Exception:
+                    # 실패 내용은 startup에 기록됨 (RAG 없이 워크플로우 생성)
+                    pass
+            elif STARTUP_WARMUP:
+                startup.fail("warmup_embedding", "embedding model not loaded")
+
+            try:
+                new_llm = llm_future.result()
+            except Exception as e:
+                startup.fail("chat_workflow", f"model not loaded: {e}")
+                if STARTUP_WARMUP:
+                    startup.fail("warmup_llm", "model not loaded")
+                startup.mark_core_done()
+                logger.warning("Service will start anyway - model will be loaded on first request")
+            else:
+                try:
+                    workflow = startup.run("chat_workflow", ChatWorkflow, new_llm, rag_service,
+                                           model_path=DEFAULT_MODEL_PATH)
+                except Exception:
+                    # 워크플로우 실패는 치명적이지 않음 (레거시 모드 사용 가능)
+                    workflow = None
+                with model_lock:
+                    llm, chat_workflow = new_llm, workflow
+                    model_manager.set_active(current_model_path, new_llm, workflow)
+                startup.mark_core_done()
+
+                if STARTUP_WARMUP:
+                    if workflow is not None:
+                        # 스케줄러를 거쳐 실제 요청과 겹치지 않게 실행
+                        executor.submit(startup.run, "warmup_llm",
+                                        lambda: scheduler_for(workflow).submit(
+                                            workflow.warmup, priority=PRIORITY_HIGH).result())
+                    else:
+                        startup.fail("warmup_llm", "chat workflow not initialized")
+    finally:
+        startup.finish()
+
+    readiness = startup.readiness()
+    logger.info("=" * 60)
+    logger.info(f"LLM service startup finished in {readiness['startup_ms']:.0f} ms (ready: {readiness['ready']})")
+    for name, component in readiness["components"].items():
+        logger.info(f"  - {name}: {component['status']} ({component['duration_ms']} ms)")
+    logger.info("=" * 60)
 
 if __name__ == "__main__":
-    # 앱 시작 전에 모델 로드
-    init_llm_service()
+    # 모델 로드는 백그라운드에서 진행하고 포트는 바로 연다 (진행 상황: /health/ready)
+    threading.Thread(target=init_llm_service, name="startup", daemon=True).start()
 
     port = int(os.getenv("PORT", "8000"))
     app.run(host="0.0.0.0", port=port, debug=False)
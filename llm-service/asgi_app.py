@@ -0,0 +1,559 @@
+"""
+로컬 LLM 서비스 ASGI 서빙 모드 (Starlette + uvicorn)
+Flask 개발 서버는 요청마다 스레드 하나를 점유하므로, 대기열에서 기다리거나 토큰을 천천히 받는
+스트리밍 연결이 많아지면 스레드가 먼저 고갈됩니다.
+이 모드는 같은 라우트를 이벤트 루프에서 처리합니다:
+- 채팅/스트리밍: 추론 스케줄러 작업을 await (대기 중인 연결은 스레드를 쓰지 않음),
+  기다리는 동안 클라이언트 연결이 끊기면 요청 데드라인을 취소해 생성을 멈춤
+- 문서 검색/삭제/통계: neo4j 비동기 드라이버, 임베딩/파싱만 executor
+- 그 밖의 라우트(모델 관리, 세션 조회, 통계)는 Flask 앱을 WSGI로 마운트해 그대로 제공
+
+모델, 스케줄러, 세션, 캐시 등 전역 상태는 app.py 모듈과 공유합니다.
+
+실행:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 8000
+    (또는 python asgi_app.py)
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+import app as service
+from deadline import Deadline
+from document_upload import StreamingUpload, UploadError
+from inference_scheduler import QueueFullError, QueueTimeoutError
+from model_manager import ModelSelectionError
+from rag_service_async import AsyncRAGServiceNeo4j
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# 임베딩, 문서 파싱, 모델 로드 등 블로킹 작업용 스레드 수 (추론은 스케줄러 워커에서 실행)
+ASGI_EXECUTOR_WORKERS = int(os.getenv("ASGI_EXECUTOR_WORKERS", "8"))
+# 채팅 응답을 기다리는 동안 클라이언트 연결 끊김을 확인하는 간격(초)
+ASGI_DISCONNECT_POLL_INTERVAL = float(os.getenv("ASGI_DISCONNECT_POLL_INTERVAL", "0.5"))
+# 시작 단계 로드가 끝났는지 확인하는 간격(초)
+STARTUP_POLL_INTERVAL = 0.2
+
+executor = ThreadPoolExecutor(max_workers=ASGI_EXECUTOR_WORKERS, thread_name_prefix="asgi-blocking")
+_async_rag: Optional[AsyncRAGServiceNeo4j] = None
+
+
+async def run_blocking(fn, *args):
+    """블로킹 함수를 executor에서 실행"""
+    return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+
+async def wait_for_startup():
+    """시작 단계 병렬 로드가 끝날 때까지 이벤트 루프에서 대기
+
+    app.load_model은 startup.core_done.wait()로 스레드를 막으므로, 시작 중에 들어온 요청이
+    executor 스레드를 모두 점유하지 않도록 여기서 먼저 기다립니다.
+    """
+    while service.startup.in_progress:
+        await asyncio.sleep(STARTUP_POLL_INTERVAL)
+
+
+async def load_model():
+    """app.load_model을 executor에서 실행 (최초 로드는 수 분 걸릴 수 있음)"""
+    await wait_for_startup()
+    return await run_blocking(service.load_model)
+
+
+async def select_workflow(data: dict, workflow, message: str = None):
+    """app.select_workflow를 executor에서 실행 (상주하지 않은 모델이면 로드까지 수 분 걸릴 수 있음)"""
+    return await run_blocking(service.select_workflow, data, workflow, message)
+
+
+def model_selection_response(error: ModelSelectionError) -> JSONResponse:
+    return JSONResponse(service.model_selection_body(error), status_code=error.status_code)
+
+
+async def watch_disconnect(request: Request, deadline: Deadline):
+    """클라이언트 연결이 끊기면 데드라인을 취소 (진행 중인 생성은 stopping_criteria로 다음 토큰에서 멈춤)"""
+    while not deadline.expired():
+        if await request.is_disconnected():
+            logger.info("Client disconnected, cancelling chat request")
+            deadline.cancel("client_disconnected")
+            return
+        await asyncio.sleep(ASGI_DISCONNECT_POLL_INTERVAL)
+
+
+async def await_job(request: Request, deadline: Deadline, future):
+    """스케줄러 작업을 기다리면서 클라이언트 연결 끊김 감시"""
+    watcher = asyncio.create_task(watch_disconnect(request, deadline))
+    try:
+        return await asyncio.wrap_future(future)
+    finally:
+        watcher.cancel()
+
+
+def parse_deadline(request: Request, data: dict):
+    """요청 데드라인, 값이 잘못되면 400 응답"""
+    try:
+        return Deadline.from_request(request.headers, data), None
+    except ValueError as deadline_error:
+        return None, JSONResponse({"error": "Invalid deadline", "message": str(deadline_error)}, status_code=400)
+
+
+def get_async_rag(rag) -> Optional[AsyncRAGServiceNeo4j]:
+    """현재 RAG 서비스에 대한 비동기 래퍼 (RAG 서비스가 바뀌면 새로 생성)"""
+    global _async_rag
+    if rag is None:
+        return None
+    if _async_rag is None or _async_rag.rag is not rag:
+        _async_rag = AsyncRAGServiceNeo4j(rag, executor)
+    return _async_rag
+
+
+async def read_json(request: Request) -> dict:
+    try:
+        return await request.json() or {}
+    except Exception:
+        return {}
+
+
+def queue_full_response(error: QueueFullError) -> JSONResponse:
+    return JSONResponse(
+        service.queue_full_body(error),
+        status_code=429,
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+def queue_timeout_response(error: QueueTimeoutError) -> JSONResponse:
+    logger.error(f"Chat request expired in queue: {error}")
+    return JSONResponse({
+        "error": "Request timed out in queue",
+        "message": str(error),
+        "reply": "죄송합니다. 요청 대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요."
+    }, status_code=503)
+
+
+def model_unavailable_response(error: Exception) -> JSONResponse:
+    logger.error(f"Failed to load model: {error}", exc_info=True)
+    return JSONResponse({
+        "error": "Model not available",
+        "message": f"Failed to load model: {str(error)}",
+        "reply": "죄송합니다. 현재 AI 모델을 로드할 수 없습니다. 잠시 후 다시 시도해주세요."
+    }, status_code=503)
+
+
+async def health(request: Request):
+    """헬스 체크"""
+    return JSONResponse(service.health_status())
+
+
+async def health_live(request: Request):
+    """liveness (모델 로드 여부와 무관)"""
+    return JSONResponse(service.liveness_status())
+
+
+async def health_ready(request: Request):
+    """readiness (필수 컴포넌트 로드 + 워밍업 완료 전에는 503)"""
+    body = service.readiness_status()
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+
+async def chat(request: Request):
+    """채팅 요청 처리 (LangGraph 워크플로우 기반)"""
+    data = await read_json(request)
+    message = data.get("message", "")
+    context = data.get("context", [])
+    retrieved_docs = service.normalize_retrieved_docs(data.get("retrieved_docs", []))
+
+    if not message:
+        return JSONResponse({"error": "Message is required"}, status_code=400)
+
+    deadline, error_response = parse_deadline(request, data)
+    if error_response is not None:
+        return error_response
+
+    try:
+        model, rag, workflow = await load_model()
+    except Exception as load_error:
+        return model_unavailable_response(load_error)
+
+    try:
+        selected = await select_workflow(data, workflow, message)
+    except ModelSelectionError as selection_error:
+        return model_selection_response(selection_error)
+    if selected is not workflow:
+        model, workflow = selected.llm, selected
+
+    scheduler = service.scheduler_for(workflow)
+
+    async def run_legacy():
+        reply = await await_job(request, deadline, scheduler.submit(
+            service.generate_legacy_reply, message, context, model, rag, retrieved_docs, deadline=deadline
+        ))
+        return JSONResponse(service.legacy_response_body(reply, deadline))
+
+    try:
+        if workflow is None:
+            logger.warning("LangGraph not available, using legacy chat")
+            return await run_legacy()
+
+        logger.info(f"Processing chat with LangGraph (ASGI): {message[:50]}...")
+        result = await await_job(
+            request, deadline, scheduler.submit(workflow.run, message, context, retrieved_docs, deadline=deadline)
+        )
+        return JSONResponse(service.chat_response_body(result))
+    except QueueFullError as queue_error:
+        return queue_full_response(queue_error)
+    except QueueTimeoutError as timeout_error:
+        return queue_timeout_response(timeout_error)
+    except Exception as workflow_error:
+        logger.error(f"Workflow execution failed: {workflow_error}", exc_info=True)
+        if workflow is not None:
+            try:
+                logger.info("Falling back to legacy chat after workflow failure")
+                return await run_legacy()
+            except QueueFullError as queue_error:
+                return queue_full_response(queue_error)
+            except Exception as fallback_error:
+                logger.error(f"Fallback to legacy chat also failed: {fallback_error}", exc_info=True)
+        return JSONResponse({
+            "error": "Chat processing failed",
+            "message": str(workflow_error),
+            "reply": "죄송합니다. 응답 생성 중 오류가 발생했습니다."
+        }, status_code=500)
+
+
+async def chat_stream(request: Request):
+    """스트리밍 채팅 (SSE 기본, ?format=ndjson 지원)"""
+    data = await read_json(request)
+    message = data.get("message", "")
+    context = data.get("context", [])
+    retrieved_docs = service.normalize_retrieved_docs(data.get("retrieved_docs", []))
+    stream_format = request.query_params.get("format", "sse").lower()
+
+    if not message:
+        return JSONResponse({"error": "Message is required"}, status_code=400)
+
+    # 스트림은 연결이 끊기면 스케줄러가 생성을 멈추므로 제한 시간만 적용
+    deadline, error_response = parse_deadline(request, data)
+    if error_response is not None:
+        return error_response
+
+    try:
+        _, _, workflow = await load_model()
+    except Exception as load_error:
+        return model_unavailable_response(load_error)
+
+    if workflow is None:
+        return JSONResponse({
+            "error": "Chat workflow not available",
+            "message": "Streaming requires the LangGraph workflow"
+        }, status_code=503)
+
+    try:
+        workflow = await select_workflow(data, workflow, message)
+    except ModelSelectionError as selection_error:
+        return model_selection_response(selection_error)
+
+    try:
+        events = service.scheduler_for(workflow).astream(
+            lambda: workflow.stream(message, context, retrieved_docs, deadline)
+        )
+    except QueueFullError as queue_error:
+        return queue_full_response(queue_error)
+
+    async def generate():
+        try:
+            async for event in events:
+                yield service.format_stream_event(event["event"], event["data"], stream_format)
+        except Exception as stream_error:
+            logger.error(f"Streaming workflow failed: {stream_error}", exc_info=True)
+            yield service.format_stream_event("error", {
+                "error": "Chat processing failed",
+                "message": str(stream_error),
+                "reply": "죄송합니다. 응답 생성 중 오류가 발생했습니다."
+            }, stream_format)
+
+    media_type = "application/x-ndjson" if stream_format == "ndjson" else "text/event-stream"
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def session_chat(request: Request):
+    """서버 측 세션 채팅 (요청에는 새 메시지만 포함)"""
+    session_id = request.path_params["session_id"]
+    data = await read_json(request)
+    message = data.get("message", "")
+    retrieved_docs = service.normalize_retrieved_docs(data.get("retrieved_docs", []))
+
+    if not message:
+        return JSONResponse({"error": "Message is required"}, status_code=400)
+
+    deadline, error_response = parse_deadline(request, data)
+    if error_response is not None:
+        return error_response
+
+    try:
+        session, created = service.open_session(session_id, data)
+    except ValueError as context_error:
+        return JSONResponse({"error": "Invalid context", "message": str(context_error)}, status_code=400)
+    if session is None:
+        return JSONResponse(service.session_not_found_body(session_id), status_code=404)
+
+    try:
+        _, _, workflow = await load_model()
+    except Exception as load_error:
+        return model_unavailable_response(load_error)
+
+    if workflow is None:
+        return JSONResponse({
+            "error": "Chat workflow not available",
+            "message": "Sessions require the LangGraph workflow"
+        }, status_code=503)
+
+    try:
+        workflow = await select_workflow(data, workflow, message)
+    except ModelSelectionError as selection_error:
+        return model_selection_response(selection_error)
+
+    try:
+        result = await await_job(request, deadline, service.scheduler_for(workflow).submit(
+            workflow.run, message, None, retrieved_docs, session=session, deadline=deadline
+        ))
+    except QueueFullError as queue_error:
+        return queue_full_response(queue_error)
+    except QueueTimeoutError as timeout_error:
+        return queue_timeout_response(timeout_error)
+    except Exception as workflow_error:
+        logger.error(f"Session chat failed: {workflow_error}", exc_info=True)
+        return JSONResponse({
+            "error": "Chat processing failed",
+            "message": str(workflow_error),
+            "reply": "죄송합니다. 응답 생성 중 오류가 발생했습니다."
+        }, status_code=500)
+
+    body = service.chat_response_body(result)
+    body["session"] = {**session.to_dict(), "created": created}
+    return JSONResponse(body)
+
+
+async def _require_rag():
+    _, rag, _ = await load_model()
+    return get_async_rag(rag)
+
+
+async def add_documents(request: Request):
+    """문서 추가 API (RAG 인덱싱)"""
+    try:
+        data = await read_json(request)
+        documents = data.get("documents", [])
+        if not documents:
+            return JSONResponse({"error": "Documents are required"}, status_code=400)
+
+        rag = await _require_rag()
+        if not rag:
+            return JSONResponse({"error": "RAG service not available"}, status_code=503)
+
+        # 인덱싱은 백그라운드 작업으로 (app.py와 같은 작업 관리자)
+        job = service.ingestion_jobs.submit(documents)
+        wait = service.wants_wait(request.query_params.get("wait"), data)
+        if wait:
+            await run_blocking(job.wait)
+        return JSONResponse(service.ingestion_job_body(job, finished=wait), status_code=200 if wait else 202)
+    except Exception as e:
+        logger.error(f"Error adding documents: {e}", exc_info=True)
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+async def upload_documents(request: Request):
+    """스트리밍 문서 업로드 API (app.py와 같은 스풀러/작업 관리자, 본문은 도착하는 청크 단위로 디스크에 씀)"""
+    try:
+        rag = await _require_rag()
+    except Exception as e:
+        logger.error(f"Failed to load RAG service for upload: {e}", exc_info=True)
+        rag = None
+    if not rag:
+        return JSONResponse({"error": "RAG service not available"}, status_code=503)
+
+    try:
+        upload = StreamingUpload(service.ingestion_jobs, request.headers.get("content-type"), request.query_params)
+    except UploadError as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
+
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                await run_blocking(upload.feed, chunk)
+        await run_blocking(upload.finish)
+    except UploadError as e:
+        upload.abort()
+        return JSONResponse(service.upload_response_body(upload, error=str(e)), status_code=e.status_code)
+    except Exception as e:
+        upload.abort()
+        logger.error(f"Error receiving document upload: {e}", exc_info=True)
+        return JSONResponse(service.upload_response_body(upload, error=str(e)), status_code=500)
+
+    wait = service.wants_wait(request.query_params.get("wait"), {})
+    if wait:
+        await run_blocking(upload.job.wait)
+    return JSONResponse(service.upload_response_body(upload, finished=wait), status_code=200 if wait else 202)
+
+
+async def get_ingestion_job(request: Request):
+    """인덱싱 작업 진행 상태"""
+    job_id = request.path_params["job_id"]
+    job = service.ingestion_jobs.get(job_id)
+    if job is None:
+        return JSONResponse({"error": f"Ingestion job {job_id} not found"}, status_code=404)
+    return JSONResponse(job.to_dict())
+
+
+async def delete_document(request: Request):
+    """문서 삭제 API"""
+    doc_id = request.path_params["doc_id"]
+    try:
+        rag = await _require_rag()
+        if not rag:
+            return JSONResponse({"error": "RAG service not available"}, status_code=503)
+
+        if await rag.delete_document(doc_id):
+            return JSONResponse({"message": f"Document {doc_id} deleted successfully"})
+        return JSONResponse({"error": f"Failed to delete document {doc_id}"}, status_code=404)
+    except Exception as e:
+        logger.error(f"Error deleting document: {e}", exc_info=True)
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+async def get_stats(request: Request):
+    """컬렉션 통계 조회"""
+    try:
+        rag = await _require_rag()
+        if not rag:
+            return JSONResponse({"error": "RAG service not available"}, status_code=503)
+        return JSONResponse(await rag.get_collection_stats())
+    except Exception as e:
+        logger.error(f"Error getting stats: {e}", exc_info=True)
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+async def search_documents(request: Request):
+    """문서 검색 API"""
+    try:
+        data = await read_json(request)
+        query = data.get("query", "")
+        top_k = data.get("top_k", 3)
+        if "queries" in data:
+            error = service.validate_search_queries(data["queries"])
+            if error is not None:
+                return JSONResponse({"error": error[0]}, status_code=error[1])
+        elif not query:
+            return JSONResponse({"error": "Query is required"}, status_code=400)
+
+        rag = await _require_rag()
+        if not rag:
+            return JSONResponse({"error": "RAG service not available"}, status_code=503)
+
+        if "queries" in data:
+            # 다중 질의: encode 한 번 + 전략별 UNWIND 쿼리 (실패하면 질의별 검색을 동시에)
+            started = time.perf_counter()
+            try:
+                results = await rag.search_batch(data["queries"], top_k=top_k)
+            except Exception as batch_error:
+                logger.warning(f"Batch search failed, searching per query: {batch_error}")
+                results = await asyncio.gather(*(rag.search(q, top_k=top_k) for q in data["queries"]))
+            return JSONResponse(service.batch_search_body(data["queries"], results, time.perf_counter() - started))
+
+        results = await rag.search(query, top_k=top_k)
+        return JSONResponse({"query": query, "results": results, "count": len(results)})
+    except Exception as e:
+        logger.error(f"Error searching documents: {e}", exc_info=True)
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+class RequestMetricsMiddleware:
+    """네이티브 라우트의 요청 수/지연 기록 (마운트된 Flask 라우트는 Flask 훅에서 기록)
+
+    라우트 라벨은 Flask와 같은 형식(/api/sessions/<session_id>/chat)으로 맞춥니다.
+    스트리밍 응답은 Flask와 마찬가지로 응답 시작까지의 시간을 기록합니다.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.route_labels = {
+            route.endpoint: re.sub(r"\{(\w+)\}", r"<\1>", route.path)
+            for route in routes if isinstance(route, Route)
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                # 라우팅 후 scope에 endpoint가 채워짐
+                route = self.route_labels.get(scope.get("endpoint"))
+                if route is not None:
+                    metrics.HTTP_REQUESTS.inc(route=route, method=scope["method"], status=str(message["status"]))
+                    metrics.HTTP_REQUEST_DURATION.observe(time.perf_counter() - started,
+                                                          route=route, method=scope["method"])
+            await send(message)
+
+        await self.app(scope, receive, send_with_metrics)
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    # 포트는 바로 열고 컴포넌트는 백그라운드에서 병렬 로드 (첫 요청은 로드 완료까지 대기)
+    # 첫 요청이 시작 스레드보다 먼저 와도 중복 로드하지 않도록 시작 단계 진입을 먼저 표시
+    service.startup.begin()
+    # 요청용 executor 스레드를 쓰지 않도록 별도 스레드(기본 executor)에서 실행
+    startup = asyncio.get_running_loop().run_in_executor(None, service.init_llm_service)
+    yield
+    await asyncio.gather(startup, return_exceptions=True)
+    if _async_rag is not None:
+        await _async_rag.close()
+    executor.shutdown(wait=False)
+
+
+routes = [
+    Route("/health", health, methods=["GET"]),
+    Route("/health/live", health_live, methods=["GET"]),
+    Route("/health/ready", health_ready, methods=["GET"]),
+    Route("/api/chat", chat, methods=["POST"]),
+    Route("/api/chat/stream", chat_stream, methods=["POST"]),
+    Route("/api/sessions/{session_id}/chat", session_chat, methods=["POST"]),
+    Route("/api/documents", add_documents, methods=["POST"]),
+    Route("/api/documents/stats", get_stats, methods=["GET"]),
+    Route("/api/documents/upload", upload_documents, methods=["POST"]),
+    Route("/api/documents/jobs/{job_id}", get_ingestion_job, methods=["GET"]),
+    Route("/api/documents/search", search_documents, methods=["POST"]),
+    Route("/api/documents/{doc_id}", delete_document, methods=["DELETE"]),
+    # 모델 관리, 세션 조회/삭제, 스케줄러/캐시 통계는 기존 Flask 핸들러로 처리
+    Mount("/", WSGIMiddleware(service.app)),
+]
+
+app = Starlette(routes=routes, lifespan=lifespan)
+app.add_middleware(RequestMetricsMiddleware, routes=routes)
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    port = int(os.getenv("PORT", "8000"))
+    uvicorn.run(app, host="0.0.0.0", port=port, log_level="info")
@@ -0,0 +1,129 @@
+"""
+다중 질의 검색 벤치마크 (질의별 search() 반복 vs search_batch())
+배치 크기를 바꿔가며 질의 하나당 지연(ms)을 비교합니다.
+질의별 검색은 질의마다 encode 한 번 + Neo4j 세션 하나, 배치 검색은 encode 한 번 + 전략별 UNWIND 쿼리 한 번입니다.
+매 측정 전에 질의 임베딩 캐시를 비우고 디스크 임베딩 캐시는 꺼서 encode 비용이 항상 포함되도록 합니다.
+
+예시 (서비스 코드를 직접 호출, Neo4j와 임베딩 모델 필요):
+    python benchmarks/bench_batch_search.py --batch-sizes 1,2,4,8,16,32,64 --repeats 3
+
+실행 중인 서버의 /api/documents/search로 측정 (HTTP 왕복 포함):
+    python benchmarks/bench_batch_search.py --url http://localhost:8000
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pms_questions import PMS_QUESTIONS  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def build_queries(count: int, round_index: int) -> List[str]:
+    """서로 다른 질의 count개 (라운드마다 문구를 바꿔 임베딩 캐시에 걸리지 않게 함)"""
+    return [
+        f"{PMS_QUESTIONS[i % len(PMS_QUESTIONS)]} (r{round_index}-{i // len(PMS_QUESTIONS)})"
+        for i in range(count)
+    ]
+
+
+def post_search(url: str, body: dict) -> dict:
+    request = urllib.request.Request(
+        f"{url.rstrip('/')}/api/documents/search",
+        data=json.dumps(body, ensure_ascii=False).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=300) as response:
+        return json.loads(response.read())
+
+
+def make_runners(args):
+    """(질의별 검색, 배치 검색, 캐시 비우기) 함수 세트"""
+    if args.url:
+        def sequential(queries: List[str]):
+            for query in queries:
+                post_search(args.url, {"query": query, "top_k": args.top_k})
+
+        def batch(queries: List[str]):
+            post_search(args.url, {"queries": queries, "top_k": args.top_k})
+
+        return sequential, batch, lambda: None
+
+    from embedding_cache import EmbeddingCache
+    from rag_service_neo4j import RAGServiceNeo4j
+
+    rag = RAGServiceNeo4j()
+    # 디스크 임베딩 캐시에 걸리면 encode 비용이 빠지므로 끔
+    rag.embedding_cache = EmbeddingCache(enabled=False)
+
+    def sequential(queries: List[str]):
+        for query in queries:
+            rag.search(query, top_k=args.top_k)
+
+    def batch(queries: List[str]):
+        rag.search_batch(queries, top_k=args.top_k)
+
+    def clear_cache():
+        with rag._query_embeddings_lock:
+            rag._query_embeddings.clear()
+
+    return sequential, batch, clear_cache
+
+
+def measure(fn: Callable[[List[str]], None], clear_cache: Callable[[], None], size: int, repeats: int,
+            offset: int) -> float:
+    """질의 하나당 지연(ms)의 중앙값"""
+    samples = []
+    for r in range(repeats):
+        queries = build_queries(size, offset + r)
+        clear_cache()
+        started = time.perf_counter()
+        fn(queries)
+        samples.append((time.perf_counter() - started) * 1000 / size)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched multi-query search benchmark")
+    parser.add_argument("--batch-sizes", default="1,2,4,8,16,32,64", help="Comma separated batch sizes")
+    parser.add_argument("--repeats", type=int, default=3, help="Rounds per batch size (median reported)")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--url", help="Measure a running server's /api/documents/search instead of in-process")
+    args = parser.parse_args()
+
+    sequential, batch, clear_cache = make_runners(args)
+    # 첫 호출 비용(모델 로딩, 드라이버 연결) 제외
+    sequential(build_queries(1, -1))
+    batch(build_queries(2, -1))
+
+    results = []
+    for i, size in enumerate(int(s) for s in args.batch_sizes.split(",")):
+        offset = i * args.repeats * 2
+        seq_ms = measure(sequential, clear_cache, size, args.repeats, offset)
+        batch_ms = measure(batch, clear_cache, size, args.repeats, offset + args.repeats)
+        results.append({"size": size, "sequential_ms": seq_ms, "batch_ms": batch_ms})
+        logger.info("batch=%d: sequential %.1f ms/query, batched %.1f ms/query", size, seq_ms, batch_ms)
+
+    print()
+    print(f"{'batch':>6} {'seq ms/q':>10} {'batch ms/q':>11} {'batch total':>12} {'speedup':>8}")
+    for r in results:
+        speedup = r["sequential_ms"] / r["batch_ms"] if r["batch_ms"] else 0.0
+        print(f"{r['size']:>6} {r['sequential_ms']:>10.1f} {r['batch_ms']:>11.1f} "
+              f"{r['batch_ms'] * r['size']:>12.1f} {speedup:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
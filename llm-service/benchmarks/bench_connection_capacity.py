@@ -0,0 +1,216 @@
+"""
+동시 연결 수용량 부하 테스트 (Flask 개발 서버 vs ASGI 서빙 모드)
+스트리밍 채팅 연결 N개를 동시에 열어 유지한 상태에서
+- 몇 개가 정상적으로 유지되는지 (거절/오류 수)
+- 그동안 /health 응답 지연이 얼마나 늘어나는지
+- 서버 프로세스의 스레드 수와 RSS (같은 호스트에서 --pid를 주면)
+를 측정합니다. 외부 패키지 없이 asyncio 소켓만 사용합니다.
+
+연결이 대기열에서 기다리며 유지되도록 두 서버 모두 SCHEDULER_MAX_QUEUE를 충분히 크게 설정하세요.
+
+예시:
+    SCHEDULER_MAX_QUEUE=5000 python app.py                       # :8000
+    SCHEDULER_MAX_QUEUE=5000 PORT=8001 python asgi_app.py        # :8001
+    python benchmarks/bench_connection_capacity.py \
+        --target flask=http://localhost:8000 --target asgi=http://localhost:8001 \
+        --connections 50,200,1000 --hold 20
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pms_questions import PMS_QUESTIONS  # noqa: E402
+
+
+def build_request(host: str, path: str, body: Optional[dict] = None) -> bytes:
+    if body is None:
+        return f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode()
+    payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n"
+    )
+    return head.encode() + payload
+
+
+async def hold_stream(host: str, port: int, path: str, body: dict, hold: float,
+                      connect_timeout: float) -> Dict[str, Optional[float]]:
+    """스트리밍 요청 하나를 열어 hold초 동안 유지"""
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), connect_timeout)
+    except Exception as e:
+        return {"outcome": "connect_error", "error": type(e).__name__}
+
+    first_byte = None
+    status = None
+    outcome = "held"
+    try:
+        writer.write(build_request(f"{host}:{port}", path, body))
+        await writer.drain()
+        deadline = started + hold
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(reader.read(4096), remaining)
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                outcome = "closed_by_server"
+                break
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+                line = chunk.split(b"\r\n", 1)[0].decode(errors="replace")
+                parts = line.split()
+                status = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+                if status and status >= 400:
+                    outcome = f"http_{status}"
+                    break
+    except Exception as e:
+        outcome = f"error_{type(e).__name__}"
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+    return {"outcome": outcome, "first_byte_s": first_byte, "status": status}
+
+
+async def probe_health(host: str, port: int, stop: asyncio.Event, interval: float) -> List[float]:
+    """부하 중 /health 응답 시간 측정"""
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), 10)
+            writer.write(build_request(f"{host}:{port}", "/health"))
+            await writer.drain()
+            await asyncio.wait_for(reader.read(), 30)
+            writer.close()
+            latencies.append(time.perf_counter() - started)
+        except Exception:
+            latencies.append(float("inf"))
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+    return latencies
+
+
+def read_process_stats(pid: Optional[int]) -> Dict[str, Optional[int]]:
+    """/proc에서 서버 프로세스 스레드 수와 RSS(MB) 읽기 (Linux, 같은 호스트)"""
+    if pid is None:
+        return {"threads": None, "rss_mb": None}
+    stats = {"threads": None, "rss_mb": None}
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("Threads:"):
+                stats["threads"] = int(line.split()[1])
+            elif line.startswith("VmRSS:"):
+                stats["rss_mb"] = int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return stats
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    finite = sorted(v for v in values if v != float("inf"))
+    if not finite:
+        return None
+    return finite[min(len(finite) - 1, int(len(finite) * q))]
+
+
+async def run_round(url: str, connections: int, hold: float, path: str, connect_timeout: float,
+                    pid: Optional[int], ramp: float) -> dict:
+    parsed = urlparse(url)
+    host, port = parsed.hostname, parsed.port or 80
+
+    stop = asyncio.Event()
+    health_task = asyncio.create_task(probe_health(host, port, stop, 0.5))
+
+    tasks = []
+    for i in range(connections):
+        body = {"message": PMS_QUESTIONS[i % len(PMS_QUESTIONS)], "context": []}
+        tasks.append(asyncio.create_task(hold_stream(host, port, path, body, hold, connect_timeout)))
+        if ramp:
+            await asyncio.sleep(ramp / connections)
+
+    # 연결이 모두 열린 상태에서 서버 자원 측정
+    await asyncio.sleep(min(hold / 2, 5))
+    process_stats = read_process_stats(pid)
+
+    results = await asyncio.gather(*tasks)
+    stop.set()
+    health = await health_task
+
+    outcomes: Dict[str, int] = {}
+    for r in results:
+        outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+    first_bytes = [r["first_byte_s"] for r in results if r.get("first_byte_s") is not None]
+
+    return {
+        "connections": connections,
+        "held": outcomes.get("held", 0),
+        "outcomes": outcomes,
+        "first_byte_p50_ms": (statistics.median(first_bytes) * 1000) if first_bytes else None,
+        "health_p50_ms": (percentile(health, 0.5) or 0) * 1000 if health else None,
+        "health_p95_ms": (percentile(health, 0.95) or 0) * 1000 if health else None,
+        "health_failures": sum(1 for h in health if h == float("inf")),
+        **process_stats,
+    }
+
+
+def fmt(value, spec: str = ".0f") -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent streaming connection capacity benchmark")
+    parser.add_argument("--target", action="append", required=True,
+                        help="name=url, e.g. flask=http://localhost:8000 (repeatable)")
+    parser.add_argument("--pid", action="append", default=[],
+                        help="name=pid of the server process on this host (repeatable, optional)")
+    parser.add_argument("--connections", default="50,200,1000", help="Comma separated connection counts")
+    parser.add_argument("--hold", type=float, default=20.0, help="Seconds to keep each connection open")
+    parser.add_argument("--ramp", type=float, default=2.0, help="Seconds over which connections are opened")
+    parser.add_argument("--path", default="/api/chat/stream?format=ndjson")
+    parser.add_argument("--connect-timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    targets = [t.split("=", 1) for t in args.target]
+    pids = {name: int(pid) for name, pid in (p.split("=", 1) for p in args.pid)}
+
+    rows = []
+    for name, url in targets:
+        for connections in [int(c) for c in args.connections.split(",")]:
+            print(f"[{name}] {connections} connections for {args.hold:.0f}s ...", flush=True)
+            result = asyncio.run(run_round(url, connections, args.hold, args.path,
+                                           args.connect_timeout, pids.get(name), args.ramp))
+            result["target"] = name
+            rows.append(result)
+            print(f"  outcomes={result['outcomes']}", flush=True)
+
+    print()
+    print(f"{'target':>8} {'conns':>6} {'held':>6} {'health_p50':>11} {'health_p95':>11} "
+          f"{'health_err':>10} {'threads':>8} {'rss_mb':>7}")
+    for r in rows:
+        print(f"{r['target']:>8} {r['connections']:>6} {r['held']:>6} {fmt(r['health_p50_ms']):>11} "
+              f"{fmt(r['health_p95_ms']):>11} {r['health_failures']:>10} {fmt(r['threads'], 'd'):>8} "
+              f"{fmt(r['rss_mb'], 'd'):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+문서 청크 임베딩 처리량 벤치마크 (청크마다 encode vs 길이순 배치 encode)
+ragdata PDF를 add_document와 같은 경로(텍스트 추출 → MinerUDocumentParser → LayoutAwareChunker)로 청킹한 뒤
+같은 청크 집합을 여러 방식으로 임베딩해 chunks/sec를 비교합니다. Neo4j는 필요 없습니다.
+
+- per_chunk: 이전 add_document (청크마다 encode 한 번)
+- batch N unsorted: 입력 순서대로 N개씩 encode
+- batch N sorted: RAGServiceNeo4j.embed_passages (길이순 정렬 후 N개씩 encode)
+
+예시:
+    python benchmarks/bench_embedding.py --ragdata-dir ../ragdata --batch-sizes 8,16,32,64
+    python benchmarks/bench_embedding.py --max-chunks 256 --skip-per-chunk
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from document_parser import MinerUDocumentParser  # noqa: E402
+from embedding_cache import EmbeddingCache  # noqa: E402
+from pdf_ocr_pipeline import extract_text_from_pdf  # noqa: E402
+from rag_service_neo4j import RAGServiceNeo4j  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def load_chunks(rag: RAGServiceNeo4j, ragdata_dir: str, max_docs: int, max_chunks: int) -> List[str]:
+    """ragdata PDF를 add_document와 같은 방식으로 청킹"""
+    chunks: List[str] = []
+    pdf_files = sorted(Path(ragdata_dir).glob("*.pdf"))[:max_docs or None]
+    if not pdf_files:
+        raise SystemExit(f"No PDF files found in {ragdata_dir}")
+    for pdf_file in pdf_files:
+        text = extract_text_from_pdf(str(pdf_file))
+        if not text or len(text.strip()) < 100:
+            continue
+        blocks = rag.parser.parse_document(text, {"file_name": pdf_file.name, "file_type": "pdf"})
+        doc_chunks = [chunk["content"] for chunk in rag.chunker.chunk_blocks(blocks)]
+        logger.info("%s: %d chunks", pdf_file.name, len(doc_chunks))
+        chunks.extend(doc_chunks)
+        if max_chunks and len(chunks) >= max_chunks:
+            return chunks[:max_chunks]
+    return chunks
+
+
+def time_per_chunk(rag: RAGServiceNeo4j, texts: List[str]) -> float:
+    started = time.perf_counter()
+    for text in texts:
+        rag.embedding_model.encode(f"passage: {text}")
+    return time.perf_counter() - started
+
+
+def time_unsorted(rag: RAGServiceNeo4j, texts: List[str], batch_size: int) -> float:
+    started = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        rag.embedding_model.encode([f"passage: {text}" for text in batch], batch_size=len(batch))
+    return time.perf_counter() - started
+
+
+def time_sorted(rag: RAGServiceNeo4j, texts: List[str], batch_size: int) -> float:
+    started = time.perf_counter()
+    rag.embed_passages(texts, batch_size=batch_size)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunk embedding throughput benchmark")
+    parser.add_argument(
+        "--ragdata-dir",
+        default="/app/ragdata" if os.path.exists("/app/ragdata") else os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "ragdata"
+        ),
+    )
+    parser.add_argument("--max-docs", type=int, default=0, help="Limit PDFs (0: all)")
+    parser.add_argument("--max-chunks", type=int, default=0, help="Limit chunks (0: all)")
+    parser.add_argument("--batch-sizes", default="8,16,32,64", help="Comma separated encode batch sizes")
+    parser.add_argument("--mineru", action="store_true", help="Parse with the MinerU model (default: heuristic)")
+    parser.add_argument("--skip-per-chunk", action="store_true", help="Skip the slow per-chunk baseline")
+    args = parser.parse_args()
+
+    # Neo4j에는 연결하지 않음 (드라이버 생성만)
+    rag = RAGServiceNeo4j(defer_init=True)
+    # 같은 청크를 여러 번 임베딩하므로 디스크 임베딩 캐시는 끔
+    rag.embedding_cache = EmbeddingCache(enabled=False)
+    rag.load_embedding_model()
+    rag.parser = MinerUDocumentParser(use_mock=not args.mineru)
+
+    texts = load_chunks(rag, args.ragdata_dir, args.max_docs, args.max_chunks)
+    lengths = sorted(len(text) for text in texts)
+    logger.info("Embedding %d chunks (chars: min %d, median %d, max %d)",
+                len(texts), lengths[0], lengths[len(lengths) // 2], lengths[-1])
+    # 첫 호출 비용 제외
+    rag.warmup()
+
+    results = []
+    if not args.skip_per_chunk:
+        results.append(("per_chunk", 1, time_per_chunk(rag, texts)))
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        results.append(("unsorted", batch_size, time_unsorted(rag, texts, batch_size)))
+        results.append(("sorted", batch_size, time_sorted(rag, texts, batch_size)))
+        logger.info("batch=%d done", batch_size)
+
+    baseline = results[0][2] or 1.0
+    print()
+    print(f"{'mode':>10} {'batch':>6} {'chunks':>7} {'elapsed_s':>10} {'chunks/s':>9} {'speedup':>8}")
+    for mode, batch_size, elapsed in results:
+        print(f"{mode:>10} {batch_size:>6} {len(texts):>7} {elapsed:>10.1f} "
+              f"{len(texts) / elapsed if elapsed else 0.0:>9.2f} {baseline / elapsed if elapsed else 0.0:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
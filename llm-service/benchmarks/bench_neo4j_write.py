@@ -0,0 +1,178 @@
+"""
+Neo4j 문서 쓰기 벤치마크 (청크마다 auto-commit 쿼리 vs UNWIND 배치 쓰기 트랜잭션)
+임의 임베딩을 가진 합성 문서를 만들어 _write_document의 wall time을 청크 배치 크기별로 비교합니다.
+임베딩 모델은 필요 없고 Neo4j만 필요합니다. 측정이 끝난 문서는 매 라운드마다 삭제합니다.
+
+- legacy: 이전 _write_document (청크마다 MERGE Chunk + HAS_CHUNK 쿼리 두 번, 끝에 NEXT_CHUNK 정렬 쿼리)
+- batch N: RAGServiceNeo4j._write_document(batch_size=N) (N개 청크마다 쓰기 트랜잭션 하나)
+
+예시:
+    python benchmarks/bench_neo4j_write.py --docs 5 --chunks 300 --batch-sizes 1,50,100,200,500,1000
+    python benchmarks/bench_neo4j_write.py --skip-legacy --chunks 2000
+"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rag_service_neo4j import RAGServiceNeo4j  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+BENCH_PREFIX = "bench-neo4j-write"
+
+
+def make_document(index: int, chunk_count: int, chunk_chars: int, dim: int, rng: random.Random) -> Dict:
+    """_prepare_document 결과와 같은 형태의 합성 문서와 임베딩"""
+    doc_id = f"{BENCH_PREFIX}-{index}"
+    chunks = [
+        {
+            "content": f"[{doc_id}#{i}] " + "프로젝트 일정 위험 관리 " * (chunk_chars // 14),
+            "metadata": {"structure_type": "paragraph", "page_number": i // 4, "section_title": f"섹션 {i // 10}"},
+        }
+        for i in range(chunk_count)
+    ]
+    embeddings = [[rng.uniform(-1.0, 1.0) for _ in range(dim)] for _ in range(chunk_count)]
+    doc = {
+        "doc_id": doc_id,
+        "content": chunks[0]["content"] if chunks else "",
+        "metadata": {"file_path": f"/bench/{doc_id}.pdf", "created_at": "2024-01-01"},
+        "title": doc_id,
+        "category": "benchmark",
+        "file_type": "pdf",
+        "chunks": chunks,
+    }
+    return {"doc": doc, "embeddings": embeddings}
+
+
+def write_legacy(rag: RAGServiceNeo4j, doc: Dict, embeddings: List[List[float]]):
+    """이전 구현: auto-commit 쿼리를 청크마다 두 번 보냄"""
+    doc_id = doc["doc_id"]
+    with rag.driver.session() as session:
+        session.run("""
+            MERGE (d:Document {doc_id: $doc_id})
+            SET d.title = $title, d.content = $content, d.file_type = $file_type,
+                d.file_path = $file_path, d.created_at = $created_at
+        """, doc_id=doc_id, title=doc["title"], content=doc["content"][:1000], file_type=doc["file_type"],
+                    file_path=doc["metadata"]["file_path"], created_at=doc["metadata"]["created_at"])
+        session.run("""
+            MERGE (cat:Category {name: $category})
+            WITH cat
+            MATCH (d:Document {doc_id: $doc_id})
+            MERGE (d)-[:BELONGS_TO]->(cat)
+        """, category=doc["category"], doc_id=doc_id)
+
+        for i, (chunk_data, embedding) in enumerate(zip(doc["chunks"], embeddings)):
+            chunk_id = str(uuid.uuid4())
+            chunk_metadata = chunk_data["metadata"]
+            session.run("""
+                MERGE (c:Chunk {chunk_id: $chunk_id})
+                SET c.content = $content, c.chunk_index = $chunk_index, c.title = $title, c.doc_id = $doc_id,
+                    c.structure_type = $structure_type, c.has_table = $has_table, c.has_list = $has_list,
+                    c.section_title = $section_title, c.page_number = $page_number, c.embedding = $embedding
+            """, chunk_id=chunk_id, content=chunk_data["content"], chunk_index=i, title=doc["title"],
+                        doc_id=doc_id, structure_type=chunk_metadata.get("structure_type", "paragraph"),
+                        has_table=False, has_list=False, section_title=chunk_metadata.get("section_title", ""),
+                        page_number=int(chunk_metadata.get("page_number", 0)), embedding=embedding)
+            session.run("""
+                MATCH (d:Document {doc_id: $doc_id})
+                MATCH (c:Chunk {chunk_id: $chunk_id})
+                MERGE (d)-[:HAS_CHUNK]->(c)
+            """, doc_id=doc_id, chunk_id=chunk_id)
+
+        session.run("""
+            MATCH (d:Document {doc_id: $doc_id})-[:HAS_CHUNK]->(c:Chunk)
+            WITH c ORDER BY c.chunk_index
+            WITH collect(c) AS chunks
+            UNWIND range(0, size(chunks)-2) AS i
+            WITH chunks[i] AS curr, chunks[i+1] AS next
+            MERGE (curr)-[:NEXT_CHUNK]->(next)
+        """, doc_id=doc_id)
+
+
+def cleanup(rag: RAGServiceNeo4j, docs: List[Dict]):
+    with rag.driver.session() as session:
+        for item in docs:
+            session.run(rag.DELETE_DOCUMENT_CYPHER, doc_id=item["doc"]["doc_id"]).consume()
+
+
+def check_graph(rag: RAGServiceNeo4j, docs: List[Dict]) -> bool:
+    """청크 수와 NEXT_CHUNK 수가 기대값과 같은지 확인"""
+    with rag.driver.session() as session:
+        for item in docs:
+            expected = len(item["doc"]["chunks"])
+            record = session.run("""
+                MATCH (d:Document {doc_id: $doc_id})-[:HAS_CHUNK]->(c:Chunk)
+                OPTIONAL MATCH (c)-[n:NEXT_CHUNK]->(:Chunk)
+                RETURN count(DISTINCT c) AS chunks, count(n) AS links
+            """, doc_id=item["doc"]["doc_id"]).single()
+            if record["chunks"] != expected or record["links"] != max(0, expected - 1):
+                logger.warning("%s: %d chunks / %d links (expected %d / %d)", item["doc"]["doc_id"],
+                               record["chunks"], record["links"], expected, max(0, expected - 1))
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Neo4j document write benchmark")
+    parser.add_argument("--docs", type=int, default=5, help="Synthetic documents per round")
+    parser.add_argument("--chunks", type=int, default=300, help="Chunks per document")
+    parser.add_argument("--chunk-chars", type=int, default=800, help="Approximate chunk content length")
+    parser.add_argument("--batch-sizes", default="1,50,100,200,500,1000", help="Comma separated chunk batch sizes")
+    parser.add_argument("--skip-legacy", action="store_true", help="Skip the per-chunk auto-commit baseline")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # 임베딩 모델은 로드하지 않음 (제약조건/벡터 인덱스만 준비)
+    rag = RAGServiceNeo4j(defer_init=True)
+    rag.initialize_database()
+
+    rng = random.Random(args.seed)
+    docs = [make_document(i, args.chunks, args.chunk_chars, rag.embedding_dim, rng) for i in range(args.docs)]
+    total_chunks = args.docs * args.chunks
+    logger.info("Writing %d documents x %d chunks (dim %d)", args.docs, args.chunks, rag.embedding_dim)
+    cleanup(rag, docs)
+
+    rounds = [("legacy", 0)] if not args.skip_legacy else []
+    rounds += [("batch", int(b)) for b in args.batch_sizes.split(",")]
+
+    results = []
+    try:
+        for mode, batch_size in rounds:
+            started = time.perf_counter()
+            for item in docs:
+                if mode == "legacy":
+                    write_legacy(rag, item["doc"], item["embeddings"])
+                elif not rag._write_document(item["doc"], item["embeddings"], batch_size=batch_size):
+                    raise SystemExit(f"Write failed for {item['doc']['doc_id']}")
+            elapsed = time.perf_counter() - started
+            ok = check_graph(rag, docs)
+            results.append((mode, batch_size, elapsed, ok))
+            logger.info("%s batch=%d: %.2fs", mode, batch_size, elapsed)
+            cleanup(rag, docs)
+    finally:
+        cleanup(rag, docs)
+        rag.close()
+
+    baseline = results[0][2] if results else 1.0
+    print()
+    print(f"{'mode':>7} {'batch':>6} {'chunks':>7} {'elapsed_s':>10} {'chunks/s':>9} {'speedup':>8} {'graph':>6}")
+    for mode, batch_size, elapsed, ok in results:
+        print(f"{mode:>7} {batch_size or '-':>6} {total_chunks:>7} {elapsed:>10.2f} "
+              f"{total_chunks / elapsed if elapsed else 0.0:>9.1f} {baseline / elapsed if elapsed else 0.0:>7.2f}x "
+              f"{'ok' if ok else 'FAIL':>6}")
+
+
+if __name__ == "__main__":
+    main()
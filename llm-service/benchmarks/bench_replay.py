@@ -0,0 +1,376 @@
+"""
+요청 재생(replay) 부하 테스트
+requests.jsonl 형식의 트래픽을 정해진 동시성/도착률로 app.py에 보내고
+경로별 p50/p95/p99 지연, 스트리밍 TTFT(첫 token 이벤트까지), 처리량, 오류율을 보고합니다.
+스케줄러/캐시/서빙 변경 전후를 같은 트래픽으로 비교하는 용도입니다.
+
+서버:
+- --target URL: 이미 실행 중인 서버 (실제 모델/Neo4j 등 어떤 구성이든)
+- 없으면 이 프로세스 안에서 app.py(--serve flask) 또는 asgi_app.py(--serve asgi)를 띄움.
+  --llm stub이면 StubLlama(--token-rate, --prefill-rate), --rag fake이면 메모리 FakeRAGService를 사용하고
+  real이면 MODEL_PATH의 실제 모델 / Neo4j를 사용 (benchmarks/stand_ins.py).
+  ASGI 모드의 /api/documents* 경로는 비동기 Neo4j 드라이버를 쓰므로 --rag real이 필요합니다.
+
+트래픽 파일 (한 줄에 요청 하나, 없으면 PMS 질문 세트로 생성):
+    {"path": "/api/chat", "body": {"message": "..."}, "headers": {...}, "offset_ms": 120}
+    {"message": "..."}                       # /api/chat 본문으로 취급
+스트리밍 경로(/api/chat/stream)는 ?format=ndjson으로 보내 token 이벤트를 셉니다.
+
+도착 방식:
+- 기본: --concurrency개 클라이언트가 응답을 받는 즉시 다음 요청 (closed loop)
+- --rate R: 초당 R건 포아송 도착 (open loop, 지연은 예정 도착 시각부터 측정)
+- --trace: 파일의 offset_ms대로 재생 (--speed로 배속)
+
+예시:
+    python benchmarks/bench_replay.py --concurrency 8 --count 200 --token-rate 30
+    python benchmarks/bench_replay.py --rate 4 --count 300 --stream-ratio 0.5 --json-out before.json
+    python benchmarks/bench_replay.py --target http://localhost:8000 --requests traffic.jsonl --trace
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from pms_questions import PMS_QUESTIONS  # noqa: E402
+from stand_ins import FakeRAGService, StubLlama  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = "/api/chat/stream"
+
+
+def load_traffic(args) -> List[Dict[str, Any]]:
+    """트래픽 파일을 읽거나 PMS 질문 세트로 생성"""
+    entries = []
+    if args.requests:
+        with open(args.requests, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                if "path" not in entry:
+                    entry = {"path": "/api/chat", "body": entry}
+                entries.append(entry)
+    else:
+        rng = random.Random(args.seed)
+        for i, question in enumerate(PMS_QUESTIONS):
+            path = STREAM_PATH if rng.random() < args.stream_ratio else "/api/chat"
+            entries.append({"path": path, "body": {"message": question}, "offset_ms": i * 250})
+    if not entries:
+        raise SystemExit("No requests to replay")
+    return entries
+
+
+def seed_documents() -> List[Dict[str, Any]]:
+    """FakeRAGService에 넣을 문서 (질문마다 관련 문서 하나)"""
+    return [{
+        "id": f"seed-{i}",
+        "content": f"{question} 에 대한 PMS 가이드: " + " ".join([question] * 8),
+        "metadata": {"title": question[:20], "category": "pms"},
+    } for i, question in enumerate(PMS_QUESTIONS)]
+
+
+def start_local_server(args) -> str:
+    """이 프로세스 안에서 서비스를 띄우고 base URL 반환"""
+    os.environ.setdefault("STARTUP_WARMUP", "false")
+    if args.llm == "stub":
+        # load_model은 모델 파일 존재만 확인 (생성은 StubLlama가 대신함)
+        placeholder = os.path.join(tempfile.mkdtemp(prefix="replay-"), "stub.gguf")
+        open(placeholder, "wb").close()
+        os.environ["MODEL_PATH"] = placeholder
+
+    import app as service
+
+    if args.llm == "stub":
+        service.create_llm = lambda model_path: StubLlama(token_rate=args.token_rate, prefill_rate=args.prefill_rate,
+                                                          n_ctx=args.n_ctx)
+    if args.rag == "fake":
+        fake = FakeRAGService(search_latency_ms=args.rag_latency_ms)
+        fake.add_documents(seed_documents())
+        service.RAGServiceNeo4j = lambda *a, **kw: fake
+    elif args.rag == "none":
+        def no_rag(*a, **kw):
+            raise RuntimeError("RAG disabled for this replay (--rag none)")
+        service.RAGServiceNeo4j = no_rag
+
+    port = args.port or _free_port()
+    if args.serve == "asgi":
+        import uvicorn
+        import asgi_app
+
+        server = uvicorn.Server(uvicorn.Config(asgi_app.app, host="127.0.0.1", port=port, log_level="warning"))
+        threading.Thread(target=server.run, name="replay-server", daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+    else:
+        from werkzeug.serving import make_server
+
+        service.init_llm_service()
+        server = make_server("127.0.0.1", port, service.app, threaded=True)
+        threading.Thread(target=server.serve_forever, name="replay-server", daemon=True).start()
+
+    base_url = f"http://127.0.0.1:{port}"
+    _wait_ready(base_url, timeout=args.ready_timeout)
+    return base_url
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base_url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            status, body = get_json(base_url, "/health/ready")
+            if status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Service at {base_url} did not become ready within {timeout}s")
+
+
+def get_json(base_url: str, path: str):
+    parsed = urlparse(base_url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        raw = response.read()
+        return response.status, json.loads(raw) if raw else None
+    finally:
+        conn.close()
+
+
+def send(base_url: str, entry: Dict[str, Any], timeout: float, scheduled_at: float) -> Dict[str, Any]:
+    """요청 하나를 보내고 결과 기록 (지연은 scheduled_at부터)"""
+    parsed = urlparse(base_url)
+    path = entry["path"]
+    streaming = path.split("?")[0] == STREAM_PATH
+    if streaming and "format=" not in path:
+        path += ("&" if "?" in path else "?") + "format=ndjson"
+    body = json.dumps(entry.get("body", {}), ensure_ascii=False).encode("utf-8")
+    headers = {"Content-Type": "application/json", "Connection": "close", **entry.get("headers", {})}
+
+    result = {"route": entry["path"].split("?")[0], "status": None, "ok": False, "latency_ms": None,
+              "ttft_ms": None, "tokens": 0, "error": None}
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+    try:
+        conn.request(entry.get("method", "POST"), path, body=body, headers=headers)
+        response = conn.getresponse()
+        result["status"] = response.status
+        if streaming and response.status == 200:
+            stream_error = None
+            while True:
+                line = response.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event.get("event") == "token":
+                    if result["ttft_ms"] is None:
+                        result["ttft_ms"] = (time.perf_counter() - scheduled_at) * 1000
+                    result["tokens"] += 1
+                elif event.get("event") == "error":
+                    stream_error = event.get("message") or event.get("error")
+            result["ok"] = stream_error is None
+            result["error"] = stream_error
+        else:
+            raw = response.read()
+            result["ok"] = 200 <= response.status < 300
+            if not result["ok"]:
+                result["error"] = raw[:200].decode("utf-8", errors="replace")
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        conn.close()
+        result["latency_ms"] = (time.perf_counter() - scheduled_at) * 1000
+    return result
+
+
+def run_closed_loop(base_url: str, traffic: List[Dict[str, Any]], count: int, concurrency: int,
+                    timeout: float) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    counter = iter(range(count))
+    lock = threading.Lock()
+
+    def client():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            result = send(base_url, traffic[index % len(traffic)], timeout, time.perf_counter())
+            with lock:
+                results.append(result)
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def run_open_loop(base_url: str, traffic: List[Dict[str, Any]], count: int, arrivals: List[float],
+                  max_in_flight: int, timeout: float) -> List[Dict[str, Any]]:
+    """예정 도착 시각(초, 시작 기준)마다 요청 전송 (앞 요청 완료를 기다리지 않음)"""
+    started = time.perf_counter()
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        for index in range(count):
+            scheduled_at = started + arrivals[index]
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(send, base_url, traffic[index % len(traffic)], timeout, scheduled_at))
+    return [future.result() for future in futures]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    latencies = [r["latency_ms"] for r in results if r["ok"]]
+    ttfts = [r["ttft_ms"] for r in results if r["ttft_ms"] is not None]
+    errors = sum(1 for r in results if not r["ok"])
+    statuses: Dict[str, int] = {}
+    for r in results:
+        key = str(r["status"]) if r["status"] is not None else "no_response"
+        statuses[key] = statuses.get(key, 0) + 1
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "error_rate": errors / len(results) if results else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "ttft_p50_ms": percentile(ttfts, 50),
+        "ttft_p95_ms": percentile(ttfts, 95),
+        "ttft_p99_ms": percentile(ttfts, 99),
+        "throughput_rps": (len(results) - errors) / elapsed if elapsed else 0.0,
+        "stream_tokens_per_s": sum(r["tokens"] for r in results) / elapsed if elapsed else 0.0,
+        "statuses": statuses,
+    }
+
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:.0f}" if value is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay load test for llm-service")
+    parser.add_argument("--target", help="Base URL of a running service (default: start one in-process)")
+    parser.add_argument("--serve", choices=["flask", "asgi"], default="flask", help="In-process server mode")
+    parser.add_argument("--llm", choices=["stub", "real"], default="stub")
+    parser.add_argument("--rag", choices=["fake", "real", "none"], default="fake")
+    parser.add_argument("--token-rate", type=float, default=20.0, help="StubLlama decode tokens/sec")
+    parser.add_argument("--prefill-rate", type=float, default=400.0, help="StubLlama prompt eval tokens/sec")
+    parser.add_argument("--n-ctx", type=int, default=4096, help="StubLlama context length")
+    parser.add_argument("--rag-latency-ms", type=float, default=20.0, help="FakeRAGService search latency")
+    parser.add_argument("--port", type=int, default=0, help="In-process server port (0: any free port)")
+    parser.add_argument("--ready-timeout", type=float, default=600.0)
+
+    parser.add_argument("--requests", help="Traffic file (JSON lines)")
+    parser.add_argument("--stream-ratio", type=float, default=0.3,
+                        help="Share of generated requests sent to /api/chat/stream (no --requests)")
+    parser.add_argument("--count", type=int, default=100, help="Requests to send (cycles through traffic)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Closed-loop clients")
+    parser.add_argument("--rate", type=float, help="Open-loop Poisson arrivals per second")
+    parser.add_argument("--trace", action="store_true", help="Replay offset_ms from the traffic file")
+    parser.add_argument("--speed", type=float, default=1.0, help="Trace replay speed factor")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open-loop client thread cap")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request client timeout (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json-out", help="Write the summary and server stats as JSON")
+    args = parser.parse_args()
+
+    traffic = load_traffic(args)
+    base_url = args.target.rstrip("/") if args.target else start_local_server(args)
+    logger.info("Replaying %d requests (%d distinct) against %s", args.count, len(traffic), base_url)
+
+    started = time.perf_counter()
+    if args.rate or args.trace:
+        if args.trace:
+            span = max(entry.get("offset_ms", 0) for entry in traffic) + 1
+            arrivals = [((i // len(traffic)) * span + traffic[i % len(traffic)].get("offset_ms", 0))
+                        / 1000 / args.speed for i in range(args.count)]
+            mode = f"trace x{args.speed}"
+        else:
+            rng = random.Random(args.seed)
+            arrivals, t = [], 0.0
+            for _ in range(args.count):
+                t += rng.expovariate(args.rate)
+                arrivals.append(t)
+            mode = f"poisson {args.rate}/s"
+        results = run_open_loop(base_url, traffic, args.count, arrivals, args.max_in_flight, args.timeout)
+    else:
+        mode = f"closed x{args.concurrency}"
+        results = run_closed_loop(base_url, traffic, args.count, args.concurrency, args.timeout)
+    elapsed = time.perf_counter() - started
+
+    routes = sorted({r["route"] for r in results})
+    summary = {"overall": summarize(results, elapsed),
+               "routes": {route: summarize([r for r in results if r["route"] == route], elapsed)
+                          for route in routes}}
+
+    server_stats = {}
+    for name, path in (("scheduler", "/api/scheduler/stats"), ("answer_cache", "/api/answer-cache/stats")):
+        try:
+            status, body = get_json(base_url, path)
+            if status == 200:
+                server_stats[name] = body
+        except OSError as e:
+            logger.warning("Could not read %s: %s", path, e)
+
+    print()
+    print(f"mode={mode} llm={args.llm if not args.target else 'remote'} "
+          f"rag={args.rag if not args.target else 'remote'} elapsed={elapsed:.1f}s")
+    print(f"{'route':<26} {'reqs':>6} {'err%':>6} {'p50':>7} {'p95':>7} {'p99':>7} "
+          f"{'ttft50':>7} {'ttft95':>7} {'ttft99':>7} {'req/s':>7} {'tok/s':>7}")
+    for name, s in [("overall", summary["overall"])] + list(summary["routes"].items()):
+        print(f"{name:<26} {s['requests']:>6} {s['error_rate'] * 100:>5.1f}% {_fmt(s['p50_ms']):>7} "
+              f"{_fmt(s['p95_ms']):>7} {_fmt(s['p99_ms']):>7} {_fmt(s['ttft_p50_ms']):>7} "
+              f"{_fmt(s['ttft_p95_ms']):>7} {_fmt(s['ttft_p99_ms']):>7} {s['throughput_rps']:>7.2f} "
+              f"{s['stream_tokens_per_s']:>7.1f}")
+    print(f"statuses: {summary['overall']['statuses']}")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"mode": mode, "args": vars(args), "summary": summary, "server_stats": server_stats},
+                      f, ensure_ascii=False, indent=2)
+        logger.info("Summary written to %s", args.json_out)
+
+
+if __name__ == "__main__":
+    main()
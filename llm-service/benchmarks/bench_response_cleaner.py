@@ -0,0 +1,532 @@
+"""
+응답 정리 마이크로벤치마크
+기존 구현(ChatWorkflow._clean_response + _finalize_reply 모델 이름 검사, generate_legacy_reply 후처리,
+StreamingResponseCleaner)과 response_cleaner 엔진의 처리 시간을 비교합니다. 모델 없이 실행됩니다.
+
+기존 구현은 비교를 위해 이 파일에 그대로 옮겨 두었습니다 (baseline_*).
+
+예시:
+    python benchmarks/bench_response_cleaner.py --repeat 2000
+"""
+
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from response_cleaner import ResponseCleaner, clean_response  # noqa: E402
+
+MODEL_PATH = "./models/google.gemma-3-12b-pt.Q5_K_M.gguf"
+CORRECT_NAME = "Gemma 3"
+
+ANSWER = (
+    "스프린트 회고는 스프린트가 끝날 때 팀이 지난 작업 방식을 돌아보고 개선점을 찾는 회의입니다.\n"
+    "1. 잘된 점: 일일 스탠드업으로 이슈를 빠르게 공유했습니다.\n"
+    "2. 아쉬운 점: 요구사항 변경이 늦게 반영되어 일정이 3일 지연되었습니다.\n"
+    "3. 개선 방안: 백로그 정제 시간을 주 1회로 고정하고, 변경 요청은 PMS 이슈로 등록합니다.\n"
+    "리스크 관점에서는 인력 부족(R-12)과 외부 API 의존성(R-07)을 계속 모니터링해야 합니다.\n"
+)
+SAMPLES = [
+    ANSWER,
+    ANSWER * 4,
+    "assistant\n" + ANSWER + "<|im_end|>\n<|im_start|>user\n다음 질문",
+    "Gemma 3\n===\n스프린트 회고가 뭐야?\n" + ANSWER + "제공된 정보로 완벽하게 답변했습니다.",
+    "'''\n모델: X\n'''\n" + ANSWER.replace("\n", " 답변을 작성해 주세요\n", 2) + "\x07<start",
+]
+
+
+def chunked(text: str, size: int = 2):
+    """토큰 스트림 흉내 (한국어 토큰 1~2글자)"""
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+
+# ---- 기존 구현 (비교용) ----
+
+def baseline_clean_response(reply: str, model_path: str = None) -> str:
+    """기존 ChatWorkflow._clean_response"""
+
+    # Gemma 특수 토큰 제거
+    reply = reply.replace("<start_of_turn>", "").replace("<end_of_turn>", "")
+    # im_end 토큰 제거 (깨지는 문자 방지)
+    reply = reply.replace("<|im_end|>", "").replace("|im_end|>", "").replace("<|im_end", "")
+
+    # 삼중 따옴표로 감싸진 블록 제거 (모델 이름, 구분선, 질문 등 포함)
+    reply = re.sub(r"'''[\s\S]*?'''", "", reply)
+    reply = re.sub(r'"""[\s\S]*?"""', "", reply)
+    if reply.startswith("'''") or reply.startswith('"""'):
+        reply = reply[3:].lstrip()
+    if reply.endswith("'''") or reply.endswith('"""'):
+        reply = reply[:-3].rstrip()
+
+    # 모델 이름과 구분선이 포함된 앞부분 제거
+    # 예: "Llama Forge Model 2 (LFM2)\n===\n질문내용"
+    reply = re.sub(r"^.*?(Llama Forge Model|Gemma|LFM2|로컬 LLM).*?\n=+\n.*?\n", "", reply, flags=re.MULTILINE | re.IGNORECASE)
+    reply = re.sub(r"^.*?=+\n.*?\n", "", reply, flags=re.MULTILINE)
+
+    # 불필요한 role 레이블 제거
+    if reply.startswith("model"):
+        reply = reply[5:].strip()
+    if reply.startswith("assistant"):
+        reply = reply[9:].strip()
+
+    # 프롬프트 형식 태그 제거
+    reply = reply.replace("<think>", "")
+    reply = reply.replace("system", "")
+    reply = reply.replace("사용자:", "")
+    reply = reply.replace("user:", "")
+    reply = reply.replace("USER", "")
+    reply = reply.replace("_assistant", "")
+    reply = reply.replace("assistant", "")
+
+    # "현재 질문에 대한 답변을 작성해 주세요" 같은 프롬프트 텍스트 제거
+    unwanted_patterns = [
+        "현재 질문에 대한 답변을 작성해 주세요",
+        "현재 질문에 대한 답변을 작성해주세요",
+        "답변을 작성해 주세요",
+        "답변을 작성해주세요",
+        "Please write an answer",
+        "Write an answer",
+        "답변은 3~6문장",
+        "핵심 정의",
+        "목적/배경",
+        "간단한 예시",
+    ]
+
+    # 메타 설명 텍스트 제거 (뒤에 붙는 불필요한 설명)
+    meta_patterns = [
+        r"제공된 정보로.*?완벽하게 답변했습니다.*?",
+        r"제공된 정보로.*?답변했습니다.*?",
+        r"이제 사용자님의 요청대로.*?제공",
+        r"이제 사용자의 요청대로.*?제공",
+        r"사용자님의 요청대로.*?설명.*?제공",
+        r"사용자의 요청대로.*?설명.*?제공",
+        r"요청대로.*?한국어로.*?제공",
+        r"요청하신.*?한국어로.*?제공",
+    ]
+    for pattern in meta_patterns:
+        reply = re.sub(pattern, "", reply, flags=re.IGNORECASE | re.DOTALL)
+
+    # 잘못된 모델 이름 필터링 (모델 이름 질문인 경우)
+    wrong_model_names = ["니콜라스", "nicolas", "알렉스", "alex", "사라", "sara", 
+                        "gpt-4", "chatgpt", "claude", "gemini", "palm", "gpt4"]
+
+    # 정확한 모델 이름 가져오기
+    correct_name = "로컬 LLM"
+    if model_path:
+        import os
+        model_file = os.path.basename(model_path)
+        if "lfm2" in model_file.lower():
+            correct_name = "Llama Forge Model 2 (LFM2)"
+        elif "gemma" in model_file.lower():
+            correct_name = "Gemma 3"
+
+    # 잘못된 모델 이름이 포함된 경우 강제로 교체
+    reply_lower = reply.lower()
+    found_wrong_name = False
+    for wrong_name in wrong_model_names:
+        if wrong_name.lower() in reply_lower:
+            found_wrong_name = True
+            # 정확한 모델 이름으로 완전히 교체
+            reply = f"저는 {correct_name} 모델입니다."
+            break
+
+    # 모델 이름 관련 키워드가 있고, 정확한 모델 이름이 없는 경우
+    model_keywords = ["모델", "model", "이름", "name", "너는", "당신은", "너의", "당신의"]
+    has_model_keyword = any(keyword in reply_lower for keyword in model_keywords)
+    has_correct_name = any(correct in reply for correct in ["Llama", "Gemma", "로컬 LLM", "LFM2"])
+
+    if has_model_keyword and not has_correct_name:
+        # 잘못된 답변이 나온 경우 강제 교체
+        reply = f"저는 {correct_name} 모델입니다."
+    for pattern in unwanted_patterns:
+        reply = reply.replace(pattern, "")
+        # 대소문자 구분 없이 제거
+        reply = re.sub(re.escape(pattern), "", reply, flags=re.IGNORECASE)
+
+    # assistant 접두어 정리
+    cleaned_lines = []
+    for line in reply.splitlines():
+        stripped = line.strip()
+        lower = stripped.lower()
+
+        # 모델 이름과 구분선이 포함된 줄 제거
+        if re.search(r"(llama forge model|gemma|lfm2|로컬 llm).*?===", lower) or re.search(r"^=+$", stripped):
+            stripped = ""
+        # 삼중 따옴표로 시작하거나 끝나는 줄 제거
+        elif stripped.startswith("'''") or stripped.endswith("'''") or stripped.startswith('"""') or stripped.endswith('"""'):
+            stripped = ""
+        # 불필요한 패턴 제거
+        elif lower.startswith("assistant:") or lower.startswith("assistant："):
+            stripped = stripped.split(":", 1)[1].strip() if ":" in stripped else ""
+        elif lower == "assistant" or lower == "system" or lower == "user":
+            stripped = ""
+        elif stripped.startswith("사용자:") or stripped.startswith("사용자："):
+            stripped = ""
+        elif stripped.startswith("system") or stripped.startswith("user"):
+            stripped = ""
+        elif "<think>" in stripped.lower():
+            stripped = ""
+        elif any(pattern in stripped for pattern in unwanted_patterns):
+            stripped = ""
+        # 메타 설명 텍스트가 포함된 줄 제거
+        elif re.search(r"제공된 정보로.*?답변했습니다", lower) or re.search(r"이제 사용자.*?요청대로", lower) or re.search(r"요청.*?한국어로.*?제공", lower):
+            stripped = ""
+
+        if stripped:
+            cleaned_lines.append(stripped)
+
+    if cleaned_lines:
+        reply = "\n".join(cleaned_lines)
+    else:
+        # 모든 줄이 제거된 경우 원본에서 첫 번째 의미있는 줄만 사용
+        lines = reply.splitlines()
+        for line in lines:
+            stripped = line.strip()
+            if stripped and not any(unwanted in stripped.lower() for unwanted in ["system", "user", "assistant", "사용자", "<redacted"]):
+                reply = stripped
+                break
+
+    # 응답 앞부분에서 모델 이름과 구분선 제거
+    # 예: "Llama Forge Model 2 (LFM2)\n===\n질문내용\n\n답변내용" -> "답변내용"
+    lines = reply.splitlines()
+    start_idx = 0
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        # 모델 이름이나 구분선이 있는 줄은 건너뛰기
+        if re.search(r"(llama forge model|gemma|lfm2|로컬 llm)", stripped, re.IGNORECASE) or re.match(r"^=+$", stripped):
+            start_idx = i + 1
+        # 사용자 질문처럼 보이는 줄도 건너뛰기 (질문으로 끝나는 경우)
+        elif (stripped.endswith("?") or stripped.endswith("주세요") or stripped.endswith("해주세요")) and i < len(lines) - 1:
+            start_idx = i + 1
+        else:
+            break
+
+    if start_idx > 0:
+        reply = "\n".join(lines[start_idx:]).strip()
+
+    # 응답 뒷부분에서 메타 설명 제거
+    lines = reply.splitlines()
+    end_idx = len(lines)
+    for i in range(len(lines) - 1, -1, -1):
+        line = lines[i].strip()
+        # 메타 설명 패턴이 있으면 그 줄부터 끝까지 제거
+        if re.search(r"제공된 정보로.*?답변했습니다", line, re.IGNORECASE) or \
+           re.search(r"이제 사용자.*?요청대로", line, re.IGNORECASE) or \
+           re.search(r"요청.*?한국어로.*?제공", line, re.IGNORECASE) or \
+           re.search(r"완벽하게 답변했습니다", line, re.IGNORECASE):
+            end_idx = i
+            break
+
+    if end_idx < len(lines):
+        reply = "\n".join(lines[:end_idx]).strip()
+
+    # 중복 응답 방지
+    if "<start_of_turn>" in reply:
+        reply = reply.split("<start_of_turn>")[0].strip()
+
+    # im_end 토큰이 남아있으면 제거
+    if "<|im_end|>" in reply:
+        reply = reply.split("<|im_end|>")[0].strip()
+    if "|im_end|>" in reply:
+        reply = reply.split("|im_end|>")[0].strip()
+
+    # 과도하게 긴 응답 제한
+    if "\n\n\n" in reply:
+        reply = reply.split("\n\n\n")[0].strip()
+
+    # 제어 문자 및 깨지는 문자 제거 (인코딩 문제 방지)
+    import string
+    # 인쇄 가능한 문자와 공백만 유지
+    printable_chars = set(string.printable)
+    # 한글, 한자, 일본어 등 유니코드 문자도 허용
+    cleaned_chars = []
+    for char in reply:
+        # 인쇄 가능한 ASCII 문자이거나, 유니코드 문자(한글 등)인 경우만 유지
+        if char in printable_chars or ord(char) > 127:
+            # 제어 문자 제거 (탭, 줄바꿈, 캐리지 리턴은 유지)
+            if ord(char) < 32 and char not in ['\n', '\r', '\t']:
+                continue
+            cleaned_chars.append(char)
+    reply = ''.join(cleaned_chars)
+
+    # 앞뒤 공백 정리
+    reply = reply.strip()
+
+    # 응답 끝에 남은 불완전한 태그나 특수 문자 제거
+    # 예: "<", "<start", "<end", "<|" 등
+    while reply and reply[-1] in ['<', '>', '|']:
+        reply = reply[:-1].strip()
+
+    # 불완전한 태그 패턴 제거 (끝부분에 남은 것들)
+    reply = re.sub(r'<[^>]*$', '', reply)  # 끝에 불완전한 태그 제거
+    reply = re.sub(r'\|[^>]*$', '', reply)  # 끝에 불완전한 토큰 제거
+
+    # 다시 앞뒤 공백 정리
+    reply = reply.strip()
+
+    return reply
+
+
+def baseline_legacy_cleanup(reply: str) -> str:
+    """기존 generate_legacy_reply 후처리"""
+    # 후처리
+    reply = reply.replace("<start_of_turn>", "").replace("<end_of_turn>", "")
+    # im_end 토큰 제거 (깨지는 문자 방지)
+    reply = reply.replace("<|im_end|>", "").replace("|im_end|>", "").replace("<|im_end", "")
+    if reply.startswith("model"):
+        reply = reply[5:].strip()
+    if reply.startswith("assistant"):
+        reply = reply[9:].strip()
+    cleaned_lines = []
+    for line in reply.splitlines():
+        stripped = line.strip()
+        lower = stripped.lower()
+        if lower.startswith("assistant:") or lower.startswith("assistant："):
+            stripped = stripped.split(":", 1)[1].strip() if ":" in stripped else ""
+        elif lower == "assistant":
+            stripped = ""
+        if stripped.endswith("?"):
+            stripped = ""
+        if stripped:
+            cleaned_lines.append(stripped)
+    if cleaned_lines:
+        reply = "\n".join(cleaned_lines)
+    if "<start_of_turn>" in reply:
+        reply = reply.split("<start_of_turn>")[0].strip()
+    # im_end 토큰이 남아있으면 제거
+    if "<|im_end|>" in reply:
+        reply = reply.split("<|im_end|>")[0].strip()
+    if "|im_end|>" in reply:
+        reply = reply.split("|im_end|>")[0].strip()
+    if "\n\n\n" in reply:
+        reply = reply.split("\n\n\n")[0].strip()
+    
+    # 제어 문자 및 깨지는 문자 제거 (인코딩 문제 방지)
+    import string
+    # 인쇄 가능한 문자와 공백만 유지
+    printable_chars = set(string.printable)
+    # 한글, 한자, 일본어 등 유니코드 문자도 허용
+    cleaned_chars = []
+    for char in reply:
+        # 인쇄 가능한 ASCII 문자이거나, 유니코드 문자(한글 등)인 경우만 유지
+        if char in printable_chars or ord(char) > 127:
+            # 제어 문자 제거 (탭, 줄바꿈, 캐리지 리턴은 유지)
+            if ord(char) < 32 and char not in ['\n', '\r', '\t']:
+                continue
+            cleaned_chars.append(char)
+    reply = ''.join(cleaned_chars)
+    
+    # 앞뒤 공백 정리
+    reply = reply.strip()
+
+    return reply
+
+
+class BaselineStreamingResponseCleaner:
+    """토큰 스트림을 증분 정리하는 클리너
+
+    _clean_response의 줄 단위 규칙(역할 레이블, 프롬프트 태그, 구분선 등)을 스트림에 적용합니다.
+    줄이 충분히 길어져 제거 대상 접두어가 아님이 확인되면 줄 끝을 기다리지 않고 바로 내보내므로
+    첫 토큰 지연이 prefill 시간 수준으로 유지됩니다.
+    """
+
+    # 이 길이를 넘으면 줄 단위 제거 규칙과 무관하다고 보고 즉시 내보냄
+    COMMIT_LENGTH = 24
+
+    SPECIAL_TOKENS = ("<end_of_turn>",)
+    TERMINATORS = ("<start_of_turn>", "<|im_end|>", "|im_end|>", "<|im_start|>")
+    DROP_EXACT = {"assistant", "system", "user", "model"}
+    DROP_PREFIXES = ("system", "user", "사용자:", "사용자：", "'''", '"""')
+    DROP_SUFFIXES = ("'''", '"""')
+    LABEL_PREFIXES = ("assistant:", "assistant：")
+    UNWANTED_PATTERNS = (
+        "현재 질문에 대한 답변을 작성해 주세요",
+        "현재 질문에 대한 답변을 작성해주세요",
+        "답변을 작성해 주세요",
+        "답변을 작성해주세요",
+        "Please write an answer",
+        "Write an answer",
+    )
+    META_PATTERN = re.compile(r"제공된 정보로.*?답변했습니다|이제 사용자.*?요청대로|요청.*?한국어로.*?제공")
+    SEPARATOR_PATTERN = re.compile(r"^=+$")
+    # 탭/줄바꿈/캐리지 리턴을 제외한 제어 문자
+    CONTROL_CHARS = dict.fromkeys(c for c in range(32) if chr(c) not in "\n\r\t")
+
+    def __init__(self):
+        self._buffer = ""
+        self._committed = False
+        self._emitted_any = False
+        self._blank_lines = 0
+        self.stopped = False
+
+    def feed(self, chunk: str) -> str:
+        """토큰 청크를 받아 지금 내보낼 수 있는 정리된 텍스트 반환"""
+        if self.stopped or not chunk:
+            return ""
+
+        self._buffer = self._truncate_at_terminator(self._buffer + chunk.translate(self.CONTROL_CHARS))
+
+        output = []
+        while "\n" in self._buffer and not self.stopped:
+            line, self._buffer = self._buffer.split("\n", 1)
+            output.append(self._finish_line(line))
+
+        if self.stopped:
+            output.append(self.flush())
+        else:
+            output.append(self._emit_partial())
+        return "".join(output)
+
+    def flush(self) -> str:
+        """스트림 종료 시 남은 버퍼 처리"""
+        line, self._buffer = self._buffer, ""
+        if not line:
+            return ""
+        return self._finish_line(line).rstrip("\n")
+
+    def _truncate_at_terminator(self, text: str) -> str:
+        """특수 토큰 제거, 종료 토큰 이후는 버림"""
+        for token in self.SPECIAL_TOKENS:
+            text = text.replace(token, "")
+        for token in self.TERMINATORS:
+            if token in text:
+                self.stopped = True
+                text = text.split(token, 1)[0]
+        return text
+
+    def _finish_line(self, line: str) -> str:
+        """완성된 줄 처리 (이미 일부를 내보낸 줄이면 나머지만 반환)"""
+        if self._committed:
+            self._committed = False
+            return line.rstrip() + "\n"
+
+        cleaned = self._clean_line(line)
+        if not cleaned:
+            if self._emitted_any and not line.strip():
+                self._blank_lines += 1
+                # 과도하게 긴 응답 제한 ("\n\n\n" 이후 제거)
+                if self._blank_lines >= 2:
+                    self.stopped = True
+            return ""
+
+        self._blank_lines = 0
+        self._emitted_any = True
+        return cleaned + "\n"
+
+    def _emit_partial(self) -> str:
+        """아직 끝나지 않은 줄 중 안전하게 내보낼 수 있는 부분 반환"""
+        if not self._committed:
+            stripped = self._buffer.strip()
+            if len(stripped) < self.COMMIT_LENGTH or self._clean_line(stripped) != stripped:
+                return ""
+            self._committed = True
+            self._blank_lines = 0
+            self._emitted_any = True
+            self._buffer = ""
+            return stripped
+
+        # 종료 토큰의 앞부분일 수 있는 꼬리는 보류
+        hold = max(self._buffer.rfind("<"), self._buffer.rfind("|"))
+        if hold == -1:
+            text, self._buffer = self._buffer, ""
+        else:
+            text, self._buffer = self._buffer[:hold], self._buffer[hold:]
+        return text
+
+    def _clean_line(self, line: str) -> str:
+        """줄 단위 제거 규칙 적용 (_clean_response의 줄 처리와 동일한 기준)"""
+        stripped = line.strip()
+        if not self._emitted_any:
+            # 응답 맨 앞의 role 레이블 제거
+            for label in ("model", "assistant"):
+                if stripped.startswith(label):
+                    stripped = stripped[len(label):].strip()
+        lower = stripped.lower()
+
+        if not stripped or lower in self.DROP_EXACT:
+            return ""
+        if self.SEPARATOR_PATTERN.match(stripped) or "<think>" in lower:
+            return ""
+        if lower.startswith(self.LABEL_PREFIXES):
+            return stripped.split(":", 1)[1].strip() if ":" in stripped else ""
+        if stripped.startswith(self.DROP_PREFIXES) or stripped.endswith(self.DROP_SUFFIXES):
+            return ""
+        if any(pattern in stripped for pattern in self.UNWANTED_PATTERNS):
+            return ""
+        if self.META_PATTERN.search(lower):
+            return ""
+        return stripped
+
+
+def baseline_finalize_reply(reply: str) -> str:
+    """기존 ChatWorkflow._finalize_reply"""
+    reply = baseline_clean_response(reply, MODEL_PATH)
+    wrong_names = ["니콜라스", "nicolas", "알렉스", "alex", "사라", "sara",
+                   "gpt-4", "chatgpt", "claude", "gemini", "palm"]
+    reply_lower_check = reply.lower()
+    if any(wrong in reply_lower_check for wrong in wrong_names):
+        reply = f"저는 {CORRECT_NAME} 모델입니다."
+    return reply
+
+
+def baseline_stream(chunks) -> str:
+    """기존 스트리밍 경로: 증분 클리너 + 원문 전체에 _finalize_reply"""
+    cleaner = BaselineStreamingResponseCleaner()
+    for chunk in chunks:
+        cleaner.feed(chunk)
+        if cleaner.stopped:
+            break
+    cleaner.flush()
+    return baseline_finalize_reply("".join(chunks).strip())
+
+
+def engine_stream(chunks) -> str:
+    cleaner = ResponseCleaner(correct_model_name=CORRECT_NAME)
+    for chunk in chunks:
+        cleaner.feed(chunk)
+        if cleaner.stopped:
+            break
+    cleaner.flush()
+    return cleaner.reply()
+
+
+def measure(fn, inputs, repeat: int) -> float:
+    """입력 하나당 평균 처리 시간 (µs), 5회 측정의 중앙값"""
+    runs = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for item in inputs:
+                fn(item)
+        runs.append((time.perf_counter() - started) / (repeat * len(inputs)) * 1e6)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response cleaner microbenchmark")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    streams = [chunked(sample) for sample in SAMPLES]
+    cases = [
+        ("workflow reply", baseline_finalize_reply,
+         lambda text: clean_response(text, correct_model_name=CORRECT_NAME), SAMPLES),
+        ("legacy reply", baseline_legacy_cleanup,
+         lambda text: clean_response(text, drop_question_lines=True), SAMPLES),
+        ("stream (2-char chunks)", baseline_stream, engine_stream, streams),
+    ]
+
+    print(f"{'case':>24} {'baseline µs':>12} {'engine µs':>10} {'speedup':>8}")
+    for name, baseline, engine, inputs in cases:
+        before = measure(baseline, inputs, args.repeat)
+        after = measure(engine, inputs, args.repeat)
+        print(f"{name:>24} {before:>12.1f} {after:>10.1f} {before / after:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+투기적 디코딩 CPU 벤치마크
+한국어 PMS 질문 세트에 RAG 문서를 붙인 프롬프트(ChatWorkflow._build_prompt와 같은 형식)로
+투기적 디코딩 없이 / prompt lookup / draft 모델 각각의 decode tokens/sec를 측정합니다.
+greedy(temperature=0)에서는 투기적 디코딩이 출력을 바꾸지 않아야 하므로 기준 출력과 같은지도 확인합니다.
+
+RAG 문서는 --rag이면 Neo4j에서 검색하고(NEO4J_URI 등 환경 변수 사용), 아니면 --docs-file(JSON 문자열 목록)을
+모든 질문에 붙입니다. 둘 다 없으면 문서 없이 측정합니다 (prompt lookup이 옮겨 쓸 문장이 없어 효과가 작음).
+
+예시:
+    python benchmarks/bench_speculative.py --model ./models/google.gemma-3-12b-pt.Q5_K_M.gguf \
+        --modes off,prompt_lookup --rag --threads 16 --questions 8 --max-tokens 192
+    python benchmarks/bench_speculative.py --model ./models/google.gemma-3-12b-pt.Q5_K_M.gguf \
+        --modes off,prompt_lookup,draft --draft-model ./models/gemma-3-1b-it.Q8_0.gguf --rag
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from llama_cpp import Llama  # noqa: E402
+from pms_questions import PMS_QUESTIONS  # noqa: E402
+import speculative  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = "당신은 프로젝트 관리 시스템(PMS) 전용 한국어 AI 에이전트입니다."
+STOP = ["<|im_end|>", "<end_of_turn>"]
+
+
+def build_prompt(question: str, docs: List[str]) -> str:
+    """ChatWorkflow._build_prompt와 같은 구조 (시스템 → 질문 + 관련 문서 → assistant)"""
+    parts = ["<|im_start|>system", SYSTEM_PROMPT, "<|im_end|>", "<|im_start|>user", question]
+    if docs:
+        parts.append("\n관련 문서:")
+        parts.extend(f"{i}. {doc}" for i, doc in enumerate(docs, 1))
+    parts.extend(["<|im_end|>", "<|im_start|>assistant"])
+    return "\n".join(parts)
+
+
+def load_docs(questions: List[str], use_rag: bool, docs_file: Optional[str], top_k: int) -> Dict[str, List[str]]:
+    if use_rag:
+        from rag_service_neo4j import RAGServiceNeo4j
+        rag = RAGServiceNeo4j()
+        try:
+            # 워크플로우와 같은 관련도 기준(0.3)으로 필터링
+            return {q: [r["content"] for r in rag.search(q, top_k=top_k) if r.get("relevance_score", 0) >= 0.3]
+                    for q in questions}
+        finally:
+            rag.close()
+    if docs_file:
+        with open(docs_file, encoding="utf-8") as f:
+            docs = json.load(f)
+        return {q: docs[:top_k] for q in questions}
+    logger.warning("No RAG docs (--rag or --docs-file); prompt lookup has little to copy")
+    return {q: [] for q in questions}
+
+
+def measure(llm: Llama, prompt: str, max_tokens: int, temperature: float) -> dict:
+    """스트리밍으로 첫 토큰 시각과 이후 decode 시간을 분리해 측정"""
+    llm.reset()
+    started = time.perf_counter()
+    first_token_at = None
+    tokens = 0
+    text = []
+    for chunk in llm(prompt, max_tokens=max_tokens, temperature=temperature, top_p=0.9, stop=STOP, stream=True):
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+        tokens += 1
+        text.append(chunk["choices"][0]["text"])
+    finished = time.perf_counter()
+    decode_s = finished - (first_token_at or finished)
+    return {
+        "tokens": tokens,
+        "ttft_s": (first_token_at or finished) - started,
+        "decode_s": decode_s,
+        "decode_tps": (tokens - 1) / decode_s if tokens > 1 and decode_s > 0 else 0.0,
+        "text": "".join(text),
+    }
+
+
+def run_mode(mode: str, args, prompts: List[str]) -> dict:
+    kwargs = {}
+    if mode != "off":
+        config = {"mode": mode, "num_pred_tokens": args.num_pred_tokens,
+                  "max_ngram_size": args.max_ngram_size, "draft_model": args.draft_model}
+        kwargs["draft_model"] = speculative.create_draft_model(config, args.n_ctx, args.threads)
+    llm = Llama(model_path=args.model, n_ctx=args.n_ctx, n_threads=args.threads, n_gpu_layers=0,
+                verbose=False, **kwargs)
+
+    # 첫 호출 비용 제외
+    measure(llm, prompts[0], 8, args.temperature)
+    runs = [measure(llm, prompt, args.max_tokens, args.temperature) for prompt in prompts]
+    tokens = sum(r["tokens"] for r in runs)
+    decode_s = sum(r["decode_s"] for r in runs)
+    del llm
+    return {
+        "mode": mode,
+        "tokens": tokens,
+        "decode_tps": (tokens - len(runs)) / decode_s if decode_s else 0.0,
+        "ttft_p50_s": statistics.median(r["ttft_s"] for r in runs),
+        "texts": [r["text"] for r in runs],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speculative decoding CPU benchmark")
+    parser.add_argument("--model", required=True, help="GGUF model path")
+    parser.add_argument("--modes", default="off,prompt_lookup", help="Comma separated: off,prompt_lookup,draft")
+    parser.add_argument("--draft-model", help="Draft GGUF (same tokenizer) for --modes draft")
+    parser.add_argument("--num-pred-tokens", type=int, default=10)
+    parser.add_argument("--max-ngram-size", type=int, default=2)
+    parser.add_argument("--n-ctx", type=int, default=4096)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--questions", type=int, default=len(PMS_QUESTIONS))
+    parser.add_argument("--max-tokens", type=int, default=192)
+    parser.add_argument("--temperature", type=float, default=0.0, help="0이면 greedy (출력 동일성 확인)")
+    parser.add_argument("--rag", action="store_true", help="Neo4j에서 질문별 문서 검색")
+    parser.add_argument("--docs-file", help="모든 질문에 붙일 문서 (JSON 문자열 목록)")
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    if "draft" in modes and not args.draft_model:
+        parser.error("--modes draft requires --draft-model")
+
+    questions = PMS_QUESTIONS[:args.questions]
+    docs = load_docs(questions, args.rag, args.docs_file, args.top_k)
+    prompts = [build_prompt(q, docs[q]) for q in questions]
+    logger.info("%d prompts, %.1f docs/prompt", len(prompts), statistics.mean(len(d) for d in docs.values()))
+
+    results = []
+    for mode in modes:
+        logger.info("=" * 60)
+        logger.info("mode=%s", mode)
+        result = run_mode(mode, args, prompts)
+        results.append(result)
+        logger.info("  %.1f decode tokens/s, TTFT p50 %.2fs", result["decode_tps"], result["ttft_p50_s"])
+
+    baseline = results[0]
+    print()
+    print(f"{'mode':>14} {'tokens':>8} {'decode tok/s':>13} {'speedup':>8} {'TTFT p50':>9} {'same output':>12}")
+    for r in results:
+        same = sum(a == b for a, b in zip(r["texts"], baseline["texts"]))
+        print(f"{r['mode']:>14} {r['tokens']:>8} {r['decode_tps']:>13.1f} "
+              f"{r['decode_tps'] / (baseline['decode_tps'] or 1.0):>7.2f}x {r['ttft_p50_s']:>8.2f}s "
+              f"{same:>5}/{len(r['texts'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Llama 워커 풀 처리량 벤치마크
+레플리카 수를 바꿔가며 동일한 총 스레드 예산에서 전체 tokens/sec가 어떻게 늘어나는지 측정합니다.
+
+예시:
+    python benchmarks/bench_worker_pool.py --model ./models/google.gemma-3-12b-pt.Q5_K_M.gguf \
+        --replicas 1,2,4,8 --total-threads 32 --requests 32 --max-tokens 128
+"""
+
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from llama_worker_pool import LlamaWorkerPool  # noqa: E402
+from pms_questions import PMS_QUESTIONS  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def build_prompt(question: str) -> str:
+    return (
+        "<|im_start|>system\n당신은 프로젝트 관리 시스템(PMS) 전용 한국어 AI 에이전트입니다.\n<|im_end|>\n"
+        f"<|im_start|>user\n{question}\n<|im_end|>\n<|im_start|>assistant"
+    )
+
+
+def run_round(pool: LlamaWorkerPool, requests: int, max_tokens: int) -> dict:
+    """레플리카 수만큼 동시에 요청을 보내고 처리량 측정"""
+    prompts = [build_prompt(PMS_QUESTIONS[i % len(PMS_QUESTIONS)]) for i in range(requests)]
+
+    def call(prompt: str) -> int:
+        response = pool(prompt, max_tokens=max_tokens, temperature=0.7, top_p=0.9,
+                        stop=["<|im_end|>"], echo=False)
+        return response.get("usage", {}).get("completion_tokens", 0)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        completion_tokens = sum(executor.map(call, prompts))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "completion_tokens": completion_tokens,
+        "elapsed_s": elapsed,
+        "tokens_per_s": completion_tokens / elapsed if elapsed else 0.0,
+        "requests_per_min": requests / elapsed * 60 if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Llama worker pool throughput benchmark")
+    parser.add_argument("--model", required=True, help="GGUF model path")
+    parser.add_argument("--replicas", default="1,2,4", help="Comma separated replica counts")
+    parser.add_argument("--total-threads", type=int, default=32, help="Thread budget split across replicas")
+    parser.add_argument("--n-ctx", type=int, default=4096)
+    parser.add_argument("--requests", type=int, default=16, help="Requests per round")
+    parser.add_argument("--max-tokens", type=int, default=128)
+    args = parser.parse_args()
+
+    results = []
+    for replicas in [int(r) for r in args.replicas.split(",")]:
+        threads = max(1, args.total_threads // replicas)
+        logger.info("=" * 60)
+        logger.info("replicas=%d, threads/replica=%d", replicas, threads)
+        pool = LlamaWorkerPool(
+            args.model,
+            replicas=replicas,
+            llama_kwargs={"n_ctx": args.n_ctx, "n_threads": threads, "n_gpu_layers": 0, "verbose": False},
+        )
+        try:
+            # 첫 호출 비용 제외
+            run_round(pool, pool.size, 8)
+            result = run_round(pool, args.requests, args.max_tokens)
+        finally:
+            pool.close()
+        result.update({"replicas": replicas, "threads_per_replica": threads})
+        results.append(result)
+        logger.info("  %.1f tokens/s, %.1f req/min", result["tokens_per_s"], result["requests_per_min"])
+
+    baseline = results[0]["tokens_per_s"] or 1.0
+    print()
+    print(f"{'replicas':>8} {'threads':>8} {'tokens':>8} {'elapsed_s':>10} {'tok/s':>8} {'speedup':>8}")
+    for r in results:
+        print(f"{r['replicas']:>8} {r['threads_per_replica']:>8} {r['completion_tokens']:>8} "
+              f"{r['elapsed_s']:>10.1f} {r['tokens_per_s']:>8.1f} {r['tokens_per_s'] / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
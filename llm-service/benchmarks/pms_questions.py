@@ -0,0 +1,22 @@
+"""
+벤치마크 공통 한국어 PMS 질문 세트
+"""
+
+PMS_QUESTIONS = [
+    "스크럼 스프린트 계획은 어떻게 진행하나요?",
+    "XP 핵심 프랙티스에는 어떤 것들이 있나요?",
+    "칸반 보드의 WIP 제한은 왜 필요한가요?",
+    "플래닝 포커로 스토리 포인트를 추정하는 방법을 알려주세요.",
+    "프로젝트 리스크 관리 프로세스를 단계별로 설명해주세요.",
+    "스프린트 회고에서 다뤄야 할 내용은 무엇인가요?",
+    "일정 지연 이슈가 발생했을 때 대응 절차는?",
+    "애자일과 폭포수 방법론의 차이점은?",
+    "제품 백로그 우선순위는 어떤 기준으로 정하나요?",
+    "소프트웨어 테스팅 방법론에는 어떤 것들이 있나요?",
+    "데일리 스크럼의 목적과 진행 방식은?",
+    "번다운 차트를 해석하는 방법을 알려주세요.",
+    "산출물 승인 절차는 어떻게 되나요?",
+    "프로젝트 예산 초과를 방지하려면 어떻게 해야 하나요?",
+    "요구사항 변경 관리 절차를 설명해주세요.",
+    "단계 게이트(Phase Gate) 검토 항목은 무엇인가요?",
+]
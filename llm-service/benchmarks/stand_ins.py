@@ -0,0 +1,280 @@
+"""
+부하 테스트용 로컬 대역 (12B 모델과 Neo4j 없이 app.py를 띄우기 위한 것)
+
+- StubLlama: LlamaWorkerPool과 같은 인터페이스(__call__, complete_with_prefix, tokenize/detokenize, n_ctx)로
+  prefill/decode 속도만 흉내 냄. 실제 Llama처럼 한 번에 하나의 생성만 실행
+- FakeRAGService: RAGServiceNeo4j와 같은 메서드를 가진 메모리 검색 서비스.
+  해시 기반 n-gram 임베딩이라 같은/비슷한 질문은 같은 문서와 답변 캐시 항목에 걸림
+"""
+
+import hashlib
+import math
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from embedding_cache import EmbeddingCache
+
+STUB_ANSWER = (
+    "스프린트 계획 회의에서는 제품 책임자가 우선순위가 높은 백로그 항목을 설명하고, "
+    "개발팀이 이번 스프린트에서 완료할 수 있는 범위를 추정해 스프린트 목표를 정합니다. "
+    "이후 각 항목을 작업 단위로 나누고 담당자와 완료 기준을 확인합니다. "
+    "진행 상황은 데일리 스크럼과 번다운 차트로 점검하며, 위험 요소는 즉시 공유합니다. "
+)
+
+# 토큰 하나에 담을 UTF-8 바이트 수 (한글 한 글자 ≈ 토큰 하나)
+_BYTES_PER_TOKEN = 3
+
+
+class StubLlama:
+    """속도를 조절할 수 있는 가짜 Llama
+
+    Args:
+        token_rate: decode 속도 (tokens/sec)
+        prefill_rate: prompt eval 속도 (tokens/sec, 0이면 prefill 시간 없음)
+        n_ctx: 컨텍스트 길이 (prompt_budget 패킹에 사용)
+        answer: 생성할 텍스트 (max_tokens에 맞춰 반복/절단)
+    """
+
+    def __init__(self, token_rate: float = 20.0, prefill_rate: float = 400.0, n_ctx: int = 4096,
+                 answer: str = STUB_ANSWER):
+        self.token_rate = token_rate
+        self.prefill_rate = prefill_rate
+        self._n_ctx = n_ctx
+        self._answer_tokens = self.tokenize(answer.encode("utf-8"))
+        # 실제 Llama 컨텍스트처럼 생성은 한 번에 하나
+        self._lock = threading.Lock()
+
+    def tokenize(self, text: bytes, add_bos: bool = True, special: bool = False) -> List[int]:
+        """UTF-8 바이트를 3바이트씩 묶은 가역 토큰 (detokenize로 원문 복원)"""
+        return [
+            (len(piece) << 24) | int.from_bytes(piece, "big")
+            for piece in (text[i:i + _BYTES_PER_TOKEN] for i in range(0, len(text), _BYTES_PER_TOKEN))
+        ]
+
+    def detokenize(self, tokens: List[int]) -> bytes:
+        return b"".join((token & 0xFFFFFF).to_bytes(token >> 24, "big") for token in tokens)
+
+    def n_ctx(self) -> int:
+        return self._n_ctx
+
+    def reset(self):
+        pass
+
+    def __call__(self, prompt: str, **kwargs):
+        response, _ = self.complete_with_prefix(prompt, None, **kwargs)
+        return response
+
+    def complete_with_prefix(self, prompt: str, prefix: Optional[str], **kwargs) -> Tuple[Any, Dict[str, Any]]:
+        """prompt_cache.complete_with_prefix_cache와 같은 반환 형식 (stream=True이면 청크 이터레이터)"""
+        stats: Dict[str, Any] = {"prefix_status": "stub", "prefix_tokens": 0}
+        generator = self._generate(prompt, kwargs, stats)
+        if kwargs.get("stream"):
+            return generator, stats
+        pieces = list(generator)
+        text = "".join(chunk["choices"][0]["text"] for chunk in pieces)
+        finish_reason = pieces[-1]["choices"][0]["finish_reason"] if pieces else "stop"
+        return {
+            "id": f"cmpl-{uuid.uuid4().hex}",
+            "object": "text_completion",
+            "created": int(time.time()),
+            "model": "stub",
+            "choices": [{"text": text, "index": 0, "logprobs": None, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": stats["prompt_tokens"],
+                "completion_tokens": stats["completion_tokens"],
+                "total_tokens": stats["prompt_tokens"] + stats["completion_tokens"],
+            },
+        }, stats
+
+    def _generate(self, prompt: str, kwargs: Dict[str, Any], stats: Dict[str, Any]) -> Iterator[dict]:
+        max_tokens = kwargs.get("max_tokens") or 256
+        stopping = kwargs.get("stopping_criteria")
+        criteria: List[Callable] = list(stopping) if isinstance(stopping, (list, tuple)) else (
+            [stopping] if stopping is not None else [])
+        prompt_tokens = len(self.tokenize(prompt.encode("utf-8")))
+        stats["prompt_tokens"] = prompt_tokens
+
+        with self._lock:
+            started = time.perf_counter()
+            if self.prefill_rate > 0:
+                time.sleep(prompt_tokens / self.prefill_rate)
+            prefill_done = time.perf_counter()
+
+            produced = 0
+            finish_reason = "length"
+            pending = b""
+            try:
+                while produced < max_tokens:
+                    if any(criterion(None, None) for criterion in criteria):
+                        finish_reason = "stop"
+                        break
+                    if self.token_rate > 0:
+                        time.sleep(1.0 / self.token_rate)
+                    token = self._answer_tokens[produced % len(self._answer_tokens)]
+                    produced += 1
+                    # 토큰 경계가 글자 중간이면 다음 토큰과 합쳐서 내보냄
+                    pending += self.detokenize([token])
+                    try:
+                        text = pending.decode("utf-8")
+                    except UnicodeDecodeError:
+                        continue
+                    pending = b""
+                    yield {"choices": [{"text": text, "index": 0, "logprobs": None, "finish_reason": None}]}
+                yield {"choices": [{"text": pending.decode("utf-8", errors="ignore"), "index": 0,
+                                    "logprobs": None, "finish_reason": finish_reason}]}
+            finally:
+                finished = time.perf_counter()
+                stats.update({
+                    "completion_tokens": produced,
+                    "prompt_eval_tokens": prompt_tokens,
+                    "prompt_eval_ms": round((prefill_done - started) * 1000, 1),
+                    "eval_tokens": produced,
+                    "eval_ms": round((finished - prefill_done) * 1000, 1),
+                    "total_ms": round((finished - started) * 1000, 1),
+                })
+
+
+def hash_embedding(text: str, dim: int = 384) -> List[float]:
+    """글자 bigram 해시 임베딩 (정규화, 비슷한 문장일수록 코사인 유사도가 높음)"""
+    vector = [0.0] * dim
+    text = text.lower()
+    for i in range(max(len(text) - 1, 1)):
+        digest = hashlib.md5(text[i:i + 2].encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class FakeRAGService:
+    """RAGServiceNeo4j의 메모리 대역
+
+    Args:
+        search_latency_ms: 검색 한 번에 더할 지연 (Neo4j 왕복 흉내)
+        embed_latency_ms: encode 호출 한 번에 더할 지연
+        chunk_chars: add_document가 자르는 청크 길이
+    """
+
+    def __init__(self, search_latency_ms: float = 20.0, embed_latency_ms: float = 5.0, chunk_chars: int = 500,
+                 embedding_dim: int = 384):
+        self.search_latency_ms = search_latency_ms
+        self.embed_latency_ms = embed_latency_ms
+        self.chunk_chars = chunk_chars
+        self.embedding_dim = embedding_dim
+        self._chunks: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._write_listeners: List[Callable[[str, str], None]] = []
+        # 디스크 임베딩 캐시 없음 (health/stats에는 꺼진 캐시로 보임)
+        self.embedding_cache = EmbeddingCache(enabled=False)
+
+    # 시작 단계 훅 (RAGServiceNeo4j와 같은 이름, 할 일 없음)
+    def load_embedding_model(self):
+        pass
+
+    def load_parser(self):
+        pass
+
+    def initialize_database(self):
+        pass
+
+    def warmup(self):
+        pass
+
+    def add_write_listener(self, listener: Callable[[str, str], None]):
+        if listener not in self._write_listeners:
+            self._write_listeners.append(listener)
+
+    def embed_query(self, query: str) -> List[float]:
+        time.sleep(self.embed_latency_ms / 1000)
+        return hash_embedding(query, self.embedding_dim)
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        time.sleep(self.embed_latency_ms / 1000)
+        return [hash_embedding(query, self.embedding_dim) for query in queries]
+
+    def resolve_graph_expansion(self, query: str, filter_metadata: Optional[Dict] = None,
+                                use_graph_expansion: bool = True) -> bool:
+        return use_graph_expansion
+
+    def add_document(self, document: Dict[str, Any], progress: Optional[Callable] = None) -> bool:
+        report = progress or (lambda stage, **counts: None)
+        doc_id, content = document.get("id"), document.get("content")
+        if not doc_id or not content:
+            report("failed", error="Document must have 'id' and 'content'")
+            return False
+        report("parse")
+        pieces = [content[i:i + self.chunk_chars] for i in range(0, len(content), self.chunk_chars)]
+        report("chunk", blocks=len(pieces))
+        report("embed", chunks=len(pieces), embedded=0)
+        metadata = document.get("metadata", {})
+        chunks = [{
+            "chunk_id": f"{doc_id}_chunk_{i}",
+            "content": piece,
+            "embedding": hash_embedding(piece, self.embedding_dim),
+            "metadata": {"doc_id": doc_id, "title": metadata.get("title"), "chunk_index": i,
+                         "category": metadata.get("category"), "doc_title": metadata.get("title")},
+        } for i, piece in enumerate(pieces)]
+        report("embed", embedded=len(chunks))
+        with self._lock:
+            self._chunks = [c for c in self._chunks if c["metadata"]["doc_id"] != doc_id] + chunks
+        report("write", written=len(chunks))
+        self._notify_write(doc_id, "add")
+        return True
+
+    def add_documents(self, documents: List[Dict[str, Any]]) -> int:
+        return sum(1 for document in documents if self.add_document(document))
+
+    def delete_document(self, doc_id: str) -> bool:
+        with self._lock:
+            before = len(self._chunks)
+            self._chunks = [c for c in self._chunks if c["metadata"]["doc_id"] != doc_id]
+            deleted = len(self._chunks) < before
+        if deleted:
+            self._notify_write(doc_id, "delete")
+        return deleted
+
+    def search(self, query: str, top_k: int = 3, filter_metadata: Optional[Dict] = None,
+               use_graph_expansion: bool = True, timeout: Optional[float] = None) -> List[Dict]:
+        return self._rank(self.embed_query(query), top_k, filter_metadata)
+
+    def search_batch(self, queries: List[str], top_k: int = 3, filter_metadata: Optional[Dict] = None,
+                     embeddings: Optional[List[List[float]]] = None) -> List[List[Dict]]:
+        if embeddings is None:
+            embeddings = self.embed_queries(queries)
+        time.sleep(self.search_latency_ms / 1000)
+        return [self._rank(embedding, top_k, filter_metadata, sleep=False) for embedding in embeddings]
+
+    def _rank(self, embedding: List[float], top_k: int, filter_metadata: Optional[Dict],
+              sleep: bool = True) -> List[Dict]:
+        if sleep:
+            time.sleep(self.search_latency_ms / 1000)
+        with self._lock:
+            chunks = list(self._chunks)
+        if filter_metadata and "category" in filter_metadata:
+            chunks = [c for c in chunks if c["metadata"].get("category") == filter_metadata["category"]]
+        scored = sorted(
+            ((sum(a * b for a, b in zip(embedding, c["embedding"])), c) for c in chunks),
+            key=lambda item: item[0], reverse=True,
+        )[:top_k]
+        return [{
+            "chunk_id": c["chunk_id"],
+            "content": c["content"],
+            "metadata": dict(c["metadata"]),
+            "distance": 1 - score,
+            # 해시 임베딩의 유사도는 낮게 나오므로 워크플로우의 관련도 필터(0.3)를 넘도록 보정
+            "relevance_score": min(1.0, 0.5 + score),
+        } for score, c in scored]
+
+    def get_collection_stats(self) -> Dict:
+        with self._lock:
+            doc_ids = {c["metadata"]["doc_id"] for c in self._chunks}
+            chunk_count = len(self._chunks)
+        return {"vector_db": "fake", "graph_db": "fake", "status": "available",
+                "total_documents": len(doc_ids), "total_chunks": chunk_count,
+                "vector_size": self.embedding_dim, "categories": [], "graph_rag_enabled": False}
+
+    def _notify_write(self, doc_id: str, action: str):
+        for listener in self._write_listeners:
+            listener(doc_id, action)
@@ -3,11 +3,20 @@ LangGraph 기반 채팅 워크플로우
 RAG와 일반 LLM을 지능적으로 라우팅
 """
 
-from typing import TypedDict, Literal, List, Optional, Union
+from typing import TypedDict, Literal, List, Dict, Optional, Union, Iterator, Tuple
 from langgraph.graph import StateGraph, END
 from llama_cpp import Llama
+from answer_cache import get_answer_cache
+from deadline import DEADLINE_EXCEEDED_REPLY, DEADLINE_REFINE_MIN_MS, Deadline
+from prompt_budget import PackedPrompt, PromptPacker
+from prompt_cache import complete_with_prefix_cache
+from response_cleaner import ResponseCleaner, clean_response
+import metrics
+import request_timings
+from session_store import ChatSession, TURN_END, complete_with_session, session_transcript
+import copy
 import logging
-import re
+import time
 
 # RAG 서비스 임포트 (타입 호환성)
 try:
@@ -20,6 +29,9 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# LLM 생성 시 공통 정지 토큰
+STOP_TOKENS = ["<end_of_turn>", "<start_of_turn>", "</s>", "<|im_end|>"]
+
 
 # 상태 스키마 정의
 class ChatState(TypedDict):
@@ -28,6 +40,7 @@ class ChatState(TypedDict):
     context: List[dict]  # 대화 컨텍스트
     intent: Optional[str]  # 의도 분류 결과 (casual, pms_query, general)
     retrieved_docs: List[str]  # RAG 검색 결과
+    doc_scores: List[float]  # retrieved_docs별 relevance_score (요청으로 전달된 문서는 비어 있음)
     response: Optional[str]  # 최종 응답
     confidence: float  # 응답 신뢰도
     debug_info: dict  # 디버깅 정보
@@ -37,6 +50,15 @@ class ChatState(TypedDict):
     retry_count: int  # 재시도 횟수
     extracted_terms: List[str]  # 추출된 핵심 용어
 
+    # 서버 측 세션 (없으면 context로 전달된 히스토리만 사용)
+    session: Optional[ChatSession]
+
+    # 배치 요청에서 미리 검색해 둔 첫 검색 결과 (없으면 rag_search_node에서 검색)
+    prefetched_results: Optional[List[Dict]]
+
+    # 요청 제한 시간/취소 상태 (검색 타임아웃, 재시도 생략, 생성 중단에 사용)
+    deadline: Deadline
+
 
 class ChatWorkflow:
     """LangGraph 기반 채팅 워크플로우"""
@@ -45,21 +67,36 @@ class ChatWorkflow:
         self.llm = llm
         self.rag_service = rag_service
         self.model_path = model_path
+        # n_ctx 안에 시스템 프롬프트/히스토리/문서/답변 자리를 나눔
+        self.prompt_packer = PromptPacker(llm)
         self.graph = self._build_graph()
+        # 스트리밍용: 응답 생성 직전까지만 실행하는 그래프
+        self.retrieval_graph = self._build_graph(include_generation=False)
+        # 반복 질문용 의미 기반 답변 캐시 (문서가 바뀌면 해당 문서로 만든 답변 무효화)
+        self.answer_cache = get_answer_cache()
+        if rag_service is not None and hasattr(rag_service, "add_write_listener"):
+            rag_service.add_write_listener(self.answer_cache.invalidate_document)
+
+    def _build_graph(self, include_generation: bool = True) -> StateGraph:
+        """워크플로우 그래프 구축 (RAG 우선 접근 + 쿼리 개선 루프)
 
-    def _build_graph(self) -> StateGraph:
-        """워크플로우 그래프 구축 (RAG 우선 접근 + 쿼리 개선 루프)"""
+        Args:
+            include_generation: False이면 generate_response 노드 없이
+                검색/검증 단계까지만 실행 (스트리밍 엔드포인트에서 사용)
+        """
 
         # 그래프 초기화
         workflow = StateGraph(ChatState)
 
         # 노드 추가
-        workflow.add_node("classify_intent_simple", self.classify_intent_simple_node)
-        workflow.add_node("rag_search", self.rag_search_node)
-        workflow.add_node("verify_rag_quality", self.verify_rag_quality_node)  # ✨ 새 노드
-        workflow.add_node("refine_query", self.refine_query_node)              # ✨ 새 노드
-        workflow.add_node("refine_intent", self.refine_intent_node)
-        workflow.add_node("generate_response", self.generate_response_node)
+        workflow.add_node("classify_intent_simple", self._instrument("classify_intent_simple", self.classify_intent_simple_node))
+        workflow.add_node("rag_search", self._instrument("rag_search", self.rag_search_node))
+        workflow.add_node("verify_rag_quality", self._instrument("verify_rag_quality", self.verify_rag_quality_node))  # ✨ 새 노드
+        workflow.add_node("refine_query", self._instrument("refine_query", self.refine_query_node))                    # ✨ 새 노드
+        workflow.add_node("refine_intent", self._instrument("refine_intent", self.refine_intent_node))
+        if include_generation:
+            workflow.add_node("generate_response", self._instrument("generate_response", self.generate_response_node))
+        generation_target = "generate_response" if include_generation else END
 
         # 엔트리 포인트 설정
         workflow.set_entry_point("classify_intent_simple")
@@ -69,7 +106,7 @@ class ChatWorkflow:
             "classify_intent_simple",
             self.route_by_simple_intent,
             {
-                "casual": "generate_response",  # 명확한 인사 → 바로 응답
+                "casual": generation_target,  # 명확한 인사 → 바로 응답
                 "uncertain": "rag_search"        # 나머지 → RAG 검색
             }
         )
@@ -91,13 +128,26 @@ class ChatWorkflow:
         workflow.add_edge("refine_query", "rag_search")
 
         # 의도 재분류 → 응답 생성
-        workflow.add_edge("refine_intent", "generate_response")
+        workflow.add_edge("refine_intent", generation_target)
 
         # 응답 생성 후 종료
-        workflow.add_edge("generate_response", END)
+        if include_generation:
+            workflow.add_edge("generate_response", END)
 
         return workflow.compile()
 
+    @staticmethod
+    def _instrument(name: str, node):
+        """노드 실행 시간/오류를 메트릭과 요청별 timings에 기록하는 래퍼"""
+        def run(state: ChatState) -> ChatState:
+            try:
+                with metrics.WORKFLOW_NODE_DURATION.time(node=name), request_timings.span(name, node=True):
+                    return node(state)
+            except Exception:
+                metrics.WORKFLOW_NODE_ERRORS.inc(node=name)
+                raise
+        return run
+
     def classify_intent_simple_node(self, state: ChatState) -> ChatState:
         """노드 1: 간단한 의도 분류 (명확한 인사말만 처리)"""
         message = state["message"]
@@ -105,7 +155,7 @@ class ChatWorkflow:
         logger.info(f"Simple classification for message: {message[:50]}...")
 
         # 명확한 인사말만 분류
-        intent = self._classify_casual_only(message)
+        intent = self.classify_casual_only(message)
 
         state["intent"] = intent
         state["debug_info"] = state.get("debug_info", {})
@@ -115,7 +165,7 @@ class ChatWorkflow:
 
         return state
 
-    def _classify_casual_only(self, message: str) -> str:
+    def classify_casual_only(self, message: str) -> str:
         """명확한 인사말만 분류 (나머지는 uncertain)"""
         message_lower = message.lower()
 
@@ -179,10 +229,27 @@ class ChatWorkflow:
             state["debug_info"]["rag_docs_count"] = len(state["retrieved_docs"])
             return state
 
+        deadline = state["deadline"]
+        prefetched = state.get("prefetched_results")
+        if self.rag_service and deadline.expired() and not (prefetched is not None and retry_count == 0):
+            # 남은 시간이 없으면 검색하지 않음 (generate_response_node가 제한 시간 초과 응답을 반환)
+            logger.warning("  ⏱️ Deadline exceeded before RAG search, skipping")
+            deadline.skip("rag_search")
+            metrics.DEADLINE_EXCEEDED.inc(stage="rag_search")
+            state["retrieved_docs"] = []
+            state["doc_scores"] = []
+            return state
+
         if self.rag_service:
             try:
-                # 항상 메타데이터 필터 없이 검색 (범위를 넓게)
-                results = self.rag_service.search(search_query, top_k=5, filter_metadata=None)
+                if prefetched is not None and retry_count == 0:
+                    # /api/chat/batch에서 질문들을 한 번에 검색해 둔 결과 사용
+                    results = prefetched
+                    state["debug_info"]["rag_prefetched"] = True
+                else:
+                    # 항상 메타데이터 필터 없이 검색 (범위를 넓게), 남은 시간을 Neo4j 트랜잭션 타임아웃으로
+                    results = self.rag_service.search(search_query, top_k=5, filter_metadata=None,
+                                                      timeout=deadline.remaining())
                 logger.info(f"  📋 RAG service returned {len(results)} results")
 
                 # 유사도 점수 필터링 (relevance_score < 0.3은 제외)
@@ -199,6 +266,19 @@ class ChatWorkflow:
                 # 추가 토큰 필터링
                 retrieved_docs = self._filter_docs_by_query(search_query, retrieved_docs)
 
+                # 프롬프트 패킹 시 낮은 점수의 문서부터 빼도록 점수 보관
+                scores = {}
+                for doc in filtered_results:
+                    scores.setdefault(doc['content'], doc.get('relevance_score', 0))
+                state["doc_scores"] = [scores[doc] for doc in retrieved_docs]
+
+                # 답변 캐시 무효화를 위해 답변 근거 문서/청크 ID 기록
+                kept = set(retrieved_docs)
+                state["debug_info"]["rag_sources"] = [
+                    {"doc_id": doc.get("metadata", {}).get("doc_id"), "chunk_id": doc.get("chunk_id")}
+                    for doc in filtered_results if doc.get("content") in kept
+                ]
+
                 state["retrieved_docs"] = retrieved_docs
                 state["debug_info"]["rag_docs_count"] = len(retrieved_docs)
                 state["debug_info"][f"search_query_attempt_{retry_count}"] = search_query
@@ -208,6 +288,7 @@ class ChatWorkflow:
             except Exception as e:
                 logger.error(f"❌ RAG search failed: {e}", exc_info=True)
                 state["retrieved_docs"] = []
+                state["doc_scores"] = []
                 state["debug_info"]["rag_error"] = str(e)
         else:
             logger.warning("RAG service not available")
@@ -276,10 +357,22 @@ class ChatWorkflow:
         # 품질이 충분하거나 최대 재시도 횟수 도달 시 진행
         if quality_score >= 0.6 or retry_count >= MAX_RETRIES:
             logger.info(f"  ✅ Proceeding to next step")
+            metrics.RAG_ROUTING_DECISIONS.inc(decision="proceed")
+            return "proceed"
+
+        # 남은 시간이 부족하면 재시도하지 않고 지금 문서로 답변 생성
+        deadline = state["deadline"]
+        if not deadline.allows(DEADLINE_REFINE_MIN_MS / 1000):
+            logger.info(f"  ⏱️ Skipping query refinement, remaining={deadline.remaining()}s")
+            deadline.skip("refine_query")
+            metrics.RAG_ROUTING_DECISIONS.inc(decision="deadline")
+            metrics.DEADLINE_EXCEEDED.inc(stage="refine_query")
             return "proceed"
 
         # 품질이 낮고 재시도 가능하면 쿼리 개선
         logger.info(f"  🔄 Refining query (attempt {retry_count + 1})")
+        metrics.RAG_ROUTING_DECISIONS.inc(decision="refine")
+        metrics.RAG_RETRIES.inc()
         return "refine"
 
     def refine_query_node(self, state: ChatState) -> ChatState:
@@ -403,13 +496,91 @@ class ChatWorkflow:
 
     def generate_response_node(self, state: ChatState) -> ChatState:
         """노드 4: 응답 생성"""
-        message = state["message"]
-        context = state.get("context", [])
         retrieved_docs = state.get("retrieved_docs", [])
         intent = state.get("intent", "general")
 
         logger.info(f"💬 Generating response: intent={intent}, rag_docs={len(retrieved_docs)}")
 
+        deadline = state["deadline"]
+        if deadline.expired():
+            state["response"] = self._deadline_reply(deadline)
+            state["confidence"] = 0.0
+            state["debug_info"]["prompt_length"] = 0
+            return state
+
+        direct = self._direct_reply(state)
+        if direct is not None:
+            reply, confidence = direct
+            state["response"] = reply
+            state["confidence"] = confidence
+            state["debug_info"]["prompt_length"] = 0
+            if state.get("session") is not None:
+                state["session"].append_turn(state["message"], reply)
+            return state
+
+        # RAG 문서 있음 → LLM으로 답변 생성
+        logger.info(f"  → Generating LLM response with {len(retrieved_docs)} RAG docs")
+        session = state.get("session")
+        transcript = session_transcript(self.llm, session) if session is not None else None
+        packed = self._pack_prompt(state, transcript=transcript)
+        prompt = packed.prompt
+        generation_kwargs = self._generation_kwargs(packed.max_tokens, deadline)
+
+        try:
+            if session is not None:
+                # 세션 KV 스냅샷을 복원하고 새 턴만 평가
+                response, prompt_cache_stats = complete_with_session(
+                    self.llm, session, prompt, self._build_system_prefix(),
+                    model_key=self.model_path, **generation_kwargs
+                )
+            else:
+                # 시스템 프롬프트 접두부 KV를 재사용하고 나머지만 평가
+                response, prompt_cache_stats = complete_with_prefix_cache(
+                    self.llm, prompt, self._build_system_prefix(), **generation_kwargs
+                )
+            state["debug_info"]["prompt_cache"] = prompt_cache_stats
+            self._record_generation(prompt_cache_stats)
+            self._check_truncation(deadline, prompt_cache_stats)
+            raw_text = response["choices"][0]["text"]
+            reply = raw_text.strip()
+
+            # 원본 응답 로깅 (디버깅용)
+            logger.info(f"Raw model response: {repr(reply)}")
+
+            reply = self._finalize_reply(reply)
+            if deadline.truncated and not reply:
+                reply = DEADLINE_EXCEEDED_REPLY
+
+            if session is not None:
+                # KV에 실제로 평가된 원문 그대로 이어 붙여야 다음 턴에 접두부가 일치함
+                usage = response.get("usage") or {}
+                session.append_turn(
+                    state["message"], reply,
+                    transcript=prompt + raw_text.rstrip() + TURN_END,
+                    transcript_tokens=(usage.get("prompt_tokens") or 0) + (usage.get("completion_tokens") or 0),
+                )
+        except Exception as e:
+            logger.error(f"Response generation failed: {e}")
+            reply = "죄송합니다. 응답 생성 중 오류가 발생했습니다."
+            state["debug_info"]["generation_error"] = str(e)
+
+        # 신뢰도 계산
+        confidence = self._calculate_confidence(intent, retrieved_docs)
+
+        state["response"] = reply
+        state["confidence"] = confidence
+        state["debug_info"]["prompt_length"] = len(prompt)
+
+        logger.info(f"Response generated: {reply[:50]}... (confidence: {confidence})")
+
+        return state
+
+    def _direct_reply(self, state: ChatState) -> Optional[Tuple[str, float]]:
+        """LLM 호출 없이 바로 반환할 답변 (인사말, 범위 밖 질문, 모델 이름 질문)"""
+        message = state["message"]
+        intent = state.get("intent", "general")
+        retrieved_docs = state.get("retrieved_docs", [])
+
         # 1. 명확한 인사말 → 간단한 답변
         if intent == "casual":
             logger.info("  → Casual conversation, returning greeting")
@@ -417,11 +588,7 @@ class ChatWorkflow:
                 "안녕하세요! 저는 프로젝트 관리(PMS) 전문 AI 어시스턴트입니다. "
                 "프로젝트 일정, 리스크, 이슈, 애자일 방법론 등에 대해 물어보세요!"
             )
-            confidence = 0.9
-            state["response"] = reply
-            state["confidence"] = confidence
-            state["debug_info"]["prompt_length"] = 0
-            return state
+            return reply, 0.9
 
         # 2. RAG 문서 없음 → 범위 밖 질문
         if len(retrieved_docs) == 0:
@@ -430,92 +597,79 @@ class ChatWorkflow:
                 "죄송합니다. 해당 질문은 제가 가진 프로젝트 관리 지식 범위를 벗어납니다. "
                 "프로젝트 일정, 진척, 예산, 리스크, 이슈, 또는 애자일 방법론에 대해 질문해주세요."
             )
-            confidence = 0.7
-            state["response"] = reply
-            state["confidence"] = confidence
-            state["debug_info"]["prompt_length"] = 0
-            return state
-
-        # 3. RAG 문서 있음 → LLM으로 답변 생성
-        logger.info(f"  → Generating LLM response with {len(retrieved_docs)} RAG docs")
+            return reply, 0.7
 
-        # 프롬프트 구성
-        prompt = self._build_prompt(message, context, retrieved_docs, intent)
-
-        # 모델 이름 질문에 대한 사전 처리 (LLM 호출 전에 확인)
+        # 3. 모델 이름 질문 → LLM 호출을 건너뛰고 직접 답변
         original_message_lower = message.lower()
-        is_model_name_question = any(keyword in original_message_lower for keyword in 
+        is_model_name_question = any(keyword in original_message_lower for keyword in
                                     ["모델", "model", "이름", "name", "너는", "당신은", "너의", "당신의"])
-        
+
         logger.info(f"Checking model name question: message='{message}', is_model_name_question={is_model_name_question}")
-        
-        # 정확한 모델 이름 가져오기
+
+        if is_model_name_question:
+            correct_name = self._correct_model_name()
+            logger.info(f"Model name question detected, returning direct answer: {correct_name}")
+            return f"저는 {correct_name} 모델입니다.", self._calculate_confidence(intent, retrieved_docs)
+
+        return None
+
+    def _correct_model_name(self) -> str:
+        """모델 파일명으로부터 정확한 모델 이름 결정"""
         if self.model_path:
             import os
             model_file = os.path.basename(self.model_path)
             if "lfm2" in model_file.lower():
-                correct_name = "Llama Forge Model 2 (LFM2)"
+                return "Llama Forge Model 2 (LFM2)"
             elif "gemma" in model_file.lower():
-                correct_name = "Gemma 3"
-            else:
-                correct_name = "로컬 LLM"
-        else:
-            correct_name = "로컬 LLM"
-        
-        # 모델 이름 질문인 경우 LLM 호출을 건너뛰고 직접 답변
-        if is_model_name_question:
-            logger.info(f"Model name question detected, returning direct answer: {correct_name}")
-            reply = f"저는 {correct_name} 모델입니다."
-        else:
-            try:
-                # KV 캐시 초기화
-                self.llm.reset()
-
-                # LLM 추론
-                response = self.llm(
-                    prompt,
-                    max_tokens=8182,
-                    temperature=0.7,
-                    top_p=0.9,
-                    stop=["<end_of_turn>", "<start_of_turn>", "</s>", "<|im_end|>"],
-                    echo=False,
-                    repeat_penalty=1.1
-                )
-
-                reply = response["choices"][0]["text"].strip()
-
-                # 원본 응답 로깅 (디버깅용)
-                logger.info(f"Raw model response: {repr(reply)}")
-
-                # 후처리
-                reply = self._clean_response(reply)
-
-                # 클리닝 후 응답 로깅
-                logger.info(f"Cleaned response: {repr(reply)}")
-                
-                # 잘못된 모델 이름이 포함되어 있는지 추가 검증
-                wrong_names = ["니콜라스", "nicolas", "알렉스", "alex", "사라", "sara", 
-                              "gpt-4", "chatgpt", "claude", "gemini", "palm"]
-                reply_lower_check = reply.lower()
-                has_wrong_name = any(wrong in reply_lower_check for wrong in wrong_names)
-                
-                if has_wrong_name:
-                    logger.warning(f"Detected wrong model name in response, replacing with: {correct_name}")
-                    reply = f"저는 {correct_name} 모델입니다."
-            except Exception as e:
-                logger.error(f"Response generation failed: {e}")
-                reply = "죄송합니다. 응답 생성 중 오류가 발생했습니다."
-
-        # 신뢰도 계산
-        confidence = self._calculate_confidence(intent, retrieved_docs)
-
-        state["response"] = reply
-        state["confidence"] = confidence
-        state["debug_info"]["prompt_length"] = len(prompt)
-
-        logger.info(f"Response generated: {reply[:50]}... (confidence: {confidence})")
+                return "Gemma 3"
+        return "로컬 LLM"
+
+    def _generation_kwargs(self, max_tokens: int, deadline: Optional[Deadline] = None) -> dict:
+        """LLM 추론 파라미터
+
+        Args:
+            max_tokens: 프롬프트를 채우고 남은 컨텍스트에서 계산한 생성 토큰 수 (PromptPacker)
+            deadline: 요청 데드라인. 지나거나 취소되면 stopping_criteria가 다음 토큰에서 생성을 멈춤
+        """
+        kwargs = {
+            "max_tokens": max_tokens,
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "stop": STOP_TOKENS,
+            "echo": False,
+            "repeat_penalty": 1.1,
+        }
+        if deadline is not None:
+            kwargs["stopping_criteria"] = deadline.stopping_criteria()
+        return kwargs
+
+    @staticmethod
+    def _check_truncation(deadline: Deadline, stats: Dict):
+        """생성이 데드라인/취소로 멈췄는지 기록 (워커 풀 레플리카는 통계의 deadline_stopped로 알림)"""
+        if stats.get("deadline_stopped"):
+            deadline.mark_truncated()
+        if deadline.truncated:
+            logger.warning(f"⏱️ Generation stopped early ({deadline.reason}), "
+                           f"{stats.get('completion_tokens')} tokens generated")
+            metrics.DEADLINE_EXCEEDED.inc(stage="generation")
+
+    @staticmethod
+    def _deadline_reply(deadline: Deadline) -> str:
+        """생성 전에 이미 데드라인이 지났을 때의 응답"""
+        logger.warning(f"⏱️ Deadline exceeded before generation ({deadline.reason or 'deadline_exceeded'}), skipping LLM call")
+        deadline.skip("generation")
+        deadline.mark_truncated()
+        metrics.DEADLINE_EXCEEDED.inc(stage="generation")
+        return DEADLINE_EXCEEDED_REPLY
+
+    def _finalize_reply(self, reply: str) -> str:
+        """모델 원본 응답 후처리 및 잘못된 모델 이름 검증"""
+        reply = clean_response(reply, correct_model_name=self._correct_model_name())
+
+        # 클리닝 후 응답 로깅
+        logger.info(f"Cleaned response: {repr(reply)}")
 
-        return state
+        return reply
 
     def _filter_docs_by_query(self, message: str, retrieved_docs: List[str]) -> List[str]:
         """질문과 직접 관련된 문서만 남기는 간단한 필터"""
@@ -571,29 +725,8 @@ class ChatWorkflow:
 
         return filtered
 
-    def _build_prompt(self, message: str, context: List[dict],
-                     retrieved_docs: List[str], intent: str) -> str:
-        """프롬프트 구성"""
-
-        prompt_parts = []
-
-        tools_json_schema = "없음"
-        
-        # 현재 사용 중인 모델 정보 가져오기
-        model_name = "로컬 LLM"
-        if self.model_path:
-            # 파일명에서 모델 이름 추출
-            import os
-            model_file = os.path.basename(self.model_path)
-            if "gemma" in model_file.lower():
-                model_name = "Gemma 3"
-            elif "lfm2" in model_file.lower():
-                model_name = "Llama Forge Model 2 (LFM2)"
-            elif "llama" in model_file.lower():
-                model_name = "Llama 기반 모델"
-            else:
-                model_name = "로컬 LLM"
-        
+    def _build_system_prefix(self) -> str:
+        """시스템 프롬프트 접두부 (요청마다 동일하므로 KV 상태를 상주시켜 재사용)"""
         system_prompt = f"""당신은 프로젝트 관리 시스템(PMS) 전용 한국어 AI 에이전트입니다.
 역할: 일정/진척/예산/리스크/이슈/산출물/의사결정 등 프로젝트 관리 질문에 답하고, 필요한 경우 요약과 액션 아이템을 제안하세요.
 RAG 문서와 제공된 컨텍스트를 최우선으로 사용하고, 근거가 없으면 추측하지 말고 "모르겠습니다" 또는 확인 질문을 하세요.
@@ -602,12 +735,34 @@ RAG 문서와 제공된 컨텍스트를 최우선으로 사용하고, 근거가
 사용자의 질문에는 짧지 않게 답변하세요."""
 
         # LFM2 모델은 <|im_start|>와 <|im_end|> 토큰 사용
-        prompt_parts.append("<|im_start|>system")
-        prompt_parts.append(system_prompt)
-        prompt_parts.append("<|im_end|>")
+        return "\n".join(["<|im_start|>system", system_prompt, "<|im_end|>"])
+
+    def _pack_prompt(self, state: ChatState, transcript: Optional[str] = None) -> PackedPrompt:
+        """토큰 예산에 맞춰 히스토리/문서를 고른 프롬프트와 max_tokens (패킹 결과는 debug_info에 기록)"""
+        message = state["message"]
+        intent = state.get("intent", "general")
+        # 세션 transcript에는 히스토리가 이미 포함됨
+        context = [] if transcript is not None else state.get("context", [])[-5:]
+        with request_timings.span("prompt_pack"):
+            packed = self.prompt_packer.pack(
+                lambda history, docs: self._build_prompt(message, history, docs, intent, transcript=transcript),
+                context, state.get("retrieved_docs", []), state.get("doc_scores"),
+            )
+        state["debug_info"]["prompt_budget"] = packed.to_dict()
+        return packed
+
+    def _build_prompt(self, message: str, context: List[dict],
+                     retrieved_docs: List[str], intent: str, transcript: Optional[str] = None) -> str:
+        """프롬프트 구성
 
-        # 컨텍스트 메시지 (최근 5개)
-        for msg in context[-5:]:
+        Args:
+            transcript: 세션에서 이미 평가된 프롬프트 전문. 있으면 시스템 프롬프트와 히스토리 대신 사용
+        """
+
+        prompt_parts = [transcript if transcript is not None else self._build_system_prefix()]
+
+        # 컨텍스트 메시지 (최근 5개, 세션 transcript에는 이미 포함됨)
+        for msg in ([] if transcript is not None else context[-5:]):
             role = msg.get("role", "user")
             content = msg.get("content", "")
             if role == "user":
@@ -636,230 +791,6 @@ RAG 문서와 제공된 컨텍스트를 최우선으로 사용하고, 근거가
 
         return "\n".join(prompt_parts)
 
-    def _clean_response(self, reply: str) -> str:
-        """응답 정리"""
-
-        # Gemma 특수 토큰 제거
-        reply = reply.replace("<start_of_turn>", "").replace("<end_of_turn>", "")
-        # im_end 토큰 제거 (깨지는 문자 방지)
-        reply = reply.replace("<|im_end|>", "").replace("|im_end|>", "").replace("<|im_end", "")
-
-        # 삼중 따옴표로 감싸진 블록 제거 (모델 이름, 구분선, 질문 등 포함)
-        reply = re.sub(r"'''[\s\S]*?'''", "", reply)
-        reply = re.sub(r'"""[\s\S]*?"""', "", reply)
-        if reply.startswith("'''") or reply.startswith('"""'):
-            reply = reply[3:].lstrip()
-        if reply.endswith("'''") or reply.endswith('"""'):
-            reply = reply[:-3].rstrip()
-        
-        # 모델 이름과 구분선이 포함된 앞부분 제거
-        # 예: "Llama Forge Model 2 (LFM2)\n===\n질문내용"
-        reply = re.sub(r"^.*?(Llama Forge Model|Gemma|LFM2|로컬 LLM).*?\n=+\n.*?\n", "", reply, flags=re.MULTILINE | re.IGNORECASE)
-        reply = re.sub(r"^.*?=+\n.*?\n", "", reply, flags=re.MULTILINE)
-        
-        # 불필요한 role 레이블 제거
-        if reply.startswith("model"):
-            reply = reply[5:].strip()
-        if reply.startswith("assistant"):
-            reply = reply[9:].strip()
-
-        # 프롬프트 형식 태그 제거
-        reply = reply.replace("<think>", "")
-        reply = reply.replace("system", "")
-        reply = reply.replace("사용자:", "")
-        reply = reply.replace("user:", "")
-        reply = reply.replace("USER", "")
-        reply = reply.replace("_assistant", "")
-        reply = reply.replace("assistant", "")
-        
-        # "현재 질문에 대한 답변을 작성해 주세요" 같은 프롬프트 텍스트 제거
-        unwanted_patterns = [
-            "현재 질문에 대한 답변을 작성해 주세요",
-            "현재 질문에 대한 답변을 작성해주세요",
-            "답변을 작성해 주세요",
-            "답변을 작성해주세요",
-            "Please write an answer",
-            "Write an answer",
-            "답변은 3~6문장",
-            "핵심 정의",
-            "목적/배경",
-            "간단한 예시",
-        ]
-        
-        # 메타 설명 텍스트 제거 (뒤에 붙는 불필요한 설명)
-        meta_patterns = [
-            r"제공된 정보로.*?완벽하게 답변했습니다.*?",
-            r"제공된 정보로.*?답변했습니다.*?",
-            r"이제 사용자님의 요청대로.*?제공",
-            r"이제 사용자의 요청대로.*?제공",
-            r"사용자님의 요청대로.*?설명.*?제공",
-            r"사용자의 요청대로.*?설명.*?제공",
-            r"요청대로.*?한국어로.*?제공",
-            r"요청하신.*?한국어로.*?제공",
-        ]
-        for pattern in meta_patterns:
-            reply = re.sub(pattern, "", reply, flags=re.IGNORECASE | re.DOTALL)
-        
-        # 잘못된 모델 이름 필터링 (모델 이름 질문인 경우)
-        wrong_model_names = ["니콜라스", "nicolas", "알렉스", "alex", "사라", "sara", 
-                            "gpt-4", "chatgpt", "claude", "gemini", "palm", "gpt4"]
-        
-        # 정확한 모델 이름 가져오기
-        correct_name = "로컬 LLM"
-        if self.model_path:
-            import os
-            model_file = os.path.basename(self.model_path)
-            if "lfm2" in model_file.lower():
-                correct_name = "Llama Forge Model 2 (LFM2)"
-            elif "gemma" in model_file.lower():
-                correct_name = "Gemma 3"
-        
-        # 잘못된 모델 이름이 포함된 경우 강제로 교체
-        reply_lower = reply.lower()
-        found_wrong_name = False
-        for wrong_name in wrong_model_names:
-            if wrong_name.lower() in reply_lower:
-                found_wrong_name = True
-                # 정확한 모델 이름으로 완전히 교체
-                reply = f"저는 {correct_name} 모델입니다."
-                break
-        
-        # 모델 이름 관련 키워드가 있고, 정확한 모델 이름이 없는 경우
-        model_keywords = ["모델", "model", "이름", "name", "너는", "당신은", "너의", "당신의"]
-        has_model_keyword = any(keyword in reply_lower for keyword in model_keywords)
-        has_correct_name = any(correct in reply for correct in ["Llama", "Gemma", "로컬 LLM", "LFM2"])
-        
-        if has_model_keyword and not has_correct_name:
-            # 잘못된 답변이 나온 경우 강제 교체
-            reply = f"저는 {correct_name} 모델입니다."
-        for pattern in unwanted_patterns:
-            reply = reply.replace(pattern, "")
-            # 대소문자 구분 없이 제거
-            reply = re.sub(re.escape(pattern), "", reply, flags=re.IGNORECASE)
-
-        # assistant 접두어 정리
-        cleaned_lines = []
-        for line in reply.splitlines():
-            stripped = line.strip()
-            lower = stripped.lower()
-            
-            # 모델 이름과 구분선이 포함된 줄 제거
-            if re.search(r"(llama forge model|gemma|lfm2|로컬 llm).*?===", lower) or re.search(r"^=+$", stripped):
-                stripped = ""
-            # 삼중 따옴표로 시작하거나 끝나는 줄 제거
-            elif stripped.startswith("'''") or stripped.endswith("'''") or stripped.startswith('"""') or stripped.endswith('"""'):
-                stripped = ""
-            # 불필요한 패턴 제거
-            elif lower.startswith("assistant:") or lower.startswith("assistant："):
-                stripped = stripped.split(":", 1)[1].strip() if ":" in stripped else ""
-            elif lower == "assistant" or lower == "system" or lower == "user":
-                stripped = ""
-            elif stripped.startswith("사용자:") or stripped.startswith("사용자："):
-                stripped = ""
-            elif stripped.startswith("system") or stripped.startswith("user"):
-                stripped = ""
-            elif "<think>" in stripped.lower():
-                stripped = ""
-            elif any(pattern in stripped for pattern in unwanted_patterns):
-                stripped = ""
-            # 메타 설명 텍스트가 포함된 줄 제거
-            elif re.search(r"제공된 정보로.*?답변했습니다", lower) or re.search(r"이제 사용자.*?요청대로", lower) or re.search(r"요청.*?한국어로.*?제공", lower):
-                stripped = ""
-            
-            if stripped:
-                cleaned_lines.append(stripped)
-        
-        if cleaned_lines:
-            reply = "\n".join(cleaned_lines)
-        else:
-            # 모든 줄이 제거된 경우 원본에서 첫 번째 의미있는 줄만 사용
-            lines = reply.splitlines()
-            for line in lines:
-                stripped = line.strip()
-                if stripped and not any(unwanted in stripped.lower() for unwanted in ["system", "user", "assistant", "사용자", "<redacted"]):
-                    reply = stripped
-                    break
-
-        # 응답 앞부분에서 모델 이름과 구분선 제거
-        # 예: "Llama Forge Model 2 (LFM2)\n===\n질문내용\n\n답변내용" -> "답변내용"
-        lines = reply.splitlines()
-        start_idx = 0
-        for i, line in enumerate(lines):
-            stripped = line.strip()
-            # 모델 이름이나 구분선이 있는 줄은 건너뛰기
-            if re.search(r"(llama forge model|gemma|lfm2|로컬 llm)", stripped, re.IGNORECASE) or re.match(r"^=+$", stripped):
-                start_idx = i + 1
-            # 사용자 질문처럼 보이는 줄도 건너뛰기 (질문으로 끝나는 경우)
-            elif (stripped.endswith("?") or stripped.endswith("주세요") or stripped.endswith("해주세요")) and i < len(lines) - 1:
-                start_idx = i + 1
-            else:
-                break
-        
-        if start_idx > 0:
-            reply = "\n".join(lines[start_idx:]).strip()
-        
-        # 응답 뒷부분에서 메타 설명 제거
-        lines = reply.splitlines()
-        end_idx = len(lines)
-        for i in range(len(lines) - 1, -1, -1):
-            line = lines[i].strip()
-            # 메타 설명 패턴이 있으면 그 줄부터 끝까지 제거
-            if re.search(r"제공된 정보로.*?답변했습니다", line, re.IGNORECASE) or \
-               re.search(r"이제 사용자.*?요청대로", line, re.IGNORECASE) or \
-               re.search(r"요청.*?한국어로.*?제공", line, re.IGNORECASE) or \
-               re.search(r"완벽하게 답변했습니다", line, re.IGNORECASE):
-                end_idx = i
-                break
-        
-        if end_idx < len(lines):
-            reply = "\n".join(lines[:end_idx]).strip()
-
-        # 중복 응답 방지
-        if "<start_of_turn>" in reply:
-            reply = reply.split("<start_of_turn>")[0].strip()
-        
-        # im_end 토큰이 남아있으면 제거
-        if "<|im_end|>" in reply:
-            reply = reply.split("<|im_end|>")[0].strip()
-        if "|im_end|>" in reply:
-            reply = reply.split("|im_end|>")[0].strip()
-
-        # 과도하게 긴 응답 제한
-        if "\n\n\n" in reply:
-            reply = reply.split("\n\n\n")[0].strip()
-        
-        # 제어 문자 및 깨지는 문자 제거 (인코딩 문제 방지)
-        import string
-        # 인쇄 가능한 문자와 공백만 유지
-        printable_chars = set(string.printable)
-        # 한글, 한자, 일본어 등 유니코드 문자도 허용
-        cleaned_chars = []
-        for char in reply:
-            # 인쇄 가능한 ASCII 문자이거나, 유니코드 문자(한글 등)인 경우만 유지
-            if char in printable_chars or ord(char) > 127:
-                # 제어 문자 제거 (탭, 줄바꿈, 캐리지 리턴은 유지)
-                if ord(char) < 32 and char not in ['\n', '\r', '\t']:
-                    continue
-                cleaned_chars.append(char)
-        reply = ''.join(cleaned_chars)
-        
-        # 앞뒤 공백 정리
-        reply = reply.strip()
-        
-        # 응답 끝에 남은 불완전한 태그나 특수 문자 제거
-        # 예: "<", "<start", "<end", "<|" 등
-        while reply and reply[-1] in ['<', '>', '|']:
-            reply = reply[:-1].strip()
-        
-        # 불완전한 태그 패턴 제거 (끝부분에 남은 것들)
-        reply = re.sub(r'<[^>]*$', '', reply)  # 끝에 불완전한 태그 제거
-        reply = re.sub(r'\|[^>]*$', '', reply)  # 끝에 불완전한 토큰 제거
-        
-        # 다시 앞뒤 공백 정리
-        reply = reply.strip()
-
-        return reply
-
     def _calculate_confidence(self, intent: str, retrieved_docs: List[str]) -> float:
         """신뢰도 계산"""
 
@@ -876,14 +807,19 @@ RAG 문서와 제공된 컨텍스트를 최우선으로 사용하고, 근거가
 
         return round(base_confidence, 2)
 
-    def run(self, message: str, context: List[dict] = None, retrieved_docs: List[str] = None) -> dict:
-        """워크플로우 실행"""
-
-        initial_state: ChatState = {
+    def _initial_state(self, message: str, context: List[dict] = None,
+                       retrieved_docs: List[str] = None, session: Optional[ChatSession] = None,
+                       prefetched_results: Optional[List[Dict]] = None,
+                       deadline: Optional[Deadline] = None) -> ChatState:
+        """워크플로우 초기 상태 생성"""
+        if session is not None:
+            context = list(session.history)
+        return {
             "message": message,
             "context": context or [],
             "intent": None,
             "retrieved_docs": retrieved_docs or [],
+            "doc_scores": [],
             "response": None,
             "confidence": 0.0,
             "debug_info": {},
@@ -891,19 +827,26 @@ RAG 문서와 제공된 컨텍스트를 최우선으로 사용하고, 근거가
             # 쿼리 개선 관련 필드 초기화
             "current_query": message,
             "retry_count": 0,
-            "extracted_terms": []
-        }
-
-        logger.info(f"Starting workflow for message: {message[:50]}...")
-
-        # 그래프 실행
-        final_state = self.graph.invoke(initial_state)
+            "extracted_terms": [],
 
-        logger.info(f"Workflow completed. Intent: {final_state.get('intent')}, "
-                   f"RAG docs: {len(final_state.get('retrieved_docs', []))}, "
-                   f"Retries: {final_state.get('retry_count', 0)}")
+            "session": session,
+            "prefetched_results": prefetched_results,
+            "deadline": deadline or Deadline(),
+        }
 
-        # 디버그 정보에 쿼리 개선 정보 추가
+    @staticmethod
+    def _record_generation(stats: Dict):
+        """생성 통계를 메트릭과 요청별 timings(prefill/decode 시간, 프롬프트 토큰 수)에 기록"""
+        metrics.observe_generation(stats)
+        request_timings.record("prefix_restore", stats.get("prefix_ms"))
+        request_timings.record("prefill", stats.get("prompt_eval_ms"))
+        request_timings.record("decode", stats.get("eval_ms"))
+        request_timings.record_value("prompt_tokens", stats.get("prompt_tokens"))
+        request_timings.record_value("prompt_eval_tokens", stats.get("prompt_eval_tokens"))
+        request_timings.record_value("completion_tokens", stats.get("completion_tokens"))
+
+    def _collect_debug_info(self, message: str, final_state: ChatState) -> dict:
+        """디버그 정보에 쿼리 개선 정보 추가"""
         debug_info = final_state.get("debug_info", {})
         if final_state.get("retry_count", 0) > 0:
             debug_info["query_refinement"] = {
@@ -912,11 +855,212 @@ RAG 문서와 제공된 컨텍스트를 최우선으로 사용하고, 근거가
                 "retry_count": final_state.get("retry_count", 0),
                 "extracted_terms": final_state.get("extracted_terms", [])
             }
+        return debug_info
+
+    def warmup(self) -> Dict:
+        """더미 프롬프트로 1토큰 생성 — 시스템 프롬프트 접두부 KV를 미리 채우고 첫 호출 비용을 선지불
+
+        Returns:
+            접두부 캐시 통계
+        """
+        prompt = self._build_prompt("안녕하세요", [], [], "casual")
+        _, stats = complete_with_prefix_cache(self.llm, prompt, self._build_system_prefix(), max_tokens=1)
+        return stats
+
+    def run(self, message: str, context: List[dict] = None, retrieved_docs: List[str] = None,
+            session: Optional[ChatSession] = None, prefetched: Optional[Dict] = None,
+            deadline: Optional[Deadline] = None) -> dict:
+        """워크플로우 실행
+
+        Args:
+            session: 서버 측 세션. 주어지면 context 대신 세션 히스토리를 사용하고 턴 결과를 세션에 기록
+            prefetched: 배치 요청에서 미리 계산한 {"embedding": query 임베딩, "results": 첫 검색 결과}
+            deadline: 요청 제한 시간/취소 상태 (없으면 제한 없음)
+        """
+        deadline = deadline or Deadline()
+        with request_timings.collect() as timings:
+            result = self._run_with_caches(message, context, retrieved_docs, session, prefetched or {}, deadline)
+        # 노드/하위 단계별 시간과 데드라인 상태 (답변 캐시에는 저장되지 않음)
+        result["debug_info"]["timings"] = timings.to_dict()
+        result["debug_info"]["deadline"] = deadline.to_dict()
+        request_timings.log_timings(message, result["debug_info"]["timings"])
+        # 다중 모델 라우팅 시 어떤 모델이 답했는지
+        result["debug_info"]["model"] = self.model_path
+        return result
+
+    def _run_with_caches(self, message: str, context: Optional[List[dict]], retrieved_docs: Optional[List[str]],
+                         session: Optional[ChatSession], prefetched: Dict, deadline: Deadline) -> dict:
+        prefetched_results = prefetched.get("results")
+        if session is not None:
+            # 같은 세션의 턴이 동시에 들어와도 transcript/KV 스냅샷이 꼬이지 않도록 순서대로 처리
+            with session.lock:
+                return self._run(message, None, retrieved_docs, session, prefetched_results, deadline)
+
+        # 대화 맥락이나 외부 문서 없이 들어온 단독 질문만 답변 캐시 대상
+        cacheable = (not context and not retrieved_docs and hasattr(self.rag_service, "embed_query")
+                     and self.answer_cache.enabled)
+        embedding = prefetched.get("embedding") if cacheable else None
+        if cacheable and embedding is None:
+            try:
+                # rag_search_node의 첫 검색이 같은 query 임베딩을 재사용
+                embedding = self.rag_service.embed_query(message)
+            except Exception as e:
+                logger.warning(f"Answer cache lookup skipped, query embedding failed: {e}")
+
+        if embedding is not None:
+            with request_timings.span("answer_cache_lookup"):
+                cached = self.answer_cache.lookup(embedding, self.model_path)
+            if cached is not None:
+                entry, similarity = cached
+                logger.info(f"Answer cache hit (similarity={similarity:.4f}): '{message[:50]}' ~ '{entry.question[:50]}'")
+                result = copy.deepcopy(entry.result)
+                result["debug_info"]["answer_cache"] = {
+                    "hit": True,
+                    "similarity": round(similarity, 4),
+                    "cached_question": entry.question,
+                    "saved_ms": round(entry.latency_ms, 1),
+                }
+                return result
+
+        started = time.perf_counter()
+        result = self._run(message, context, retrieved_docs, None, prefetched_results, deadline)
+
+        # 데드라인으로 잘렸거나 단계를 건너뛴 답변은 캐시하지 않음
+        complete = not deadline.truncated and not deadline.skipped
+        if embedding is not None and complete and "generation_error" not in result["debug_info"]:
+            sources = result["debug_info"].get("rag_sources", [])
+            self.answer_cache.store(
+                message, embedding, copy.deepcopy(result), self.model_path,
+                doc_ids={source["doc_id"] for source in sources},
+                chunk_ids=[source["chunk_id"] for source in sources],
+                latency_ms=(time.perf_counter() - started) * 1000,
+            )
+            result["debug_info"]["answer_cache"] = {"hit": False}
+        return result
+
+    def _run(self, message: str, context: Optional[List[dict]], retrieved_docs: Optional[List[str]],
+             session: Optional[ChatSession], prefetched_results: Optional[List[Dict]] = None,
+             deadline: Optional[Deadline] = None) -> dict:
+        initial_state = self._initial_state(message, context, retrieved_docs, session, prefetched_results, deadline)
+
+        logger.info(f"Starting workflow for message: {message[:50]}...")
+
+        # 그래프 실행
+        final_state = self.graph.invoke(initial_state)
+
+        logger.info(f"Workflow completed. Intent: {final_state.get('intent')}, "
+                   f"RAG docs: {len(final_state.get('retrieved_docs', []))}, "
+                   f"Retries: {final_state.get('retry_count', 0)}")
 
         return {
             "reply": final_state.get("response", "응답을 생성할 수 없습니다."),
             "confidence": final_state.get("confidence", 0.0),
             "intent": final_state.get("intent"),
             "rag_docs_count": len(final_state.get("retrieved_docs", [])),
-            "debug_info": debug_info
+            "debug_info": self._collect_debug_info(message, final_state)
+        }
+
+    def stream(self, message: str, context: List[dict] = None,
+               retrieved_docs: List[str] = None, deadline: Optional[Deadline] = None) -> Iterator[dict]:
+        """워크플로우 스트리밍 실행
+
+        검색 단계(classify → rag_search → verify → refine)를 먼저 실행해 metadata 이벤트를
+        내보낸 뒤, LLM 토큰을 생성되는 즉시 정리하여 token 이벤트로 내보냅니다.
+        마지막 done 이벤트의 reply가 전체 후처리를 거친 최종 응답입니다.
+
+        Yields:
+            {"event": "metadata" | "token" | "done", "data": dict}
+        """
+        deadline = deadline or Deadline()
+        with request_timings.collect() as timings:
+            for event in self._stream(message, context, retrieved_docs, deadline):
+                if event["event"] == "done":
+                    event["data"]["debug_info"]["timings"] = timings.to_dict()
+                    event["data"]["debug_info"]["deadline"] = deadline.to_dict()
+                    request_timings.log_timings(message, event["data"]["debug_info"]["timings"])
+                yield event
+
+    def _stream(self, message: str, context: Optional[List[dict]],
+                retrieved_docs: Optional[List[str]], deadline: Deadline) -> Iterator[dict]:
+        initial_state = self._initial_state(message, context, retrieved_docs, deadline=deadline)
+
+        logger.info(f"Starting streaming workflow for message: {message[:50]}...")
+
+        state = self.retrieval_graph.invoke(initial_state)
+        intent = state.get("intent")
+        docs = state.get("retrieved_docs", [])
+
+        yield {
+            "event": "metadata",
+            "data": {
+                "intent": intent,
+                "rag_docs_count": len(docs),
+                "search_query": state.get("current_query", message),
+                "retry_count": state.get("retry_count", 0),
+                "rag_quality_score": state["debug_info"].get("rag_quality_score"),
+                "workflow": "langgraph",
+            },
+        }
+
+        expired = deadline.expired()
+        direct = None if expired else self._direct_reply(state)
+        if expired:
+            reply, confidence = self._deadline_reply(deadline), 0.0
+            yield {"event": "token", "data": {"text": reply}}
+        elif direct is not None:
+            reply, confidence = direct
+            yield {"event": "token", "data": {"text": reply}}
+        else:
+            packed = self._pack_prompt(state)
+            prompt = packed.prompt
+            state["debug_info"]["prompt_length"] = len(prompt)
+            confidence = self._calculate_confidence(intent, docs)
+            raw_parts = []
+            cleaner = ResponseCleaner(correct_model_name=self._correct_model_name())
+            try:
+                # 시스템 프롬프트 접두부 KV를 재사용하고 나머지만 평가
+                chunks, prompt_cache_stats = complete_with_prefix_cache(
+                    self.llm, prompt, self._build_system_prefix(), stream=True,
+                    **self._generation_kwargs(packed.max_tokens, deadline)
+                )
+                state["debug_info"]["prompt_cache"] = prompt_cache_stats
+                for chunk in chunks:
+                    text = chunk["choices"][0].get("text", "")
+                    raw_parts.append(text)
+                    cleaned = cleaner.feed(text)
+                    if cleaned:
+                        yield {"event": "token", "data": {"text": cleaned}}
+                    if cleaner.stopped:
+                        break
+                if hasattr(chunks, "close"):
+                    # 중간에 멈춰도 생성 통계(토큰 수, llama.cpp 타이밍)가 채워지도록 닫음
+                    chunks.close()
+                self._record_generation(prompt_cache_stats)
+                self._check_truncation(deadline, prompt_cache_stats)
+                tail = cleaner.flush()
+                if tail:
+                    yield {"event": "token", "data": {"text": tail}}
+
+                logger.info(f"Raw model response (stream): {repr(''.join(raw_parts).strip())}")
+                # 스트리밍으로 정리한 결과에 응답 전체 검사만 더함 (원문을 다시 정리하지 않음)
+                reply = cleaner.reply()
+                if deadline.truncated and not reply:
+                    reply = DEADLINE_EXCEEDED_REPLY
+                    yield {"event": "token", "data": {"text": reply}}
+                logger.info(f"Cleaned response: {repr(reply)}")
+            except Exception as e:
+                logger.error(f"Streaming response generation failed: {e}")
+                reply = "죄송합니다. 응답 생성 중 오류가 발생했습니다."
+
+        logger.info(f"Streaming workflow completed. Intent: {intent}, RAG docs: {len(docs)}")
+
+        yield {
+            "event": "done",
+            "data": {
+                "reply": reply,
+                "confidence": confidence,
+                "intent": intent,
+                "rag_docs_count": len(docs),
+                "debug_info": self._collect_debug_info(message, state),
+            },
         }
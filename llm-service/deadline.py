@@ -0,0 +1,174 @@
+"""
+요청 데드라인 (end-to-end 제한 시간과 생성 취소)
+호출자(Java AIChatClient 등)가 응답을 포기한 뒤에도 최대 생성 토큰까지 계속 생성하지 않도록,
+요청의 제한 시간을 LangGraph 노드 → Neo4j 트랜잭션 타임아웃 → llama-cpp stopping_criteria까지 전달합니다.
+
+- 제한 시간: X-Request-Timeout-Ms 헤더(남은 ms) 또는 X-Request-Deadline 헤더(epoch ms),
+  본문의 timeout_ms / deadline 필드 (없으면 CHAT_DEFAULT_TIMEOUT_MS, 0이면 제한 없음)
+- 남은 시간이 DEADLINE_REFINE_MIN_MS보다 적으면 쿼리 개선 재시도를 건너뜀
+- 데드라인이 지나거나 클라이언트 연결이 끊기면(cancel) 다음 토큰에서 생성을 멈추고
+  지금까지 생성된 답변을 truncated로 표시해 반환
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+# 헤더/본문에 제한 시간이 없을 때 적용할 기본값(ms, 0이면 제한 없음)
+CHAT_DEFAULT_TIMEOUT_MS = int(os.getenv("CHAT_DEFAULT_TIMEOUT_MS", "0"))
+# 남은 시간이 이보다 적으면 쿼리 개선(검색 재시도)을 건너뛰고 바로 답변 생성
+DEADLINE_REFINE_MIN_MS = int(os.getenv("DEADLINE_REFINE_MIN_MS", "15000"))
+
+TIMEOUT_HEADER = "X-Request-Timeout-Ms"
+DEADLINE_HEADER = "X-Request-Deadline"
+
+# 데드라인이 이미 지나 생성을 시작하지 않았을 때의 답변
+DEADLINE_EXCEEDED_REPLY = "죄송합니다. 요청 제한 시간 안에 답변을 생성하지 못했습니다. 다시 시도해주세요."
+
+
+class Deadline:
+    """요청 하나의 제한 시간과 취소 상태
+
+    Args:
+        timeout_s: 지금부터의 제한 시간(초). None이면 제한 없음 (연결 끊김 취소만 적용)
+    """
+
+    def __init__(self, timeout_s: Optional[float] = None):
+        self.timeout_s = timeout_s
+        self.expires_at = time.monotonic() + timeout_s if timeout_s is not None else None
+        self.reason: Optional[str] = None
+        # 생성이 데드라인/취소로 중간에 멈췄는지
+        self.truncated = False
+        # 시간이 부족해 건너뛴 단계 (refine_query, rag_search, generation)
+        self.skipped: List[str] = []
+        self._cancelled = threading.Event()
+
+    @classmethod
+    def from_request(cls, headers: Mapping[str, str], data: Optional[dict] = None) -> "Deadline":
+        """요청 헤더/본문에서 데드라인 생성
+
+        Raises:
+            ValueError: 제한 시간 값이 숫자가 아니거나 0 이하, 또는 데드라인이 이미 지남
+        """
+        data = data or {}
+        timeout_ms = headers.get(TIMEOUT_HEADER)
+        if timeout_ms is None:
+            timeout_ms = data.get("timeout_ms")
+        if timeout_ms is not None:
+            timeout = _parse_ms(timeout_ms, "timeout_ms")
+            if not timeout > 0:
+                raise ValueError(f"timeout_ms must be positive: {timeout_ms!r}")
+            return cls(timeout / 1000)
+
+        deadline_ms = headers.get(DEADLINE_HEADER)
+        if deadline_ms is None:
+            deadline_ms = data.get("deadline")
+        if deadline_ms is not None:
+            remaining = _parse_ms(deadline_ms, "deadline") / 1000 - time.time()
+            if not remaining > 0:
+                raise ValueError(f"deadline is already in the past: {deadline_ms!r}")
+            return cls(remaining)
+
+        return cls(CHAT_DEFAULT_TIMEOUT_MS / 1000 if CHAT_DEFAULT_TIMEOUT_MS > 0 else None)
+
+    def remaining(self) -> Optional[float]:
+        """남은 시간(초, 음수 없음). 제한이 없으면 None"""
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        """데드라인이 지났거나 취소됨"""
+        if self._cancelled.is_set():
+            return True
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def cancel(self, reason: str = "client_disconnected"):
+        """클라이언트 연결 끊김 등으로 요청 취소 (진행 중인 생성은 다음 토큰에서 멈춤)"""
+        if not self._cancelled.is_set():
+            self.reason = reason
+            self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def allows(self, min_remaining_s: float) -> bool:
+        """남은 시간이 min_remaining_s 이상인지 (제한이 없으면 취소되지 않은 한 항상 True)"""
+        if self.cancelled:
+            return False
+        remaining = self.remaining()
+        return remaining is None or remaining >= min_remaining_s
+
+    def skip(self, stage: str):
+        """시간이 부족해 단계를 건너뜀"""
+        if stage not in self.skipped:
+            self.skipped.append(stage)
+
+    def mark_truncated(self):
+        """생성이 데드라인/취소로 중간에 멈춤"""
+        self.truncated = True
+        if self.reason is None:
+            self.reason = "deadline_exceeded"
+
+    def stopping_criteria(self) -> "DeadlineStoppingCriteria":
+        return DeadlineStoppingCriteria(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        remaining = self.remaining()
+        return {
+            "timeout_ms": round(self.timeout_s * 1000) if self.timeout_s is not None else None,
+            "remaining_ms": round(remaining * 1000) if remaining is not None else None,
+            "truncated_by_deadline": self.truncated,
+            "reason": self.reason,
+            "skipped": list(self.skipped),
+        }
+
+
+def _parse_ms(value: Any, name: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name}: {value!r} (milliseconds expected)")
+
+
+class DeadlineStoppingCriteria:
+    """llama-cpp stopping_criteria: 데드라인이 지나거나 요청이 취소되면 True (토큰마다 호출)
+
+    워커 풀 레플리카로 보낼 때는 threading.Event를 넘길 수 없으므로 만료 시각만 가진
+    ExpiryStoppingCriteria로 피클됩니다 (time.monotonic은 같은 호스트의 프로세스 간에 공유됨).
+    """
+
+    def __init__(self, deadline: Deadline):
+        self.deadline = deadline
+
+    def __call__(self, input_ids, logits) -> bool:
+        if self.deadline.expired():
+            self.deadline.mark_truncated()
+            return True
+        return False
+
+    def __reduce__(self):
+        return ExpiryStoppingCriteria, (self.deadline.expires_at,)
+
+
+class ExpiryStoppingCriteria:
+    """만료 시각만으로 판단하는 stopping_criteria (레플리카 프로세스용, 멈췄으면 fired=True)"""
+
+    def __init__(self, expires_at: Optional[float]):
+        self.expires_at = expires_at
+        self.fired = False
+
+    def __call__(self, input_ids, logits) -> bool:
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            self.fired = True
+        return self.fired
+
+
+def stopped_by_deadline(kwargs: Dict[str, Any]) -> bool:
+    """생성 인자의 stopping_criteria가 데드라인으로 생성을 멈췄는지 (레플리카가 통계로 전달)"""
+    criteria = kwargs.get("stopping_criteria")
+    if isinstance(criteria, DeadlineStoppingCriteria):
+        return criteria.deadline.truncated
+    return bool(getattr(criteria, "fired", False))
@@ -0,0 +1,281 @@
+"""
+스트리밍 문서 업로드 (NDJSON 또는 PDF/DOCX/텍스트 원본)
+/api/documents는 documents 배열 전체를 request.json 한 번으로 받으므로 말뭉치 전체가 여러 번 메모리에 올라갑니다.
+/api/documents/upload는 요청 본문을 청크 단위로 읽어 문서마다 디스크 스풀 파일에 바로 쓰고,
+문서 하나가 끝나는 즉시 인덱싱 작업(ingestion_jobs)에 넣습니다.
+
+- 메모리에는 읽고 있는 청크(UPLOAD_CHUNK_BYTES)만 올라가며, 문서 본문은 워커가 인덱싱할 때 한 건씩 읽음
+- NDJSON: 한 줄 = {"id", "content", "metadata"} 문서 하나
+- 원본 파일: PDF(pdf_ocr_pipeline), DOCX(python-docx), 텍스트 — 워커가 텍스트를 추출해
+  기존 MinerUDocumentParser → LayoutAwareChunker 경로로 인덱싱
+- 스풀 파일은 인덱싱이 끝나면(성공/실패 모두) 삭제
+"""
+
+import json
+import logging
+import os
+import tempfile
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# 스풀 파일 위치, 요청 본문을 읽는 단위
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "llm-upload-spool"))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(64 * 1024)))
+# NDJSON 문서 한 줄 / 원본 파일 하나의 최대 크기
+UPLOAD_MAX_DOCUMENT_MB = float(os.getenv("UPLOAD_MAX_DOCUMENT_MB", "256"))
+
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-seq"}
+FILE_TYPES = {
+    "application/pdf": "pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "text/plain": "txt",
+    "text/markdown": "txt",
+}
+FILE_EXTENSIONS = {".pdf": "pdf", ".docx": "docx", ".txt": "txt", ".md": "txt"}
+
+
+class UploadError(ValueError):
+    """업로드를 받을 수 없음 (status_code로 HTTP 상태 전달)"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class SpooledDocument:
+    """디스크에 스풀된 문서 (워커가 load()로 읽어 add_document에 전달하고 cleanup()으로 삭제)
+
+    Args:
+        path: 스풀 파일 경로
+        kind: ndjson(문서 JSON 한 줄) / pdf / docx / txt
+        doc_id: 원본 파일의 문서 ID (NDJSON은 load() 전까지 알 수 없어 None)
+        source: 진행 상태에 표시할 출처 (예: "line 3", 파일명)
+    """
+
+    def __init__(self, path: str, kind: str, doc_id: Optional[str] = None, source: Optional[str] = None,
+                 metadata: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.kind = kind
+        self.doc_id = doc_id
+        self.source = source
+        self.metadata = metadata or {}
+
+    def load(self) -> Dict[str, Any]:
+        """add_document에 넘길 문서 dict
+
+        Raises:
+            ValueError: NDJSON 줄이 문서 객체가 아님
+        """
+        if self.kind == "ndjson":
+            with open(self.path, "r", encoding="utf-8") as f:
+                document = json.load(f)
+            if not isinstance(document, dict):
+                raise ValueError(f"{self.source}: expected a JSON object, got {type(document).__name__}")
+            return document
+        return {"id": self.doc_id, "content": extract_text(self.path, self.kind), "metadata": self.metadata}
+
+    def cleanup(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def extract_text(path: str, kind: str) -> str:
+    """원본 파일에서 텍스트 추출 (PDF는 USE_MINERU_OCR 설정을 따름)"""
+    if kind == "pdf":
+        from pdf_ocr_pipeline import extract_text_from_pdf
+        return extract_text_from_pdf(path)
+    if kind == "docx":
+        from docx import Document
+        return "\n\n".join(paragraph.text for paragraph in Document(path).paragraphs)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+class _Spooler:
+    """요청 본문 청크를 받아 스풀 파일에 쓰는 공통 부분"""
+
+    def __init__(self, spool_dir: str = UPLOAD_SPOOL_DIR, max_document_bytes: Optional[int] = None):
+        os.makedirs(spool_dir, exist_ok=True)
+        self.spool_dir = spool_dir
+        self.max_document_bytes = (max_document_bytes if max_document_bytes is not None
+                                   else int(UPLOAD_MAX_DOCUMENT_MB * 1024 * 1024))
+        self.bytes_received = 0
+        self._file = None
+        self._path: Optional[str] = None
+        self._size = 0
+
+    def _write(self, data: bytes):
+        if not data:
+            return
+        if self._file is None:
+            self._path = os.path.join(self.spool_dir, f"{uuid.uuid4().hex}.spool")
+            self._file = open(self._path, "wb")
+            self._size = 0
+        self._size += len(data)
+        if self._size > self.max_document_bytes:
+            raise UploadError(f"Document exceeds {self.max_document_bytes} bytes", status_code=413)
+        self._file.write(data)
+
+    def _close_file(self) -> Optional[str]:
+        """현재 스풀 파일을 닫고 경로 반환 (쓴 내용이 없으면 None)"""
+        if self._file is None:
+            return None
+        self._file.close()
+        path, self._file, self._path = self._path, None, None
+        return path
+
+    def abort(self):
+        """업로드 실패: 쓰다 만 스풀 파일 삭제"""
+        if self._file is not None:
+            self._file.close()
+            try:
+                os.remove(self._path)
+            except FileNotFoundError:
+                pass
+            self._file, self._path = None, None
+
+
+class NdjsonSpooler(_Spooler):
+    """NDJSON 본문 → 줄(문서)마다 스풀 파일 하나 (줄이 끝날 때마다 SpooledDocument 반환)"""
+
+    def __init__(self, spool_dir: str = UPLOAD_SPOOL_DIR, max_document_bytes: Optional[int] = None):
+        super().__init__(spool_dir, max_document_bytes)
+        self.lines = 0
+
+    def feed(self, chunk: bytes) -> List[SpooledDocument]:
+        self.bytes_received += len(chunk)
+        documents = []
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                self._write(chunk[start:])
+                return documents
+            self._write(chunk[start:end])
+            document = self._finish_line()
+            if document is not None:
+                documents.append(document)
+            start = end + 1
+
+    def finish(self) -> List[SpooledDocument]:
+        """마지막 줄(개행 없이 끝난 경우) 처리"""
+        document = self._finish_line()
+        return [document] if document is not None else []
+
+    def _finish_line(self) -> Optional[SpooledDocument]:
+        self.lines += 1
+        path = self._close_file()
+        if path is None:
+            return None
+        if os.path.getsize(path) == 0 or not _has_content(path):
+            os.remove(path)  # 빈 줄
+            return None
+        return SpooledDocument(path, "ndjson", source=f"line {self.lines}")
+
+
+class FileSpooler(_Spooler):
+    """PDF/DOCX/텍스트 원본 본문 → 스풀 파일 하나 (본문이 끝나면 SpooledDocument 반환)"""
+
+    def __init__(self, kind: str, doc_id: str, metadata: Dict[str, Any], spool_dir: str = UPLOAD_SPOOL_DIR,
+                 max_document_bytes: Optional[int] = None):
+        super().__init__(spool_dir, max_document_bytes)
+        self.kind = kind
+        self.doc_id = doc_id
+        self.metadata = metadata
+
+    def feed(self, chunk: bytes) -> List[SpooledDocument]:
+        self.bytes_received += len(chunk)
+        self._write(chunk)
+        return []
+
+    def finish(self) -> List[SpooledDocument]:
+        path = self._close_file()
+        if path is None:
+            raise UploadError("Empty upload")
+        return [SpooledDocument(path, self.kind, doc_id=self.doc_id,
+                                source=self.metadata.get("file_name"), metadata=self.metadata)]
+
+
+def _has_content(path: str) -> bool:
+    """공백만 있는 줄인지 확인 (앞부분만 읽음)"""
+    with open(path, "rb") as f:
+        return bool(f.read(4096).strip()) or os.path.getsize(path) > 4096
+
+
+def create_spooler(content_type: Optional[str], params: Mapping[str, str], spool_dir: str = UPLOAD_SPOOL_DIR):
+    """Content-Type과 쿼리 파라미터로 스풀러 선택
+
+    원본 파일 파라미터: id(없으면 파일명), filename, title, category
+
+    Raises:
+        UploadError: 지원하지 않는 형식 (415)
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in NDJSON_TYPES:
+        return NdjsonSpooler(spool_dir)
+
+    filename = params.get("filename") or ""
+    kind = FILE_TYPES.get(media_type) or FILE_EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+    if kind is None:
+        raise UploadError(
+            f"Unsupported upload type: {media_type or 'none'} "
+            f"(use application/x-ndjson, PDF, DOCX or text, or pass ?filename= with a known extension)",
+            status_code=415,
+        )
+
+    stem = os.path.splitext(os.path.basename(filename))[0] if filename else uuid.uuid4().hex[:12]
+    metadata = {
+        "file_name": filename or f"{stem}.{kind}",
+        "file_type": kind,
+        "source": "upload",
+        "category": params.get("category", "general"),
+        "created_at": datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
+    }
+    if params.get("title"):
+        metadata["title"] = params["title"]
+    return FileSpooler(kind, params.get("id") or f"upload_{stem}", metadata, spool_dir)
+
+
+class StreamingUpload:
+    """업로드 본문 하나 → 인덱싱 작업 하나 (Flask/ASGI 공용)
+
+    스풀된 문서는 본문이 끝나기를 기다리지 않고 도착하는 대로 작업에 추가되므로,
+    큰 NDJSON을 올리는 동안에도 앞쪽 문서는 이미 인덱싱됩니다.
+
+    Raises:
+        UploadError: 지원하지 않는 형식 (작업을 만들기 전에 실패)
+    """
+
+    def __init__(self, jobs, content_type: Optional[str], params: Mapping[str, str],
+                 spool_dir: str = UPLOAD_SPOOL_DIR):
+        self.spooler = create_spooler(content_type, params, spool_dir)
+        self.jobs = jobs
+        self.job = jobs.open_job()
+
+    def feed(self, chunk: bytes):
+        for document in self.spooler.feed(chunk):
+            self.jobs.add(self.job, document)
+
+    def finish(self):
+        """본문 끝: 남은 문서를 넣고 작업을 닫음"""
+        try:
+            for document in self.spooler.finish():
+                self.jobs.add(self.job, document)
+        finally:
+            self.jobs.close(self.job)
+
+    def abort(self):
+        """업로드 중단: 쓰다 만 문서는 버리고, 이미 넣은 문서는 계속 인덱싱"""
+        self.spooler.abort()
+        self.jobs.close(self.job)
+        logger.warning(f"Upload for ingestion job {self.job.job_id} aborted after "
+                       f"{self.spooler.bytes_received} bytes ({len(self.job.progress)} documents queued)")
+
+    @property
+    def bytes_received(self) -> int:
+        return self.spooler.bytes_received
@@ -0,0 +1,239 @@
+"""
+디스크 임베딩 캐시 (내용 주소 기반)
+e5 입력 문자열("passage: ..." / "query: ...")과 모델 이름의 해시를 키로 임베딩을 SQLite에 보관합니다.
+load_ragdata_pdfs_neo4j.py --clear-neo4j로 전체를 다시 인덱싱해도 바뀌지 않은 청크는 encode하지 않고
+새로 생긴 텍스트만 임베딩 비용을 치릅니다. 서버와 인덱싱 스크립트가 같은 파일을 함께 쓸 수 있습니다 (WAL).
+
+벡터는 float16 blob으로 저장하므로(1024차원 = 2KB) 정규화된 e5 임베딩의 코사인 유사도 오차는 1e-3 미만입니다.
+전체 크기가 EMBEDDING_CACHE_MAX_MB를 넘으면 가장 오래 쓰지 않은 항목부터 지웁니다.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache/embeddings.sqlite3")
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "2048"))
+# 예산을 넘으면 이 비율까지 줄임 (쓰기마다 퇴출하지 않도록 여유를 둠)
+EVICT_TARGET_RATIO = 0.9
+# SQLite 변수 개수 제한(999) 아래로 IN (...) 조회를 나눔
+LOOKUP_CHUNK = 500
+# 적중 항목의 last_used는 이 시간(초)보다 오래됐을 때만 갱신 (채팅 경로의 적중마다 쓰기 트랜잭션을 열지 않음)
+TOUCH_INTERVAL_SECONDS = 3600.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key BLOB PRIMARY KEY,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+"""
+
+
+def cache_key(model_name: str, text: str) -> bytes:
+    """모델 이름 + encode 입력 문자열(접두어 포함)의 SHA-256"""
+    return hashlib.sha256(f"{model_name}\n{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """SQLite에 float16으로 저장하는 크기 제한 임베딩 캐시"""
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, max_mb: float = EMBEDDING_CACHE_MAX_MB,
+                 enabled: bool = EMBEDDING_CACHE_ENABLED, touch_interval: float = TOUCH_INTERVAL_SECONDS):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.enabled = enabled
+        self.touch_interval = touch_interval
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._bytes = 0
+        self._entries = 0
+
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+        self.errors = 0
+
+        if enabled:
+            try:
+                self._open()
+            except Exception as e:
+                # 캐시가 없어도 임베딩은 계산할 수 있으므로 끄고 계속
+                logger.warning(f"Embedding cache disabled, cannot open {path}: {e}")
+                self.enabled = False
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        entries, total = conn.execute("SELECT count(*), coalesce(sum(length(vector)), 0) FROM embeddings").fetchone()
+        self._conn = conn
+        self._entries, self._bytes = entries, total
+        logger.info(f"Embedding cache: {self.path} ({entries} entries, {total / 1024 / 1024:.1f} MB)")
+
+    def get_many(self, model_name: str, texts: Sequence[str], kind: str = "passage") -> List[Optional[List[float]]]:
+        """encode 입력 문자열별 캐시된 임베딩 (없으면 None)
+
+        SQLite 오류(예: 인덱싱 스크립트가 쓰는 중 database is locked)는 기록만 하고 전부 미스로 처리합니다.
+        """
+        if not self.enabled or not texts:
+            return [None] * len(texts)
+
+        keys = [cache_key(model_name, text) for text in texts]
+        found: Dict[bytes, List[float]] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            try:
+                now = time.time()
+                stale = []
+                for start in range(0, len(unique), LOOKUP_CHUNK):
+                    part = unique[start:start + LOOKUP_CHUNK]
+                    rows = self._conn.execute(
+                        f"SELECT key, vector, last_used FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                        part,
+                    ).fetchall()
+                    for key, vector, last_used in rows:
+                        found[key] = np.frombuffer(vector, dtype=np.float16).astype(np.float32).tolist()
+                        if now - last_used >= self.touch_interval:
+                            stale.append((now, key))
+                if stale:
+                    self._write(lambda: self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?", stale))
+            except sqlite3.Error as e:
+                self._failed("lookup", e)
+                found = {}
+            hits = sum(1 for key in keys if key in found)
+            self.lookups += len(keys)
+            self.hits += hits
+
+        if hits:
+            metrics.EMBEDDING_CACHE_LOOKUPS.inc(hits, kind=kind, result="hit")
+        if len(keys) > hits:
+            metrics.EMBEDDING_CACHE_LOOKUPS.inc(len(keys) - hits, kind=kind, result="miss")
+        return [found.get(key) for key in keys]
+
+    def put_many(self, model_name: str, texts: Sequence[str], embeddings: Sequence[Sequence[float]]):
+        """encode 결과 저장 (예산을 넘으면 오래 쓰지 않은 항목부터 퇴출, SQLite 오류 시 저장을 건너뜀)"""
+        if not self.enabled or not texts:
+            return
+
+        now = time.time()
+        rows = []
+        for text, embedding in zip(texts, embeddings):
+            vector = np.asarray(embedding, dtype=np.float16)
+            rows.append((cache_key(model_name, text), int(vector.shape[0]), vector.tobytes(), now))
+        with self._lock:
+            try:
+                before = self._conn.total_changes
+                self._write(lambda: self._conn.executemany(
+                    "INSERT OR IGNORE INTO embeddings (key, dim, vector, last_used) VALUES (?, ?, ?, ?)", rows))
+                inserted = self._conn.total_changes - before
+                # 한 번의 put_many 안에서는 행 크기가 같음
+                self._entries += inserted
+                self._bytes += inserted * len(rows[0][2])
+                self.stores += inserted
+                if self._bytes > self.max_bytes:
+                    self._evict()
+            except sqlite3.Error as e:
+                self._failed("store", e)
+
+    def _write(self, statement: Callable[[], Any]):
+        """쓰기 트랜잭션 하나로 실행 (실패하면 열린 트랜잭션만 되돌리고 예외를 다시 던짐)"""
+        try:
+            self._conn.execute("BEGIN")
+            statement()
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            if self._conn.in_transaction:
+                try:
+                    self._conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    logger.debug("Embedding cache rollback failed", exc_info=True)
+            raise
+
+    def _failed(self, operation: str, error: Exception):
+        self.errors += 1
+        logger.warning(f"Embedding cache {operation} failed, continuing without cache: {error}")
+
+    def _evict(self):
+        """가장 오래 쓰지 않은 항목부터 max_bytes * EVICT_TARGET_RATIO 아래로 삭제 (잠금 안에서 호출)"""
+        target = int(self.max_bytes * EVICT_TARGET_RATIO)
+        excess = self._bytes - target
+        if excess <= 0 or not self._entries:
+            return
+        average = self._bytes / self._entries
+        count = min(self._entries, int(excess / average) + 1)
+        self._write(lambda: self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (count,)))
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT count(*), coalesce(sum(length(vector)), 0) FROM embeddings"
+        ).fetchone()
+        self.evictions += count
+        logger.info(f"Embedding cache: evicted {count} entries ({self._bytes / 1024 / 1024:.1f} MB left)")
+
+    def clear(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            try:
+                self._write(lambda: self._conn.execute("DELETE FROM embeddings"))
+            except sqlite3.Error as e:
+                self._failed("clear", e)
+                return
+            self.evictions += self._entries
+            self._entries, self._bytes = 0, 0
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self.enabled = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "path": self.path,
+                "entries": self._entries,
+                "size_mb": round(self._bytes / 1024 / 1024, 1),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 1),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "misses": self.lookups - self.hits,
+                "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "errors": self.errors,
+            }
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """프로세스 전역 임베딩 캐시 (키에 모델 이름이 들어가므로 모델별로 구분)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
@@ -0,0 +1,316 @@
+"""
+LLM 추론 요청 스케줄러
+단일 Llama 인스턴스 앞에서 우선순위 큐 + 전용 워커 스레드로 요청을 직렬화하고,
+큐가 가득 차면 즉시 거절(429)하여 처리량을 예측 가능하게 유지합니다.
+"""
+
+import asyncio
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 우선순위 (값이 작을수록 먼저 처리)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+# 스트림 종료 표시
+_STREAM_END = object()
+
+
+class QueueFullError(Exception):
+    """대기열이 가득 차 요청을 받을 수 없음"""
+
+    def __init__(self, queue_depth: int, retry_after: int):
+        super().__init__(f"Inference queue is full (depth={queue_depth})")
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+
+
+class QueueTimeoutError(Exception):
+    """대기열에서 너무 오래 기다려 요청이 폐기됨"""
+
+    def __init__(self, waited: float):
+        super().__init__(f"Request waited {waited:.1f}s in inference queue")
+        self.waited = waited
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    fn: Callable[[], Any] = field(compare=False)
+    future: Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+class InferenceScheduler:
+    """모델 하나에 대한 추론 스케줄러
+
+    Args:
+        name: 스케줄러 이름 (로그/통계용, 보통 모델 경로)
+        max_queue_size: 대기열 최대 길이 (초과 시 QueueFullError)
+        queue_timeout: 이 시간(초) 이상 대기한 요청은 실행하지 않고 폐기
+        num_workers: 추론 워커 스레드 수 (단일 Llama 인스턴스이면 1)
+    """
+
+    # 대기/처리 시간 통계에 사용할 최근 샘플 수
+    STATS_WINDOW = 200
+
+    def __init__(self, name: str, max_queue_size: int = 16, queue_timeout: float = 120.0,
+                 num_workers: int = 1):
+        self.name = name
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+        self.num_workers = num_workers
+
+        self._queue: "queue.PriorityQueue[_Job]" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._expired = 0
+        self._wait_times = deque(maxlen=self.STATS_WINDOW)
+        self._service_times = deque(maxlen=self.STATS_WINDOW)
+        self._running = True
+
+        self._workers = []
+        for i in range(num_workers):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"inference-worker-{i}",
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+
+        logger.info(f"Inference scheduler started: {name} (workers={num_workers}, max_queue={max_queue_size})")
+
+    def submit(self, fn: Callable[..., Any], *args, priority: int = PRIORITY_NORMAL, **kwargs) -> Future:
+        """추론 작업을 대기열에 추가하고 Future 반환
+
+        Raises:
+            QueueFullError: 대기열이 가득 찬 경우
+        """
+        with self._lock:
+            depth = self._queue.qsize()
+            if not self._running or depth >= self.max_queue_size:
+                self._rejected += 1
+                raise QueueFullError(depth, self.retry_after())
+
+            future: Future = Future()
+            job = _Job(
+                priority=priority,
+                seq=next(self._seq),
+                fn=lambda: fn(*args, **kwargs),
+                future=future,
+                enqueued_at=time.monotonic(),
+            )
+            self._queue.put(job)
+        return future
+
+    def run_batch(self, calls: Sequence[Callable[[], Any]], window: int = 0,
+                  priority: int = PRIORITY_NORMAL) -> Iterator[Tuple[int, Future]]:
+        """여러 작업을 window개씩 대기열에 유지하며 실행하고 완료 순서대로 (인덱스, Future) 반환
+
+        워커가 작업을 끝내는 즉시 다음 작업이 대기열에 있어 모델이 쉬지 않고, 대기열 전체를
+        한 배치가 차지하지 않아 다른 요청도 사이사이 처리됩니다. 대기열이 가득 차면 자리가 날 때까지 기다립니다.
+        소비자가 중간에 멈추면 아직 시작하지 않은 작업은 취소합니다.
+        """
+        window = window or self.num_workers + 1
+        pending: Dict[Future, int] = {}
+        next_index = 0
+        full_since = None
+        try:
+            while next_index < len(calls) or pending:
+                while next_index < len(calls) and len(pending) < window:
+                    try:
+                        future = self.submit(calls[next_index], priority=priority)
+                    except QueueFullError as e:
+                        if pending:
+                            break
+                        # 기다릴 작업이 없으면 잠시 후 재시도하고, 너무 오래 막히면 해당 작업을 실패 처리
+                        full_since = full_since or time.monotonic()
+                        if time.monotonic() - full_since > self.queue_timeout:
+                            future = Future()
+                            future.set_exception(e)
+                        else:
+                            time.sleep(0.05)
+                            continue
+                    full_since = None
+                    pending[future] = next_index
+                    next_index += 1
+
+                if not pending:
+                    continue
+                done, _ = wait(list(pending), timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def stream(self, generator_factory: Callable[[], Iterator[Any]],
+               priority: int = PRIORITY_NORMAL) -> Iterator[Any]:
+        """제너레이터를 워커 스레드에서 실행하고 생성 항목을 호출 스레드로 전달
+
+        대기열 진입(QueueFullError)은 즉시 발생하고, 소비자가 중간에 멈추면 워커도 생성을 중단합니다.
+        """
+        items: "queue.Queue[Any]" = queue.Queue()
+        cancelled = threading.Event()
+        future = self.submit(self._produce, generator_factory, items.put, cancelled, priority=priority)
+        return self._drain(items, future, cancelled)
+
+    def astream(self, generator_factory: Callable[[], Iterator[Any]],
+                priority: int = PRIORITY_NORMAL) -> AsyncIterator[Any]:
+        """stream()의 asyncio 버전 (ASGI 서버용)
+
+        생성 항목은 이벤트 루프로 직접 전달되므로, 대기 중이거나 느린 스트리밍 연결이 스레드를 점유하지 않습니다.
+        """
+        loop = asyncio.get_running_loop()
+        items: "asyncio.Queue[Any]" = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def emit(item: Any):
+            try:
+                loop.call_soon_threadsafe(items.put_nowait, item)
+            except RuntimeError:
+                # 이벤트 루프가 이미 닫힘 (서버 종료 중)
+                cancelled.set()
+
+        future = self.submit(self._produce, generator_factory, emit, cancelled, priority=priority)
+        # 대기열에서 만료/취소되어 생성이 시작되지 않은 경우에도 소비자가 깨어나도록
+        future.add_done_callback(lambda _: emit(_STREAM_END))
+        return self._adrain(items, future, cancelled)
+
+    @staticmethod
+    def _produce(generator_factory: Callable[[], Iterator[Any]], emit: Callable[[Any], None],
+                 cancelled: threading.Event):
+        generator = generator_factory()
+        try:
+            for item in generator:
+                if cancelled.is_set():
+                    logger.info("Stream consumer went away, stopping generation")
+                    break
+                emit(item)
+        finally:
+            if hasattr(generator, "close"):
+                generator.close()
+            emit(_STREAM_END)
+
+    def _drain(self, items: "queue.Queue[Any]", future: Future, cancelled: threading.Event) -> Iterator[Any]:
+        try:
+            while True:
+                try:
+                    item = items.get(timeout=0.5)
+                except queue.Empty:
+                    if future.done() and future.exception() is not None:
+                        raise future.exception()
+                    continue
+                if item is _STREAM_END:
+                    break
+                yield item
+            # 작업 중 발생한 예외 전달
+            future.result()
+        finally:
+            cancelled.set()
+            future.cancel()
+
+    async def _adrain(self, items: "asyncio.Queue[Any]", future: Future,
+                      cancelled: threading.Event) -> AsyncIterator[Any]:
+        try:
+            while True:
+                item = await items.get()
+                if item is _STREAM_END:
+                    break
+                yield item
+            # 작업 중 발생한 예외 전달
+            await asyncio.wrap_future(future)
+        finally:
+            cancelled.set()
+            future.cancel()
+
+    def _worker_loop(self):
+        while self._running or not self._queue.empty():
+            try:
+                job = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            if not job.future.set_running_or_notify_cancel():
+                continue
+
+            waited = time.monotonic() - job.enqueued_at
+            if waited > self.queue_timeout:
+                with self._lock:
+                    self._expired += 1
+                logger.warning(f"Dropping inference job after waiting {waited:.1f}s in queue")
+                job.future.set_exception(QueueTimeoutError(waited))
+                continue
+
+            with self._lock:
+                self._in_flight += 1
+                self._wait_times.append(waited)
+
+            started = time.monotonic()
+            try:
+                result = job.fn()
+            except BaseException as e:
+                with self._lock:
+                    self._failed += 1
+                job.future.set_exception(e)
+            else:
+                with self._lock:
+                    self._completed += 1
+                job.future.set_result(result)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._service_times.append(time.monotonic() - started)
+
+    def retry_after(self) -> int:
+        """대기열이 비워질 때까지의 예상 시간(초) - Retry-After 헤더 값"""
+        avg_service = (sum(self._service_times) / len(self._service_times)) if self._service_times else 10.0
+        pending = self._queue.qsize() + self._in_flight
+        return max(1, int(avg_service * pending / max(1, self.num_workers)))
+
+    def busy(self) -> bool:
+        """실행 중이거나 대기 중인 작업이 있는지 (백그라운드 인덱싱 양보 판단용, stats()보다 가벼움)"""
+        return self._in_flight > 0 or not self._queue.empty()
+
+    def stats(self) -> Dict[str, Any]:
+        """대기열 깊이, 대기/처리 시간 통계"""
+        with self._lock:
+            wait_times = sorted(self._wait_times)
+            service_times = list(self._service_times)
+            return {
+                "name": self.name,
+                "workers": self.num_workers,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_size": self.max_queue_size,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "expired": self._expired,
+                "avg_wait_ms": round(sum(wait_times) / len(wait_times) * 1000, 1) if wait_times else 0.0,
+                "p95_wait_ms": round(wait_times[min(len(wait_times) - 1, int(len(wait_times) * 0.95))] * 1000, 1) if wait_times else 0.0,
+                "avg_service_ms": round(sum(service_times) / len(service_times) * 1000, 1) if service_times else 0.0,
+            }
+
+    def shutdown(self, wait: bool = False):
+        """새 요청 수신 중단 (대기 중인 작업은 워커가 계속 처리)"""
+        self._running = False
+        if wait:
+            for worker in self._workers:
+                worker.join()
@@ -0,0 +1,315 @@
+"""
+비동기 문서 인덱싱 작업
+/api/documents는 문서를 작업으로 등록하고 job_id만 바로 반환합니다.
+백그라운드 워커(INGEST_WORKERS개)가 문서마다 parse → chunk → embed → write를 실행하고,
+문서별 진행 단계와 처리량을 /api/documents/jobs/<job_id>로 제공합니다.
+
+채팅보다 낮은 우선순위:
+- 워커 스레드는 nice 값을 INGEST_NICE만큼 올려 실행 (Linux에서는 스레드 단위로 적용)
+- 단계/청크 사이마다 채팅 스케줄러가 바쁘면 비워질 때까지 잠시 양보 (최대 INGEST_YIELD_MAX_WAIT초 연속)
+
+스트리밍 업로드(document_upload)는 open_job()으로 작업을 먼저 만들고 문서가 도착할 때마다 add(),
+본문이 끝나면 close()합니다. 문서 대신 load()/cleanup()을 가진 지연 로드 문서(SpooledDocument)를
+넣으면 워커가 인덱싱 직전에 디스크에서 읽고 끝나면 스풀 파일을 지웁니다.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# 동시에 인덱싱할 문서 수 (워커 스레드 수)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+# 워커 스레드 nice 증가분 (0이면 채팅과 같은 우선순위)
+INGEST_NICE = int(os.getenv("INGEST_NICE", "10"))
+# 채팅 요청이 처리 중이면 단계 사이에서 양보 (연속 양보 상한, 초)
+INGEST_YIELD_TO_CHAT = os.getenv("INGEST_YIELD_TO_CHAT", "true").lower() == "true"
+INGEST_YIELD_MAX_WAIT = float(os.getenv("INGEST_YIELD_MAX_WAIT", "30"))
+INGEST_YIELD_POLL_INTERVAL = 0.1
+# 끝난 작업 보관 수와 보관 시간(초)
+INGEST_MAX_JOBS = int(os.getenv("INGEST_MAX_JOBS", "256"))
+INGEST_JOB_TTL_SECONDS = float(os.getenv("INGEST_JOB_TTL_SECONDS", "86400"))
+
+@dataclass
+class DocumentProgress:
+    """작업 안 문서 하나의 진행 상태"""
+    doc_id: Optional[str]
+    # 지연 로드 문서의 출처 (예: NDJSON "line 3", 업로드 파일명)
+    source: Optional[str] = None
+    # queued → parse → chunk → embed → write → done / failed
+    stage: str = "queued"
+    blocks: int = 0
+    chunks: int = 0
+    embedded: int = 0
+    written: int = 0
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.stage in ("done", "failed")
+
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = self.elapsed()
+        return {
+            "doc_id": self.doc_id,
+            "source": self.source,
+            "stage": self.stage,
+            "blocks": self.blocks,
+            "chunks": self.chunks,
+            "embedded": self.embedded,
+            "written": self.written,
+            "error": self.error,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "chunks_per_sec": round(self.embedded / elapsed, 2) if elapsed > 0 else None,
+        }
+
+
+@dataclass
+class IngestionJob:
+    """문서 묶음 하나의 인덱싱 작업"""
+    job_id: str
+    documents: List[Any]
+    progress: List[DocumentProgress]
+    # 문서를 더 받을 수 없음 (submit은 바로 닫힘, 스트리밍 업로드는 본문이 끝나야 닫힘)
+    closed: bool = True
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def status(self) -> str:
+        """queued → running → completed / partial(일부 실패) / failed(전부 실패)"""
+        if not self.done.is_set():
+            return "running" if self.started_at is not None else "queued"
+        failed = sum(1 for doc in self.progress if doc.stage == "failed")
+        if failed == 0:
+            return "completed"
+        return "failed" if failed == len(self.progress) else "partial"
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+    def to_dict(self, include_documents: bool = True) -> Dict[str, Any]:
+        succeeded = sum(1 for doc in self.progress if doc.stage == "done")
+        failed = sum(1 for doc in self.progress if doc.stage == "failed")
+        chunks = sum(doc.embedded for doc in self.progress)
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+        body = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "receiving": not self.closed,
+            "total": len(self.progress),
+            "success_count": succeeded,
+            "failed_count": failed,
+            "pending_count": len(self.progress) - succeeded - failed,
+            "chunks": chunks,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "docs_per_sec": round((succeeded + failed) / elapsed, 3) if elapsed > 0 else None,
+            "chunks_per_sec": round(chunks / elapsed, 2) if elapsed > 0 else None,
+            "created_at": self.created_at,
+        }
+        if include_documents:
+            body["documents"] = [doc.to_dict() for doc in self.progress]
+        return body
+
+
+def _lower_thread_priority():
+    """워커 스레드의 nice 값을 올림 (Linux는 스레드별 nice, 다른 OS는 무시)"""
+    if INGEST_NICE <= 0 or not hasattr(os, "setpriority"):
+        return
+    try:
+        tid = threading.get_native_id()
+        os.setpriority(os.PRIO_PROCESS, tid, os.getpriority(os.PRIO_PROCESS, tid) + INGEST_NICE)
+    except OSError as e:
+        logger.debug(f"Could not lower ingestion thread priority: {e}")
+
+
+class IngestionJobManager:
+    """문서 인덱싱 작업 대기열과 백그라운드 워커
+
+    Args:
+        rag_provider: 현재 RAG 서비스를 반환하는 함수 (add_document(document, progress=...) 제공)
+        workers: 동시에 인덱싱할 문서 수
+        busy: 채팅 추론이 진행/대기 중이면 True를 반환하는 함수 (없으면 양보하지 않음)
+    """
+
+    def __init__(self, rag_provider: Callable[[], Any], workers: int = INGEST_WORKERS,
+                 busy: Optional[Callable[[], bool]] = None,
+                 yield_max_wait: float = INGEST_YIELD_MAX_WAIT if INGEST_YIELD_TO_CHAT else 0.0,
+                 max_jobs: int = INGEST_MAX_JOBS, job_ttl: float = INGEST_JOB_TTL_SECONDS):
+        self.rag_provider = rag_provider
+        self.workers = max(1, workers)
+        self.busy = busy
+        self.yield_max_wait = yield_max_wait
+        self.max_jobs = max_jobs
+        self.job_ttl = job_ttl
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest",
+                                            initializer=_lower_thread_priority)
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending_docs = 0
+        self._yield_seconds = 0.0
+
+    def submit(self, documents: List[dict]) -> IngestionJob:
+        """문서들을 작업으로 등록 (문서 단위로 워커에 분배)"""
+        job = self.open_job()
+        for document in documents:
+            self.add(job, document)
+        self.close(job)
+        logger.info(f"Ingestion job {job.job_id} queued with {len(documents)} documents")
+        return job
+
+    def open_job(self) -> IngestionJob:
+        """문서를 나중에 하나씩 넣을 빈 작업 등록 (close() 전까지 끝나지 않음)"""
+        job = IngestionJob(job_id=uuid.uuid4().hex, documents=[], progress=[], closed=False)
+        with self._lock:
+            self._evict()
+            self._jobs[job.job_id] = job
+        return job
+
+    def add(self, job: IngestionJob, document: Any):
+        """열린 작업에 문서 하나 추가 (dict 또는 load()/cleanup()을 가진 지연 로드 문서)"""
+        if isinstance(document, dict) or document is None:
+            progress = DocumentProgress(doc_id=(document or {}).get("id"))
+        else:
+            progress = DocumentProgress(doc_id=document.doc_id, source=document.source)
+        with self._lock:
+            if job.closed:
+                raise RuntimeError(f"Ingestion job {job.job_id} is closed")
+            index = len(job.documents)
+            job.documents.append(document)
+            job.progress.append(progress)
+            self._pending_docs += 1
+        self._executor.submit(self._ingest, job, index)
+
+    def close(self, job: IngestionJob):
+        """작업에 더 넣을 문서가 없음 (이미 모두 끝났으면 바로 완료)"""
+        with self._lock:
+            job.closed = True
+            finished = self._finish_if_complete(job)
+        if finished:
+            logger.info(f"Ingestion job {job.job_id} {job.status}: {job.to_dict(include_documents=False)}")
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[IngestionJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def pending_documents(self) -> int:
+        with self._lock:
+            return self._pending_docs
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+            pending = self._pending_docs
+            yield_seconds = self._yield_seconds
+        statuses: Dict[str, int] = {}
+        for job in jobs:
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "pending_documents": pending,
+            "jobs": statuses,
+            "yield_to_chat_ms": round(yield_seconds * 1000, 1),
+        }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait)
+
+    def _evict(self):
+        """보관 수/시간을 넘은 끝난 작업 삭제 (진행 중인 작업은 유지)"""
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            expired = job.finished_at is not None and now - job.finished_at > self.job_ttl
+            if expired or (len(self._jobs) >= self.max_jobs and job.finished_at is not None):
+                del self._jobs[job_id]
+
+    def _ingest(self, job: IngestionJob, index: int):
+        progress = job.progress[index]
+        document = job.documents[index]
+        progress.started_at = time.time()
+        if job.started_at is None:
+            job.started_at = progress.started_at
+
+        def report(stage: str, **counts):
+            progress.stage = stage
+            for name, value in counts.items():
+                setattr(progress, name, value)
+            if stage not in ("done", "failed"):
+                self._yield_to_chat()
+
+        try:
+            rag = self.rag_provider()
+            if rag is None:
+                raise RuntimeError("RAG service not available")
+            if not isinstance(document, dict) and hasattr(document, "load"):
+                document = document.load()
+                progress.doc_id = document.get("id")
+            ok = rag.add_document(document, progress=report)
+            if not ok and progress.stage != "failed":
+                report("failed", error=progress.error or "add_document returned False")
+            elif ok:
+                report("done")
+        except Exception as e:
+            logger.error(f"Ingestion of document {progress.doc_id} failed: {e}", exc_info=True)
+            report("failed", error=str(e))
+        finally:
+            cleanup = getattr(job.documents[index], "cleanup", None)
+            if cleanup is not None:
+                try:
+                    cleanup()
+                except Exception as e:
+                    # 스풀 파일을 못 지워도 작업 집계는 끝내야 job.wait()가 멈추지 않음
+                    logger.warning(f"Cleanup of spooled document {progress.doc_id} failed: {e}", exc_info=True)
+            # 처리가 끝난 문서 본문은 바로 놓아 줌 (큰 업로드가 작업 보관 기간 동안 메모리에 남지 않도록)
+            job.documents[index] = None
+            metrics.INGEST_DOCUMENTS.inc(status=progress.stage)
+            metrics.INGEST_CHUNKS.inc(progress.written)
+            with self._lock:
+                # 정리까지 끝난 뒤에만 완료로 셈 (close()가 먼저 작업을 끝내지 않도록)
+                progress.finished_at = time.time()
+                self._pending_docs -= 1
+                finished = self._finish_if_complete(job)
+            if finished:
+                logger.info(f"Ingestion job {job.job_id} {job.status}: {job.to_dict(include_documents=False)}")
+
+    def _finish_if_complete(self, job: IngestionJob) -> bool:
+        """닫힌 작업의 문서가 모두 끝났으면 완료 처리 (self._lock 안에서 호출)"""
+        if not job.closed or job.done.is_set() or not all(doc.finished_at is not None for doc in job.progress):
+            return False
+        job.finished_at = time.time()
+        job.done.set()
+        return True
+
+    def _yield_to_chat(self):
+        """채팅 추론이 진행/대기 중이면 비워질 때까지 대기 (연속 yield_max_wait초까지)"""
+        if self.busy is None or self.yield_max_wait <= 0:
+            return
+        started = time.monotonic()
+        while self.busy() and time.monotonic() - started < self.yield_max_wait:
+            time.sleep(INGEST_YIELD_POLL_INTERVAL)
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            with self._lock:
+                self._yield_seconds += waited
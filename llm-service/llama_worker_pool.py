@@ -0,0 +1,386 @@
+"""
+Llama 멀티 레플리카 워커 풀
+코어가 많은 호스트에서 독립 프로세스 N개에 모델 레플리카를 띄우고(GGUF는 mmap으로 공유),
+가장 한가한 레플리카로 요청을 분배합니다.
+
+LlamaWorkerPool은 Llama와 같은 호출 인터페이스(__call__, reset, tokenize, detokenize)를 제공하므로
+ChatWorkflow나 레거시 채팅 경로에 그대로 전달할 수 있습니다.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 레플리카 기동 대기 시간 (12B 모델 로드 포함)
+REPLICA_START_TIMEOUT = float(os.getenv("LLM_REPLICA_START_TIMEOUT", "600"))
+# 죽은 레플리카(OOM 등)를 백그라운드에서 다시 띄울지
+REPLICA_RESPAWN = os.getenv("LLM_REPLICA_RESPAWN", "true").lower() == "true"
+
+
+def _replica_main(conn, replica_id: int, model_path: str, llama_kwargs: Dict[str, Any]):
+    """레플리카 프로세스 진입점: 모델을 로드하고 파이프로 들어오는 요청을 처리"""
+    logging.basicConfig(level=logging.INFO)
+    replica_logger = logging.getLogger(f"llama-replica-{replica_id}")
+
+    try:
+        from llama_cpp import Llama
+        from prompt_cache import complete_with_prefix_cache
+        from deadline import stopped_by_deadline
+        import speculative
+        # draft 모델은 프로세스 간에 넘길 수 없으므로 레플리카에서 생성
+        draft_kwargs = speculative.llama_kwargs(model_path, llama_kwargs.get("n_ctx", 512),
+                                                llama_kwargs.get("n_threads", 1), llama_kwargs.get("n_gpu_layers", 0))
+        llm = Llama(model_path=model_path, use_mmap=True, **llama_kwargs, **draft_kwargs)
+    except Exception as e:
+        replica_logger.error(f"Failed to load replica model: {e}", exc_info=True)
+        conn.send(("error", str(e)))
+        return
+
+    replica_logger.info(f"Replica {replica_id} ready (pid={os.getpid()})")
+    conn.send(("ready", os.getpid()))
+
+    while True:
+        try:
+            command, payload = conn.recv()
+        except EOFError:
+            break
+
+        if command == "stop":
+            break
+        if command == "cancel":
+            # 스트림이 이미 끝난 뒤 도착한 취소 요청
+            continue
+
+        try:
+            if command == "call":
+                prompt, prefix, kwargs = payload
+                # 레플리카마다 자체 접두부 KV 캐시를 유지하고 접미부만 평가
+                response, stats = complete_with_prefix_cache(llm, prompt, prefix, **kwargs)
+                if kwargs.get("stream"):
+                    for chunk in response:
+                        conn.send(("chunk", chunk))
+                        # 소비자가 스트림을 중단하면 생성을 멈춤
+                        if conn.poll() and conn.recv()[0] == "cancel":
+                            response.close()
+                            break
+                    # 요청 데드라인으로 멈췄는지 부모에 알림 (stopping_criteria는 만료 시각만 넘어옴)
+                    stats["deadline_stopped"] = stopped_by_deadline(kwargs)
+                    conn.send(("end", stats))
+                else:
+                    stats["deadline_stopped"] = stopped_by_deadline(kwargs)
+                    conn.send(("result", (response, stats)))
+            else:
+                conn.send(("error", f"Unknown command: {command}"))
+        except Exception as e:
+            replica_logger.error(f"Replica request failed: {e}", exc_info=True)
+            conn.send(("error", str(e)))
+
+    replica_logger.info(f"Replica {replica_id} stopped")
+
+
+class ReplicaDied(RuntimeError):
+    """레플리카 프로세스가 종료되어 파이프가 끊김"""
+
+    def __init__(self, replica_id: int, error: Exception):
+        super().__init__(f"Replica {replica_id} died: {error!r}")
+        self.replica_id = replica_id
+
+
+class _Replica:
+    """부모 프로세스 쪽 레플리카 핸들"""
+
+    def __init__(self, replica_id: int, process, conn):
+        self.replica_id = replica_id
+        self.process = process
+        self.conn = conn
+        self.pid: Optional[int] = None
+        # 파이프 하나에는 한 번에 하나의 요청만
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.completion_tokens = 0
+        # 프로세스가 죽으면 분배 대상에서 빠짐 (재기동되면 다시 False)
+        self.dead = False
+        self.respawning = False
+        self.deaths = 0
+        self.last_error: Optional[str] = None
+
+    def send(self, message: Tuple[str, Any]):
+        try:
+            self.conn.send(message)
+        except (EOFError, OSError) as e:
+            raise ReplicaDied(self.replica_id, e) from e
+
+    def recv(self) -> Tuple[str, Any]:
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise ReplicaDied(self.replica_id, e) from e
+
+    def request(self, command: str, payload: Any = None) -> Any:
+        with self.lock:
+            self.send((command, payload))
+            kind, value = self.recv()
+        if kind == "error":
+            raise RuntimeError(f"Replica {self.replica_id} error: {value}")
+        return value
+
+
+class LlamaWorkerPool:
+    """독립 프로세스 Llama 레플리카 풀 (최소 부하 레플리카로 분배)
+
+    Args:
+        model_path: GGUF 모델 경로 (모든 레플리카가 mmap으로 공유)
+        replicas: 레플리카(프로세스) 수
+        llama_kwargs: 레플리카별 Llama 생성 인자 (n_ctx, n_threads, n_gpu_layers 등)
+        respawn: 죽은 레플리카를 백그라운드에서 다시 띄울지
+        target: 레플리카 프로세스 진입점 (테스트에서 대역으로 교체)
+    """
+
+    def __init__(self, model_path: str, replicas: int, llama_kwargs: Dict[str, Any],
+                 respawn: bool = REPLICA_RESPAWN, target: Callable[..., None] = _replica_main,
+                 start_timeout: float = REPLICA_START_TIMEOUT):
+        self.model_path = model_path
+        self.llama_kwargs = dict(llama_kwargs)
+        self.respawn = respawn
+        self.start_timeout = start_timeout
+        self._target = target
+        self._ctx = multiprocessing.get_context("spawn")
+        self._dispatch_lock = threading.Lock()
+        self._replicas: List[_Replica] = []
+        self._vocab = None
+        self._closed = False
+        self.restarts = 0
+
+        logger.info(f"Starting {replicas} Llama replicas for {model_path} "
+                    f"(n_threads={self.llama_kwargs.get('n_threads')} each)")
+
+        for replica_id in range(replicas):
+            process, conn = self._spawn(replica_id)
+            self._replicas.append(_Replica(replica_id, process, conn))
+
+        try:
+            for replica in self._replicas:
+                replica.pid = self._wait_ready(replica.replica_id, replica.conn)
+        except Exception:
+            self.close()
+            raise
+
+        logger.info(f"Llama worker pool ready: {replicas} replicas")
+
+    def _spawn(self, replica_id: int):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=self._target,
+            args=(child_conn, replica_id, self.model_path, self.llama_kwargs),
+            name=f"llama-replica-{replica_id}",
+            daemon=True,
+        )
+        process.start()
+        # 자식 쪽 끝을 닫아 두어야 자식이 죽으면 부모의 recv가 EOFError로 끝남
+        child_conn.close()
+        return process, parent_conn
+
+    def _wait_ready(self, replica_id: int, conn) -> int:
+        """레플리카의 ready 메시지 대기 (pid 반환)"""
+        if not conn.poll(self.start_timeout):
+            raise RuntimeError(f"Replica {replica_id} did not start in {self.start_timeout}s")
+        try:
+            kind, value = conn.recv()
+        except (EOFError, OSError) as e:
+            raise RuntimeError(f"Replica {replica_id} exited while loading the model: {e!r}") from e
+        if kind != "ready":
+            raise RuntimeError(f"Replica {replica_id} failed to load model: {value}")
+        return value
+
+    @property
+    def size(self) -> int:
+        return len(self._replicas)
+
+    def _acquire_replica(self) -> _Replica:
+        """살아 있는 레플리카 중 진행 중인 요청이 가장 적은 것 선택"""
+        with self._dispatch_lock:
+            for replica in self._replicas:
+                if not replica.dead and not replica.process.is_alive():
+                    self._mark_dead_locked(replica, f"process exited (code {replica.process.exitcode})")
+            live = [r for r in self._replicas if not r.dead]
+            if not live:
+                raise RuntimeError("No live Llama replicas")
+            replica = min(live, key=lambda r: (r.in_flight, r.completed))
+            replica.in_flight += 1
+            return replica
+
+    def _mark_dead(self, replica: _Replica, error: str):
+        with self._dispatch_lock:
+            self._mark_dead_locked(replica, error)
+
+    def _mark_dead_locked(self, replica: _Replica, error: str):
+        """레플리카를 분배 대상에서 빼고 (설정되어 있으면) 재기동 시작 — _dispatch_lock 안에서 호출"""
+        if replica.dead:
+            return
+        replica.dead = True
+        replica.deaths += 1
+        replica.last_error = error
+        logger.error(f"Llama replica {replica.replica_id} (pid={replica.pid}) died: {error}")
+        if self.respawn and not self._closed:
+            replica.respawning = True
+            threading.Thread(target=self._respawn, args=(replica,),
+                             name=f"llama-replica-{replica.replica_id}-respawn", daemon=True).start()
+
+    def _respawn(self, replica: _Replica):
+        """죽은 레플리카 자리에 새 프로세스를 띄우고 준비되면 다시 분배 대상에 넣음"""
+        logger.info(f"Respawning Llama replica {replica.replica_id}")
+        replica.process.join(timeout=1)
+        try:
+            process, conn = self._spawn(replica.replica_id)
+            pid = self._wait_ready(replica.replica_id, conn)
+        except Exception as e:
+            logger.error(f"Failed to respawn Llama replica {replica.replica_id}: {e}")
+            with self._dispatch_lock:
+                replica.respawning = False
+                replica.last_error = str(e)
+            return
+
+        with replica.lock, self._dispatch_lock:
+            if self._closed:
+                conn.send(("stop", None))
+                return
+            old_conn = replica.conn
+            replica.process, replica.conn, replica.pid = process, conn, pid
+            replica.dead = False
+            replica.respawning = False
+            self.restarts += 1
+        old_conn.close()
+        logger.info(f"Llama replica {replica.replica_id} respawned (pid={pid})")
+
+    def _release_replica(self, replica: _Replica, response: Optional[dict] = None):
+        with self._dispatch_lock:
+            replica.in_flight -= 1
+            replica.completed += 1
+            if response:
+                replica.completion_tokens += response.get("usage", {}).get("completion_tokens", 0)
+
+    def __call__(self, prompt: str, **kwargs):
+        """Llama.__call__과 동일 (stream=True이면 청크 제너레이터 반환)"""
+        response, _ = self.complete_with_prefix(prompt, None, **kwargs)
+        return response
+
+    def complete_with_prefix(self, prompt: str, prefix: Optional[str], **kwargs) -> Tuple[Any, Dict[str, Any]]:
+        """prompt_cache.complete_with_prefix_cache와 동일 (레플리카 안에서 접두부 KV 재사용)"""
+        if kwargs.get("stream"):
+            stats: Dict[str, Any] = {}
+            return self._stream(prompt, prefix, kwargs, stats), stats
+
+        replica = self._acquire_replica()
+        response = None
+        try:
+            response, stats = replica.request("call", (prompt, prefix, kwargs))
+            return response, stats
+        except ReplicaDied as e:
+            self._mark_dead(replica, str(e))
+            raise
+        finally:
+            self._release_replica(replica, response)
+
+    def _stream(self, prompt: str, prefix: Optional[str], kwargs: Dict[str, Any],
+                stats: Dict[str, Any]) -> Iterator[dict]:
+        replica = self._acquire_replica()
+        tokens = 0
+        try:
+            with replica.lock:
+                finished = False
+                try:
+                    replica.send(("call", (prompt, prefix, kwargs)))
+                    while True:
+                        kind, value = replica.recv()
+                        if kind in ("end", "error"):
+                            finished = True
+                            if kind == "error":
+                                raise RuntimeError(f"Replica {replica.replica_id} error: {value}")
+                            stats.update(value or {})
+                            break
+                        tokens += 1
+                        yield value
+                except ReplicaDied:
+                    finished = True
+                    raise
+                finally:
+                    if not finished:
+                        # 중단된 스트림: 레플리카에 취소를 알리고 남은 메시지를 비움
+                        try:
+                            replica.send(("cancel", None))
+                            while replica.recv()[0] not in ("end", "error"):
+                                pass
+                        except ReplicaDied as e:
+                            self._mark_dead(replica, str(e))
+        except ReplicaDied as e:
+            self._mark_dead(replica, str(e))
+            raise
+        finally:
+            self._release_replica(replica, {"usage": {"completion_tokens": tokens}})
+
+    def reset(self):
+        """각 레플리카가 자체 KV 컨텍스트를 관리하므로 부모 쪽에서는 할 일이 없음"""
+
+    def tokenize(self, text: bytes, add_bos: bool = True, special: bool = False) -> List[int]:
+        """부모 프로세스의 어휘 전용 모델로 토큰화 (레플리카의 생성 작업을 막지 않음)"""
+        return self._vocab_model().tokenize(text, add_bos=add_bos, special=special)
+
+    def detokenize(self, tokens: List[int]) -> bytes:
+        return self._vocab_model().detokenize(tokens)
+
+    def _vocab_model(self):
+        if self._vocab is None:
+            from llama_cpp import Llama
+            self._vocab = Llama(model_path=self.model_path, vocab_only=True, verbose=False)
+        return self._vocab
+
+    def n_ctx(self) -> int:
+        return int(self.llama_kwargs.get("n_ctx", 512))
+
+    def live_replicas(self) -> int:
+        with self._dispatch_lock:
+            return sum(1 for r in self._replicas if not r.dead and r.process.is_alive())
+
+    def stats(self) -> Dict[str, Any]:
+        """레플리카별 부하 통계 (죽은/재기동 중인 레플리카 포함)"""
+        with self._dispatch_lock:
+            replicas = [
+                {
+                    "replica_id": r.replica_id,
+                    "pid": r.pid,
+                    "alive": not r.dead and r.process.is_alive(),
+                    "respawning": r.respawning,
+                    "deaths": r.deaths,
+                    "last_error": r.last_error,
+                    "in_flight": r.in_flight,
+                    "completed": r.completed,
+                    "completion_tokens": r.completion_tokens,
+                }
+                for r in self._replicas
+            ]
+            return {
+                "model_path": self.model_path,
+                "live_replicas": sum(1 for r in replicas if r["alive"]),
+                "restarts": self.restarts,
+                "replicas": replicas,
+            }
+
+    def close(self):
+        """모든 레플리카 종료"""
+        with self._dispatch_lock:
+            self._closed = True
+        for replica in self._replicas:
+            try:
+                if replica.process.is_alive():
+                    replica.conn.send(("stop", None))
+                replica.process.join(timeout=10)
+                if replica.process.is_alive():
+                    replica.process.terminate()
+            except Exception as e:
+                logger.warning(f"Error stopping replica {replica.replica_id}: {e}")
+        logger.info("Llama worker pool closed")
@@ -0,0 +1,301 @@
+"""
+Prometheus 메트릭 (텍스트 노출 형식, 외부 패키지/서비스 불필요)
+/metrics 엔드포인트가 render()를 반환하면 로컬 Prometheus가 그대로 스크랩할 수 있습니다.
+
+라우트/워크플로우 노드별 요청 수와 지연 히스토그램, 프롬프트/생성 토큰 수,
+prompt eval / eval tokens/sec, 임베딩/Neo4j 지연, 대기열 깊이, RAG 재검색 횟수를 수집합니다.
+"""
+
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+# 지연 히스토그램 기본 버킷 (초): 임베딩 수 ms ~ 생성 수십 초
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# tokens/sec 히스토그램 버킷 (CPU decode 수 tok/s ~ GPU prefill 수천 tok/s)
+THROUGHPUT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """단조 증가 카운터"""
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    """현재 값 게이지 (collect가 주어지면 스크랩 시점에 값을 계산)
+
+    Args:
+        collect: 라벨 값 튜플 → 값 dict를 반환하는 함수 (예: 스케줄러별 대기열 깊이)
+    """
+
+    TYPE = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._collect = collect
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_collector(self, collect: Callable[[], Dict[LabelValues, float]]):
+        self._collect = collect
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        if self._collect is not None:
+            try:
+                values.update(self._collect())
+            except Exception:
+                # 저장된 값은 계속 노출하고, 수집 실패는 로그로 남김
+                logger.warning("Gauge %s collector failed", self.name, exc_info=True)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+                for key, v in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램"""
+
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 값 → (버킷별 개수, 합계, 개수)
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ([0] * len(self.buckets), [0.0, 0.0])
+                self._series[key] = series
+            counts, totals = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            totals[0] += value
+            totals[1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """with 블록 실행 시간(초) 기록 (예외가 나도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return int(series[1][1]) if series else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), list(totals))) for key, (counts, totals) in self._series.items())
+        lines = []
+        for key, (counts, (total, count)) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {_format_value(count)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {_format_value(count)}")
+        return lines
+
+
+class Registry:
+    """메트릭 모음 (이름 중복 등록 방지)"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render() -> str:
+    """텍스트 노출 형식의 전체 메트릭"""
+    return REGISTRY.render()
+
+
+# ---- 서비스 메트릭 ----
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "llm_http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status")))
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "llm_http_request_duration_seconds",
+    "HTTP request latency by route (streaming routes: until the response starts).", ("route", "method")))
+
+WORKFLOW_NODE_DURATION = REGISTRY.register(Histogram(
+    "llm_workflow_node_duration_seconds", "LangGraph workflow node latency.", ("node",)))
+WORKFLOW_NODE_ERRORS = REGISTRY.register(Counter(
+    "llm_workflow_node_errors_total", "LangGraph workflow nodes that raised.", ("node",)))
+RAG_RETRIES = REGISTRY.register(Counter(
+    "llm_rag_retries_total", "Query refinement retries chosen by should_refine_query."))
+RAG_ROUTING_DECISIONS = REGISTRY.register(Counter(
+    "llm_rag_routing_decisions_total", "should_refine_query decisions.", ("decision",)))
+DEADLINE_EXCEEDED = REGISTRY.register(Counter(
+    "llm_deadline_exceeded_total",
+    "Workflow stages skipped or cut short by the request deadline or a client disconnect.", ("stage",)))
+
+PROMPT_TOKENS = REGISTRY.register(Counter(
+    "llm_prompt_tokens_total", "Prompt tokens submitted to the model."))
+COMPLETION_TOKENS = REGISTRY.register(Counter(
+    "llm_completion_tokens_total", "Completion tokens generated by the model."))
+PROMPT_EVAL_TOKENS = REGISTRY.register(Counter(
+    "llm_prompt_eval_tokens_total", "Prompt tokens actually evaluated (after KV prefix reuse)."))
+PROMPT_EVAL_SECONDS = REGISTRY.register(Counter(
+    "llm_prompt_eval_seconds_total", "Time spent in prompt eval (prefill) according to llama.cpp."))
+EVAL_TOKENS = REGISTRY.register(Counter(
+    "llm_eval_tokens_total", "Tokens decoded according to llama.cpp."))
+EVAL_SECONDS = REGISTRY.register(Counter(
+    "llm_eval_seconds_total", "Time spent decoding according to llama.cpp."))
+PROMPT_EVAL_TPS = REGISTRY.register(Histogram(
+    "llm_prompt_eval_tokens_per_second", "Per-request prompt eval (prefill) throughput.", (),
+    buckets=THROUGHPUT_BUCKETS))
+EVAL_TPS = REGISTRY.register(Histogram(
+    "llm_eval_tokens_per_second", "Per-request decode throughput.", (), buckets=THROUGHPUT_BUCKETS))
+GENERATION_DURATION = REGISTRY.register(Histogram(
+    "llm_generation_duration_seconds", "Wall-clock time of one model completion."))
+
+EMBEDDING_DURATION = REGISTRY.register(Histogram(
+    "llm_embedding_duration_seconds", "SentenceTransformer encode latency.", ("kind",)))
+NEO4J_QUERY_DURATION = REGISTRY.register(Histogram(
+    "llm_neo4j_query_duration_seconds", "Neo4j query latency including result consumption.", ("query",)))
+EMBEDDING_CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "llm_embedding_cache_lookups_total", "Persistent embedding cache lookups.", ("kind", "result")))
+
+INGEST_DOCUMENTS = REGISTRY.register(Counter(
+    "llm_ingest_documents_total", "Documents processed by background ingestion jobs.", ("status",)))
+INGEST_CHUNKS = REGISTRY.register(Counter(
+    "llm_ingest_chunks_total", "Chunks written by background ingestion jobs."))
+INGEST_PENDING = REGISTRY.register(Gauge(
+    "llm_ingest_pending_documents", "Documents queued or running in ingestion jobs."))
+
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "llm_inference_queue_depth", "Jobs waiting in the inference scheduler queue.", ("scheduler",)))
+QUEUE_IN_FLIGHT = REGISTRY.register(Gauge(
+    "llm_inference_in_flight", "Jobs currently running on inference workers.", ("scheduler",)))
+
+
+def observe_generation(stats: Optional[dict]):
+    """complete_with_prefix_cache/complete_with_session 통계로 토큰 수와 처리 속도 기록"""
+    if not stats:
+        return
+    if stats.get("prompt_tokens"):
+        PROMPT_TOKENS.inc(stats["prompt_tokens"])
+    if stats.get("completion_tokens"):
+        COMPLETION_TOKENS.inc(stats["completion_tokens"])
+    if stats.get("total_ms") is not None:
+        GENERATION_DURATION.observe(stats["total_ms"] / 1000)
+
+    for tokens_key, ms_key, tokens_total, seconds_total, tps in (
+        ("prompt_eval_tokens", "prompt_eval_ms", PROMPT_EVAL_TOKENS, PROMPT_EVAL_SECONDS, PROMPT_EVAL_TPS),
+        ("eval_tokens", "eval_ms", EVAL_TOKENS, EVAL_SECONDS, EVAL_TPS),
+    ):
+        tokens, ms = stats.get(tokens_key), stats.get(ms_key)
+        if not tokens or not ms:
+            continue
+        tokens_total.inc(tokens)
+        seconds_total.inc(ms / 1000)
+        tps.observe(tokens / (ms / 1000))
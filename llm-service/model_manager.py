@@ -0,0 +1,202 @@
+"""
+다중 모델 상주 관리
+활성 모델(전역 llm) 외에 요청의 model 필드나 의도 라우팅 규칙으로 선택된 GGUF 모델을 RAM 예산 안에서
+함께 상주시킵니다. 예산을 넘으면 가장 오래 쓰지 않은 모델부터 내립니다 (활성 모델은 고정).
+
+로드/해제/메모리 추정 방법은 호출자가 함수로 넘기므로 이 모듈은 app.py 전역 상태를 알지 못합니다.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class ModelSelectionError(Exception):
+    """요청한 모델을 사용할 수 없음 (error_type, status_code로 응답 구성)"""
+
+    def __init__(self, message: str, error_type: str, status_code: int):
+        super().__init__(message)
+        self.error_type = error_type
+        self.status_code = status_code
+
+
+@dataclass
+class ResidentModel:
+    path: str
+    model: Any
+    workflow: Any
+    memory_bytes: int
+    pinned: bool = False
+    load_ms: float = 0.0
+    loaded_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    requests: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "memory_mb": round(self.memory_bytes / MB, 1),
+            "pinned": self.pinned,
+            "load_ms": self.load_ms,
+            "loaded_at": self.loaded_at,
+            "last_used": self.last_used,
+            "requests": self.requests,
+            "workflow_initialized": self.workflow is not None,
+        }
+
+
+class ModelManager:
+    """RAM 예산 안에서 여러 모델을 상주시키는 LRU 관리자
+
+    Args:
+        load: model_path → (모델, 워크플로우). 실패하면 예외
+        release: (model_path, 모델) → None. 남은 요청을 기다린 뒤 해제
+        estimate: model_path → 예상 메모리(bytes)
+        budget_bytes: 상주 모델 전체(활성 모델 포함) 메모리 예산. 0이면 활성 모델만 사용
+    """
+
+    def __init__(self, load: Callable[[str], Tuple[Any, Any]], release: Callable[[str, Any], None],
+                 estimate: Callable[[str], int], budget_bytes: int):
+        self._load = load
+        self._release = release
+        self._estimate = estimate
+        self.budget_bytes = budget_bytes
+        # 오래 쓰지 않은 순서 (앞쪽이 LRU)
+        self._models: "OrderedDict[str, ResidentModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 로드/퇴출은 한 번에 하나씩 (예산 계산이 겹치지 않도록)
+        self._load_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+        self._evictions = 0
+        self._load_failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_bytes > 0
+
+    def set_active(self, path: str, model: Any, workflow: Any):
+        """활성 모델 등록 (고정, 퇴출 대상 아님). 이전 활성 모델은 목록에서만 제거 (해제는 호출자 담당)"""
+        try:
+            memory_bytes = self._estimate(path)
+        except Exception as e:
+            logger.warning(f"Failed to estimate memory of active model {path}: {e}")
+            memory_bytes = 0
+        with self._lock:
+            for key in [k for k, m in self._models.items() if m.pinned]:
+                del self._models[key]
+            self._models[path] = ResidentModel(path=path, model=model, workflow=workflow,
+                                               memory_bytes=memory_bytes, pinned=True)
+
+    def take(self, path: str) -> Optional[ResidentModel]:
+        """상주 중인 비활성 모델을 목록에서 꺼냄 (모델 교체 시 다시 로드하지 않고 재사용)"""
+        with self._lock:
+            resident = self._models.get(path)
+            if resident is None or resident.pinned:
+                return None
+            return self._models.pop(path)
+
+    def get(self, path: str) -> ResidentModel:
+        """모델을 상주시키고 반환 (필요하면 LRU 모델을 내리고 로드)
+
+        Raises:
+            ModelSelectionError: 다중 모델 비활성화 또는 예산 초과
+        """
+        resident = self._touch(path)
+        if resident is not None:
+            return resident
+        if not self.enabled:
+            raise ModelSelectionError(
+                "Multi-model residency is disabled (MODEL_RAM_BUDGET_MB=0); only the active model can be used",
+                "MULTI_MODEL_DISABLED", 400)
+
+        with self._load_lock:
+            # 대기하는 동안 다른 요청이 로드했을 수 있음
+            resident = self._touch(path)
+            if resident is not None:
+                return resident
+            with self._lock:
+                self._misses += 1
+
+            needed = self._estimate(path)
+            self._make_room(path, needed)
+
+            started = time.perf_counter()
+            try:
+                model, workflow = self._load(path)
+            except Exception:
+                with self._lock:
+                    self._load_failures += 1
+                raise
+            resident = ResidentModel(path=path, model=model, workflow=workflow, memory_bytes=needed,
+                                     load_ms=round((time.perf_counter() - started) * 1000, 1))
+            resident.requests = 1
+            with self._lock:
+                self._models[path] = resident
+                self._loads += 1
+            logger.info(f"Model {path} resident ({needed / MB:.0f} MB, loaded in {resident.load_ms:.0f} ms)")
+            return resident
+
+    def _touch(self, path: str) -> Optional[ResidentModel]:
+        with self._lock:
+            resident = self._models.get(path)
+            if resident is None:
+                return None
+            self._models.move_to_end(path)
+            resident.last_used = time.time()
+            resident.requests += 1
+            self._hits += 1
+            return resident
+
+    def _used_bytes(self) -> int:
+        return sum(m.memory_bytes for m in self._models.values())
+
+    def _make_room(self, path: str, needed: int):
+        """needed만큼 예산이 남을 때까지 LRU 비고정 모델을 내림"""
+        with self._lock:
+            pinned = sum(m.memory_bytes for m in self._models.values() if m.pinned)
+        if pinned + needed > self.budget_bytes:
+            raise ModelSelectionError(
+                f"Model {path} needs ~{needed / MB:.0f} MB; budget is {self.budget_bytes / MB:.0f} MB "
+                f"with {pinned / MB:.0f} MB held by the active model",
+                "INSUFFICIENT_MEMORY", 507)
+
+        while True:
+            with self._lock:
+                if self._used_bytes() + needed <= self.budget_bytes:
+                    return
+                victim = next(m for m in self._models.values() if not m.pinned)
+                del self._models[victim.path]
+                self._evictions += 1
+            logger.info(f"Evicting model {victim.path} (last used {time.time() - victim.last_used:.0f}s ago) "
+                        f"to load {path}")
+            try:
+                self._release(victim.path, victim.model)
+            except Exception as e:
+                logger.error(f"Failed to release evicted model {victim.path}: {e}", exc_info=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "budget_mb": round(self.budget_bytes / MB, 1),
+                "used_mb": round(self._used_bytes() / MB, 1),
+                "resident": [m.to_dict() for m in reversed(self._models.values())],
+                "hits": self._hits,
+                "misses": self._misses,
+                "loads": self._loads,
+                "load_failures": self._load_failures,
+                "evictions": self._evictions,
+            }
+
+    def resident_paths(self) -> List[str]:
+        with self._lock:
+            return list(self._models)
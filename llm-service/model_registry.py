@@ -0,0 +1,419 @@
+"""
+GGUF 모델 레지스트리
+가중치를 로드하지 않고 GGUF 헤더(메타데이터 + 텐서 정보)만 읽어 아키텍처, 파라미터 수, 양자화 타입,
+컨텍스트 길이, 채팅 템플릿을 알려 줍니다. 결과는 파일 경로별로 캐시하고 mtime/크기가 바뀌면 다시 읽습니다.
+
+주어진 n_ctx로 로드했을 때의 RAM/KV 캐시 사용량을 추정해, 가용 메모리를 넘는 모델 교체는
+Llama()를 만들기 전에 거부합니다.
+"""
+
+import logging
+import os
+import struct
+import threading
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 모델 교체 전 메모리 검사 사용 여부
+MODEL_MEMORY_CHECK = os.getenv("MODEL_MEMORY_CHECK", "true").lower() == "true"
+# 추정치에 더하는 계산 버퍼/런타임 여유분(MB)
+MODEL_MEMORY_OVERHEAD_MB = float(os.getenv("MODEL_MEMORY_OVERHEAD_MB", "512"))
+# 로드 후에도 남겨 둘 최소 가용 메모리(MB)
+MODEL_MEMORY_HEADROOM_MB = float(os.getenv("MODEL_MEMORY_HEADROOM_MB", "512"))
+
+GGUF_MAGIC = b"GGUF"
+MB = 1024 * 1024
+
+# GGUF 메타데이터 값 타입
+_UINT8, _INT8, _UINT16, _INT16, _UINT32, _INT32, _FLOAT32, _BOOL, _STRING, _ARRAY, _UINT64, _INT64, _FLOAT64 = range(13)
+_SCALAR_FORMATS = {
+    _UINT8: "<B", _INT8: "<b", _UINT16: "<H", _INT16: "<h", _UINT32: "<I", _INT32: "<i",
+    _FLOAT32: "<f", _BOOL: "<?", _UINT64: "<Q", _INT64: "<q", _FLOAT64: "<d",
+}
+
+# general.file_type (llama_ftype) → 양자화 이름
+FILE_TYPES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 7: "Q8_0", 8: "Q5_0", 9: "Q5_1",
+    10: "Q2_K", 11: "Q3_K_S", 12: "Q3_K_M", 13: "Q3_K_L", 14: "Q4_K_S", 15: "Q4_K_M",
+    16: "Q5_K_S", 17: "Q5_K_M", 18: "Q6_K", 19: "IQ2_XXS", 20: "IQ2_XS", 21: "Q2_K_S",
+    22: "IQ3_XS", 23: "IQ3_XXS", 24: "IQ1_S", 25: "IQ4_NL", 26: "IQ3_S", 27: "IQ3_M",
+    28: "IQ2_S", 29: "IQ2_M", 30: "IQ4_XS", 31: "IQ1_M", 32: "BF16", 36: "TQ1_0", 37: "TQ2_0",
+}
+
+# 긴 배열(토크나이저 어휘 등)은 값 대신 길이만 보관
+MAX_ARRAY_VALUES = 64
+
+
+class GGUFFormatError(ValueError):
+    """GGUF 파일이 아니거나 헤더가 손상됨"""
+
+
+class InsufficientMemoryError(Exception):
+    """모델을 로드하면 가용 메모리를 넘음"""
+
+    def __init__(self, estimate: "MemoryEstimate", available_bytes: int):
+        super().__init__(
+            f"Model needs ~{estimate.total_bytes / MB:.0f} MB but only {available_bytes / MB:.0f} MB is available "
+            f"(headroom {MODEL_MEMORY_HEADROOM_MB:.0f} MB)"
+        )
+        self.estimate = estimate
+        self.available_bytes = available_bytes
+
+
+@dataclass
+class MemoryEstimate:
+    """n_ctx 기준 호스트 RAM 사용량 추정"""
+    n_ctx: int
+    weights_bytes: int
+    kv_cache_bytes: int
+    overhead_bytes: int
+    gpu_layers: int = 0
+    replicas: int = 1
+    # 투기적 디코딩: logits_all 배열(n_ctx x 어휘) + draft 모델
+    speculative_bytes: int = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self.weights_bytes + self.kv_cache_bytes + self.overhead_bytes + self.speculative_bytes
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "n_ctx": self.n_ctx,
+            "gpu_layers": self.gpu_layers,
+            "replicas": self.replicas,
+            "weights_mb": round(self.weights_bytes / MB, 1),
+            "kv_cache_mb": round(self.kv_cache_bytes / MB, 1),
+            "overhead_mb": round(self.overhead_bytes / MB, 1),
+            "speculative_mb": round(self.speculative_bytes / MB, 1),
+            "total_mb": round(self.total_bytes / MB, 1),
+        }
+
+
+@dataclass
+class ModelInfo:
+    """GGUF 헤더에서 읽은 모델 정보"""
+    path: str
+    size_bytes: int
+    mtime: float
+    gguf_version: int
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    parameter_count: int = 0
+    tensor_types: Dict[int, int] = field(default_factory=dict)  # ggml 타입 → 텐서 수
+
+    def _arch_value(self, key: str, default=None):
+        return self.metadata.get(f"{self.architecture}.{key}", default)
+
+    @property
+    def architecture(self) -> Optional[str]:
+        return self.metadata.get("general.architecture")
+
+    @property
+    def name(self) -> Optional[str]:
+        return self.metadata.get("general.name")
+
+    @property
+    def quantization(self) -> Optional[str]:
+        file_type = self.metadata.get("general.file_type")
+        if file_type is None:
+            return None
+        return FILE_TYPES.get(file_type, f"type_{file_type}")
+
+    @property
+    def context_length(self) -> Optional[int]:
+        return self._arch_value("context_length")
+
+    @property
+    def block_count(self) -> Optional[int]:
+        return self._arch_value("block_count")
+
+    @property
+    def embedding_length(self) -> Optional[int]:
+        return self._arch_value("embedding_length")
+
+    @property
+    def vocab_size(self) -> Optional[int]:
+        vocab_size = self._arch_value("vocab_size")
+        if vocab_size:
+            return vocab_size
+        tokens = self.metadata.get("tokenizer.ggml.tokens")
+        if isinstance(tokens, dict):
+            return tokens.get("length")
+        return len(tokens) if isinstance(tokens, list) else None
+
+    @property
+    def chat_template(self) -> Optional[str]:
+        return self.metadata.get("tokenizer.chat_template")
+
+    def kv_bytes_per_token(self, kv_type_bytes: int = 2) -> Optional[int]:
+        """토큰 하나당 KV 캐시 크기 (모든 레이어, 기본 f16)"""
+        n_layers = self.block_count
+        n_embd = self.embedding_length
+        n_head = self._arch_value("attention.head_count")
+        if not n_layers or not n_embd or not n_head:
+            return None
+        # 레이어별 배열이면 최대값 사용 (보수적으로)
+        if isinstance(n_head, list):
+            n_head = max(n_head)
+        n_head_kv = self._arch_value("attention.head_count_kv", n_head)
+        if isinstance(n_head_kv, list):
+            n_head_kv = max(n_head_kv)
+        key_length = self._arch_value("attention.key_length", n_embd // n_head)
+        value_length = self._arch_value("attention.value_length", n_embd // n_head)
+        return n_layers * n_head_kv * (key_length + value_length) * kv_type_bytes
+
+    def estimate_memory(self, n_ctx: Optional[int] = None, n_gpu_layers: int = 0, replicas: int = 1,
+                        logits_all: bool = False, draft_bytes: int = 0) -> MemoryEstimate:
+        """n_ctx로 로드했을 때의 호스트 RAM 사용량 추정
+
+        GPU로 오프로드한 레이어의 가중치/KV는 호스트 RAM에서 뺍니다. 레플리카 프로세스는 mmap된
+        가중치를 공유하므로 KV 캐시와 런타임 여유분만 레플리카 수만큼 곱합니다.
+
+        Args:
+            logits_all: 투기적 디코딩(draft_model) 사용 시 llama-cpp-python이 잡는 n_ctx x 어휘 float32 배열 포함
+            draft_bytes: draft GGUF 모델의 추정 메모리 (레플리카마다 하나씩)
+        """
+        n_ctx = n_ctx or self.context_length or 4096
+        n_layers = self.block_count or 0
+        if n_gpu_layers < 0 or (n_layers and n_gpu_layers >= n_layers):
+            offloaded = 1.0
+        else:
+            offloaded = n_gpu_layers / n_layers if n_layers else 0.0
+
+        per_token = self.kv_bytes_per_token() or 0
+        kv_cache = int(per_token * n_ctx * (1 - offloaded))
+        weights = int(self.size_bytes * (1 - offloaded))
+        overhead = int(MODEL_MEMORY_OVERHEAD_MB * MB)
+        speculative = draft_bytes + (n_ctx * (self.vocab_size or 0) * 4 if logits_all else 0)
+        return MemoryEstimate(
+            n_ctx=n_ctx,
+            weights_bytes=weights,
+            kv_cache_bytes=kv_cache * replicas,
+            overhead_bytes=overhead * replicas,
+            gpu_layers=n_gpu_layers,
+            replicas=replicas,
+            speculative_bytes=speculative * replicas,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "architecture": self.architecture,
+            "parameter_count": self.parameter_count,
+            "size_label": self.metadata.get("general.size_label"),
+            "quantization": self.quantization,
+            "context_length": self.context_length,
+            "block_count": self.block_count,
+            "embedding_length": self.embedding_length,
+            "kv_bytes_per_token": self.kv_bytes_per_token(),
+            "vocab_size": self.vocab_size,
+            "chat_template": self.chat_template,
+            "gguf_version": self.gguf_version,
+        }
+
+
+def _read(f: BinaryIO, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise GGUFFormatError("Unexpected end of GGUF header")
+    return data
+
+
+def _read_scalar(f: BinaryIO, value_type: int):
+    fmt = _SCALAR_FORMATS[value_type]
+    return struct.unpack(fmt, _read(f, struct.calcsize(fmt)))[0]
+
+
+def _read_string(f: BinaryIO) -> str:
+    length = _read_scalar(f, _UINT64)
+    return _read(f, length).decode("utf-8", errors="replace")
+
+
+def _skip_string(f: BinaryIO):
+    f.seek(_read_scalar(f, _UINT64), os.SEEK_CUR)
+
+
+def _read_value(f: BinaryIO, value_type: int):
+    if value_type == _STRING:
+        return _read_string(f)
+    if value_type == _ARRAY:
+        item_type = _read_scalar(f, _UINT32)
+        count = _read_scalar(f, _UINT64)
+        if count > MAX_ARRAY_VALUES:
+            # 어휘/머지 목록 등은 건너뛰고 길이만 기록
+            if item_type in _SCALAR_FORMATS:
+                f.seek(count * struct.calcsize(_SCALAR_FORMATS[item_type]), os.SEEK_CUR)
+            else:
+                for _ in range(count):
+                    _skip_value(f, item_type)
+            return {"type": "array", "length": count}
+        return [_read_value(f, item_type) for _ in range(count)]
+    if value_type in _SCALAR_FORMATS:
+        return _read_scalar(f, value_type)
+    raise GGUFFormatError(f"Unknown GGUF value type {value_type}")
+
+
+def _skip_value(f: BinaryIO, value_type: int):
+    if value_type == _STRING:
+        _skip_string(f)
+    elif value_type in _SCALAR_FORMATS:
+        f.seek(struct.calcsize(_SCALAR_FORMATS[value_type]), os.SEEK_CUR)
+    else:
+        _read_value(f, value_type)
+
+
+def read_gguf_header(path: str) -> ModelInfo:
+    """GGUF 헤더만 읽어 ModelInfo 생성 (텐서 데이터는 읽지 않음)
+
+    Raises:
+        GGUFFormatError: GGUF 파일이 아니거나 지원하지 않는 버전
+    """
+    stat = os.stat(path)
+    with open(path, "rb", buffering=1024 * 1024) as f:
+        if f.read(4) != GGUF_MAGIC:
+            raise GGUFFormatError(f"Not a GGUF file: {path}")
+        version = _read_scalar(f, _UINT32)
+        if version < 2:
+            raise GGUFFormatError(f"Unsupported GGUF version {version}: {path}")
+        tensor_count = _read_scalar(f, _UINT64)
+        kv_count = _read_scalar(f, _UINT64)
+
+        metadata: Dict[str, Any] = {}
+        for _ in range(kv_count):
+            key = _read_string(f)
+            metadata[key] = _read_value(f, _read_scalar(f, _UINT32))
+
+        parameter_count = 0
+        tensor_types: Dict[int, int] = {}
+        for _ in range(tensor_count):
+            _skip_string(f)  # 텐서 이름
+            n_dims = _read_scalar(f, _UINT32)
+            elements = 1
+            for dim in struct.unpack(f"<{n_dims}Q", _read(f, 8 * n_dims)):
+                elements *= dim
+            tensor_type = _read_scalar(f, _UINT32)
+            _read_scalar(f, _UINT64)  # 데이터 오프셋
+            parameter_count += elements
+            tensor_types[tensor_type] = tensor_types.get(tensor_type, 0) + 1
+
+    return ModelInfo(
+        path=path,
+        size_bytes=stat.st_size,
+        mtime=stat.st_mtime,
+        gguf_version=version,
+        metadata=metadata,
+        parameter_count=parameter_count,
+        tensor_types=tensor_types,
+    )
+
+
+def available_memory_bytes() -> Optional[int]:
+    """현재 가용 메모리 (/proc/meminfo MemAvailable과 cgroup 한도 중 작은 값, 알 수 없으면 None)"""
+    candidates: List[int] = []
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    candidates.append(int(line.split()[1]) * 1024)
+                    break
+    except OSError:
+        pass
+
+    # 컨테이너 메모리 한도 (cgroup v2, v1)
+    for limit_path, usage_path in (
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes"),
+    ):
+        try:
+            with open(limit_path) as f:
+                limit = f.read().strip()
+            with open(usage_path) as f:
+                usage = int(f.read().strip())
+        except (OSError, ValueError):
+            continue
+        # 한도 없음("max" 또는 매우 큰 값)
+        if limit.isdigit() and int(limit) < 1 << 60:
+            candidates.append(max(int(limit) - usage, 0))
+        break
+
+    return min(candidates) if candidates else None
+
+
+class ModelRegistry:
+    """GGUF 헤더 정보를 경로별로 캐시 (mtime 또는 크기가 바뀌면 다시 읽음)"""
+
+    def __init__(self):
+        self._cache: Dict[str, Tuple[float, int, ModelInfo]] = {}
+        self._lock = threading.Lock()
+        self._parses = 0
+        self._hits = 0
+
+    def get(self, path: str) -> ModelInfo:
+        """모델 정보 조회
+
+        Raises:
+            OSError: 파일이 없는 경우
+            GGUFFormatError: GGUF 헤더를 읽을 수 없는 경우
+        """
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+                self._hits += 1
+                return cached[2]
+
+        info = read_gguf_header(path)
+        with self._lock:
+            self._cache[key] = (info.mtime, info.size_bytes, info)
+            self._parses += 1
+        logger.info(f"Read GGUF header: {path} ({info.architecture}, {info.quantization}, "
+                    f"{info.parameter_count / 1e9:.2f}B params)")
+        return info
+
+    def list_models(self, models_dir: str) -> List[str]:
+        """디렉터리의 .gguf 경로 목록 (없어진 파일은 캐시에서 제거)"""
+        if not os.path.isdir(models_dir):
+            return []
+        paths = sorted(os.path.join(models_dir, name) for name in os.listdir(models_dir) if name.endswith(".gguf"))
+        present = {os.path.abspath(p) for p in paths}
+        with self._lock:
+            for key in [k for k in self._cache if os.path.dirname(k) == os.path.abspath(models_dir)]:
+                if key not in present:
+                    del self._cache[key]
+        return paths
+
+    def check_fits(self, path: str, n_ctx: Optional[int] = None, n_gpu_layers: int = 0, replicas: int = 1,
+                   available_bytes: Optional[int] = None, **estimate_kwargs) -> MemoryEstimate:
+        """모델을 로드해도 가용 메모리가 남는지 확인
+
+        Raises:
+            InsufficientMemoryError: 추정치 + 여유분이 가용 메모리를 넘는 경우
+        """
+        estimate = self.get(path).estimate_memory(n_ctx, n_gpu_layers=n_gpu_layers, replicas=replicas,
+                                                  **estimate_kwargs)
+        if not MODEL_MEMORY_CHECK:
+            return estimate
+        if available_bytes is None:
+            available_bytes = available_memory_bytes()
+        if available_bytes is not None and estimate.total_bytes + MODEL_MEMORY_HEADROOM_MB * MB > available_bytes:
+            raise InsufficientMemoryError(estimate, available_bytes)
+        return estimate
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"cached": len(self._cache), "parses": self._parses, "hits": self._hits}
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """프로세스 전역 모델 레지스트리"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
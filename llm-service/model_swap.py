@@ -0,0 +1,165 @@
+"""
+모델 교체 백그라운드 작업
+새 모델 로드와 워크플로우 생성은 별도 스레드에서 진행하고(기존 모델은 계속 응답),
+준비가 끝나면 전역 모델/워크플로우를 한 번에 전환합니다. 이전 모델은 자기 스케줄러에
+남은 요청을 모두 처리한 뒤에 해제합니다.
+
+로드/전환/대기/해제 방법은 호출자가 함수로 넘기므로 이 모듈은 app.py 전역 상태를 알지 못합니다.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 작업 상태
+STATUS_PENDING = "pending"
+STATUS_LOADING = "loading"      # 새 모델 로드 + 워크플로우 생성 (이전 모델이 계속 응답)
+STATUS_DRAINING = "draining"    # 전환 완료, 이전 모델에 남은 요청 처리 대기
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+ACTIVE_STATUSES = (STATUS_PENDING, STATUS_LOADING, STATUS_DRAINING)
+
+
+class SwapInProgressError(Exception):
+    """이미 진행 중인 모델 교체가 있음"""
+
+    def __init__(self, job: "ModelSwapJob"):
+        super().__init__(f"Model swap {job.job_id} to {job.model_path} is already {job.status}")
+        self.job = job
+
+
+@dataclass
+class ModelSwapJob:
+    job_id: str
+    model_path: str
+    previous_model_path: Optional[str] = None
+    status: str = STATUS_PENDING
+    error: Optional[str] = None
+    workflow_initialized: bool = False
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    # 단계별 소요 시간 (load, switch, drain, release)
+    durations_ms: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "jobId": self.job_id,
+            "status": self.status,
+            "modelPath": self.model_path,
+            "previousModelPath": self.previous_model_path,
+            "error": self.error,
+            "workflowInitialized": self.workflow_initialized,
+            "createdAt": self.created_at,
+            "finishedAt": self.finished_at,
+            "durationsMs": dict(self.durations_ms),
+        }
+
+
+class ModelSwapManager:
+    """모델 교체 작업을 한 번에 하나씩 실행
+
+    Args:
+        load: model_path → (새 모델, 새 워크플로우 또는 None). 실패하면 예외
+        activate: (model_path, 새 모델, 새 워크플로우) → (이전 모델, 이전 model_path). 전역 상태를 원자적으로 전환
+        drain: 이전 model_path의 남은 요청이 끝날 때까지 대기
+        release: 이전 모델 해제
+        max_history: 보관할 완료 작업 수
+    """
+
+    def __init__(self, load: Callable[[str], Tuple[Any, Any]],
+                 activate: Callable[[str, Any, Any], Tuple[Any, Optional[str]]],
+                 drain: Callable[[str], None], release: Callable[[Any], None], max_history: int = 20):
+        self._load = load
+        self._activate = activate
+        self._drain = drain
+        self._release = release
+        self.max_history = max_history
+        self._jobs: Dict[str, ModelSwapJob] = {}
+        self._order: List[str] = []
+        self._lock = threading.Lock()
+
+    def start(self, model_path: str) -> ModelSwapJob:
+        """교체 작업 시작 (즉시 반환)
+
+        Raises:
+            SwapInProgressError: 다른 교체 작업이 아직 끝나지 않은 경우
+        """
+        with self._lock:
+            active = self.active()
+            if active is not None:
+                raise SwapInProgressError(active)
+            job = ModelSwapJob(job_id=uuid.uuid4().hex[:12], model_path=model_path)
+            self._jobs[job.job_id] = job
+            self._order.append(job.job_id)
+            while len(self._order) > self.max_history:
+                self._jobs.pop(self._order.pop(0), None)
+
+        threading.Thread(target=self._run, args=(job,), name=f"model-swap-{job.job_id}", daemon=True).start()
+        logger.info(f"Model swap {job.job_id} started: {model_path}")
+        return job
+
+    def get(self, job_id: str) -> Optional[ModelSwapJob]:
+        return self._jobs.get(job_id)
+
+    def latest(self) -> Optional[ModelSwapJob]:
+        return self._jobs.get(self._order[-1]) if self._order else None
+
+    def active(self) -> Optional[ModelSwapJob]:
+        latest = self.latest()
+        return latest if latest is not None and latest.status in ACTIVE_STATUSES else None
+
+    def _step(self, job: ModelSwapJob, name: str, fn: Callable, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            job.durations_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    def _run(self, job: ModelSwapJob):
+        try:
+            job.status = STATUS_LOADING
+            new_model, new_workflow = self._step(job, "load", self._load, job.model_path)
+            job.workflow_initialized = new_workflow is not None
+        except Exception as e:
+            # 전환 전에 실패했으므로 기존 모델이 그대로 응답
+            logger.error(f"Model swap {job.job_id} failed while loading {job.model_path}: {e}", exc_info=True)
+            job.status = STATUS_FAILED
+            job.error = str(e)
+            job.finished_at = time.time()
+            return
+
+        try:
+            old_model, old_model_path = self._step(job, "switch", self._activate, job.model_path, new_model,
+                                                   new_workflow)
+        except Exception as e:
+            logger.error(f"Model swap {job.job_id} failed while switching: {e}", exc_info=True)
+            self._release(new_model)
+            job.status = STATUS_FAILED
+            job.error = str(e)
+            job.finished_at = time.time()
+            return
+
+        job.previous_model_path = old_model_path
+        logger.info(f"Model swap {job.job_id}: now serving {job.model_path}, draining {old_model_path}")
+        try:
+            if old_model is not None and old_model is not new_model:
+                job.status = STATUS_DRAINING
+                if old_model_path is not None and old_model_path != job.model_path:
+                    self._step(job, "drain", self._drain, old_model_path)
+                self._step(job, "release", self._release, old_model)
+
+            job.status = STATUS_COMPLETED
+            logger.info(f"Model swap {job.job_id} completed in {sum(job.durations_ms.values()):.0f} ms")
+        except Exception as e:
+            # 전환 후 이전 모델 정리 실패는 새 모델 서비스에 영향 없음 (전환 자체는 완료)
+            logger.error(f"Model swap {job.job_id}: cleanup of {old_model_path} failed: {e}", exc_info=True)
+            job.status = STATUS_COMPLETED
+            job.error = f"Previous model cleanup failed: {e}"
+        finally:
+            job.finished_at = time.time()
@@ -0,0 +1,173 @@
+"""
+토큰 예산 기반 프롬프트 패커
+로드된 모델의 토크나이저로 시스템 프롬프트/히스토리/RAG 문서/답변에 n_ctx를 나눠 줍니다.
+
+- 시스템 프롬프트(또는 세션 transcript)와 현재 질문은 항상 포함
+- 히스토리는 최근 턴부터, 남은 예산의 PROMPT_HISTORY_MAX_RATIO까지
+- 문서는 relevance_score가 높은 것부터 채우고, 넘치는 문서는 남은 자리만큼 잘라 넣거나 버림 (낮은 점수부터 빠짐)
+- max_tokens는 프롬프트를 채우고 남은 컨텍스트에서 계산 (PROMPT_MAX_COMPLETION_TOKENS로 상한)
+"""
+
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 답변용으로 최소한 남겨 둘 토큰 수 (문서/히스토리가 이 자리를 넘보지 못함)
+PROMPT_MIN_COMPLETION_TOKENS = int(os.getenv("PROMPT_MIN_COMPLETION_TOKENS", "512"))
+# 남은 컨텍스트가 많아도 이 이상은 생성하지 않음 (0이면 남은 컨텍스트 전부)
+PROMPT_MAX_COMPLETION_TOKENS = int(os.getenv("PROMPT_MAX_COMPLETION_TOKENS", "1024"))
+# 시스템 프롬프트/질문을 뺀 프롬프트 예산 중 히스토리가 쓸 수 있는 최대 비율
+PROMPT_HISTORY_MAX_RATIO = float(os.getenv("PROMPT_HISTORY_MAX_RATIO", "0.3"))
+# 이보다 적게 남으면 문서를 잘라 넣지 않고 버림
+PROMPT_MIN_DOC_TOKENS = int(os.getenv("PROMPT_MIN_DOC_TOKENS", "64"))
+
+# 역할 태그/번호 등 본문 밖에 붙는 토큰 (최종 프롬프트를 다시 세어 보정)
+TURN_OVERHEAD_TOKENS = 8
+DOC_OVERHEAD_TOKENS = 4
+# BOS와 토큰 경계 차이에 대한 여유분
+SAFETY_TOKENS = 8
+TRUNCATION_MARK = " …"
+
+
+@dataclass
+class PackedPrompt:
+    """패킹 결과"""
+    prompt: str
+    max_tokens: int
+    prompt_tokens: int
+    n_ctx: int
+    context: List[dict] = field(default_factory=list)
+    docs: List[str] = field(default_factory=list)
+    dropped_history: int = 0
+    dropped_docs: int = 0
+    truncated_docs: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "n_ctx": self.n_ctx,
+            "prompt_tokens": self.prompt_tokens,
+            "max_tokens": self.max_tokens,
+            "history_messages": len(self.context),
+            "dropped_history": self.dropped_history,
+            "docs": len(self.docs),
+            "dropped_docs": self.dropped_docs,
+            "truncated_docs": self.truncated_docs,
+        }
+
+
+class PromptPacker:
+    """모델 하나의 n_ctx 안에 프롬프트를 채우는 패커
+
+    Args:
+        llm: tokenize(bytes, add_bos, special)와 n_ctx()를 제공하는 Llama 또는 LlamaWorkerPool
+    """
+
+    def __init__(self, llm, n_ctx: Optional[int] = None,
+                 min_completion_tokens: int = PROMPT_MIN_COMPLETION_TOKENS,
+                 max_completion_tokens: int = PROMPT_MAX_COMPLETION_TOKENS,
+                 history_ratio: float = PROMPT_HISTORY_MAX_RATIO,
+                 min_doc_tokens: int = PROMPT_MIN_DOC_TOKENS):
+        self.llm = llm
+        self.n_ctx = n_ctx or llm.n_ctx()
+        self.min_completion_tokens = min_completion_tokens
+        self.max_completion_tokens = max_completion_tokens
+        self.history_ratio = history_ratio
+        self.min_doc_tokens = min_doc_tokens
+
+    def count_tokens(self, text: str) -> int:
+        return len(self._tokenize(text))
+
+    def _tokenize(self, text: str) -> List[int]:
+        return self.llm.tokenize(text.encode("utf-8"), add_bos=False, special=True)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """앞에서부터 max_tokens 토큰만 남김 (토큰 경계에서 자르고 잘렸음을 표시)"""
+        tokens = self._tokenize(text)
+        if len(tokens) <= max_tokens:
+            return text
+        keep = max(max_tokens - len(self._tokenize(TRUNCATION_MARK)), 0)
+        detokenize = getattr(self.llm, "detokenize", None)
+        if detokenize is not None:
+            head = detokenize(tokens[:keep]).decode("utf-8", errors="ignore")
+        else:
+            # detokenize가 없으면 글자 수 비율로 근사 (최종 프롬프트를 다시 세어 보정됨)
+            head = text[:len(text) * keep // len(tokens)]
+        return head.rstrip() + TRUNCATION_MARK
+
+    def pack(self, render: Callable[[List[dict], List[str]], str], context: List[dict],
+             docs: List[str], scores: Optional[List[Optional[float]]] = None) -> PackedPrompt:
+        """예산에 맞춰 히스토리와 문서를 고르고 프롬프트를 만듦
+
+        Args:
+            render: (히스토리, 문서) → 프롬프트 문자열. 시스템 프롬프트와 현재 질문은 render가 항상 포함
+            context: 히스토리 (오래된 것 → 최근)
+            docs: 검색 문서 (프롬프트에 들어갈 순서)
+            scores: docs와 같은 길이의 relevance_score. 없거나 None인 항목은 목록 순서를 순위로 사용
+        """
+        prompt_budget = self.n_ctx - self.min_completion_tokens - SAFETY_TOKENS
+        remaining = prompt_budget - self.count_tokens(render([], []))
+        if remaining < 0:
+            logger.warning(f"Prompt without history/docs already exceeds budget ({-remaining} tokens over)")
+
+        # 히스토리: 최근 턴부터 상한까지
+        history: List[dict] = []
+        history_budget = int(max(remaining, 0) * self.history_ratio)
+        for msg in reversed(context):
+            cost = self.count_tokens(msg.get("content", "")) + TURN_OVERHEAD_TOKENS
+            if cost > history_budget:
+                break
+            history.insert(0, msg)
+            history_budget -= cost
+            remaining -= cost
+
+        # 문서: 점수 높은 순으로 채우고, 넘치면 남은 자리만큼 잘라 넣음
+        ranks = self._rank(docs, scores)
+        selected: Dict[int, str] = {}
+        for index in ranks:
+            cost = self.count_tokens(docs[index]) + DOC_OVERHEAD_TOKENS
+            if cost <= remaining:
+                selected[index] = docs[index]
+                remaining -= cost
+            elif remaining - DOC_OVERHEAD_TOKENS >= self.min_doc_tokens:
+                selected[index] = self.truncate(docs[index], remaining - DOC_OVERHEAD_TOKENS)
+                remaining = 0
+
+        # 실제 프롬프트를 세어 추정 오차 보정 (넘치면 가장 낮은 점수의 문서부터 뺌)
+        while True:
+            kept_docs = [selected[index] for index in sorted(selected)]
+            prompt = render(history, kept_docs)
+            prompt_tokens = self.count_tokens(prompt) + 1  # BOS
+            if prompt_tokens <= prompt_budget + SAFETY_TOKENS or not selected:
+                break
+            lowest = next(index for index in reversed(ranks) if index in selected)
+            del selected[lowest]
+
+        max_tokens = self.n_ctx - prompt_tokens - SAFETY_TOKENS
+        if self.max_completion_tokens > 0:
+            max_tokens = min(max_tokens, self.max_completion_tokens)
+        packed = PackedPrompt(
+            prompt=prompt,
+            max_tokens=max(max_tokens, 1),
+            prompt_tokens=prompt_tokens,
+            n_ctx=self.n_ctx,
+            context=history,
+            docs=kept_docs,
+            dropped_history=len(context) - len(history),
+            dropped_docs=len(docs) - len(kept_docs),
+            truncated_docs=sum(1 for index in selected if selected[index] is not docs[index]),
+        )
+        if packed.dropped_docs or packed.truncated_docs or packed.dropped_history:
+            logger.info(f"Prompt packed to {prompt_tokens}/{self.n_ctx} tokens: "
+                        f"dropped {packed.dropped_docs} docs, truncated {packed.truncated_docs}, "
+                        f"dropped {packed.dropped_history} history messages, max_tokens={packed.max_tokens}")
+        return packed
+
+    @staticmethod
+    def _rank(docs: List[str], scores: Optional[List[Optional[float]]]) -> List[int]:
+        """관련도 높은 순의 문서 인덱스 (점수가 없으면 목록 순서, 같은 점수는 앞의 문서 우선)"""
+        if not scores or len(scores) != len(docs) or any(score is None for score in scores):
+            return list(range(len(docs)))
+        return sorted(range(len(docs)), key=lambda index: -scores[index])
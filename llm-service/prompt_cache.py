@@ -0,0 +1,197 @@
+"""
+시스템 프롬프트 접두부 KV 캐시
+매 요청마다 llm.reset() 후 긴 시스템 프롬프트를 다시 prefill하는 대신,
+평가된 접두부 KV 상태(save_state)를 상주시켜 두고 접미부(히스토리/RAG 문서/질문)만 평가합니다.
+
+llama-cpp는 현재 KV의 토큰과 새 프롬프트의 공통 접두부를 자동으로 재사용하므로,
+KV가 이미 같은 접두부를 담고 있으면 아무것도 하지 않고, 다른 프롬프트로 덮어써졌으면 저장된 상태를 복원합니다.
+"""
+
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# false이면 기존처럼 매 요청 llm.reset() 후 전체 프롬프트를 평가
+PROMPT_PREFIX_CACHE = os.getenv("PROMPT_PREFIX_CACHE", "true").lower() == "true"
+# 모델당 상주시킬 접두부 상태 개수 (상태 크기는 접두부 KV, Gemma-3 12B 기준 토큰당 384KB)
+PROMPT_PREFIX_CACHE_SLOTS = int(os.getenv("PROMPT_PREFIX_CACHE_SLOTS", "2"))
+
+
+class PrefixKVCache:
+    """Llama 인스턴스 하나의 접두부 KV 상태 캐시"""
+
+    def __init__(self, llm, max_prefixes: int = PROMPT_PREFIX_CACHE_SLOTS):
+        self.llm = llm
+        self.max_prefixes = max_prefixes
+        self._states: "OrderedDict[str, Tuple[List[int], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.resident_hits = 0
+        self.restores = 0
+        self.warms = 0
+
+    def prepare(self, prompt: str, prefix: Optional[str]) -> Dict[str, Any]:
+        """프롬프트 평가 전에 KV가 접두부를 담고 있도록 보장
+
+        Returns:
+            접두부 토큰 수, 처리 방식(resident/restored/warmed/disabled) 등 통계
+        """
+        if not PROMPT_PREFIX_CACHE or not prefix or not prompt.startswith(prefix):
+            self.llm.reset()
+            return {"prefix_tokens": 0, "prefix_status": "disabled"}
+
+        with self._lock:
+            started = time.perf_counter()
+            entry = self._states.get(prefix)
+
+            if entry is None:
+                tokens = self.llm.tokenize(prefix.encode("utf-8"), add_bos=True, special=True)
+                self.llm.reset()
+                self.llm.eval(tokens)
+                self._states[prefix] = (tokens, compact_state(self.llm.save_state()))
+                while len(self._states) > self.max_prefixes:
+                    self._states.popitem(last=False)
+                self.warms += 1
+                status = "warmed"
+            else:
+                tokens, state = entry
+                self._states.move_to_end(prefix)
+                if self._kv_holds(tokens):
+                    self.resident_hits += 1
+                    status = "resident"
+                else:
+                    self.llm.load_state(state)
+                    self.restores += 1
+                    status = "restored"
+
+            return {
+                "prefix_tokens": len(tokens),
+                "prefix_status": status,
+                "prefix_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+
+    def _kv_holds(self, tokens: List[int]) -> bool:
+        """현재 KV가 주어진 토큰 접두부를 그대로 담고 있는지"""
+        n = len(tokens)
+        return self.llm.n_tokens >= n and list(self.llm.input_ids[:n]) == tokens
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": PROMPT_PREFIX_CACHE,
+            "resident_prefixes": len(self._states),
+            "resident_hits": self.resident_hits,
+            "restores": self.restores,
+            "warms": self.warms,
+        }
+
+
+def compact_state(state: Any) -> Any:
+    """LlamaState에서 마지막 logits 행만 남김 (상태를 직접 수정하고 반환)
+
+    save_state()는 scores(최대 n_batch 행, logits_all이면 n_tokens 행 x 어휘 float32)를 통째로 복사합니다.
+    Gemma-3처럼 어휘가 262k이면 행 하나가 1MB라 n_batch 512에서 스냅샷마다 512MB가 붙습니다.
+    복원 뒤에는 항상 새 토큰을 평가하므로 이전 행은 쓰이지 않고, load_state는 남긴 한 행을 브로드캐스트해 채웁니다.
+    """
+    scores = getattr(state, "scores", None)
+    if getattr(scores, "ndim", 0) == 2 and scores.shape[0] > 1:
+        state.scores = scores[-1:].copy()
+    return state
+
+
+_caches: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def get_prefix_cache(llm) -> PrefixKVCache:
+    """Llama 인스턴스별 접두부 캐시 (모델 교체 시 함께 해제)"""
+    with _caches_lock:
+        cache = _caches.get(llm)
+        if cache is None:
+            cache = PrefixKVCache(llm)
+            _caches[llm] = cache
+        return cache
+
+
+def complete_with_prefix_cache(llm, prompt: str, prefix: Optional[str], **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """접두부 KV를 재사용하여 llm(prompt, **kwargs) 실행
+
+    Returns:
+        (응답 또는 stream=True이면 청크 이터레이터, 통계 dict)
+        스트리밍이면 통계의 prompt_eval_ms 등은 이터레이터를 끝까지 소비한 뒤 채워집니다.
+    """
+    # 워커 풀은 레플리카 프로세스 안에서 같은 처리를 수행
+    if hasattr(llm, "complete_with_prefix"):
+        return llm.complete_with_prefix(prompt, prefix, **kwargs)
+
+    stats = get_prefix_cache(llm).prepare(prompt, prefix)
+    reset_llama_timings(llm)
+    started = time.perf_counter()
+
+    if kwargs.get("stream"):
+        return _stream_with_stats(llm(prompt, **kwargs), llm, stats, started), stats
+
+    response = llm(prompt, **kwargs)
+    _finish_stats(llm, stats, started, response.get("usage"))
+    return response, stats
+
+
+def _stream_with_stats(chunks: Iterator[dict], llm, stats: Dict[str, Any], started: float) -> Iterator[dict]:
+    completion_tokens = 0
+    try:
+        for chunk in chunks:
+            completion_tokens += 1
+            yield chunk
+    finally:
+        _finish_stats(llm, stats, started, {"completion_tokens": completion_tokens})
+
+
+def _finish_stats(llm, stats: Dict[str, Any], started: float, usage: Optional[dict]):
+    stats["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    if usage:
+        stats["prompt_tokens"] = usage.get("prompt_tokens")
+        stats["completion_tokens"] = usage.get("completion_tokens")
+    stats.update(read_llama_timings(llm))
+    logger.info(
+        "Prompt eval: %s tokens in %s ms (prefix %s: %s tokens reused), decode: %s tokens in %s ms",
+        stats.get("prompt_eval_tokens"), stats.get("prompt_eval_ms"),
+        stats.get("prefix_status"), stats.get("prefix_tokens"),
+        stats.get("eval_tokens"), stats.get("eval_ms"),
+    )
+
+
+def reset_llama_timings(llm):
+    """llama.cpp 성능 카운터 초기화 (요청 단위 측정을 위해)"""
+    try:
+        import llama_cpp
+        ctx = llm._ctx.ctx
+        if hasattr(llama_cpp, "llama_perf_context_reset"):
+            llama_cpp.llama_perf_context_reset(ctx)
+        elif hasattr(llama_cpp, "llama_reset_timings"):
+            llama_cpp.llama_reset_timings(ctx)
+    except Exception as e:
+        logger.debug(f"Could not reset llama timings: {e}")
+
+
+def read_llama_timings(llm) -> Dict[str, Any]:
+    """llama.cpp 성능 카운터에서 prompt eval / eval 시간 읽기"""
+    try:
+        import llama_cpp
+        ctx = llm._ctx.ctx
+        if hasattr(llama_cpp, "llama_perf_context"):
+            data = llama_cpp.llama_perf_context(ctx)
+        else:
+            data = llama_cpp.llama_get_timings(ctx)
+        return {
+            "prompt_eval_tokens": int(data.n_p_eval),
+            "prompt_eval_ms": round(float(data.t_p_eval_ms), 1),
+            "eval_tokens": int(data.n_eval),
+            "eval_ms": round(float(data.t_eval_ms), 1),
+        }
+    except Exception as e:
+        logger.debug(f"Could not read llama timings: {e}")
+        return {}
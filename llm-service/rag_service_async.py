@@ -0,0 +1,137 @@
+"""
+RAGServiceNeo4j 비동기 래퍼 (ASGI 서빙 모드용)
+Neo4j 조회는 neo4j 비동기 드라이버로 이벤트 루프에서 처리하고,
+임베딩/문서 파싱 같은 CPU 작업만 executor 스레드에서 실행합니다.
+임베딩 모델, 파서, Cypher, 결과 포맷은 동기 서비스와 공유합니다.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import Dict, List, Optional
+
+from neo4j import AsyncGraphDatabase
+
+from rag_service_neo4j import RAGServiceNeo4j
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRAGServiceNeo4j:
+    """동기 RAGServiceNeo4j를 감싸는 async 인터페이스"""
+
+    def __init__(self, rag: RAGServiceNeo4j, executor: Optional[Executor] = None):
+        self.rag = rag
+        self.executor = executor
+        self.driver = AsyncGraphDatabase.driver(rag.neo4j_uri, auth=rag.neo4j_auth)
+
+    async def _run_in_executor(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def search(
+        self,
+        query: str,
+        top_k: int = 3,
+        filter_metadata: Optional[Dict] = None,
+        use_graph_expansion: bool = True,
+    ) -> List[Dict]:
+        """RAGServiceNeo4j.search와 같은 결과 (임베딩만 executor에서 계산)"""
+        try:
+            use_graph = self.rag.resolve_graph_expansion(query, filter_metadata, use_graph_expansion)
+            query_embedding = await self._run_in_executor(self.rag.embed_query, query)
+
+            async with self.driver.session() as session:
+                with metrics.NEO4J_QUERY_DURATION.time(query="search_graph" if use_graph else "search_vector"):
+                    result = await session.run(
+                        self.rag.search_cypher(use_graph), embedding=query_embedding, top_k=top_k * 2
+                    )
+                    records = [record async for record in result]
+
+            return self.rag.format_search_results(records, query, top_k, filter_metadata, use_graph)
+        except Exception as e:
+            logger.error(f"Async search failed: {e}", exc_info=True)
+            return []
+
+    async def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 3,
+        filter_metadata: Optional[Dict] = None,
+    ) -> List[List[Dict]]:
+        """RAGServiceNeo4j.search_batch와 같은 결과 (encode 한 번은 executor, 전략별 UNWIND 쿼리는 이벤트 루프)
+
+        Raises:
+            Exception: Neo4j 조회 실패 (호출자가 질의별 search()로 대신할 수 있도록 전달)
+        """
+        if not queries:
+            return []
+        embeddings = await self._run_in_executor(self.rag.embed_queries, queries)
+        use_graph_by_query, groups = self.rag.plan_search_batch(queries, embeddings, filter_metadata)
+
+        records_by_query: List[List] = [[] for _ in queries]
+        async with self.driver.session() as session:
+            for use_graph, batch in groups.items():
+                if not batch:
+                    continue
+                with metrics.NEO4J_QUERY_DURATION.time(
+                        query="search_batch_graph" if use_graph else "search_batch_vector"):
+                    result = await session.run(self.rag.search_batch_cypher(use_graph), batch=batch, top_k=top_k * 2)
+                    async for record in result:
+                        records_by_query[record["idx"]].append(record)
+
+        return [
+            self.rag.format_search_results(records, query, top_k, filter_metadata, use_graph)
+            for query, records, use_graph in zip(queries, records_by_query, use_graph_by_query)
+        ]
+
+    async def add_documents(self, documents: List[Dict[str, str]]) -> int:
+        """문서 추가 (파싱/청킹/임베딩이 대부분이므로 동기 경로를 executor에서 실행)"""
+        return await self._run_in_executor(self.rag.add_documents, documents)
+
+    async def delete_document(self, doc_id: str) -> bool:
+        try:
+            async with self.driver.session() as session:
+                with metrics.NEO4J_QUERY_DURATION.time(query="delete_document"):
+                    result = await session.run(self.rag.DELETE_DOCUMENT_CYPHER, doc_id=doc_id)
+                    record = await result.single()
+
+            if record and record["deleted_count"] > 0:
+                logger.info(f"✅ Deleted document {doc_id}")
+                self.rag._notify_write(doc_id, "delete")
+                return True
+            logger.warning(f"Document {doc_id} not found")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to delete document {doc_id}: {e}", exc_info=True)
+            return False
+
+    async def get_collection_stats(self) -> Dict:
+        try:
+            async with self.driver.session() as session:
+                with metrics.NEO4J_QUERY_DURATION.time(query="collection_stats"):
+                    record = await (await session.run(self.rag.DOCUMENT_COUNT_CYPHER)).single()
+                    category_stats = await (await session.run(self.rag.CATEGORY_STATS_CYPHER)).data()
+
+            return {
+                "vector_db": "neo4j",
+                "graph_db": "neo4j",
+                "status": "available",
+                "total_documents": record["doc_count"] if record else 0,
+                "total_chunks": record["chunk_count"] if record else 0,
+                "vector_size": self.rag.embedding_dim,
+                "categories": category_stats,
+                "embedding_cache": self.rag.embedding_cache.stats(),
+                "graph_rag_enabled": True,
+            }
+        except Exception as e:
+            logger.error(f"Failed to get stats: {e}", exc_info=True)
+            return {
+                "vector_db": "neo4j",
+                "status": "error",
+                "error": str(e),
+            }
+
+    async def close(self):
+        await self.driver.close()
+        logger.info("Async Neo4j driver closed")
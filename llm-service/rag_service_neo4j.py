@@ -7,15 +7,29 @@ Neo4j 기반 GraphRAG 서비스
 
 import logging
 import os
+import threading
 import uuid
-from typing import Dict, List, Optional
-from neo4j import GraphDatabase
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from neo4j import GraphDatabase, Query
 from sentence_transformers import SentenceTransformer
 
 from document_parser import MinerUDocumentParser, LayoutAwareChunker
+from embedding_cache import EmbeddingCache, get_embedding_cache
+import metrics
+import request_timings
 
 logger = logging.getLogger(__name__)
 
+# 최근 query 임베딩 캐시 크기 (답변 캐시 조회와 검색이 같은 임베딩을 공유)
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "256"))
+# 문서 청크 임베딩 encode 배치 크기 (길이순으로 정렬해 묶으므로 패딩 낭비가 적음)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+# 청크 쓰기 트랜잭션 하나에 담을 행 수 (UNWIND $rows)
+NEO4J_WRITE_BATCH_SIZE = int(os.getenv("NEO4J_WRITE_BATCH_SIZE", "200"))
+# 임베딩 모델 (디스크 임베딩 캐시 키에도 포함)
+EMBEDDING_MODEL_NAME = "intfloat/multilingual-e5-large"
+
 class ToolsRetriever:
     """상황에 따라 검색 전략을 선택하는 간단한 ToolsRetriever."""
 
@@ -28,9 +42,7 @@ class ToolsRetriever:
         top_k: int = 3,
         filter_metadata: Optional[Dict] = None,
     ) -> List[Dict]:
-        strategy = self._select_strategy(query, filter_metadata)
-        use_graph_expansion = strategy == "graph"
-        logger.info("ToolsRetriever strategy=%s, use_graph_expansion=%s", strategy, use_graph_expansion)
+        use_graph_expansion = self.use_graph_expansion(query, filter_metadata)
         return self.search_fn(
             query=query,
             top_k=top_k,
@@ -38,6 +50,13 @@ class ToolsRetriever:
             use_graph_expansion=use_graph_expansion,
         )
 
+    def use_graph_expansion(self, query: str, filter_metadata: Optional[Dict] = None) -> bool:
+        """선택된 전략이 그래프 확장 검색인지"""
+        strategy = self._select_strategy(query, filter_metadata)
+        use_graph_expansion = strategy == "graph"
+        logger.info("ToolsRetriever strategy=%s, use_graph_expansion=%s", strategy, use_graph_expansion)
+        return use_graph_expansion
+
     def _select_strategy(self, query: str, filter_metadata: Optional[Dict]) -> str:
         query_lower = query.lower()
 
@@ -85,7 +104,60 @@ class ToolsRetriever:
 class RAGServiceNeo4j:
     """Neo4j 기반 GraphRAG 서비스 - 벡터 + 그래프 통합"""
 
-    def __init__(self):
+    DELETE_DOCUMENT_CYPHER = """
+        MATCH (d:Document {doc_id: $doc_id})
+        OPTIONAL MATCH (d)-[:HAS_CHUNK]->(c:Chunk)
+        DETACH DELETE d, c
+        RETURN count(d) AS deleted_count
+    """
+    DOCUMENT_COUNT_CYPHER = """
+        MATCH (d:Document)
+        OPTIONAL MATCH (d)-[:HAS_CHUNK]->(c:Chunk)
+        RETURN count(DISTINCT d) AS doc_count, count(c) AS chunk_count
+    """
+    CATEGORY_STATS_CYPHER = """
+        MATCH (d:Document)-[:BELONGS_TO]->(cat:Category)
+        RETURN cat.name AS category, count(d) AS doc_count
+        ORDER BY doc_count DESC
+    """
+    WRITE_DOCUMENT_CYPHER = """
+        MERGE (d:Document {doc_id: $doc_id})
+        SET d.title = $title,
+            d.content = $content,
+            d.file_type = $file_type,
+            d.file_path = $file_path,
+            d.created_at = $created_at
+        MERGE (cat:Category {name: $category})
+        MERGE (d)-[:BELONGS_TO]->(cat)
+    """
+    # 마지막 청크 배치와 같은 트랜잭션에서 실행 (중간 배치가 실패하면 이전 청크가 그대로 남음)
+    DELETE_STALE_CHUNKS_CYPHER = """
+        MATCH (d:Document {doc_id: $doc_id})-[:HAS_CHUNK]->(stale:Chunk)
+        WHERE NOT stale.chunk_id IN $chunk_ids
+        DETACH DELETE stale
+    """
+    WRITE_CHUNKS_CYPHER = """
+        MATCH (d:Document {doc_id: $doc_id})
+        UNWIND $rows AS row
+        MERGE (c:Chunk {chunk_id: row.chunk_id})
+        SET c += row.props
+        MERGE (d)-[:HAS_CHUNK]->(c)
+    """
+    # 같은 트랜잭션에서 노드를 만든 뒤 실행 (배치 첫 행의 직전 청크는 앞 배치에서 이미 커밋됨)
+    LINK_CHUNKS_CYPHER = """
+        UNWIND $rows AS row
+        WITH row WHERE row.prev_chunk_id IS NOT NULL
+        MATCH (prev:Chunk {chunk_id: row.prev_chunk_id})
+        MATCH (c:Chunk {chunk_id: row.chunk_id})
+        MERGE (prev)-[:NEXT_CHUNK]->(c)
+    """
+
+    def __init__(self, defer_init: bool = False):
+        """
+        Args:
+            defer_init: True이면 임베딩 모델/MinerU 파서/DB 초기화를 호출자가 직접 (병렬로) 실행
+                (load_embedding_model, load_parser, initialize_database)
+        """
         # Neo4j 연결 설정
         neo4j_uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
         neo4j_user = os.getenv("NEO4J_USER", "neo4j")
@@ -93,28 +165,58 @@ class RAGServiceNeo4j:
 
         logger.info(f"Connecting to Neo4j at {neo4j_uri}")
         self.driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+        # 비동기 드라이버(rag_service_async) 연결용
+        self.neo4j_uri = neo4j_uri
+        self.neo4j_auth = (neo4j_user, neo4j_password)
+
+        self.embedding_dim = 1024
+        self.embedding_model: Optional[SentenceTransformer] = None
+        self.parser: Optional[MinerUDocumentParser] = None
+
+        self.chunker = LayoutAwareChunker(max_chunk_size=800, overlap=100)
+        self.tools_retriever = ToolsRetriever(self._search_impl)
+
+        self._query_embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._query_embeddings_lock = threading.Lock()
+        # 디스크 임베딩 캐시 (재인덱싱 시 바뀌지 않은 청크, 재시작 후 반복 질의는 encode하지 않음)
+        self.embedding_cache: EmbeddingCache = get_embedding_cache()
+        # 문서 추가/삭제 시 호출되는 콜백 (doc_id, action) — 답변 캐시 무효화 등
+        self._write_listeners: List[Callable[[str, str], None]] = []
+
+        if defer_init:
+            return
+
+        self.load_embedding_model()
+        self.load_parser()
+
+        # 초기 설정 (실패해도 서비스는 계속 — 검색 시 다시 오류가 드러남)
+        try:
+            self.initialize_database()
+        except Exception as e:
+            logger.error(f"Failed to initialize database: {e}", exc_info=True)
 
-        # 임베딩 모델 로드
+    def load_embedding_model(self):
+        """임베딩 모델 로드 (지정한 장치에서 실패하면 CPU로 재시도)"""
         embedding_device = os.getenv("EMBEDDING_DEVICE", "cpu")
         logger.info(f"Loading embedding model on device: {embedding_device}...")
 
         try:
             self.embedding_model = SentenceTransformer(
-                'intfloat/multilingual-e5-large',
+                EMBEDDING_MODEL_NAME,
                 device=embedding_device
             )
         except Exception as e:
             logger.warning(f"Failed to load embedding model on {embedding_device}: {e}")
             embedding_device = "cpu"
             self.embedding_model = SentenceTransformer(
-                'intfloat/multilingual-e5-large',
+                EMBEDDING_MODEL_NAME,
                 device=embedding_device
             )
 
-        self.embedding_dim = 1024
         logger.info("Embedding model loaded successfully")
 
-        # MinerU 파서 및 청커 초기화
+    def load_parser(self):
+        """MinerU 파서 초기화 (USE_MINERU_MODEL=false이면 휴리스틱 파서)"""
         use_mineru_model = os.getenv("USE_MINERU_MODEL", "true").lower() == "true"
         mineru_device = os.getenv("MINERU_DEVICE", "cpu")
 
@@ -125,14 +227,22 @@ class RAGServiceNeo4j:
             logger.info("Using heuristic-based document parsing (mock mode)...")
             self.parser = MinerUDocumentParser(use_mock=True)
 
-        self.chunker = LayoutAwareChunker(max_chunk_size=800, overlap=100)
-        self.tools_retriever = ToolsRetriever(self._search_impl)
+    def warmup(self):
+        """첫 요청의 지연(토크나이저/커널 초기화)을 미리 치르도록 query/passage 더미 인코딩
+
+        query 임베딩 캐시를 거치지 않으므로 캐시 통계에 영향 없음
+        """
+        with metrics.EMBEDDING_DURATION.time(kind="warmup"):
+            self.embedding_model.encode(["query: warmup", "passage: warmup"])
+
+    def initialize_database(self):
+        """데이터베이스 초기 설정 (제약조건, 인덱스 생성)
 
-        # 초기 설정
-        self._initialize_database()
+        Raises:
+            Exception: Neo4j에 연결할 수 없는 경우
+        """
+        self.driver.verify_connectivity()
 
-    def _initialize_database(self):
-        """데이터베이스 초기 설정 (제약조건, 인덱스 생성)"""
         with self.driver.session() as session:
             try:
                 # 1. 유니크 제약조건 생성
@@ -170,16 +280,155 @@ class RAGServiceNeo4j:
             except Exception as e:
                 logger.error(f"Failed to initialize database: {e}", exc_info=True)
 
+    def add_write_listener(self, listener: Callable[[str, str], None]):
+        """문서 쓰기 알림 등록 (action: "add" | "delete")"""
+        if listener not in self._write_listeners:
+            self._write_listeners.append(listener)
+
+    def _notify_write(self, doc_id: str, action: str):
+        for listener in self._write_listeners:
+            try:
+                listener(doc_id, action)
+            except Exception as e:
+                logger.warning(f"Document write listener failed for {doc_id}: {e}")
+
+    def embed_query(self, query: str) -> List[float]:
+        """검색용 query 임베딩 (최근 질의는 재계산하지 않음)"""
+        with self._query_embeddings_lock:
+            embedding = self._query_embeddings.get(query)
+            if embedding is not None:
+                self._query_embeddings.move_to_end(query)
+                return embedding
+
+        text = f"query: {query}"
+        embedding = self.embedding_cache.get_many(EMBEDDING_MODEL_NAME, [text], kind="query")[0]
+        if embedding is None:
+            with metrics.EMBEDDING_DURATION.time(kind="query"), request_timings.span("embed_query"):
+                embedding = self.embedding_model.encode(text).tolist()
+            self.embedding_cache.put_many(EMBEDDING_MODEL_NAME, [text], [embedding])
+
+        with self._query_embeddings_lock:
+            self._query_embeddings[query] = embedding
+            while len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+                self._query_embeddings.popitem(last=False)
+        return embedding
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """여러 query 임베딩을 한 번의 encode 호출로 계산 (캐시에 있는 것은 재사용)"""
+        embeddings: List[Optional[List[float]]] = [None] * len(queries)
+        missing: Dict[str, List[int]] = {}
+        with self._query_embeddings_lock:
+            for i, query in enumerate(queries):
+                cached = self._query_embeddings.get(query)
+                if cached is not None:
+                    embeddings[i] = cached
+                else:
+                    missing.setdefault(query, []).append(i)
+
+        if missing:
+            texts = list(missing.keys())
+            inputs = [f"query: {q}" for q in texts]
+            encoded = self.embedding_cache.get_many(EMBEDDING_MODEL_NAME, inputs, kind="query")
+            uncached = [i for i, embedding in enumerate(encoded) if embedding is None]
+            if uncached:
+                with metrics.EMBEDDING_DURATION.time(kind="query_batch"), request_timings.span("embed_query_batch"):
+                    computed = self.embedding_model.encode([inputs[i] for i in uncached], batch_size=32).tolist()
+                for i, embedding in zip(uncached, computed):
+                    encoded[i] = embedding
+                self.embedding_cache.put_many(EMBEDDING_MODEL_NAME, [inputs[i] for i in uncached], computed)
+            with self._query_embeddings_lock:
+                for query, embedding in zip(texts, encoded):
+                    for i in missing[query]:
+                        embeddings[i] = embedding
+                    self._query_embeddings[query] = embedding
+                while len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+                    self._query_embeddings.popitem(last=False)
+
+        return embeddings
+
+    def embed_passages(self, texts: List[str], batch_size: Optional[int] = None,
+                       progress: Optional[Callable[[int], None]] = None) -> List[List[float]]:
+        """문서 청크("passage: ") 임베딩을 배치 encode로 계산 (입력 순서대로 반환)
+
+        디스크 임베딩 캐시에 있는 청크는 건너뛰고, 나머지를 길이순으로 정렬해 batch_size개씩 encode하므로
+        한 배치 안의 패딩이 최소가 됩니다. 배치가 끝날 때마다 결과를 캐시에 저장하고
+        progress(완료 개수)를 호출합니다 (인덱싱 진행 상태와 채팅 양보 지점).
+        """
+        batch_size = max(1, batch_size or EMBED_BATCH_SIZE)
+        inputs = [f"passage: {text}" for text in texts]
+        embeddings = self.embedding_cache.get_many(EMBEDDING_MODEL_NAME, inputs, kind="passage")
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        done = len(texts) - len(missing)
+        if done:
+            logger.info(f"Embedding cache: {done}/{len(texts)} chunks cached, encoding {len(missing)}")
+            if progress is not None:
+                progress(done)
+
+        order = sorted(missing, key=lambda i: len(texts[i]), reverse=True)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            with metrics.EMBEDDING_DURATION.time(kind="passage_batch"):
+                encoded = self.embedding_model.encode([inputs[i] for i in batch], batch_size=len(batch)).tolist()
+            for i, embedding in zip(batch, encoded):
+                embeddings[i] = embedding
+            self.embedding_cache.put_many(EMBEDDING_MODEL_NAME, [inputs[i] for i in batch], encoded)
+            done += len(batch)
+            if progress is not None:
+                progress(done)
+        return embeddings
+
     def add_documents(self, documents: List[Dict[str, str]]) -> int:
-        """여러 문서를 Neo4j에 추가"""
+        """여러 문서를 Neo4j에 추가 (모든 문서의 청크를 한꺼번에 배치 임베딩한 뒤 문서별로 쓰기)"""
+        ready = [doc for doc in (self._prepare_document(document) for document in documents) if doc is not None]
+        texts = [chunk["content"] for doc in ready for chunk in doc["chunks"]]
+        try:
+            embeddings = self.embed_passages(texts)
+        except Exception as e:
+            logger.error(f"Failed to embed {len(texts)} chunks: {e}", exc_info=True)
+            return 0
+
         success_count = 0
-        for document in documents:
-            if self.add_document(document):
+        offset = 0
+        for doc in ready:
+            count = len(doc["chunks"])
+            if self._write_document(doc, embeddings[offset:offset + count]):
                 success_count += 1
+            offset += count
         return success_count
 
-    def add_document(self, document: Dict[str, str]) -> bool:
-        """단일 문서를 Neo4j 그래프 + 벡터로 추가"""
+    def add_document(self, document: Dict[str, str],
+                     progress: Optional[Callable[..., None]] = None) -> bool:
+        """단일 문서를 Neo4j 그래프 + 벡터로 추가
+
+        Args:
+            progress: 단계 알림 콜백 progress(stage, **counts) — stage는 parse/chunk/embed/write/failed
+                (ingestion_jobs가 문서별 진행 상태 기록과 채팅 양보에 사용)
+        """
+        def report(stage: str, **counts):
+            if progress is not None:
+                progress(stage, **counts)
+
+        doc = self._prepare_document(document, report)
+        if doc is None:
+            return False
+
+        try:
+            # 청크 임베딩 (Neo4j 쓰기 전에 배치로 모두 계산)
+            chunks = doc["chunks"]
+            report("embed", chunks=len(chunks), embedded=0)
+            embeddings = self.embed_passages([chunk["content"] for chunk in chunks],
+                                             progress=lambda done: report("embed", embedded=done))
+        except Exception as e:
+            logger.error(f"Failed to embed document {doc['doc_id']}: {e}", exc_info=True)
+            report("failed", error=str(e))
+            return False
+
+        return self._write_document(doc, embeddings, report)
+
+    def _prepare_document(self, document: Dict[str, str],
+                          report: Optional[Callable[..., None]] = None) -> Optional[Dict]:
+        """문서 검증, 구조 파싱, 청킹 (실패하면 None)"""
+        report = report or (lambda stage, **counts: None)
         try:
             doc_id = document.get("id")
             content = document.get("content", "")
@@ -187,7 +436,8 @@ class RAGServiceNeo4j:
 
             if not doc_id or not content:
                 logger.error("Document must have 'id' and 'content'")
-                return False
+                report("failed", error="Document must have 'id' and 'content'")
+                return None
 
             title = metadata.get("title") or metadata.get("file_name") or doc_id
             category = metadata.get("category", "general")
@@ -195,7 +445,9 @@ class RAGServiceNeo4j:
 
             # 구조 파싱 및 청킹
             logger.info(f"Parsing document {doc_id} with MinerU...")
+            report("parse")
             blocks = self.parser.parse_document(content, metadata)
+            report("chunk", blocks=len(blocks))
             chunks = self.chunker.chunk_blocks(blocks)
 
             logger.info(
@@ -204,95 +456,106 @@ class RAGServiceNeo4j:
                 len(blocks),
                 len(chunks),
             )
+            return {"doc_id": doc_id, "content": content, "metadata": metadata, "title": title,
+                    "category": category, "file_type": file_type, "chunks": chunks}
 
+        except Exception as e:
+            logger.error(f"Failed to parse document {document.get('id')}: {e}", exc_info=True)
+            report("failed", error=str(e))
+            return None
+
+    def _write_document(self, doc: Dict, embeddings: List[List[float]],
+                        report: Optional[Callable[..., None]] = None, batch_size: Optional[int] = None) -> bool:
+        """파싱/임베딩이 끝난 문서를 Neo4j에 쓰기
+
+        Document/Category를 트랜잭션 하나로 쓴 뒤, 청크 행을 batch_size개씩 명시적 쓰기 트랜잭션
+        (UNWIND $rows)으로 보내 Chunk 노드, HAS_CHUNK, 직전 청크와의 NEXT_CHUNK를 함께 만듭니다.
+        chunk_id는 (doc_id, chunk_index)로 정해지므로 재시도/재인덱싱해도 청크가 중복되지 않고,
+        이번 청크 목록에 없는 이전 청크는 마지막 배치가 커밋될 때 함께 삭제됩니다.
+        """
+        report = report or (lambda stage, **counts: None)
+        batch_size = max(1, batch_size or NEO4J_WRITE_BATCH_SIZE)
+        doc_id, content, metadata = doc["doc_id"], doc["content"], doc["metadata"]
+        rows = self.chunk_rows(doc, embeddings)
+        try:
+            report("write", written=0)
             with self.driver.session() as session:
-                # 1. Document 노드 생성
-                session.run("""
-                    MERGE (d:Document {doc_id: $doc_id})
-                    SET d.title = $title,
-                        d.content = $content,
-                        d.file_type = $file_type,
-                        d.file_path = $file_path,
-                        d.created_at = $created_at
-                """, doc_id=doc_id, title=title, content=content[:1000],
-                           file_type=file_type,
-                           file_path=metadata.get("file_path", ""),
-                           created_at=metadata.get("created_at", ""))
-
-                # 2. Category 노드와 관계 생성
-                session.run("""
-                    MERGE (cat:Category {name: $category})
-                    WITH cat
-                    MATCH (d:Document {doc_id: $doc_id})
-                    MERGE (d)-[:BELONGS_TO]->(cat)
-                """, category=category, doc_id=doc_id)
-
-                # 3. Chunk 노드들 생성 및 관계 설정
-                chunk_ids = []
-                for i, chunk_data in enumerate(chunks):
-                    chunk_id = str(uuid.uuid4())
-                    chunk_content = chunk_data["content"]
-                    chunk_metadata = chunk_data["metadata"]
-
-                    # 임베딩 생성
-                    embedding_text = f"passage: {chunk_content}"
-                    embedding = self.embedding_model.encode(embedding_text).tolist()
-
-                    # Chunk 노드 생성
-                    session.run("""
-                        MERGE (c:Chunk {chunk_id: $chunk_id})
-                        SET c.content = $content,
-                            c.chunk_index = $chunk_index,
-                            c.title = $title,
-                            c.doc_id = $doc_id,
-                            c.structure_type = $structure_type,
-                            c.has_table = $has_table,
-                            c.has_list = $has_list,
-                            c.section_title = $section_title,
-                            c.page_number = $page_number,
-                            c.embedding = $embedding
-                    """, chunk_id=chunk_id, content=chunk_content,
-                               chunk_index=i, title=title, doc_id=doc_id,
-                               structure_type=chunk_metadata.get("structure_type", "paragraph"),
-                               has_table=bool(chunk_metadata.get("has_table", False)),
-                               has_list=bool(chunk_metadata.get("has_list", False)),
-                               section_title=chunk_metadata.get("section_title", ""),
-                               page_number=int(chunk_metadata.get("page_number", 0)),
-                               embedding=embedding)
-
-                    # Document -> Chunk 관계 생성
-                    session.run("""
-                        MATCH (d:Document {doc_id: $doc_id})
-                        MATCH (c:Chunk {chunk_id: $chunk_id})
-                        MERGE (d)-[:HAS_CHUNK]->(c)
-                    """, doc_id=doc_id, chunk_id=chunk_id)
-
-                    chunk_ids.append(chunk_id)
-
-                # 4. 순차 청크 간 NEXT_CHUNK 관계 생성
-                if len(chunk_ids) > 1:
-                    session.run("""
-                        MATCH (d:Document {doc_id: $doc_id})-[:HAS_CHUNK]->(c:Chunk)
-                        WITH c ORDER BY c.chunk_index
-                        WITH collect(c) AS chunks
-                        UNWIND range(0, size(chunks)-2) AS i
-                        WITH chunks[i] AS curr, chunks[i+1] AS next
-                        MERGE (curr)-[:NEXT_CHUNK]->(next)
-                    """, doc_id=doc_id)
-
-            logger.info(f"✅ Added document {doc_id} with {len(chunks)} chunks to Neo4j")
+                # 1. Document/Category 노드
+                with metrics.NEO4J_QUERY_DURATION.time(query="write_document"):
+                    session.execute_write(
+                        self._run_write, self.WRITE_DOCUMENT_CYPHER,
+                        doc_id=doc_id, title=doc["title"], content=content[:1000],
+                        file_type=doc["file_type"], file_path=metadata.get("file_path", ""),
+                        created_at=metadata.get("created_at", ""), category=doc["category"],
+                    )
+
+                # 2. Chunk 노드 + HAS_CHUNK + NEXT_CHUNK (배치마다 쓰기 트랜잭션 하나),
+                #    마지막 배치에서 이전 청크(재인덱싱) 삭제
+                chunk_ids = [row["chunk_id"] for row in rows]
+                for start in range(0, max(len(rows), 1), batch_size):
+                    batch = rows[start:start + batch_size]
+                    last = start + batch_size >= len(rows)
+                    with metrics.NEO4J_QUERY_DURATION.time(query="write_chunks"):
+                        session.execute_write(self._write_chunk_batch, doc_id, batch,
+                                              chunk_ids if last else None)
+                    report("write", written=start + len(batch))
+
+            logger.info(f"✅ Added document {doc_id} with {len(rows)} chunks to Neo4j "
+                        f"({-(-len(rows) // batch_size)} chunk transactions)")
+            self._notify_write(doc_id, "add")
             return True
 
         except Exception as e:
             logger.error(f"Failed to add document to Neo4j: {e}", exc_info=True)
+            report("failed", error=str(e))
             return False
 
+    @staticmethod
+    def _run_write(tx, cypher: str, **params):
+        tx.run(cypher, **params).consume()
+
+    @classmethod
+    def _write_chunk_batch(cls, tx, doc_id: str, rows: List[Dict], keep_chunk_ids: Optional[List[str]] = None):
+        tx.run(cls.WRITE_CHUNKS_CYPHER, doc_id=doc_id, rows=rows).consume()
+        tx.run(cls.LINK_CHUNKS_CYPHER, rows=rows).consume()
+        if keep_chunk_ids is not None:
+            tx.run(cls.DELETE_STALE_CHUNKS_CYPHER, doc_id=doc_id, chunk_ids=keep_chunk_ids).consume()
+
+    @staticmethod
+    def chunk_rows(doc: Dict, embeddings: List[List[float]]) -> List[Dict]:
+        """UNWIND용 청크 행 {chunk_id, prev_chunk_id, props}"""
+        doc_id = doc["doc_id"]
+        rows = []
+        prev_chunk_id = None
+        for i, (chunk_data, embedding) in enumerate(zip(doc["chunks"], embeddings)):
+            chunk_metadata = chunk_data["metadata"]
+            chunk_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"pms-rag:{doc_id}#{i}"))
+            rows.append({
+                "chunk_id": chunk_id,
+                "prev_chunk_id": prev_chunk_id,
+                "props": {
+                    "content": chunk_data["content"],
+                    "chunk_index": i,
+                    "title": doc["title"],
+                    "doc_id": doc_id,
+                    "structure_type": chunk_metadata.get("structure_type", "paragraph"),
+                    "has_table": bool(chunk_metadata.get("has_table", False)),
+                    "has_list": bool(chunk_metadata.get("has_list", False)),
+                    "section_title": chunk_metadata.get("section_title", ""),
+                    "page_number": int(chunk_metadata.get("page_number", 0)),
+                    "embedding": embedding,
+                },
+            })
+            prev_chunk_id = chunk_id
+        return rows
+
     def search(
         self,
         query: str,
         top_k: int = 3,
         filter_metadata: Optional[Dict] = None,
-        use_graph_expansion: bool = True
+        use_graph_expansion: bool = True,
+        timeout: Optional[float] = None,
     ) -> List[Dict]:
         """
         Neo4j 기반 GraphRAG 검색
@@ -302,32 +565,33 @@ class RAGServiceNeo4j:
             top_k: 반환할 결과 개수
             filter_metadata: 메타데이터 필터 (예: {"category": "보험"})
             use_graph_expansion: 그래프 확장 사용 여부 (순차 컨텍스트)
+            timeout: Neo4j 트랜잭션 타임아웃(초, 요청 데드라인의 남은 시간). 넘으면 서버가 쿼리를 중단하고 빈 결과
         """
+        return self._search_impl(
+            query=query,
+            top_k=top_k,
+            filter_metadata=filter_metadata,
+            use_graph_expansion=self.resolve_graph_expansion(query, filter_metadata, use_graph_expansion),
+            timeout=timeout,
+        )
+
+    def resolve_graph_expansion(
+        self,
+        query: str,
+        filter_metadata: Optional[Dict] = None,
+        use_graph_expansion: bool = True,
+    ) -> bool:
+        """TOOLS_RETRIEVER_MODE와 ToolsRetriever 전략으로 그래프 확장 여부 결정"""
         tools_mode = os.getenv("TOOLS_RETRIEVER_MODE", "auto").lower()
         if tools_mode in {"graph", "vector"}:
-            forced_graph = tools_mode == "graph"
             logger.info("ToolsRetriever forced mode=%s", tools_mode)
-            return self._search_impl(
-                query=query,
-                top_k=top_k,
-                filter_metadata=filter_metadata,
-                use_graph_expansion=forced_graph,
-            )
+            return tools_mode == "graph"
 
         if not use_graph_expansion:
             logger.info("ToolsRetriever bypassed (use_graph_expansion=False)")
-            return self._search_impl(
-                query=query,
-                top_k=top_k,
-                filter_metadata=filter_metadata,
-                use_graph_expansion=False,
-            )
+            return False
 
-        return self.tools_retriever.retrieve(
-            query=query,
-            top_k=top_k,
-            filter_metadata=filter_metadata,
-        )
+        return self.tools_retriever.use_graph_expansion(query, filter_metadata)
 
     def _search_impl(
         self,
@@ -335,162 +599,262 @@ class RAGServiceNeo4j:
         top_k: int = 3,
         filter_metadata: Optional[Dict] = None,
         use_graph_expansion: bool = True,
+        timeout: Optional[float] = None,
     ) -> List[Dict]:
         try:
             # 쿼리 임베딩 생성
-            query_with_prefix = f"query: {query}"
             logger.info(f"🔍 _search_impl called: query='{query}', top_k={top_k}, use_graph_expansion={use_graph_expansion}")
-            query_embedding = self.embedding_model.encode(query_with_prefix).tolist()
+            query_embedding = self.embed_query(query)
             logger.info(f"  - Generated embedding vector of length: {len(query_embedding)}")
 
             with self.driver.session() as session:
-                if use_graph_expansion:
-                    # GraphRAG: 벡터 검색 + 순차 컨텍스트 확장
-                    cypher_query = """
-                        CALL db.index.vector.queryNodes('chunk_embeddings', $top_k, $embedding)
-                        YIELD node AS c, score
-
-                        // 순차 컨텍스트 확장
-                        OPTIONAL MATCH (prev:Chunk)-[:NEXT_CHUNK]->(c)
-                        OPTIONAL MATCH (c)-[:NEXT_CHUNK]->(next:Chunk)
-
-                        // 문서 및 카테고리 정보
-                        MATCH (d:Document)-[:HAS_CHUNK]->(c)
-                        OPTIONAL MATCH (d)-[:BELONGS_TO]->(cat:Category)
-
-                        // 같은 카테고리의 다른 최신 문서
-                        OPTIONAL MATCH (cat)<-[:BELONGS_TO]-(related:Document)
-                        WHERE related <> d
-
-                        RETURN
-                            c.chunk_id AS chunk_id,
-                            c.content AS content,
-                            c.title AS title,
-                            c.chunk_index AS chunk_index,
-                            c.structure_type AS structure_type,
-                            c.has_table AS has_table,
-                            c.has_list AS has_list,
-                            score,
-                            prev.content AS prev_context,
-                            next.content AS next_context,
-                            d.doc_id AS doc_id,
-                            d.title AS doc_title,
-                            d.file_path AS file_path,
-                            cat.name AS category,
-                            collect(DISTINCT {
-                                doc_id: related.doc_id,
-                                title: related.title,
-                                created_at: related.created_at
-                            })[0..3] AS related_docs
-                        ORDER BY score DESC
-                        LIMIT $top_k
-                    """
-                else:
-                    # 단순 벡터 검색
-                    cypher_query = """
-                        CALL db.index.vector.queryNodes('chunk_embeddings', $top_k, $embedding)
-                        YIELD node AS c, score
-
-                        MATCH (d:Document)-[:HAS_CHUNK]->(c)
-                        OPTIONAL MATCH (d)-[:BELONGS_TO]->(cat:Category)
-
-                        RETURN
-                            c.chunk_id AS chunk_id,
-                            c.content AS content,
-                            c.title AS title,
-                            c.structure_type AS structure_type,
-                            score,
-                            d.doc_id AS doc_id,
-                            d.title AS doc_title,
-                            cat.name AS category
-                        ORDER BY score DESC
-                        LIMIT $top_k
-                    """
-
+                cypher_query = self.search_cypher(use_graph_expansion)
                 logger.info(f"  - Executing {'graph expansion' if use_graph_expansion else 'simple vector'} search with top_k={top_k * 2}")
-                result = session.run(cypher_query, embedding=query_embedding, top_k=top_k * 2)
-
-                # 결과 포맷팅
-                results = []
-                record_count = 0
-                for record in result:
-                    record_count += 1
-                    item = {
-                        "chunk_id": record.get("chunk_id"),
-                        "content": record.get("content"),
-                        "metadata": {
-                            "title": record.get("title"),
-                            "doc_id": record.get("doc_id"),
-                            "doc_title": record.get("doc_title"),
-                            "chunk_index": record.get("chunk_index"),
-                            "structure_type": record.get("structure_type"),
-                            "has_table": record.get("has_table"),
-                            "has_list": record.get("has_list"),
-                            "category": record.get("category"),
-                            "file_path": record.get("file_path"),
-                        },
-                        "distance": 1 - record.get("score", 0),  # 유사도 -> 거리 변환
-                        "relevance_score": record.get("score", 0),
-                    }
-
-                    # 순차 컨텍스트 추가
-                    if use_graph_expansion:
-                        prev_context = record.get("prev_context")
-                        next_context = record.get("next_context")
-                        related_docs = record.get("related_docs", [])
-
-                        if prev_context or next_context or related_docs:
-                            item["context"] = {}
-                            if prev_context:
-                                item["context"]["prev"] = prev_context
-                            if next_context:
-                                item["context"]["next"] = next_context
-                            if related_docs:
-                                item["context"]["related_docs"] = [
-                                    doc for doc in related_docs if doc.get("doc_id")
-                                ]
-
-                    results.append(item)
-
-                # 카테고리 필터 적용 (메타데이터 필터)
-                if filter_metadata and "category" in filter_metadata:
-                    filter_category = filter_metadata["category"]
-                    results = [r for r in results if r["metadata"].get("category") == filter_category]
-
-                logger.info(f"  - Retrieved {record_count} raw results from Neo4j")
-
-                # top_k 개만 반환
-                results = results[:top_k]
-
-                logger.info(f"✅ Found {len(results)} results for query: {query[:50]}...")
-                if len(results) > 0:
-                    logger.info(f"  - Top result score: {results[0].get('relevance_score', 0):.4f}")
-                    logger.info(f"  - Top result preview: {results[0].get('content', '')[:100]}...")
-                else:
-                    logger.warning("  ⚠️ No results found! Checking if vector index exists...")
+                with metrics.NEO4J_QUERY_DURATION.time(query="search_graph" if use_graph_expansion else "search_vector"), \
+                        request_timings.span("neo4j_graph_search" if use_graph_expansion else "neo4j_vector_search"):
+                    query_obj = Query(cypher_query, timeout=timeout) if timeout is not None else cypher_query
+                    records = list(session.run(query_obj, embedding=query_embedding, top_k=top_k * 2))
 
-                return results
+                return self.format_search_results(records, query, top_k, filter_metadata, use_graph_expansion)
 
         except Exception as e:
             logger.error(f"Search failed: {e}", exc_info=True)
             return []
 
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 3,
+        filter_metadata: Optional[Dict] = None,
+        embeddings: Optional[List[List[float]]] = None,
+    ) -> List[List[Dict]]:
+        """여러 질의를 한 번에 검색 (임베딩은 encode 한 번, 벡터 조회는 전략별 UNWIND 쿼리 한 번)
+
+        Returns:
+            질의 순서대로 search()와 같은 형식의 결과 목록
+        """
+        if not queries:
+            return []
+        if embeddings is None:
+            embeddings = self.embed_queries(queries)
+
+        use_graph_by_query, groups = self.plan_search_batch(queries, embeddings, filter_metadata)
+        records_by_query: List[List] = [[] for _ in queries]
+        try:
+            with self.driver.session() as session:
+                for use_graph, batch in groups.items():
+                    if not batch:
+                        continue
+                    logger.info(f"🔍 Batch {'graph expansion' if use_graph else 'simple vector'} search: "
+                                f"{len(batch)} queries, top_k={top_k * 2}")
+                    with metrics.NEO4J_QUERY_DURATION.time(
+                            query="search_batch_graph" if use_graph else "search_batch_vector"):
+                        records = list(session.run(self.search_batch_cypher(use_graph), batch=batch, top_k=top_k * 2))
+                    for record in records:
+                        records_by_query[record["idx"]].append(record)
+        except Exception as e:
+            # 호출자가 질의별 search()로 대신할 수 있도록 예외를 그대로 전달
+            logger.error(f"Batch search failed: {e}", exc_info=True)
+            raise
+
+        return [
+            self.format_search_results(records, query, top_k, filter_metadata, use_graph)
+            for query, records, use_graph in zip(queries, records_by_query, use_graph_by_query)
+        ]
+
+    def plan_search_batch(
+        self,
+        queries: List[str],
+        embeddings: List[List[float]],
+        filter_metadata: Optional[Dict] = None,
+    ) -> Tuple[List[bool], Dict[bool, List[Dict]]]:
+        """질의별 검색 전략을 정하고 전략별 UNWIND 파라미터로 묶음 (동기/비동기 드라이버 공용)
+
+        Returns:
+            (질의별 그래프 확장 여부, {그래프 확장 여부: [{idx, embedding}]})
+        """
+        use_graph_by_query = [self.resolve_graph_expansion(query, filter_metadata) for query in queries]
+        groups: Dict[bool, List[Dict]] = {True: [], False: []}
+        for idx, (use_graph, embedding) in enumerate(zip(use_graph_by_query, embeddings)):
+            groups[use_graph].append({"idx": idx, "embedding": embedding})
+        return use_graph_by_query, groups
+
+    @classmethod
+    def search_batch_cypher(cls, use_graph_expansion: bool) -> str:
+        """질의별 벡터 검색을 UNWIND + CALL 서브쿼리로 묶은 Cypher ($batch: [{idx, embedding}])"""
+        inner = cls.search_cypher(use_graph_expansion, embedding="item.embedding")
+        # 임베딩 벡터(item)는 돌려받지 않도록 단건 검색의 반환 컬럼만 나열
+        columns = ", ".join(cls.GRAPH_SEARCH_COLUMNS if use_graph_expansion else cls.VECTOR_SEARCH_COLUMNS)
+        return f"""
+            UNWIND $batch AS item
+            CALL {{
+                WITH item
+                {inner}
+            }}
+            RETURN item.idx AS idx, {columns}
+        """
+
+    # 검색 결과 컬럼 (별칭, Cypher 식) — search_cypher의 RETURN과 search_batch_cypher의 반환 컬럼을 함께 정의
+    VECTOR_SEARCH_RETURNS = (
+        ("chunk_id", "c.chunk_id"),
+        ("content", "c.content"),
+        ("title", "c.title"),
+        ("structure_type", "c.structure_type"),
+        ("score", "score"),
+        ("doc_id", "d.doc_id"),
+        ("doc_title", "d.title"),
+        ("category", "cat.name"),
+    )
+    GRAPH_SEARCH_RETURNS = (
+        ("chunk_id", "c.chunk_id"),
+        ("content", "c.content"),
+        ("title", "c.title"),
+        ("chunk_index", "c.chunk_index"),
+        ("structure_type", "c.structure_type"),
+        ("has_table", "c.has_table"),
+        ("has_list", "c.has_list"),
+        ("score", "score"),
+        ("prev_context", "prev.content"),
+        ("next_context", "next.content"),
+        ("doc_id", "d.doc_id"),
+        ("doc_title", "d.title"),
+        ("file_path", "d.file_path"),
+        ("category", "cat.name"),
+        ("related_docs", "collect(DISTINCT {doc_id: related.doc_id, title: related.title, "
+                         "created_at: related.created_at})[0..3]"),
+    )
+    VECTOR_SEARCH_COLUMNS = tuple(alias for alias, _ in VECTOR_SEARCH_RETURNS)
+    GRAPH_SEARCH_COLUMNS = tuple(alias for alias, _ in GRAPH_SEARCH_RETURNS)
+
+    @classmethod
+    def search_cypher(cls, use_graph_expansion: bool, embedding: str = "$embedding") -> str:
+        """벡터 검색 Cypher (동기/비동기 드라이버 공용)
+
+        Args:
+            embedding: 질의 임베딩 Cypher 식 (배치 검색에서는 UNWIND 항목의 item.embedding)
+        """
+        returns = cls.GRAPH_SEARCH_RETURNS if use_graph_expansion else cls.VECTOR_SEARCH_RETURNS
+        columns = ",\n                    ".join(f"{expression} AS {alias}" for alias, expression in returns)
+        if use_graph_expansion:
+            # GraphRAG: 벡터 검색 + 순차 컨텍스트 확장
+            return f"""
+                CALL db.index.vector.queryNodes('chunk_embeddings', $top_k, {embedding})
+                YIELD node AS c, score
+
+                // 순차 컨텍스트 확장
+                OPTIONAL MATCH (prev:Chunk)-[:NEXT_CHUNK]->(c)
+                OPTIONAL MATCH (c)-[:NEXT_CHUNK]->(next:Chunk)
+
+                // 문서 및 카테고리 정보
+                MATCH (d:Document)-[:HAS_CHUNK]->(c)
+                OPTIONAL MATCH (d)-[:BELONGS_TO]->(cat:Category)
+
+                // 같은 카테고리의 다른 최신 문서
+                OPTIONAL MATCH (cat)<-[:BELONGS_TO]-(related:Document)
+                WHERE related <> d
+
+                RETURN
+                    {columns}
+                ORDER BY score DESC
+                LIMIT $top_k
+            """
+        else:
+            # 단순 벡터 검색
+            return f"""
+                CALL db.index.vector.queryNodes('chunk_embeddings', $top_k, {embedding})
+                YIELD node AS c, score
+
+                MATCH (d:Document)-[:HAS_CHUNK]->(c)
+                OPTIONAL MATCH (d)-[:BELONGS_TO]->(cat:Category)
+
+                RETURN
+                    {columns}
+                ORDER BY score DESC
+                LIMIT $top_k
+            """
+
+    @staticmethod
+    def format_search_results(
+        records,
+        query: str,
+        top_k: int,
+        filter_metadata: Optional[Dict] = None,
+        use_graph_expansion: bool = True,
+    ) -> List[Dict]:
+        """검색 레코드를 API 결과 형식으로 변환 (동기/비동기 드라이버 공용)"""
+        # 결과 포맷팅
+        results = []
+        record_count = 0
+        for record in records:
+            record_count += 1
+            item = {
+                "chunk_id": record.get("chunk_id"),
+                "content": record.get("content"),
+                "metadata": {
+                    "title": record.get("title"),
+                    "doc_id": record.get("doc_id"),
+                    "doc_title": record.get("doc_title"),
+                    "chunk_index": record.get("chunk_index"),
+                    "structure_type": record.get("structure_type"),
+                    "has_table": record.get("has_table"),
+                    "has_list": record.get("has_list"),
+                    "category": record.get("category"),
+                    "file_path": record.get("file_path"),
+                },
+                "distance": 1 - record.get("score", 0),  # 유사도 -> 거리 변환
+                "relevance_score": record.get("score", 0),
+            }
+
+            # 순차 컨텍스트 추가
+            if use_graph_expansion:
+                prev_context = record.get("prev_context")
+                next_context = record.get("next_context")
+                related_docs = record.get("related_docs", [])
+
+                if prev_context or next_context or related_docs:
+                    item["context"] = {}
+                    if prev_context:
+                        item["context"]["prev"] = prev_context
+                    if next_context:
+                        item["context"]["next"] = next_context
+                    if related_docs:
+                        item["context"]["related_docs"] = [
+                            doc for doc in related_docs if doc.get("doc_id")
+                        ]
+
+            results.append(item)
+
+        # 카테고리 필터 적용 (메타데이터 필터)
+        if filter_metadata and "category" in filter_metadata:
+            filter_category = filter_metadata["category"]
+            results = [r for r in results if r["metadata"].get("category") == filter_category]
+
+        logger.info(f"  - Retrieved {record_count} raw results from Neo4j")
+
+        # top_k 개만 반환
+        results = results[:top_k]
+
+        logger.info(f"✅ Found {len(results)} results for query: {query[:50]}...")
+        if len(results) > 0:
+            logger.info(f"  - Top result score: {results[0].get('relevance_score', 0):.4f}")
+            logger.info(f"  - Top result preview: {results[0].get('content', '')[:100]}...")
+        else:
+            logger.warning("  ⚠️ No results found! Checking if vector index exists...")
+
+        return results
+
     def delete_document(self, doc_id: str) -> bool:
         """문서 삭제 (Document 및 연결된 Chunk들 삭제)"""
         try:
-            with self.driver.session() as session:
-                result = session.run("""
-                    MATCH (d:Document {doc_id: $doc_id})
-                    OPTIONAL MATCH (d)-[:HAS_CHUNK]->(c:Chunk)
-                    DETACH DELETE d, c
-                    RETURN count(d) AS deleted_count
-                """, doc_id=doc_id)
+            with self.driver.session() as session, metrics.NEO4J_QUERY_DURATION.time(query="delete_document"):
+                result = session.run(self.DELETE_DOCUMENT_CYPHER, doc_id=doc_id)
 
                 record = result.single()
                 deleted_count = record["deleted_count"] if record else 0
 
                 if deleted_count > 0:
                     logger.info(f"✅ Deleted document {doc_id}")
+                    self._notify_write(doc_id, "delete")
                     return True
                 else:
                     logger.warning(f"Document {doc_id} not found")
@@ -503,21 +867,13 @@ class RAGServiceNeo4j:
     def get_collection_stats(self) -> Dict:
         """Neo4j 상태 정보 반환"""
         try:
-            with self.driver.session() as session:
+            with self.driver.session() as session, metrics.NEO4J_QUERY_DURATION.time(query="collection_stats"):
                 # 문서 및 청크 수 조회
-                result = session.run("""
-                    MATCH (d:Document)
-                    OPTIONAL MATCH (d)-[:HAS_CHUNK]->(c:Chunk)
-                    RETURN count(DISTINCT d) AS doc_count, count(c) AS chunk_count
-                """)
+                result = session.run(self.DOCUMENT_COUNT_CYPHER)
                 record = result.single()
 
                 # 카테고리별 통계
-                category_stats = session.run("""
-                    MATCH (d:Document)-[:BELONGS_TO]->(cat:Category)
-                    RETURN cat.name AS category, count(d) AS doc_count
-                    ORDER BY doc_count DESC
-                """).data()
+                category_stats = session.run(self.CATEGORY_STATS_CYPHER).data()
 
                 return {
                     "vector_db": "neo4j",
@@ -527,6 +883,7 @@ class RAGServiceNeo4j:
                     "total_chunks": record["chunk_count"] if record else 0,
                     "vector_size": self.embedding_dim,
                     "categories": category_stats,
+                    "embedding_cache": self.embedding_cache.stats(),
                     "graph_rag_enabled": True,
                 }
 
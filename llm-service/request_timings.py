@@ -0,0 +1,113 @@
+"""
+요청 단위 구간 시간 수집
+ChatWorkflow.run이 collect()로 수집기를 열면, 같은 실행 흐름 안의 노드/하위 단계
+(query 임베딩, Neo4j 쿼리, prefill/decode 등)가 span()/record()로 시간을 남깁니다.
+수집기가 열려 있지 않으면 아무것도 하지 않으므로 어디서든 호출해도 됩니다.
+
+결과는 metadata.timings로 반환되고, CHAT_TIMINGS_LOG=true이면 요청마다 JSON 한 줄로도 기록됩니다.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+CHAT_TIMINGS_LOG = os.getenv("CHAT_TIMINGS_LOG", "false").lower() == "true"
+
+
+class RequestTimings:
+    """노드/하위 단계별 누적 시간(ms)과 호출 수
+
+    refine 루프처럼 같은 노드가 여러 번 실행되면 시간은 합산되고 calls가 늘어납니다.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.values: Dict[str, Any] = {}
+        # LangGraph가 노드를 다른 스레드에서 실행해도 안전하도록
+        self._lock = threading.Lock()
+
+    def add(self, name: str, ms: float, node: bool = False):
+        target = self.nodes if node else self.steps
+        with self._lock:
+            entry = target.setdefault(name, {"ms": 0.0, "calls": 0})
+            entry["ms"] += ms
+            entry["calls"] += 1
+
+    def set_value(self, name: str, value: Any):
+        with self._lock:
+            self.values[name] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+                "nodes": {name: {"ms": round(e["ms"], 1), "calls": e["calls"]} for name, e in self.nodes.items()},
+                "steps": {name: {"ms": round(e["ms"], 1), "calls": e["calls"]} for name, e in self.steps.items()},
+                **self.values,
+            }
+
+
+_current: "contextvars.ContextVar[Optional[RequestTimings]]" = contextvars.ContextVar("request_timings", default=None)
+
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def collect() -> Iterator[RequestTimings]:
+    """현재 실행 흐름의 구간 시간 수집 시작 (이미 열려 있으면 그 수집기를 그대로 사용)"""
+    existing = _current.get()
+    if existing is not None:
+        yield existing
+        return
+
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, node: bool = False) -> Iterator[None]:
+    """with 블록 실행 시간을 현재 수집기에 기록 (예외가 나도 기록)"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - started) * 1000, node=node)
+
+
+def record(name: str, ms: Optional[float]):
+    """이미 측정된 시간(ms) 기록 (예: llama.cpp prefill/decode 타이밍)"""
+    timings = _current.get()
+    if timings is not None and ms is not None:
+        timings.add(name, float(ms))
+
+
+def record_value(name: str, value: Any):
+    """시간이 아닌 값 기록 (예: 프롬프트 토큰 수)"""
+    timings = _current.get()
+    if timings is not None and value is not None:
+        timings.set_value(name, value)
+
+
+def log_timings(message: str, timings: Dict[str, Any]):
+    """CHAT_TIMINGS_LOG=true이면 구간 시간을 구조화된 로그 한 줄로 기록"""
+    if CHAT_TIMINGS_LOG:
+        logger.info("chat_timings %s", json.dumps({"message": message[:80], **timings}, ensure_ascii=False))
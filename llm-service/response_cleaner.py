@@ -0,0 +1,290 @@
+"""
+모델 응답 정리 엔진
+워크플로우(_finalize_reply, 스트리밍)와 레거시 채팅 경로가 같은 규칙을 한 번의 순회로 적용합니다.
+
+- 규칙은 모듈 로드 시 한 번 컴파일 (인라인 제거는 정규식 하나, 제어 문자는 str.translate)
+- 토큰 청크를 증분 처리: 줄이 끝나면 줄 단위 규칙을 적용하고, 제거 대상이 아님이 확인된 긴 줄은
+  줄 끝을 기다리지 않고 내보냄. 제거 패턴/종료 토큰의 앞부분일 수 있는 꼬리만 보류
+- 응답 전체가 필요한 검사(잘못된 모델 이름, 끝에 남은 불완전한 태그)는 reply()에서 한 번만 수행
+"""
+
+import re
+from typing import List, Optional
+
+# 응답 중간에 나오면 그 뒤를 버리는 종료 토큰
+TERMINATORS = ("<start_of_turn>", "<|im_end|>", "|im_end|>", "<|im_start|>")
+SPECIAL_TOKENS = ("<end_of_turn>",)
+
+# 줄 단위 제거 규칙
+DROP_EXACT = frozenset({"assistant", "system", "user", "model"})
+DROP_PREFIXES = ("system", "user", "사용자:", "사용자：")
+LABEL_PREFIXES = ("assistant:", "assistant：")
+ROLE_LABELS = ("model", "assistant")
+QUOTE_MARKERS = ("'''", '"""')
+QUESTION_SUFFIXES = ("?", "주세요")
+
+# 줄 안에서 지우는 프롬프트 태그/지침 문구
+# (대소문자 무시 정규식은 한글 본문에서 몇 배 느려서 영어 문구는 표기별로 나열)
+INLINE_TAGS = ("<think>", "_assistant", "assistant", "system", "USER", "user:", "사용자:")
+INSTRUCTION_PATTERNS = (
+    "현재 질문에 대한 답변을 작성해 주세요",
+    "현재 질문에 대한 답변을 작성해주세요",
+    "답변을 작성해 주세요",
+    "답변을 작성해주세요",
+    "Please write an answer",
+    "please write an answer",
+    "Write an answer",
+    "write an answer",
+    "답변은 3~6문장",
+    "핵심 정의",
+    "목적/배경",
+    "간단한 예시",
+)
+
+
+def _alternation(patterns) -> str:
+    # 긴 패턴 우선 ("_assistant"가 "assistant"보다 먼저)
+    return "|".join(re.escape(p) for p in sorted(patterns, key=len, reverse=True))
+
+
+INLINE_PATTERN = re.compile(_alternation(INLINE_TAGS + INSTRUCTION_PATTERNS))
+META_PATTERN = re.compile(
+    r"제공된 정보로.*?답변했습니다|완벽하게 답변했습니다|이제 사용자.*?요청대로|"
+    r"사용자(님)?의 요청대로.*?설명.*?제공|요청(하신)?.*?한국어로.*?제공"
+)
+SEPARATOR_PATTERN = re.compile(r"^=+$")
+MODEL_NAME_PATTERN = re.compile(r"llama forge model|gemma|lfm2|로컬 llm", re.IGNORECASE)
+QUOTED_BLOCK_PATTERN = re.compile(r"'''.*?'''|\"\"\".*?\"\"\"")
+# 응답 끝에 남은 불완전한 태그/토큰 ("<", "<start", "|im_end" 등)
+TRAILING_TAG_PATTERN = re.compile(r"[<|][^<>|\s]*$")
+
+WRONG_MODEL_NAMES = re.compile(
+    _alternation(("니콜라스", "nicolas", "알렉스", "alex", "사라", "sara",
+                  "gpt-4", "gpt4", "chatgpt", "claude", "gemini", "palm"))
+)
+MODEL_KEYWORDS = re.compile(_alternation(("모델", "model", "이름", "name", "너는", "당신은", "너의", "당신의")))
+CORRECT_MODEL_NAMES = re.compile(_alternation(("Llama", "Gemma", "로컬 LLM", "LFM2")))
+
+# 탭/줄바꿈/캐리지 리턴을 제외한 제어 문자와 DEL (대부분의 청크에는 없으므로 있을 때만 translate)
+CONTROL_CHARS = dict.fromkeys([c for c in range(32) if chr(c) not in "\n\r\t"] + [127])
+CONTROL_PATTERN = re.compile("[%s]" % re.escape("".join(map(chr, CONTROL_CHARS))))
+
+# 보류해야 하는 꼬리: 인라인 패턴/종료 토큰의 진짜 앞부분 (소문자로 비교)
+_HOLD_PREFIXES = frozenset(
+    p.lower()[:i]
+    for p in INLINE_TAGS + INSTRUCTION_PATTERNS + TERMINATORS + SPECIAL_TOKENS
+    for i in range(1, len(p))
+)
+_MAX_HOLD = max(len(p) for p in _HOLD_PREFIXES)
+_HOLD_START = re.compile("[%s]" % re.escape("".join(sorted({p[0] for p in _HOLD_PREFIXES}))), re.IGNORECASE)
+
+
+class ResponseCleaner:
+    """토큰 스트림을 증분 정리하는 응답 클리너
+
+    feed()/flush()가 반환한 조각을 이어 붙이면 스트리밍으로 내보낸 텍스트가 되고,
+    reply()는 여기에 응답 전체 검사를 더한 최종 응답입니다.
+
+    Args:
+        correct_model_name: 주어지면 잘못된 모델 이름이 담긴 응답을 "저는 {이름} 모델입니다."로 교체
+        drop_question_lines: 물음표로 끝나는 줄 제거 (레거시 경로)
+    """
+
+    # 이 길이를 넘으면 줄 단위 제거 규칙과 무관하다고 보고 즉시 내보냄
+    COMMIT_LENGTH = 24
+
+    def __init__(self, correct_model_name: Optional[str] = None, drop_question_lines: bool = False):
+        self.correct_model_name = correct_model_name
+        self.drop_question_lines = drop_question_lines
+        self.stopped = False
+        self._buffer = ""
+        self._committed = False  # 현재 줄의 앞부분을 이미 내보냄
+        self._output: List[str] = []
+        self._emitted_any = False
+        self._blank_lines = 0
+        self._in_quote_block = False
+        # 응답 맨 앞의 질문 같은 줄 (뒤에 내용이 오면 버리고, 그것뿐이면 사용)
+        self._held_line: Optional[str] = None
+        # 모든 줄이 제거됐을 때 쓸 첫 의미 있는 줄
+        self._fallback: Optional[str] = None
+
+    def feed(self, chunk: str) -> str:
+        """토큰 청크를 받아 지금 내보낼 수 있는 정리된 텍스트 반환"""
+        if self.stopped or not chunk:
+            return ""
+
+        if CONTROL_PATTERN.search(chunk):
+            chunk = chunk.translate(CONTROL_CHARS)
+        buffer = self._buffer + chunk
+        # 특수/종료 토큰은 모두 "<" 또는 "|"를 포함
+        self._buffer = self._truncate_at_terminator(buffer) if "<" in buffer or "|" in buffer else buffer
+
+        if "\n" not in self._buffer and not self.stopped:
+            return self._record(self._emit_partial())
+
+        output = []
+        while "\n" in self._buffer and not self.stopped:
+            line, self._buffer = self._buffer.split("\n", 1)
+            output.append(self._finish_line(line))
+
+        if self.stopped:
+            output.append(self._drain())
+        else:
+            output.append(self._emit_partial())
+        return self._record("".join(output))
+
+    def flush(self) -> str:
+        """스트림 종료 시 남은 버퍼 처리"""
+        return self._record(self._drain())
+
+    def _drain(self) -> str:
+        line, self._buffer = self._buffer, ""
+        output = self._finish_line(line, last=True).rstrip("\n") if line else ""
+        if not self._emitted_any and not output:
+            # 남은 줄이 없으면 보류한 질문 줄 → 처음 제거된 의미 있는 줄 순으로 사용
+            output = self._held_line or self._fallback or ""
+            self._held_line = self._fallback = None
+            self._emitted_any = bool(output)
+        return strip_trailing_tags(output) if output else ""
+
+    def reply(self) -> str:
+        """flush() 이후의 최종 응답 (응답 전체에 대한 모델 이름 검사 포함)"""
+        reply = strip_trailing_tags("".join(self._output)).lstrip()
+        if self.correct_model_name and reply:
+            lower = reply.lower()
+            # 잘못된 모델 이름이 있거나, 모델 이름 이야기를 하면서 정확한 이름이 없으면 교체
+            if WRONG_MODEL_NAMES.search(lower) or (
+                    MODEL_KEYWORDS.search(lower) and not CORRECT_MODEL_NAMES.search(reply)):
+                return f"저는 {self.correct_model_name} 모델입니다."
+        return reply
+
+    def _record(self, text: str) -> str:
+        if text:
+            self._output.append(text)
+        return text
+
+    def _truncate_at_terminator(self, text: str) -> str:
+        """특수 토큰 제거, 종료 토큰 이후는 버림"""
+        for token in SPECIAL_TOKENS:
+            if token in text:
+                text = text.replace(token, "")
+        for token in TERMINATORS:
+            if token in text:
+                self.stopped = True
+                text = text.split(token, 1)[0]
+        return text
+
+    def _finish_line(self, line: str, last: bool = False) -> str:
+        """완성된 줄 처리 (이미 일부를 내보낸 줄이면 나머지만 반환)"""
+        if self._committed:
+            self._committed = False
+            return INLINE_PATTERN.sub("", line).rstrip() + "\n"
+
+        stripped = line.strip()
+        cleaned = self._clean_line(stripped, update=True)
+        if cleaned and not self._emitted_any and not last and cleaned.endswith(QUESTION_SUFFIXES):
+            # 응답 앞에 되풀이된 사용자 질문일 수 있음 → 다음 줄을 보고 결정
+            self._held_line = cleaned
+            return ""
+        if not cleaned:
+            if self._emitted_any and not stripped:
+                self._blank_lines += 1
+                # 과도하게 긴 응답 제한 ("\n\n\n" 이후 제거)
+                if self._blank_lines >= 2:
+                    self.stopped = True
+                    self._buffer = ""
+            elif stripped and self._fallback is None and not self._emitted_any \
+                    and not any(role in stripped.lower() for role in ("system", "user", "assistant", "사용자")):
+                self._fallback = stripped
+            return ""
+
+        self._blank_lines = 0
+        self._emitted_any = True
+        self._held_line = None
+        return cleaned + "\n"
+
+    def _emit_partial(self) -> str:
+        """아직 끝나지 않은 줄 중 안전하게 내보낼 수 있는 부분 반환"""
+        if not self._committed:
+            stripped = self._buffer.strip()
+            if len(stripped) < self.COMMIT_LENGTH or self._clean_line(stripped) != stripped:
+                return ""
+            if not self._emitted_any and MODEL_NAME_PATTERN.search(stripped):
+                return ""
+            self._committed = True
+            self._blank_lines = 0
+            self._emitted_any = True
+            self._held_line = None
+            self._buffer = self._buffer.lstrip()
+
+        text = INLINE_PATTERN.sub("", self._buffer)
+        hold = self._hold_length(text)
+        self._buffer = text[len(text) - hold:]
+        return text[:len(text) - hold]
+
+    @staticmethod
+    def _hold_length(text: str) -> int:
+        """제거 패턴/종료 토큰의 앞부분일 수 있는 가장 긴 꼬리 길이"""
+        for match in _HOLD_START.finditer(text, max(len(text) - _MAX_HOLD, 0)):
+            if text[match.start():].lower() in _HOLD_PREFIXES:
+                return len(text) - match.start()
+        return 0
+
+    def _clean_line(self, stripped: str, update: bool = False) -> str:
+        """줄 단위 제거 규칙 적용 (update=True이면 삼중 따옴표 블록 상태 갱신)"""
+        if self._in_quote_block:
+            if update and any(marker in stripped for marker in QUOTE_MARKERS):
+                self._in_quote_block = False
+            return ""
+        if "'''" in stripped or '"""' in stripped:
+            stripped = QUOTED_BLOCK_PATTERN.sub("", stripped)
+            opener = min((stripped.find(m) for m in QUOTE_MARKERS if m in stripped), default=-1)
+            if opener != -1:
+                # 닫히지 않은 블록은 다음 줄까지 이어짐
+                if update:
+                    self._in_quote_block = True
+                stripped = stripped[:opener]
+            stripped = stripped.strip()
+
+        lower = stripped.lower()
+        if lower.startswith(LABEL_PREFIXES):
+            stripped = stripped.split(":", 1)[1].strip() if ":" in stripped else ""
+        elif not self._emitted_any:
+            # 응답 맨 앞의 role 레이블 제거
+            for label in ROLE_LABELS:
+                if stripped.startswith(label):
+                    stripped = stripped[len(label):].strip()
+        lower = stripped.lower()
+
+        if not stripped or lower in DROP_EXACT or SEPARATOR_PATTERN.match(stripped):
+            return ""
+        if stripped.startswith(DROP_PREFIXES):
+            return ""
+        if META_PATTERN.search(lower):
+            return ""
+        if not self._emitted_any and MODEL_NAME_PATTERN.search(stripped):
+            # 응답 앞의 "모델 이름 / ===" 머리말
+            return ""
+        if self.drop_question_lines and stripped.endswith("?"):
+            return ""
+        return INLINE_PATTERN.sub("", stripped).strip()
+
+
+def strip_trailing_tags(text: str) -> str:
+    """끝에 남은 불완전한 태그와 <, >, | 문자 제거"""
+    text = text.rstrip()
+    while text:
+        stripped = TRAILING_TAG_PATTERN.sub("", text.rstrip(">")).rstrip()
+        if stripped == text:
+            break
+        text = stripped
+    return text
+
+
+def clean_response(reply: str, correct_model_name: Optional[str] = None,
+                   drop_question_lines: bool = False) -> str:
+    """완성된 응답 전체 정리 (스트리밍과 같은 엔진을 한 번에 적용)"""
+    cleaner = ResponseCleaner(correct_model_name=correct_model_name, drop_question_lines=drop_question_lines)
+    cleaner.feed(reply)
+    cleaner.flush()
+    return cleaner.reply()
@@ -0,0 +1,399 @@
+"""
+서버 측 대화 세션 저장소
+클라이언트가 매 턴마다 전체 히스토리를 보내고 서버가 최근 5턴을 처음부터 다시 prefill하는 대신,
+세션별로 히스토리와 "지금까지 KV에 평가된 프롬프트 전문(transcript)"을 보관하고
+턴이 끝날 때마다 Llama 상태(save_state)를 스냅샷으로 남겨 다음 턴에는 새 사용자 메시지만 평가합니다.
+
+스냅샷은 RAM 예산(SESSION_RAM_BUDGET_MB) 안에서 LRU로 유지하고,
+초과분은 디스크(SESSION_DISK_BUDGET_MB)로 내렸다가 디스크 예산도 넘으면 가장 오래된 것부터 버립니다.
+스냅샷이 없어진 세션도 히스토리는 남아 있으므로 다음 턴에 transcript를 다시 평가할 뿐 대화는 이어집니다.
+"""
+
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from prompt_cache import compact_state, complete_with_prefix_cache, read_llama_timings, reset_llama_timings
+
+logger = logging.getLogger(__name__)
+
+# 세션 KV 스냅샷 메모리/디스크 예산
+SESSION_RAM_BUDGET_MB = int(os.getenv("SESSION_RAM_BUDGET_MB", "1024"))
+SESSION_DISK_BUDGET_MB = int(os.getenv("SESSION_DISK_BUDGET_MB", "4096"))
+SESSION_STATE_DIR = os.getenv("SESSION_STATE_DIR", "./session_states")
+# 보관할 최대 세션 수와 미사용 세션 만료 시간(초)
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "21600"))
+# transcript가 n_ctx의 이 비율을 넘으면 최근 히스토리만으로 다시 시작
+SESSION_MAX_CONTEXT_RATIO = float(os.getenv("SESSION_MAX_CONTEXT_RATIO", "0.6"))
+
+TURN_END = "\n<|im_end|>"
+
+
+@dataclass
+class ChatSession:
+    """대화 세션 하나의 서버 측 상태"""
+    session_id: str
+    history: List[dict] = field(default_factory=list)
+    # KV 스냅샷에 평가되어 있는 프롬프트 전문 (system + 지난 턴들). None이면 아직 없음
+    transcript: Optional[str] = None
+    transcript_tokens: int = 0
+    # 스냅샷을 만든 모델 (모델이 바뀌면 스냅샷은 무효)
+    model_key: Optional[str] = None
+    turns: int = 0
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    # 같은 세션의 턴은 순서대로 처리
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def append_turn(self, message: str, reply: str, transcript: Optional[str] = None,
+                    transcript_tokens: Optional[int] = None):
+        """턴 결과 기록
+
+        Args:
+            transcript: 이번 턴까지 KV에 평가된 프롬프트 전문. None이면 기존 transcript 뒤에 텍스트로만 덧붙임
+                (LLM을 거치지 않은 직접 답변 — 다음 턴에 해당 부분만 다시 평가됨)
+        """
+        self.history.append({"role": "user", "content": message})
+        self.history.append({"role": "assistant", "content": reply})
+        self.turns += 1
+        self.last_used = time.time()
+
+        if transcript is not None:
+            self.transcript = transcript
+            if transcript_tokens is not None:
+                self.transcript_tokens = transcript_tokens
+        elif self.transcript is not None:
+            self.transcript = "\n".join([
+                self.transcript,
+                "<|im_start|>user", message, "<|im_end|>",
+                "<|im_start|>assistant", reply, "<|im_end|>",
+            ])
+
+    def to_dict(self, include_history: bool = False) -> Dict[str, Any]:
+        data = {
+            "session_id": self.session_id,
+            "turns": self.turns,
+            "transcript_tokens": self.transcript_tokens,
+            "created_at": self.created_at,
+            "last_used": self.last_used,
+        }
+        if include_history:
+            data["history"] = list(self.history)
+        return data
+
+
+def _state_size(state: Any) -> int:
+    """스냅샷이 차지하는 대략적인 바이트 수"""
+    size = getattr(state, "llama_state_size", None)
+    if size is not None:
+        for attr in ("input_ids", "scores"):
+            array = getattr(state, attr, None)
+            size += getattr(array, "nbytes", 0)
+        return int(size)
+    return len(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _state_tokens(state: Any) -> List[int]:
+    """스냅샷에 평가되어 있는 토큰 목록"""
+    if hasattr(state, "input_ids") and hasattr(state, "n_tokens"):
+        return [int(t) for t in state.input_ids[:state.n_tokens]]
+    return list(state)
+
+
+class SessionStore:
+    """세션 LRU와 KV 스냅샷 RAM/디스크 예산 관리"""
+
+    def __init__(self, ram_budget_bytes: int = SESSION_RAM_BUDGET_MB * 1024 * 1024,
+                 disk_budget_bytes: int = SESSION_DISK_BUDGET_MB * 1024 * 1024,
+                 state_dir: str = SESSION_STATE_DIR,
+                 max_sessions: int = SESSION_MAX_SESSIONS,
+                 ttl_seconds: float = SESSION_TTL_SECONDS):
+        self.ram_budget_bytes = ram_budget_bytes
+        self.disk_budget_bytes = disk_budget_bytes
+        self.state_dir = state_dir
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.RLock()
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        # session_id -> (state, bytes) / (path, bytes), 가장 오래 안 쓴 것이 앞쪽
+        self._ram_states: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._disk_states: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._ram_bytes = 0
+        self._disk_bytes = 0
+
+        self.ram_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.spills = 0
+        self.evictions = 0
+        self.expired = 0
+
+    # ------------------------------------------------------------------
+    # 세션
+    # ------------------------------------------------------------------
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        with self._lock:
+            self._expire_sessions()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.time()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def create(self, session_id: Optional[str] = None, history: Optional[List[dict]] = None) -> ChatSession:
+        with self._lock:
+            session_id = session_id or uuid.uuid4().hex
+            self._drop_state(session_id)
+            session = ChatSession(session_id=session_id, history=list(history or []))
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                oldest_id, _ = self._sessions.popitem(last=False)
+                self._drop_state(oldest_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            self._drop_state(session_id)
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire_sessions(self):
+        if self.ttl_seconds <= 0:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_used >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            self._drop_state(session_id)
+            self.expired += 1
+
+    # ------------------------------------------------------------------
+    # KV 스냅샷
+    # ------------------------------------------------------------------
+    def save_state(self, session: ChatSession, state: Any, model_key: Optional[str]):
+        """턴이 끝난 뒤의 Llama 상태 저장 (RAM에 두고 예산 초과분은 디스크로)"""
+        size = _state_size(state)
+        with self._lock:
+            self._drop_state(session.session_id)
+            session.model_key = model_key
+            self._ram_states[session.session_id] = (state, size)
+            self._ram_bytes += size
+            self._enforce_budgets()
+
+    def load_state(self, session: ChatSession, model_key: Optional[str]) -> Tuple[Optional[Any], str]:
+        """세션 스냅샷 조회
+
+        Returns:
+            (상태 또는 None, "ram" | "disk" | "miss")
+        """
+        with self._lock:
+            session_id = session.session_id
+            if session.model_key != model_key:
+                self._drop_state(session_id)
+
+            entry = self._ram_states.get(session_id)
+            if entry is not None:
+                self._ram_states.move_to_end(session_id)
+                self.ram_hits += 1
+                return entry[0], "ram"
+
+            disk_entry = self._disk_states.pop(session_id, None)
+            if disk_entry is None:
+                self.misses += 1
+                return None, "miss"
+
+            path, size = disk_entry
+            self._disk_bytes -= size
+            try:
+                with open(path, "rb") as f:
+                    state = pickle.load(f)
+            except Exception as e:
+                logger.warning(f"Failed to load session state {session_id} from disk: {e}")
+                self.misses += 1
+                return None, "miss"
+            finally:
+                self._remove_file(path)
+
+            # 다시 쓰일 가능성이 높으므로 RAM으로 올림
+            size = _state_size(state)
+            self._ram_states[session_id] = (state, size)
+            self._ram_bytes += size
+            self.disk_hits += 1
+            self._enforce_budgets(keep=session_id)
+            return state, "disk"
+
+    def drop_state(self, session: ChatSession):
+        with self._lock:
+            self._drop_state(session.session_id)
+
+    def _drop_state(self, session_id: str):
+        entry = self._ram_states.pop(session_id, None)
+        if entry is not None:
+            self._ram_bytes -= entry[1]
+        disk_entry = self._disk_states.pop(session_id, None)
+        if disk_entry is not None:
+            self._disk_bytes -= disk_entry[1]
+            self._remove_file(disk_entry[0])
+
+    def _enforce_budgets(self, keep: Optional[str] = None):
+        """RAM 예산을 넘으면 오래된 스냅샷을 디스크로, 디스크 예산을 넘으면 삭제"""
+        while self._ram_bytes > self.ram_budget_bytes and self._ram_states:
+            session_id = next(iter(self._ram_states))
+            if session_id == keep and len(self._ram_states) == 1:
+                break
+            if session_id == keep:
+                self._ram_states.move_to_end(session_id)
+                continue
+            state, size = self._ram_states.pop(session_id)
+            self._ram_bytes -= size
+            self._spill(session_id, state)
+
+        while self._disk_bytes > self.disk_budget_bytes and self._disk_states:
+            _, (path, size) = self._disk_states.popitem(last=False)
+            self._disk_bytes -= size
+            self._remove_file(path)
+            self.evictions += 1
+
+    def _spill(self, session_id: str, state: Any):
+        if self.disk_budget_bytes <= 0:
+            self.evictions += 1
+            return
+        path = os.path.join(self.state_dir, f"{session_id}.state")
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            with open(path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(path)
+        except Exception as e:
+            logger.warning(f"Failed to spill session state {session_id} to disk: {e}")
+            self._remove_file(path)
+            self.evictions += 1
+            return
+        self._disk_states[session_id] = (path, size)
+        self._disk_bytes += size
+        self.spills += 1
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to remove session state file {path}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.ram_hits + self.disk_hits + self.misses
+            return {
+                "sessions": len(self._sessions),
+                "ram_states": len(self._ram_states),
+                "ram_bytes": self._ram_bytes,
+                "ram_budget_bytes": self.ram_budget_bytes,
+                "disk_states": len(self._disk_states),
+                "disk_bytes": self._disk_bytes,
+                "disk_budget_bytes": self.disk_budget_bytes,
+                "ram_hits": self.ram_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.ram_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                "spills": self.spills,
+                "evictions": self.evictions,
+                "expired": self.expired,
+            }
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """프로세스 전역 세션 저장소 (모델 교체와 무관하게 유지)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore()
+        return _store
+
+
+def session_transcript(llm, session: ChatSession) -> Optional[str]:
+    """이번 턴 프롬프트의 접두부로 쓸 transcript (컨텍스트 한도에 가까우면 버리고 None)
+
+    새 질문, RAG 문서, 답변이 들어갈 자리를 남기기 위해 n_ctx의 SESSION_MAX_CONTEXT_RATIO까지만 이어 갑니다.
+    """
+    if session.transcript is None:
+        return None
+    try:
+        n_ctx = llm.n_ctx()
+    except Exception:
+        return session.transcript
+    if session.transcript_tokens > n_ctx * SESSION_MAX_CONTEXT_RATIO:
+        logger.info(f"Session {session.session_id}: transcript {session.transcript_tokens} tokens "
+                    f"near context limit ({n_ctx}), restarting from recent history")
+        session.transcript = None
+        session.transcript_tokens = 0
+        get_session_store().drop_state(session)
+        return None
+    return session.transcript
+
+
+def complete_with_session(llm, session: ChatSession, prompt: str, prefix: Optional[str],
+                          model_key: Optional[str] = None, **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """세션 KV 스냅샷을 복원해 새 턴만 평가하고, 끝나면 다시 스냅샷
+
+    스냅샷이 없거나(첫 턴, 예산 초과로 삭제됨) 워커 풀처럼 상태를 부모 프로세스에서 다룰 수 없으면
+    시스템 프롬프트 접두부 캐시로 처리합니다.
+
+    Returns:
+        (응답, 통계 dict) — 통계의 session_state는 resident/ram/disk/miss/unsupported
+    """
+    store = get_session_store()
+    can_snapshot = hasattr(llm, "save_state") and not hasattr(llm, "complete_with_prefix")
+
+    if not can_snapshot or session.transcript is None or not prompt.startswith(session.transcript):
+        response, stats = complete_with_prefix_cache(llm, prompt, prefix, **kwargs)
+        stats["session_state"] = "unsupported" if not can_snapshot else "miss"
+    else:
+        started = time.perf_counter()
+        state, source = store.load_state(session, model_key)
+        if state is None:
+            response, stats = complete_with_prefix_cache(llm, prompt, prefix, **kwargs)
+            stats["session_state"] = "miss"
+        else:
+            tokens = _state_tokens(state)
+            if llm.n_tokens >= len(tokens) and list(llm.input_ids[:len(tokens)]) == tokens:
+                source = "resident"
+            else:
+                llm.load_state(state)
+            stats = {
+                "session_state": source,
+                "session_tokens": len(tokens),
+                "restore_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+            reset_llama_timings(llm)
+            started = time.perf_counter()
+            # llama-cpp가 복원된 KV와 프롬프트의 공통 접두부를 재사용하므로 새 턴만 평가됨
+            response = llm(prompt, **kwargs)
+            stats["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            usage = response.get("usage") or {}
+            stats["prompt_tokens"] = usage.get("prompt_tokens")
+            stats["completion_tokens"] = usage.get("completion_tokens")
+            stats.update(read_llama_timings(llm))
+
+    if can_snapshot:
+        started = time.perf_counter()
+        store.save_state(session, compact_state(llm.save_state()), model_key)
+        stats["snapshot_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    logger.info(f"Session {session.session_id} turn {session.turns + 1}: state={stats.get('session_state')}, "
+                f"prompt eval {stats.get('prompt_eval_tokens')} tokens in {stats.get('prompt_eval_ms')} ms")
+    return response, stats
@@ -0,0 +1,142 @@
+"""
+투기적 디코딩(speculative decoding) 설정
+RAG 답변은 _build_prompt가 넣은 검색 청크의 문장을 그대로 옮겨 쓰는 경우가 많아, 프롬프트에서 n-gram을 찾아
+다음 토큰 후보를 제안하는 prompt lookup 방식이 잘 맞습니다. llama-cpp-python의 draft_model 훅을 사용하며,
+작은 draft GGUF(같은 토크나이저)로 후보를 만드는 방식도 지원합니다.
+
+모드:
+- off: 사용 안 함
+- prompt_lookup: LlamaPromptLookupDecoding (추가 메모리 거의 없음)
+- draft: 작은 GGUF 모델이 후보 토큰을 greedy로 생성
+
+draft_model을 쓰면 llama-cpp-python이 logits_all=True로 바꾸므로 n_ctx x 어휘 크기의 float32 logits
+배열이 추가로 잡힙니다 (Gemma 3 어휘 262k, n_ctx 4096이면 약 4GB). model_registry 추정치에 반영됩니다.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "prompt_lookup", "draft")
+
+# 전역 기본값 (SPECULATIVE_MODELS에서 모델 파일명별로 덮어쓰기)
+SPECULATIVE_DECODING = os.getenv("SPECULATIVE_DECODING", "off").lower()
+SPECULATIVE_NUM_PRED_TOKENS = int(os.getenv("SPECULATIVE_NUM_PRED_TOKENS", "10"))
+SPECULATIVE_MAX_NGRAM_SIZE = int(os.getenv("SPECULATIVE_MAX_NGRAM_SIZE", "2"))
+SPECULATIVE_DRAFT_MODEL = os.getenv("SPECULATIVE_DRAFT_MODEL", "")
+# 예: {"google.gemma-3-12b-pt.Q5_K_M.gguf": {"mode": "draft", "draft_model": "./models/gemma-3-1b.gguf"}}
+SPECULATIVE_MODELS: Dict[str, Dict[str, Any]] = json.loads(os.getenv("SPECULATIVE_MODELS", "{}") or "{}")
+
+
+def speculative_config(model_path: str) -> Optional[Dict[str, Any]]:
+    """모델에 적용할 투기적 디코딩 설정 (사용하지 않으면 None)
+
+    Raises:
+        ValueError: 알 수 없는 모드이거나 draft 모드인데 draft_model이 없는 경우
+    """
+    config = {
+        "mode": SPECULATIVE_DECODING,
+        "num_pred_tokens": SPECULATIVE_NUM_PRED_TOKENS,
+        "max_ngram_size": SPECULATIVE_MAX_NGRAM_SIZE,
+        "draft_model": SPECULATIVE_DRAFT_MODEL or None,
+    }
+    override = SPECULATIVE_MODELS.get(os.path.basename(model_path)) or SPECULATIVE_MODELS.get(model_path)
+    if override:
+        config.update(override)
+
+    mode = str(config["mode"] or "off").lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown speculative decoding mode for {model_path}: {mode} (expected one of {MODES})")
+    if mode == "off":
+        return None
+    if mode == "draft" and not config.get("draft_model"):
+        raise ValueError(f"Speculative draft mode for {model_path} requires draft_model")
+    config["mode"] = mode
+    return config
+
+
+def create_draft_model(config: Dict[str, Any], n_ctx: int, n_threads: int, n_gpu_layers: int = 0):
+    """Llama(draft_model=...)에 넘길 draft 모델 생성"""
+    if config["mode"] == "prompt_lookup":
+        from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+        return LlamaPromptLookupDecoding(
+            num_pred_tokens=config["num_pred_tokens"],
+            max_ngram_size=config["max_ngram_size"],
+        )
+    return GGUFDraftModel(config["draft_model"], num_pred_tokens=config["num_pred_tokens"],
+                          n_ctx=n_ctx, n_threads=n_threads, n_gpu_layers=n_gpu_layers)
+
+
+def llama_kwargs(model_path: str, n_ctx: int, n_threads: int, n_gpu_layers: int = 0) -> Dict[str, Any]:
+    """create_llm/레플리카에서 Llama()에 더할 인자 ({} 또는 {"draft_model": ...})"""
+    config = speculative_config(model_path)
+    if config is None:
+        return {}
+    logger.info(f"Speculative decoding for {model_path}: {config}")
+    return {"draft_model": create_draft_model(config, n_ctx, n_threads, n_gpu_layers)}
+
+
+class GGUFDraftModel:
+    """작은 GGUF 모델로 후보 토큰을 만드는 draft 모델 (LlamaDraftModel 호출 규약)
+
+    대상 모델과 토크나이저(어휘)가 같아야 합니다. 호출마다 이전 호출과 겹치는 접두부 KV는 재사용하고
+    나머지만 평가한 뒤 num_pred_tokens개를 greedy로 생성합니다.
+    """
+
+    def __init__(self, model_path: str, num_pred_tokens: int = 4, llm=None, **llama_kwargs):
+        if llm is None:
+            from llama_cpp import Llama
+            llama_kwargs.setdefault("verbose", False)
+            llm = Llama(model_path=model_path, **llama_kwargs)
+        self.llm = llm
+        self.model_path = model_path
+        self.num_pred_tokens = num_pred_tokens
+        self.drafted_tokens = 0
+
+    def __call__(self, input_ids, **kwargs):
+        import numpy as np
+
+        llm = self.llm
+        input_ids = [int(token) for token in input_ids]
+        # 대상 모델 컨텍스트를 넘지 않도록 (남은 자리가 없으면 제안하지 않음)
+        budget = min(self.num_pred_tokens, llm.n_ctx() - len(input_ids) - 1)
+        if budget <= 0:
+            return np.array([], dtype=np.intc)
+
+        reused = common_prefix_length(list(llm.input_ids[:llm.n_tokens]), input_ids)
+        # 마지막 토큰은 logits를 얻기 위해 다시 평가
+        reused = min(reused, len(input_ids) - 1)
+        llm.n_tokens = reused
+        llm.eval(input_ids[reused:])
+
+        draft: List[int] = []
+        while True:
+            token = self._next_token()
+            if token == llm.token_eos():
+                break
+            draft.append(token)
+            if len(draft) >= budget:
+                break
+            llm.eval([token])
+        self.drafted_tokens += len(draft)
+        return np.array(draft, dtype=np.intc)
+
+    def _next_token(self) -> int:
+        """마지막으로 평가한 위치의 logits에서 greedy 선택 (logits_all 없이 llama.cpp 버퍼를 직접 읽음)"""
+        import llama_cpp
+        import numpy as np
+
+        logits = llama_cpp.llama_get_logits_ith(self.llm._ctx.ctx, -1)
+        return int(np.argmax(np.ctypeslib.as_array(logits, shape=(self.llm.n_vocab(),))))
+
+
+def common_prefix_length(a: List[int], b: List[int]) -> int:
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
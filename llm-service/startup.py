@@ -0,0 +1,125 @@
+"""
+서비스 시작 단계 추적
+LLM, 임베딩 모델, MinerU 파서, Neo4j 초기화를 병렬로 로드하는 동안 컴포넌트별 상태와
+소요 시간을 기록해 /health/ready에서 보여 줍니다. HTTP 포트는 로드 완료를 기다리지 않고 바로 열립니다.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_LOADING = "loading"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+
+@dataclass
+class Component:
+    name: str
+    required: bool = True
+    status: str = STATUS_PENDING
+    started_at: Optional[float] = None
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "required": self.required,
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+        }
+
+
+class StartupTracker:
+    """컴포넌트별 로드 상태 추적
+
+    readiness: 필수 컴포넌트가 모두 ready이고 로드 중인 컴포넌트(워밍업 포함)가 없을 때
+    """
+
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self._components: Dict[str, Component] = {}
+        self._lock = threading.Lock()
+        # 핵심 단계(모델/RAG/워크플로우)가 끝나면 set — 첫 요청은 이때까지 대기
+        self.core_done = threading.Event()
+        self.finished_at: Optional[float] = None
+
+    def begin(self):
+        """시작 단계 진입 — 이후 core_done 전까지 in_progress"""
+        self.started_at = time.time()
+
+    def register(self, name: str, required: bool = True):
+        with self._lock:
+            self._components[name] = Component(name=name, required=required)
+
+    def run(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """컴포넌트 로드 함수를 실행하며 상태/소요 시간 기록 (실패하면 예외 전달)"""
+        with self._lock:
+            component = self._components.setdefault(name, Component(name=name))
+            component.status = STATUS_LOADING
+            component.started_at = time.time()
+
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                component.status = STATUS_FAILED
+                component.error = str(e)
+                component.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            logger.error(f"Startup component {name} failed after {component.duration_ms:.0f} ms: {e}", exc_info=True)
+            raise
+
+        with self._lock:
+            component.status = STATUS_READY
+            component.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Startup component {name} ready in {component.duration_ms:.0f} ms")
+        return result
+
+    def fail(self, name: str, error: str):
+        """선행 컴포넌트 실패로 시작하지 못한 컴포넌트 기록"""
+        with self._lock:
+            component = self._components.setdefault(name, Component(name=name))
+            component.status = STATUS_FAILED
+            component.error = error
+
+    def mark_core_done(self):
+        """모델/RAG/워크플로우 단계 종료 (성공/실패 무관) — 대기 중인 요청을 깨움"""
+        self.core_done.set()
+
+    def finish(self):
+        """워밍업까지 모든 단계 종료"""
+        self.finished_at = time.time()
+        self.core_done.set()
+
+    @property
+    def in_progress(self) -> bool:
+        return self.started_at is not None and not self.core_done.is_set()
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            components = list(self._components.values())
+        return bool(components) and all(
+            (c.status == STATUS_READY if c.required else c.status in (STATUS_READY, STATUS_FAILED))
+            for c in components
+        )
+
+    def readiness(self) -> Dict[str, Any]:
+        with self._lock:
+            components = {name: c.to_dict() for name, c in self._components.items()}
+        return {
+            "ready": self.is_ready(),
+            "startup_ms": (round(((self.finished_at or time.time()) - self.started_at) * 1000, 1)
+                           if self.started_at is not None else None),
+            "components": components,
+        }
+
+    def pending_required(self) -> List[str]:
+        with self._lock:
+            return [c.name for c in self._components.values() if c.required and c.status != STATUS_READY]
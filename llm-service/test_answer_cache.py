@@ -0,0 +1,65 @@
+"""
+의미 기반 답변 캐시 단위 테스트
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from answer_cache import SemanticAnswerCache  # noqa: E402
+
+
+def result(reply: str) -> dict:
+    return {"reply": reply, "confidence": 0.9, "intent": "pms_query", "rag_docs_count": 1, "debug_info": {}}
+
+
+def test_near_duplicate_question_hits():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.store("스크럼이란?", [1.0, 0.0, 0.1], result("스크럼은 ..."), "m",
+                doc_ids=["doc-1"], chunk_ids=["c-1"], latency_ms=5000)
+
+    hit = cache.lookup([0.99, 0.0, 0.12], "m")
+    assert hit is not None
+    entry, similarity = hit
+    assert entry.result["reply"] == "스크럼은 ..."
+    assert similarity > 0.95
+
+    assert cache.lookup([0.0, 1.0, 0.0], "m") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["lookups"] == 2
+    assert stats["latency_saved_ms"] > 4000
+
+
+def test_other_model_does_not_hit():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store("XP란?", [0.0, 1.0], result("XP는 ..."), "model-a")
+    assert cache.lookup([0.0, 1.0], "model-b") is None
+
+
+def test_document_write_invalidates_entries():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store("스크럼", [1.0, 0.0], result("a"), "m", doc_ids=["doc-1"])
+    cache.store("XP", [0.0, 1.0], result("b"), "m", doc_ids=["doc-2"])
+    cache.store("날씨", [0.7, 0.7], result("범위 밖"), "m")
+
+    cache.invalidate_document("doc-1", "delete")
+    assert cache.lookup([1.0, 0.0], "m") is None
+    assert cache.lookup([0.0, 1.0], "m") is not None
+    assert cache.lookup([0.7, 0.7], "m") is not None
+
+    # 새 문서가 추가되면 근거 없이 만든 답변도 버림
+    cache.invalidate_document("doc-3", "add")
+    assert cache.lookup([0.7, 0.7], "m") is None
+    assert cache.lookup([0.0, 1.0], "m") is not None
+
+
+def test_lru_eviction():
+    cache = SemanticAnswerCache(threshold=0.99, max_entries=2)
+    cache.store("q1", [1.0, 0.0, 0.0], result("1"), "m")
+    cache.store("q2", [0.0, 1.0, 0.0], result("2"), "m")
+    cache.lookup([1.0, 0.0, 0.0], "m")
+    cache.store("q3", [0.0, 0.0, 1.0], result("3"), "m")
+
+    assert cache.lookup([0.0, 1.0, 0.0], "m") is None
+    assert cache.lookup([1.0, 0.0, 0.0], "m") is not None
+    assert cache.stats()["evictions"] == 1
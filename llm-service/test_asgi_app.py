@@ -0,0 +1,142 @@
+"""
+ASGI 서빙 모드 스모크 테스트 (모델/Neo4j 없이)
+StubLlama/FakeRAGService로 로드한 app 모듈 위에서 asgi_app의 네이티브 라우트와 시작 중 대기를 확인
+"""
+
+import asyncio
+import functools
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("httpx")
+
+from starlette.testclient import TestClient  # noqa: E402
+
+from startup import StartupTracker  # noqa: E402
+from test_chat_stream import DOCUMENTS, QUESTION, service  # noqa: E402,F401  (service는 픽스처)
+
+
+class ExecutorRAG:
+    """AsyncRAGServiceNeo4j 대역: 비동기 Neo4j 드라이버 대신 동기 RAG 대역을 executor에서 호출"""
+
+    def __init__(self, rag, executor=None):
+        self.rag = rag
+        self.executor = executor
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(fn, *args))
+
+    async def search(self, query, top_k=3, filter_metadata=None, use_graph_expansion=True):
+        return await self._call(self.rag.search, query, top_k, filter_metadata, use_graph_expansion)
+
+    async def search_batch(self, queries, top_k=3, filter_metadata=None):
+        return await self._call(self.rag.search_batch, queries, top_k, filter_metadata)
+
+    async def add_documents(self, documents):
+        return await self._call(self.rag.add_documents, documents)
+
+    async def delete_document(self, doc_id):
+        return await self._call(self.rag.delete_document, doc_id)
+
+    async def get_collection_stats(self):
+        return await self._call(self.rag.get_collection_stats)
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def asgi(service, monkeypatch):
+    import asgi_app
+
+    monkeypatch.setattr(asgi_app, "AsyncRAGServiceNeo4j", ExecutorRAG)
+    monkeypatch.setattr(asgi_app, "_async_rag", None)
+    return asgi_app
+
+
+@pytest.fixture
+def client(asgi):
+    # lifespan(시작 단계 로드)은 실행하지 않음 — service 픽스처가 이미 대역으로 로드함
+    return TestClient(asgi.app)
+
+
+def test_chat_and_stream_routes(client):
+    reply = client.post("/api/chat", json={"message": QUESTION})
+    assert reply.status_code == 200
+    assert reply.json()["reply"]
+
+    response = client.post("/api/chat/stream?format=ndjson", json={"message": QUESTION})
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines() if line.strip()]
+    assert events[0]["event"] == "metadata" and events[-1]["event"] == "done"
+    assert events[-1]["reply"] == reply.json()["reply"]
+
+    invalid = client.post("/api/chat", json={"message": QUESTION, "timeout_ms": 0})
+    assert invalid.status_code == 400 and invalid.json()["error"] == "Invalid deadline"
+
+
+def test_session_chat_route(client):
+    uri = f"/api/sessions/{uuid.uuid4().hex}/chat"
+    assert client.post(uri, json={"message": QUESTION}).status_code == 404
+
+    started = client.post(uri, json={"message": QUESTION, "context": []})
+    assert started.status_code == 200
+    session = started.json()["session"]
+    assert session["created"] is True
+
+    follow_up = client.post(uri, json={"message": "리스크는요?"}).json()["session"]
+    assert follow_up["created"] is False and follow_up["turns"] == session["turns"] + 1
+
+
+def test_document_routes(client):
+    added = client.post("/api/documents?wait=true", json={"documents": [
+        {"id": "doc-asgi", "content": "칸반 보드는 진행 중 작업 수를 제한합니다.", "metadata": {"title": "칸반"}},
+    ]})
+    assert added.status_code == 200 and added.json()["status"] == "completed"
+
+    found = client.post("/api/documents/search", json={"query": "칸반 보드", "top_k": 2})
+    assert found.status_code == 200
+    assert found.json()["results"][0]["metadata"]["doc_id"] == "doc-asgi"
+
+    stats = client.get("/api/documents/stats")
+    assert stats.status_code == 200
+    assert stats.json()["total_documents"] == len(DOCUMENTS) + 1
+
+    assert client.delete("/api/documents/doc-asgi").status_code == 200
+    assert client.delete("/api/documents/doc-asgi").status_code == 404
+
+
+def test_health_routes(client):
+    assert client.get("/health/live").json()["status"] == "alive"
+    assert client.get("/health").json()["status"] == "healthy"
+    # 시작 단계를 거치지 않았으므로 준비된 컴포넌트가 없음
+    ready = client.get("/health/ready")
+    assert ready.status_code == 503 and ready.json()["ready"] is False
+
+
+def test_requests_during_startup_wait_without_holding_executor(asgi, service, monkeypatch):
+    tracker = StartupTracker()
+    tracker.begin()
+    single = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(service, "startup", tracker)
+    monkeypatch.setattr(asgi, "executor", single)
+    monkeypatch.setattr(asgi, "STARTUP_POLL_INTERVAL", 0.01)
+
+    async def scenario():
+        loads = [asyncio.create_task(asgi.load_model()) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        # 시작 중에 들어온 요청이 있어도 executor 스레드는 비어 있음
+        assert await asyncio.wait_for(asgi.run_blocking(lambda: "free"), 1) == "free"
+        assert not any(task.done() for task in loads)
+        tracker.mark_core_done()
+        return await asyncio.wait_for(asyncio.gather(*loads), 5)
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        single.shutdown(wait=True)
+    assert all(workflow is service.chat_workflow for _, _, workflow in results)
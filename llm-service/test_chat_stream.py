@@ -0,0 +1,129 @@
+"""
+스트리밍 채팅 테스트 (모델/Neo4j 없이)
+benchmarks/stand_ins.py의 StubLlama와 FakeRAGService로 ChatWorkflow.stream과 /api/chat/stream의
+이벤트 순서, 오류 이벤트, 스트리밍/비스트리밍 응답 일치를 확인
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("langgraph")
+pytest.importorskip("llama_cpp")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from answer_cache import SemanticAnswerCache  # noqa: E402
+from chat_workflow import ChatWorkflow  # noqa: E402
+from stand_ins import FakeRAGService, StubLlama  # noqa: E402
+
+QUESTION = "스프린트 계획 회의는 어떻게 진행하나요?"
+DOCUMENTS = [
+    {"id": "doc-sprint", "content": "스프린트 계획 회의에서는 목표를 정하고 백로그 항목을 선택합니다.",
+     "metadata": {"title": "스프린트 계획", "category": "pms"}},
+    {"id": "doc-risk", "content": "리스크 관리는 식별, 분석, 대응 계획 수립 순서로 진행합니다.",
+     "metadata": {"title": "리스크 관리", "category": "pms"}},
+]
+
+
+def make_llm():
+    # 지연 없이 결정적인 텍스트를 생성
+    return StubLlama(token_rate=0, prefill_rate=0)
+
+
+def make_rag():
+    rag = FakeRAGService(search_latency_ms=0, embed_latency_ms=0)
+    rag.add_documents(DOCUMENTS)
+    return rag
+
+
+@pytest.fixture
+def workflow():
+    flow = ChatWorkflow(make_llm(), make_rag(), model_path="stub.gguf")
+    # 두 번째 실행이 캐시된 답변을 돌려주지 않도록
+    flow.answer_cache = SemanticAnswerCache(enabled=False)
+    return flow
+
+
+def test_stream_event_order_and_reply_matches_run(workflow):
+    events = list(workflow.stream(QUESTION))
+    names = [event["event"] for event in events]
+
+    assert names[0] == "metadata"
+    assert names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+    assert events[0]["data"]["rag_docs_count"] == events[-1]["data"]["rag_docs_count"]
+
+    streamed = "".join(event["data"]["text"] for event in events[1:-1])
+    reply = events[-1]["data"]["reply"]
+    assert reply
+    assert streamed.strip() == reply
+    assert workflow.run(QUESTION)["reply"] == reply
+
+
+def test_generation_failure_ends_with_error_reply(workflow, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("decode failed")
+
+    monkeypatch.setattr(workflow.llm, "complete_with_prefix", broken)
+    events = list(workflow.stream(QUESTION))
+
+    assert [event["event"] for event in events] == ["metadata", "done"]
+    assert events[-1]["data"]["reply"] == "죄송합니다. 응답 생성 중 오류가 발생했습니다."
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """StubLlama/FakeRAGService로 모델을 로드한 Flask 앱 모듈"""
+    pytest.importorskip("flask")
+    import app as service
+
+    placeholder = tmp_path / "stub.gguf"
+    placeholder.write_bytes(b"")
+    rag = make_rag()
+    monkeypatch.setattr(service, "create_llm", lambda model_path: make_llm())
+    monkeypatch.setattr(service, "RAGServiceNeo4j", lambda *a, **kw: rag)
+    monkeypatch.setattr(service, "current_model_path", str(placeholder))
+    monkeypatch.setattr(service, "llm", None)
+    monkeypatch.setattr(service, "rag_service", None)
+    monkeypatch.setattr(service, "chat_workflow", None)
+    service.load_model()
+    service.chat_workflow.answer_cache = SemanticAnswerCache(enabled=False)
+    return service
+
+
+def read_ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line.strip()]
+
+
+def test_stream_route_matches_chat_route(service):
+    client = service.app.test_client()
+    response = client.post("/api/chat/stream?format=ndjson", json={"message": QUESTION})
+    assert response.status_code == 200
+    events = read_ndjson(response)
+
+    names = [event["event"] for event in events]
+    assert names[0] == "metadata" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+
+    streamed = "".join(event["text"] for event in events[1:-1])
+    assert streamed.strip() == events[-1]["reply"]
+
+    reply = client.post("/api/chat", json={"message": QUESTION}).get_json()["reply"]
+    assert reply == events[-1]["reply"]
+
+
+def test_stream_route_emits_error_event(service, monkeypatch):
+    class BrokenGraph:
+        def invoke(self, state):
+            raise RuntimeError("retrieval failed")
+
+    monkeypatch.setattr(service.chat_workflow, "retrieval_graph", BrokenGraph())
+    response = service.app.test_client().post("/api/chat/stream?format=ndjson", json={"message": QUESTION})
+    events = read_ndjson(response)
+
+    assert events[-1]["event"] == "error"
+    assert events[-1]["message"] == "retrieval failed"
+    assert "done" not in [event["event"] for event in events]
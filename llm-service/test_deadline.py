@@ -0,0 +1,75 @@
+"""
+요청 데드라인/생성 취소 단위 테스트 (LLM 없이)
+"""
+
+import pickle
+import time
+
+import pytest
+
+from deadline import Deadline, DeadlineStoppingCriteria, ExpiryStoppingCriteria, stopped_by_deadline
+
+
+def test_from_request_header_and_body():
+    deadline = Deadline.from_request({"X-Request-Timeout-Ms": "2000"}, {"timeout_ms": 50})
+    assert 1.9 < deadline.remaining() <= 2.0
+
+    deadline = Deadline.from_request({}, {"deadline": (time.time() + 5) * 1000})
+    assert 4.5 < deadline.remaining() <= 5.0
+
+    # 이미 지난 데드라인, 0 이하 제한 시간은 400 (Invalid deadline)
+    with pytest.raises(ValueError):
+        Deadline.from_request({"X-Request-Deadline": str((time.time() - 1) * 1000)})
+    with pytest.raises(ValueError):
+        Deadline.from_request({"X-Request-Timeout-Ms": "0"})
+    with pytest.raises(ValueError):
+        Deadline.from_request({}, {"timeout_ms": -5})
+
+    unbounded = Deadline.from_request({}, {})
+    assert unbounded.remaining() is None and not unbounded.expired()
+    assert unbounded.allows(60)
+
+    with pytest.raises(ValueError):
+        Deadline.from_request({}, {"timeout_ms": "soon"})
+
+
+def test_stopping_criteria_stops_on_expiry_and_cancel():
+    deadline = Deadline(timeout_s=0.05)
+    criteria = deadline.stopping_criteria()
+    assert not criteria([1, 2, 3], None)
+    assert not deadline.allows(1)
+    time.sleep(0.06)
+    assert criteria([1, 2, 3], None)
+    assert deadline.truncated and deadline.reason == "deadline_exceeded"
+    assert deadline.to_dict()["truncated_by_deadline"] is True
+
+    # 제한이 없어도 연결 끊김 취소로 멈춤
+    deadline = Deadline()
+    criteria = DeadlineStoppingCriteria(deadline)
+    assert not criteria([], None)
+    deadline.cancel()
+    assert criteria([], None)
+    assert deadline.to_dict()["reason"] == "client_disconnected"
+    assert stopped_by_deadline({"stopping_criteria": criteria})
+
+
+def test_criteria_pickles_to_expiry_for_worker_replicas():
+    deadline = Deadline(timeout_s=0.05)
+    remote = pickle.loads(pickle.dumps({"stopping_criteria": deadline.stopping_criteria()}))
+    criteria = remote["stopping_criteria"]
+    assert isinstance(criteria, ExpiryStoppingCriteria)
+    assert criteria.expires_at == deadline.expires_at
+
+    assert not criteria([], None) and not stopped_by_deadline(remote)
+    time.sleep(0.06)
+    assert criteria([], None) and stopped_by_deadline(remote)
+    assert not stopped_by_deadline({})
+
+
+def test_skipped_stages_are_reported_once():
+    deadline = Deadline(timeout_s=10)
+    deadline.skip("refine_query")
+    deadline.skip("refine_query")
+    info = deadline.to_dict()
+    assert info["skipped"] == ["refine_query"]
+    assert info["timeout_ms"] == 10000 and not info["truncated_by_deadline"]
@@ -0,0 +1,82 @@
+"""
+스트리밍 문서 업로드 단위 테스트 (Flask/Neo4j 없이, 스풀러와 인덱싱 작업만)
+"""
+
+import json
+import os
+
+import pytest
+
+from document_upload import FileSpooler, NdjsonSpooler, StreamingUpload, UploadError, create_spooler
+from ingestion_jobs import IngestionJobManager
+from test_ingestion_jobs import FakeRag
+
+
+def _chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_ndjson_lines_split_across_chunks_become_spooled_documents(tmp_path):
+    documents = [{"id": f"doc{i}", "content": "본문 " * (i * 50 + 1), "metadata": {"n": i}} for i in range(5)]
+    body = b"\n".join(json.dumps(doc, ensure_ascii=False).encode("utf-8") for doc in documents) + b"\n\n  \n"
+
+    spooler = NdjsonSpooler(spool_dir=str(tmp_path))
+    spooled = []
+    for chunk in _chunks(body, 7):
+        spooled.extend(spooler.feed(chunk))
+    spooled.extend(spooler.finish())
+
+    # 빈 줄은 건너뜀, 마지막 개행 없는 줄도 문서
+    assert [doc.load() for doc in spooled] == documents
+    assert spooled[0].source == "line 1" and spooled[0].doc_id is None
+    assert spooler.bytes_received == len(body)
+    for doc in spooled:
+        doc.cleanup()
+    assert os.listdir(tmp_path) == []
+
+
+def test_document_size_limit_and_abort_remove_partial_spool(tmp_path):
+    spooler = NdjsonSpooler(spool_dir=str(tmp_path), max_document_bytes=10)
+    assert spooler.feed(b'{"id": 1}\n') != []
+    with pytest.raises(UploadError) as e:
+        spooler.feed(b'{"id": "too long for the limit"')
+    assert e.value.status_code == 413
+    spooler.abort()
+    assert len(os.listdir(tmp_path)) == 1  # 이미 끝난 첫 문서만 남음
+
+
+def test_create_spooler_by_content_type_or_filename():
+    assert isinstance(create_spooler("application/x-ndjson; charset=utf-8", {}), NdjsonSpooler)
+
+    spooler = create_spooler("application/octet-stream", {"filename": "Report.docx", "category": "pm"})
+    assert isinstance(spooler, FileSpooler) and spooler.kind == "docx"
+    assert spooler.doc_id == "upload_Report"
+    assert spooler.metadata["file_name"] == "Report.docx" and spooler.metadata["category"] == "pm"
+
+    assert create_spooler("application/pdf", {"id": "manual"}).doc_id == "manual"
+
+    with pytest.raises(UploadError) as e:
+        create_spooler("image/png", {})
+    assert e.value.status_code == 415
+
+
+def test_streaming_upload_indexes_documents_and_cleans_spool(tmp_path):
+    rag = FakeRag(chunks_per_doc=2)
+    manager = IngestionJobManager(lambda: rag, workers=2)
+    upload = StreamingUpload(manager, "application/x-ndjson", {}, spool_dir=str(tmp_path))
+    body = b'{"id": "a", "content": "x"}\n[1, 2]\n{"id": "b", "content": "y"}'
+    for chunk in _chunks(body, 5):
+        upload.feed(chunk)
+    # 본문이 끝나기 전에는 앞 문서가 끝나도 작업이 완료되지 않음
+    assert len(upload.job.progress) == 2 and not upload.job.done.is_set()
+    upload.finish()
+    assert upload.job.wait(5)
+
+    result = upload.job.to_dict()
+    assert result["status"] == "partial" and result["total"] == 3
+    by_source = {doc["source"]: doc for doc in result["documents"]}
+    assert by_source["line 1"]["doc_id"] == "a" and by_source["line 1"]["stage"] == "done"
+    assert by_source["line 2"]["stage"] == "failed" and "JSON object" in by_source["line 2"]["error"]
+    assert sorted(rag.added) == ["a", "b"]
+    assert os.listdir(tmp_path) == []
+    manager.shutdown(wait=True)
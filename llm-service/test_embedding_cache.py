@@ -0,0 +1,93 @@
+"""
+디스크 임베딩 캐시 단위 테스트
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from embedding_cache import EmbeddingCache  # noqa: E402
+
+MODEL = "intfloat/multilingual-e5-large"
+
+
+def vector(seed: int, dim: int = 8) -> list:
+    return [((seed * 7 + i * 3) % 11 - 5) / 10 for i in range(dim)]
+
+
+def test_round_trip_and_stats(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "emb.sqlite3"), max_mb=1)
+    texts = ["passage: 스프린트 계획", "passage: 일일 스크럼"]
+    assert cache.get_many(MODEL, texts) == [None, None]
+
+    cache.put_many(MODEL, texts, [vector(1), vector(2)])
+    found = cache.get_many(MODEL, texts + ["passage: 회고"])
+    assert found[2] is None
+    for got, expected in zip(found[:2], [vector(1), vector(2)]):
+        assert got == pytest.approx(expected, abs=1e-3)
+
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["stores"] == 2
+    assert stats["lookups"] == 5 and stats["hits"] == 2 and stats["misses"] == 3
+
+
+def test_key_includes_model_and_prefix(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "emb.sqlite3"))
+    cache.put_many(MODEL, ["passage: 리스크 관리"], [vector(3)])
+    assert cache.get_many("other-model", ["passage: 리스크 관리"]) == [None]
+    assert cache.get_many(MODEL, ["query: 리스크 관리"], kind="query") == [None]
+
+
+def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / "emb.sqlite3")
+    first = EmbeddingCache(path=path)
+    first.put_many(MODEL, ["passage: 번다운 차트"], [vector(4)])
+    first.close()
+
+    second = EmbeddingCache(path=path)
+    assert second.stats()["entries"] == 1
+    assert second.get_many(MODEL, ["passage: 번다운 차트"])[0] == pytest.approx(vector(4), abs=1e-3)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    # 1024차원 float16 = 2KB, 예산 10KB → 5개 넘으면 오래 안 쓴 것부터 퇴출
+    cache = EmbeddingCache(path=str(tmp_path / "emb.sqlite3"), max_mb=10 / 1024, touch_interval=0)
+    for i in range(5):
+        cache.put_many(MODEL, [f"passage: {i}"], [vector(i, 1024)])
+    cache.get_many(MODEL, ["passage: 0"])  # 0번은 최근에 사용
+
+    cache.put_many(MODEL, ["passage: 5"], [vector(5, 1024)])
+    stats = cache.stats()
+    assert stats["evictions"] >= 1
+    assert stats["size_mb"] * 1024 <= 10
+    found = cache.get_many(MODEL, [f"passage: {i}" for i in range(6)])
+    assert found[0] is not None and found[5] is not None
+    assert found[1] is None
+
+
+def test_recent_hit_does_not_rewrite_last_used(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "emb.sqlite3"))
+    cache.put_many(MODEL, ["query: 스프린트"], [vector(1)])
+    before = cache._conn.total_changes
+    assert cache.get_many(MODEL, ["query: 스프린트"], kind="query")[0] is not None
+    assert cache._conn.total_changes == before
+
+
+def test_sqlite_errors_are_misses_and_skipped_stores(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "emb.sqlite3"))
+    cache.put_many(MODEL, ["passage: 리스크"], [vector(1)])
+    cache._conn.execute("DROP TABLE embeddings")
+
+    assert cache.get_many(MODEL, ["passage: 리스크"]) == [None]
+    cache.put_many(MODEL, ["passage: 일정"], [vector(2)])
+    assert not cache._conn.in_transaction
+    stats = cache.stats()
+    assert stats["errors"] == 2 and stats["stores"] == 1
+
+
+def test_disabled_cache_is_noop(tmp_path):
+    path = tmp_path / "emb.sqlite3"
+    cache = EmbeddingCache(path=str(path), enabled=False)
+    cache.put_many(MODEL, ["passage: x"], [vector(1)])
+    assert cache.get_many(MODEL, ["passage: x"]) == [None]
+    assert not path.exists()
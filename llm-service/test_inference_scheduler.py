@@ -0,0 +1,180 @@
+"""
+추론 스케줄러 단위 테스트 (LLM 없이)
+대기열 포화/우선순위/스트리밍 동작만 확인
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from inference_scheduler import (
+    InferenceScheduler,
+    QueueFullError,
+    QueueTimeoutError,
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+)
+
+
+def _block_worker(scheduler):
+    """워커를 점유하는 작업을 넣고 해제용 이벤트 반환"""
+    release = threading.Event()
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    future = scheduler.submit(hold)
+    started.wait(5)
+    return release, future
+
+
+def test_submit_returns_result():
+    scheduler = InferenceScheduler("test", max_queue_size=4)
+    assert scheduler.submit(lambda x, y: x + y, 1, y=2).result(timeout=5) == 3
+    assert scheduler.stats()["completed"] == 1
+
+
+def test_queue_full_raises_with_retry_after():
+    scheduler = InferenceScheduler("test", max_queue_size=1)
+    release, _ = _block_worker(scheduler)
+
+    scheduler.submit(lambda: None)
+    with pytest.raises(QueueFullError) as exc_info:
+        scheduler.submit(lambda: None)
+
+    assert exc_info.value.retry_after >= 1
+    assert scheduler.stats()["rejected"] == 1
+    release.set()
+
+
+def test_priority_order():
+    scheduler = InferenceScheduler("test", max_queue_size=8)
+    release, _ = _block_worker(scheduler)
+
+    order = []
+    low = scheduler.submit(order.append, "low", priority=PRIORITY_LOW)
+    high = scheduler.submit(order.append, "high", priority=PRIORITY_HIGH)
+    release.set()
+    low.result(timeout=5)
+    high.result(timeout=5)
+
+    assert order == ["high", "low"]
+
+
+def test_expired_job_is_dropped():
+    scheduler = InferenceScheduler("test", max_queue_size=4, queue_timeout=0.05)
+    release, _ = _block_worker(scheduler)
+
+    future = scheduler.submit(lambda: "never")
+    time.sleep(0.1)
+    release.set()
+
+    with pytest.raises(QueueTimeoutError):
+        future.result(timeout=5)
+    assert scheduler.stats()["expired"] == 1
+
+
+def test_stream_yields_items_and_propagates_errors():
+    scheduler = InferenceScheduler("test", max_queue_size=4)
+    assert list(scheduler.stream(lambda: iter(range(3)))) == [0, 1, 2]
+
+    def failing():
+        yield 1
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        list(scheduler.stream(failing))
+
+
+def test_stream_stops_when_consumer_leaves():
+    scheduler = InferenceScheduler("test", max_queue_size=4)
+    produced = []
+
+    def endless():
+        i = 0
+        while True:
+            produced.append(i)
+            yield i
+            i += 1
+            time.sleep(0.01)
+
+    stream = scheduler.stream(endless)
+    assert next(stream) == 0
+    stream.close()
+
+    # 워커가 다음 작업을 처리할 수 있어야 함
+    assert scheduler.submit(lambda: "free").result(timeout=5) == "free"
+    assert len(produced) < 100
+
+
+def test_astream_yields_items_and_expired_jobs_raise():
+    scheduler = InferenceScheduler("test", max_queue_size=4, queue_timeout=0.05)
+
+    async def collect(generator_factory):
+        return [item async for item in scheduler.astream(generator_factory)]
+
+    assert asyncio.run(collect(lambda: iter(range(3)))) == [0, 1, 2]
+
+    release, _ = _block_worker(scheduler)
+
+    async def expired():
+        stream = scheduler.astream(lambda: iter(range(3)))
+        await asyncio.sleep(0.1)
+        release.set()
+        return [item async for item in stream]
+
+    with pytest.raises(QueueTimeoutError):
+        asyncio.run(expired())
+
+
+def test_run_batch_keeps_window_and_yields_in_completion_order():
+    scheduler = InferenceScheduler("test", max_queue_size=2)
+    gates = [threading.Event() for _ in range(4)]
+    max_depth = []
+
+    def job(i):
+        def run():
+            max_depth.append(scheduler.stats()["queue_depth"])
+            gates[i].wait(5)
+            return i
+        return run
+
+    results = scheduler.run_batch([job(i) for i in range(4)], window=2, priority=PRIORITY_LOW)
+    # 0번이 먼저 시작하지만 1번 대기 중 0번을 풀어주면 0번이 먼저 완료
+    gates[0].set()
+    first_index, first = next(results)
+    assert first_index == 0 and first.result() == 0
+
+    for gate in gates[1:]:
+        gate.set()
+    rest = sorted(index for index, _ in results)
+    assert rest == [1, 2, 3]
+    # window=2이므로 대기열에는 한 번에 하나씩만 쌓임
+    assert max(max_depth) <= 1
+
+
+def test_run_batch_cancels_unstarted_jobs_when_consumer_stops():
+    scheduler = InferenceScheduler("test", max_queue_size=8)
+    release = threading.Event()
+    started = threading.Event()
+    ran = []
+
+    def hold():
+        started.set()
+        release.wait(5)
+        ran.append(1)
+
+    results = scheduler.run_batch([lambda: ran.append(0), hold, lambda: ran.append(2)], window=3)
+    index, _ = next(results)
+    assert index == 0
+    started.wait(5)
+
+    # 1번 실행 중에 소비자가 떠나면 대기 중인 2번은 실행되지 않음
+    results.close()
+    release.set()
+    time.sleep(0.3)
+    assert ran == [0, 1]
@@ -0,0 +1,118 @@
+"""
+비동기 문서 인덱싱 작업 단위 테스트 (Neo4j/임베딩 모델 없이)
+"""
+
+import threading
+import time
+
+from ingestion_jobs import IngestionJobManager
+
+
+class FakeRag:
+    """add_document와 같은 순서로 단계를 알리는 가짜 RAG 서비스"""
+
+    def __init__(self, chunks_per_doc=3):
+        self.chunks_per_doc = chunks_per_doc
+        self.added = []
+        self.stages = []
+
+    def add_document(self, document, progress=None):
+        def report(stage, **counts):
+            self.stages.append(stage)
+            if progress is not None:
+                progress(stage, **counts)
+
+        if not document.get("content"):
+            report("failed", error="Document must have 'id' and 'content'")
+            return False
+        report("parse")
+        report("chunk", blocks=2)
+        report("embed", chunks=self.chunks_per_doc, embedded=0)
+        for i in range(self.chunks_per_doc):
+            report("embed", embedded=i + 1)
+        for i in range(self.chunks_per_doc):
+            report("write", written=i + 1)
+        self.added.append(document["id"])
+        return True
+
+
+def test_job_reports_per_document_progress_and_throughput():
+    rag = FakeRag()
+    manager = IngestionJobManager(lambda: rag, workers=2)
+    job = manager.submit([{"id": "a", "content": "x"}, {"id": "b", "content": "y"}, {"id": "c", "content": ""}])
+    assert job.wait(5)
+
+    body = job.to_dict()
+    assert body["status"] == "partial"
+    assert body["success_count"] == 2 and body["failed_count"] == 1 and body["pending_count"] == 0
+    assert body["chunks"] == 6
+    by_id = {doc["doc_id"]: doc for doc in body["documents"]}
+    assert by_id["a"]["stage"] == "done" and by_id["a"]["written"] == 3 and by_id["a"]["blocks"] == 2
+    assert by_id["c"]["stage"] == "failed" and "content" in by_id["c"]["error"]
+    # 끝난 문서 본문은 작업에 남지 않음
+    assert job.documents == [None, None, None]
+    assert manager.get(job.job_id) is job
+    assert manager.pending_documents() == 0
+    manager.shutdown(wait=True)
+
+
+def test_missing_rag_fails_job():
+    manager = IngestionJobManager(lambda: None, workers=1)
+    job = manager.submit([{"id": "a", "content": "x"}])
+    assert job.wait(5)
+    assert job.status == "failed"
+    assert job.progress[0].error == "RAG service not available"
+    manager.shutdown(wait=True)
+
+
+class BrokenSpool:
+    """스풀 파일 삭제가 실패하는 업로드 문서 대역"""
+
+    doc_id = "spooled"
+    source = "upload.ndjson"
+
+    def load(self):
+        return {"id": "spooled", "content": "x"}
+
+    def cleanup(self):
+        raise OSError("spool file is busy")
+
+
+def test_cleanup_failure_still_finishes_job():
+    rag = FakeRag()
+    manager = IngestionJobManager(lambda: rag, workers=1)
+    job = manager.submit([BrokenSpool()])
+    assert job.wait(5)
+    assert job.status == "completed"
+    assert manager.pending_documents() == 0
+    manager.shutdown(wait=True)
+
+
+def test_ingestion_yields_while_chat_is_busy():
+    chat_busy = threading.Event()
+    chat_busy.set()
+    rag = FakeRag(chunks_per_doc=1)
+    manager = IngestionJobManager(lambda: rag, workers=1, busy=chat_busy.is_set, yield_max_wait=5)
+    job = manager.submit([{"id": "a", "content": "x"}])
+
+    time.sleep(0.3)
+    # 채팅이 바쁜 동안 첫 단계 이후로 진행하지 않음
+    assert job.progress[0].stage == "parse"
+    assert rag.stages == ["parse"]
+
+    chat_busy.clear()
+    assert job.wait(5)
+    assert job.status == "completed"
+    assert manager.stats()["yield_to_chat_ms"] >= 200
+    manager.shutdown(wait=True)
+
+
+def test_finished_jobs_are_evicted_beyond_limit():
+    manager = IngestionJobManager(lambda: FakeRag(), workers=1, max_jobs=2)
+    jobs = [manager.submit([{"id": str(i), "content": "x"}]) for i in range(3)]
+    for job in jobs:
+        assert job.wait(5)
+    manager.submit([{"id": "last", "content": "x"}]).wait(5)
+    assert manager.get(jobs[0].job_id) is None
+    assert len(manager.list_jobs()) <= 2
+    manager.shutdown(wait=True)
@@ -0,0 +1,142 @@
+"""
+Llama 워커 풀 단위 테스트 (모델 없이)
+레플리카 프로세스 진입점을 대역으로 바꿔 분배, 오류 전달, 스트림 취소, 죽은 레플리카 처리를 확인
+"""
+
+import os
+import time
+
+import pytest
+
+from llama_worker_pool import LlamaWorkerPool, ReplicaDied
+
+
+def stub_replica(conn, replica_id, model_path, llama_kwargs):
+    """_replica_main과 같은 프로토콜의 대역
+
+    prompt "die"는 프로세스를 즉시 종료(OOM 흉내), "fail"은 오류 응답,
+    stream이면 단어마다 청크를 보내고 cancel이 오면 멈춤
+    """
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            command, payload = conn.recv()
+        except EOFError:
+            break
+        if command == "stop":
+            break
+        if command == "cancel":
+            continue
+
+        prompt, prefix, kwargs = payload
+        if prompt == "die":
+            os._exit(1)
+        if prompt == "fail":
+            conn.send(("error", "boom"))
+            continue
+        if kwargs.get("stream"):
+            sent = 0
+            for word in prompt.split():
+                conn.send(("chunk", {"choices": [{"text": word}]}))
+                sent += 1
+                time.sleep(0.01)
+                if conn.poll() and conn.recv()[0] == "cancel":
+                    break
+            conn.send(("end", {"replica_id": replica_id, "sent": sent}))
+        else:
+            conn.send(("result", ({"choices": [{"text": prompt.upper()}],
+                                   "usage": {"completion_tokens": 1}}, {"replica_id": replica_id})))
+
+
+def make_pool(replicas=2, respawn=False):
+    return LlamaWorkerPool("stub.gguf", replicas, {"n_ctx": 256}, respawn=respawn,
+                           target=stub_replica, start_timeout=30)
+
+
+@pytest.fixture
+def pool():
+    p = make_pool()
+    yield p
+    p.close()
+
+
+def test_least_loaded_dispatch(pool):
+    first = pool._acquire_replica()
+    second = pool._acquire_replica()
+    assert first is not second
+    # second가 아직 처리 중이면 한가한 first
+    pool._release_replica(first)
+    assert pool._acquire_replica() is first
+    pool._release_replica(first)
+    pool._release_replica(second)
+    # 둘 다 한가하면 완료 수가 적은 쪽
+    assert first.completed == 2 and second.completed == 1
+    assert pool._acquire_replica() is second
+    pool._release_replica(second)
+
+    response, stats = pool.complete_with_prefix("hello", None)
+    assert response["choices"][0]["text"] == "HELLO"
+    assert stats["replica_id"] in (0, 1)
+
+
+def test_replica_error_propagates_and_releases(pool):
+    with pytest.raises(RuntimeError, match="boom"):
+        pool.complete_with_prefix("fail", None)
+    assert all(r["in_flight"] == 0 and r["alive"] for r in pool.stats()["replicas"])
+
+
+def test_stream_cancel_drains_pipe():
+    pool = make_pool(replicas=1)
+    try:
+        stream, stats = pool.complete_with_prefix(" ".join(f"w{i}" for i in range(50)), None, stream=True)
+        assert [next(stream)["choices"][0]["text"] for _ in range(2)] == ["w0", "w1"]
+        stream.close()
+        # 남은 청크가 비워졌으므로 같은 레플리카의 다음 요청이 정상 응답
+        response, _ = pool.complete_with_prefix("next", None)
+        assert response["choices"][0]["text"] == "NEXT"
+
+        stream, stats = pool.complete_with_prefix("a b c", None, stream=True)
+        assert [c["choices"][0]["text"] for c in stream] == ["a", "b", "c"]
+        assert stats["sent"] == 3
+    finally:
+        pool.close()
+
+
+def test_dead_replica_is_skipped_and_reported(pool):
+    with pytest.raises(ReplicaDied):
+        pool.complete_with_prefix("die", None)
+
+    stats = pool.stats()
+    assert stats["live_replicas"] == 1
+    dead = [r for r in stats["replicas"] if not r["alive"]]
+    assert len(dead) == 1 and dead[0]["deaths"] == 1
+    # 죽은 레플리카(in_flight 0)로 분배되지 않음
+    for _ in range(4):
+        _, replica_stats = pool.complete_with_prefix("ok", None)
+        assert replica_stats["replica_id"] != dead[0]["replica_id"]
+
+
+def test_all_replicas_dead_raises():
+    pool = make_pool(replicas=1)
+    try:
+        with pytest.raises(ReplicaDied):
+            pool.complete_with_prefix("die", None)
+        with pytest.raises(RuntimeError, match="No live"):
+            pool.complete_with_prefix("ok", None)
+    finally:
+        pool.close()
+
+
+def test_dead_replica_is_respawned():
+    pool = make_pool(replicas=1, respawn=True)
+    try:
+        with pytest.raises(ReplicaDied):
+            pool.complete_with_prefix("die", None)
+        deadline = time.time() + 30
+        while pool.live_replicas() == 0 and time.time() < deadline:
+            time.sleep(0.05)
+        assert pool.stats()["restarts"] == 1
+        response, _ = pool.complete_with_prefix("back", None)
+        assert response["choices"][0]["text"] == "BACK"
+    finally:
+        pool.close()
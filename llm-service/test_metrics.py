@@ -0,0 +1,71 @@
+"""
+Prometheus 메트릭 노출 형식 단위 테스트
+"""
+
+import metrics
+from metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_counter_and_histogram_exposition():
+    registry = Registry()
+    requests = registry.register(Counter("t_requests_total", "Requests.", ("route", "status")))
+    latency = registry.register(Histogram("t_latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0)))
+
+    requests.inc(route="/api/chat", status="200")
+    requests.inc(2, route="/api/chat", status="200")
+    latency.observe(0.05, route="/api/chat")
+    latency.observe(0.5, route="/api/chat")
+    latency.observe(3.0, route="/api/chat")
+
+    text = registry.render()
+    assert "# TYPE t_requests_total counter" in text
+    assert 't_requests_total{route="/api/chat",status="200"} 3' in text
+    assert "# TYPE t_latency_seconds histogram" in text
+    # 버킷은 누적 개수
+    assert 't_latency_seconds_bucket{route="/api/chat",le="0.1"} 1' in text
+    assert 't_latency_seconds_bucket{route="/api/chat",le="1"} 2' in text
+    assert 't_latency_seconds_bucket{route="/api/chat",le="+Inf"} 3' in text
+    assert 't_latency_seconds_count{route="/api/chat"} 3' in text
+    assert 't_latency_seconds_sum{route="/api/chat"} 3.55' in text
+    assert text.endswith("\n")
+
+
+def test_label_escaping_and_gauge_collector():
+    registry = Registry()
+    depth = registry.register(Gauge("t_queue_depth", "Depth.", ("scheduler",),
+                                    collect=lambda: {('./models/"a".gguf',): 4}))
+    depth.set(1, scheduler="other")
+
+    text = registry.render()
+    assert 't_queue_depth{scheduler="./models/\\"a\\".gguf"} 4' in text
+    assert 't_queue_depth{scheduler="other"} 1' in text
+
+
+def test_failing_gauge_collector_is_logged_and_keeps_stored_values(caplog):
+    def broken():
+        raise RuntimeError("scheduler gone")
+
+    registry = Registry()
+    depth = registry.register(Gauge("t_broken_depth", "Depth.", ("scheduler",), collect=broken))
+    depth.set(2, scheduler="stored")
+
+    text = registry.render()
+    assert 't_broken_depth{scheduler="stored"} 2' in text
+    assert "Gauge t_broken_depth collector failed" in caplog.text
+
+
+def test_observe_generation_records_tokens_and_throughput():
+    before_prompt = metrics.PROMPT_TOKENS.value()
+    before_eval = metrics.EVAL_TPS.count()
+
+    metrics.observe_generation({
+        "prompt_tokens": 120, "completion_tokens": 30, "total_ms": 2000,
+        "prompt_eval_tokens": 20, "prompt_eval_ms": 100.0,
+        "eval_tokens": 30, "eval_ms": 1500.0,
+    })
+    # 타이밍을 못 읽은 경우(워커 풀 등)에는 토큰 수만 기록
+    metrics.observe_generation({"prompt_tokens": 10, "completion_tokens": 5})
+
+    assert metrics.PROMPT_TOKENS.value() == before_prompt + 130
+    assert metrics.EVAL_TPS.count() == before_eval + 1
+    assert "llm_eval_tokens_per_second_bucket" in metrics.render()
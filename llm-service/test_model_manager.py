@@ -0,0 +1,90 @@
+"""
+다중 모델 상주 관리 단위 테스트 (LLM 없이)
+"""
+
+import threading
+import time
+
+import pytest
+
+from model_manager import ModelManager, ModelSelectionError
+
+MB = 1024 * 1024
+SIZES = {
+    "active.gguf": 8000 * MB, "small.gguf": 2000 * MB, "mid.gguf": 3000 * MB, "other.gguf": 3000 * MB,
+    "huge.gguf": 9000 * MB,
+}
+
+
+class FakeModels:
+    def __init__(self, budget_mb=14000):
+        self.events = []
+        self.manager = ModelManager(self.load, self.release, SIZES.__getitem__, budget_mb * MB)
+        self.manager.set_active("active.gguf", "model:active.gguf", "workflow:active.gguf")
+
+    def load(self, path):
+        self.events.append(("load", path))
+        time.sleep(0.01)
+        return f"model:{path}", f"workflow:{path}"
+
+    def release(self, path, model):
+        self.events.append(("release", path))
+
+
+def test_lru_eviction_keeps_active_model():
+    models = FakeModels()
+    manager = models.manager
+
+    assert manager.get("small.gguf").workflow == "workflow:small.gguf"
+    assert manager.get("mid.gguf").workflow == "workflow:mid.gguf"
+    manager.get("small.gguf")  # small이 최근 사용 → mid가 LRU
+
+    # 8000 + 2000 + 3000 + 3000 > 14000 → LRU인 mid만 내림
+    manager.get("other.gguf")
+    assert ("release", "mid.gguf") in models.events
+    assert ("release", "small.gguf") not in models.events
+    assert manager.resident_paths() == ["active.gguf", "small.gguf", "other.gguf"]
+
+    stats = manager.stats()
+    assert stats["loads"] == 3
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["used_mb"] == 13000
+    assert stats["resident"][-1]["pinned"]
+
+
+def test_model_larger_than_budget_is_refused_without_eviction():
+    models = FakeModels()
+    models.manager.get("small.gguf")
+    with pytest.raises(ModelSelectionError) as exc_info:
+        models.manager.get("huge.gguf")
+    assert exc_info.value.status_code == 507
+    assert models.events == [("load", "small.gguf")]
+
+
+def test_disabled_budget_rejects_other_models():
+    models = FakeModels(budget_mb=0)
+    with pytest.raises(ModelSelectionError) as exc_info:
+        models.manager.get("small.gguf")
+    assert exc_info.value.error_type == "MULTI_MODEL_DISABLED"
+    # 활성 모델은 항상 사용 가능
+    assert models.manager.get("active.gguf").pinned
+
+
+def test_concurrent_requests_load_once_and_swap_can_take_resident():
+    models = FakeModels()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(models.manager.get("small.gguf"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert models.events.count(("load", "small.gguf")) == 1
+    assert len({id(resident) for resident in results}) == 1
+
+    taken = models.manager.take("small.gguf")
+    assert taken.model == "model:small.gguf"
+    assert models.manager.take("active.gguf") is None
+    assert "small.gguf" not in models.manager.resident_paths()
@@ -0,0 +1,108 @@
+"""
+GGUF 헤더 레지스트리 단위 테스트 (작은 합성 GGUF 파일 사용)
+"""
+
+import os
+import struct
+
+import pytest
+
+from model_registry import GGUFFormatError, InsufficientMemoryError, ModelRegistry, read_gguf_header
+
+MB = 1024 * 1024
+
+
+def gguf_string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return struct.pack("<Q", len(data)) + data
+
+
+def write_gguf(path, context_length=8192, vocab_size=1000):
+    """gemma3 형태의 메타데이터와 텐서 정보 2개만 가진 GGUF v3 파일"""
+    kvs = [
+        ("general.architecture", 8, gguf_string("gemma3")),
+        ("general.name", 8, gguf_string("Tiny Gemma")),
+        ("general.file_type", 4, struct.pack("<I", 17)),
+        ("gemma3.context_length", 4, struct.pack("<I", context_length)),
+        ("gemma3.block_count", 4, struct.pack("<I", 4)),
+        ("gemma3.embedding_length", 4, struct.pack("<I", 256)),
+        ("gemma3.attention.head_count", 4, struct.pack("<I", 8)),
+        ("gemma3.attention.head_count_kv", 4, struct.pack("<I", 2)),
+        ("tokenizer.chat_template", 8, gguf_string("{{ messages }}")),
+        # 긴 배열은 길이만 기록되어야 함
+        ("tokenizer.ggml.tokens", 9,
+         struct.pack("<IQ", 8, vocab_size) + b"".join(gguf_string(f"t{i}") for i in range(vocab_size))),
+        ("tokenizer.ggml.scores", 9, struct.pack("<IQ", 6, vocab_size) + b"\0" * 4 * vocab_size),
+    ]
+    tensors = [("token_embd.weight", (256, vocab_size), 14), ("blk.0.attn_q.weight", (256, 256), 12)]
+
+    with open(path, "wb") as f:
+        f.write(b"GGUF" + struct.pack("<IQQ", 3, len(tensors), len(kvs)))
+        for key, value_type, payload in kvs:
+            f.write(gguf_string(key) + struct.pack("<I", value_type) + payload)
+        for name, dims, tensor_type in tensors:
+            f.write(gguf_string(name) + struct.pack("<I", len(dims)) + struct.pack(f"<{len(dims)}Q", *dims))
+            f.write(struct.pack("<IQ", tensor_type, 0))
+        f.write(b"\0" * 4096)  # 텐서 데이터 자리
+
+
+def test_reads_header_without_weights(tmp_path):
+    path = tmp_path / "tiny.gguf"
+    write_gguf(path)
+    info = read_gguf_header(str(path)).to_dict()
+
+    assert info["architecture"] == "gemma3"
+    assert info["name"] == "Tiny Gemma"
+    assert info["quantization"] == "Q5_K_M"
+    assert info["context_length"] == 8192
+    assert info["chat_template"] == "{{ messages }}"
+    assert info["parameter_count"] == 256 * 1000 + 256 * 256
+    # 레이어 4 x KV 헤드 2 x (32 + 32) x f16
+    assert info["kv_bytes_per_token"] == 4 * 2 * 64 * 2
+
+    metadata = read_gguf_header(str(path)).metadata
+    assert metadata["tokenizer.ggml.tokens"] == {"type": "array", "length": 1000}
+
+
+def test_cache_invalidated_by_mtime(tmp_path):
+    path = tmp_path / "tiny.gguf"
+    write_gguf(path, context_length=4096)
+    registry = ModelRegistry()
+    assert registry.get(str(path)).context_length == 4096
+    assert registry.get(str(path)).context_length == 4096
+    assert registry.stats() == {"cached": 1, "parses": 1, "hits": 1}
+
+    write_gguf(path, context_length=32768)
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert registry.get(str(path)).context_length == 32768
+    assert registry.stats()["parses"] == 2
+
+
+def test_memory_estimate_and_refusal(tmp_path):
+    path = tmp_path / "tiny.gguf"
+    write_gguf(path)
+    registry = ModelRegistry()
+    info = registry.get(str(path))
+
+    estimate = info.estimate_memory(n_ctx=1024)
+    assert estimate.kv_cache_bytes == info.kv_bytes_per_token() * 1024
+    assert estimate.weights_bytes == info.size_bytes
+    # 모든 레이어를 GPU로 오프로드하면 호스트에는 여유분만 남음
+    assert info.estimate_memory(n_ctx=1024, n_gpu_layers=-1).total_bytes == estimate.overhead_bytes
+    # 투기적 디코딩: logits_all 배열 + draft 모델
+    speculative = info.estimate_memory(n_ctx=1024, logits_all=True, draft_bytes=MB)
+    assert speculative.speculative_bytes == 1024 * 1000 * 4 + MB
+    assert speculative.total_bytes == estimate.total_bytes + speculative.speculative_bytes
+
+    with pytest.raises(InsufficientMemoryError) as exc_info:
+        registry.check_fits(str(path), n_ctx=1024, available_bytes=64 * MB)
+    assert exc_info.value.estimate.n_ctx == 1024
+    assert registry.check_fits(str(path), n_ctx=1024, available_bytes=64 * 1024 * MB).n_ctx == 1024
+
+
+def test_rejects_non_gguf(tmp_path):
+    path = tmp_path / "fake.gguf"
+    path.write_bytes(b"not a model")
+    with pytest.raises(GGUFFormatError):
+        ModelRegistry().get(str(path))
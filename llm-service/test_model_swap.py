@@ -0,0 +1,93 @@
+"""
+모델 교체 백그라운드 작업 단위 테스트 (LLM 없이)
+로드 → 전환 → 이전 모델 대기 → 해제 순서와 실패 처리만 확인
+"""
+
+import threading
+import time
+
+import pytest
+
+from model_swap import ModelSwapManager, SwapInProgressError
+
+
+def wait_for(job, statuses, timeout=5.0):
+    deadline = time.time() + timeout
+    while job.status not in statuses and time.time() < deadline:
+        time.sleep(0.01)
+    return job.status
+
+
+class FakeService:
+    """app.py 전역 상태 흉내"""
+
+    def __init__(self):
+        self.model, self.model_path = "old-model", "old.gguf"
+        self.events = []
+        self.load_gate = threading.Event()
+        self.load_gate.set()
+
+    def load(self, path):
+        self.load_gate.wait(5)
+        self.events.append(("load", path))
+        if path == "broken.gguf":
+            raise RuntimeError("bad gguf")
+        return f"model:{path}", f"workflow:{path}"
+
+    def activate(self, path, model, workflow):
+        self.events.append(("activate", path))
+        old = (self.model, self.model_path)
+        self.model, self.model_path = model, path
+        return old
+
+    def drain(self, path):
+        self.events.append(("drain", path))
+
+    def release(self, model):
+        self.events.append(("release", model))
+
+    def manager(self):
+        return ModelSwapManager(self.load, self.activate, self.drain, self.release)
+
+
+def test_swap_switches_then_drains_and_releases_old_model():
+    service = FakeService()
+    job = service.manager().start("new.gguf")
+
+    assert wait_for(job, ("completed", "failed")) == "completed"
+    assert service.model == "model:new.gguf"
+    # 이전 모델은 전환 후, 남은 요청을 기다린 다음에 해제
+    assert service.events == [
+        ("load", "new.gguf"), ("activate", "new.gguf"), ("drain", "old.gguf"), ("release", "old-model"),
+    ]
+    assert job.previous_model_path == "old.gguf"
+    assert job.workflow_initialized
+    assert set(job.durations_ms) == {"load", "switch", "drain", "release"}
+
+
+def test_load_failure_keeps_current_model():
+    service = FakeService()
+    job = service.manager().start("broken.gguf")
+
+    assert wait_for(job, ("completed", "failed")) == "failed"
+    assert "bad gguf" in job.error
+    assert service.model == "old-model"
+    assert ("activate", "broken.gguf") not in service.events
+
+
+def test_only_one_swap_at_a_time():
+    service = FakeService()
+    service.load_gate.clear()
+    manager = service.manager()
+    job = manager.start("new.gguf")
+    assert wait_for(job, ("loading",)) == "loading"
+    assert manager.active() is job
+
+    with pytest.raises(SwapInProgressError) as exc_info:
+        manager.start("other.gguf")
+    assert exc_info.value.job is job
+
+    service.load_gate.set()
+    assert wait_for(job, ("completed",)) == "completed"
+    assert manager.active() is None
+    assert manager.get(job.job_id) is job
@@ -0,0 +1,82 @@
+"""
+토큰 예산 프롬프트 패커 단위 테스트 (공백 단위 토크나이저)
+"""
+
+from prompt_budget import DOC_OVERHEAD_TOKENS, PromptPacker, SAFETY_TOKENS
+
+
+class FakeTokenizer:
+    """단어 하나 = 토큰 하나"""
+
+    def __init__(self, n_ctx):
+        self._n_ctx = n_ctx
+
+    def n_ctx(self):
+        return self._n_ctx
+
+    def tokenize(self, text, add_bos=True, special=False):
+        return text.decode("utf-8").split()
+
+    def detokenize(self, tokens):
+        return " ".join(tokens).encode("utf-8")
+
+
+def render(message):
+    def build(history, docs):
+        parts = ["system prompt here", *[m["content"] for m in history], message]
+        parts.extend(f"{i}. {doc}" for i, doc in enumerate(docs, 1))
+        return "\n".join(parts)
+    return build
+
+
+def words(n, word="w"):
+    return " ".join([word] * n)
+
+
+def test_everything_fits_and_max_tokens_uses_remaining_context():
+    packer = PromptPacker(FakeTokenizer(1000), min_completion_tokens=100, max_completion_tokens=0)
+    packed = packer.pack(render("질문"), [{"role": "user", "content": "이전 질문"}], ["a b c", "d e"], [0.9, 0.5])
+
+    assert packed.docs == ["a b c", "d e"]
+    assert packed.context == [{"role": "user", "content": "이전 질문"}]
+    assert packed.prompt_tokens == packer.count_tokens(packed.prompt) + 1
+    assert packed.max_tokens == 1000 - packed.prompt_tokens - SAFETY_TOKENS
+    assert packed.dropped_docs == 0 and packed.truncated_docs == 0
+
+
+def test_lowest_relevance_docs_are_dropped_or_truncated_first():
+    packer = PromptPacker(FakeTokenizer(400), min_completion_tokens=100, max_completion_tokens=256,
+                          min_doc_tokens=20)
+    docs = [words(120, "low"), words(150, "high"), words(100, "mid")]
+    packed = packer.pack(render("질문"), [], docs, [0.4, 0.9, 0.6])
+
+    # high(150) + mid(100)가 먼저 들어가고 low는 남은 자리만큼 잘림, 문서 순서는 원래대로
+    assert packed.docs[1] == docs[1] and packed.docs[2] == docs[2]
+    assert packed.docs[0].startswith("low") and packed.docs[0].endswith("…")
+    assert packed.truncated_docs == 1
+    assert packed.prompt_tokens <= 400 - 100
+    assert packed.max_tokens == min(256, 400 - packed.prompt_tokens - SAFETY_TOKENS)
+
+    # 잘라 넣을 자리도 없으면 낮은 점수 문서를 버림
+    packer.min_doc_tokens = 200
+    packed = packer.pack(render("질문"), [], docs, [0.4, 0.9, 0.6])
+    assert packed.docs == [docs[1], docs[2]]
+    assert packed.dropped_docs == 1
+
+
+def test_history_keeps_most_recent_turns_within_ratio():
+    packer = PromptPacker(FakeTokenizer(600), min_completion_tokens=100, history_ratio=0.3)
+    context = [{"role": "user", "content": words(60, str(i))} for i in range(5)]
+    packed = packer.pack(render("질문"), context, [], None)
+
+    # 가용 예산(약 490)의 30% → 최근 두 턴(60 + 8 오버헤드씩)만
+    assert packed.context == context[-2:]
+    assert packed.dropped_history == 3
+
+
+def test_docs_without_scores_use_list_order():
+    packer = PromptPacker(FakeTokenizer(300), min_completion_tokens=100, min_doc_tokens=1000)
+    docs = [words(100, "first"), words(100, "second")]
+    packed = packer.pack(render("질문"), [], docs)
+    assert packed.docs == [docs[0]]
+    assert 300 - 100 - packed.prompt_tokens < 100 + DOC_OVERHEAD_TOKENS
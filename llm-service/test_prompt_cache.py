@@ -0,0 +1,138 @@
+"""
+시스템 프롬프트 접두부 KV 캐시 단위 테스트 (실제 모델 없이)
+"""
+
+import numpy as np
+
+from prompt_cache import PrefixKVCache, compact_state, complete_with_prefix_cache, get_prefix_cache
+
+
+class FakeLlama:
+    """문자 단위 토큰화와 KV 상태를 흉내내는 최소 Llama 대역"""
+
+    def __init__(self):
+        self._tokens = []
+        self.evaluated = 0
+
+    @property
+    def n_tokens(self):
+        return len(self._tokens)
+
+    @property
+    def input_ids(self):
+        return list(self._tokens)
+
+    def tokenize(self, text: bytes, add_bos: bool = True, special: bool = False):
+        return ([0] if add_bos else []) + list(text.decode("utf-8").encode("utf-8"))
+
+    def reset(self):
+        self._tokens = []
+
+    def eval(self, tokens):
+        self.evaluated += len(tokens)
+        self._tokens.extend(tokens)
+
+    def save_state(self):
+        return list(self._tokens)
+
+    def load_state(self, state):
+        self._tokens = list(state)
+
+    def __call__(self, prompt, **kwargs):
+        tokens = self.tokenize(prompt.encode("utf-8"))
+        common = 0
+        for a, b in zip(self._tokens, tokens):
+            if a != b:
+                break
+            common += 1
+        self._tokens = self._tokens[:common]
+        self.eval(tokens[common:])
+        return {"choices": [{"text": "ok"}], "usage": {"prompt_tokens": len(tokens), "completion_tokens": 1}}
+
+
+class FakeLlamaState:
+    """llama_cpp.LlamaState처럼 토큰과 logits 배열(scores)을 함께 담는 상태"""
+
+    def __init__(self, tokens, n_vocab=1000, n_batch=64):
+        self.input_ids = np.array(tokens, dtype=np.intc)
+        self.n_tokens = len(tokens)
+        self.scores = np.zeros((min(len(tokens), n_batch), n_vocab), dtype=np.single)
+        self.scores[-1, :] = 1.0
+        self.llama_state = b"\0" * (16 * len(tokens))
+        self.llama_state_size = len(self.llama_state)
+
+    def __iter__(self):
+        return iter(self.input_ids.tolist())
+
+
+class ScoredFakeLlama(FakeLlama):
+    """save_state가 scores를 통째로 담은 상태를 돌려주는 대역"""
+
+    def save_state(self):
+        return FakeLlamaState(self._tokens)
+
+
+PREFIX = "<|im_start|>system\n시스템 프롬프트\n<|im_end|>"
+
+
+def test_prefix_is_warmed_once_and_reused():
+    llm = FakeLlama()
+    cache = PrefixKVCache(llm)
+
+    first = cache.prepare(PREFIX + "\n질문1", PREFIX)
+    assert first["prefix_status"] == "warmed"
+    llm(PREFIX + "\n질문1")
+
+    second = cache.prepare(PREFIX + "\n질문2", PREFIX)
+    assert second["prefix_status"] == "resident"
+    assert second["prefix_tokens"] == len(llm.tokenize(PREFIX.encode("utf-8")))
+
+
+def test_prefix_state_restored_after_other_prompt():
+    llm = FakeLlama()
+    cache = PrefixKVCache(llm)
+    cache.prepare(PREFIX + "\n질문", PREFIX)
+
+    # 다른 프롬프트가 KV를 덮어씀
+    llm.reset()
+    llm("완전히 다른 프롬프트")
+
+    stats = cache.prepare(PREFIX + "\n질문", PREFIX)
+    assert stats["prefix_status"] == "restored"
+    assert llm.input_ids == llm.tokenize(PREFIX.encode("utf-8"))
+
+
+def test_prompt_without_prefix_resets():
+    llm = FakeLlama()
+    llm("이전 프롬프트")
+    stats = PrefixKVCache(llm).prepare("접두부 없는 프롬프트", PREFIX)
+    assert stats["prefix_status"] == "disabled"
+    assert llm.n_tokens == 0
+
+
+def test_complete_evaluates_only_suffix():
+    llm = FakeLlama()
+    complete_with_prefix_cache(llm, PREFIX + "\n첫 질문", PREFIX)
+    before = llm.evaluated
+
+    response, stats = complete_with_prefix_cache(llm, PREFIX + "\n둘째 질문", PREFIX)
+
+    # 접두부 뒤의 줄바꿈까지 이전 요청과 같으므로 질문 부분만 평가됨
+    suffix_tokens = len("둘째 질문".encode("utf-8"))
+    assert response["choices"][0]["text"] == "ok"
+    assert stats["prefix_status"] == "resident"
+    assert llm.evaluated - before == suffix_tokens
+    assert get_prefix_cache(llm).stats()["resident_hits"] == 1
+
+
+def test_prefix_state_keeps_only_last_logits_row():
+    llm = ScoredFakeLlama()
+    cache = PrefixKVCache(llm)
+    cache.prepare(PREFIX + "\n질문", PREFIX)
+
+    _, state = cache._states[PREFIX]
+    assert state.scores.shape == (1, 1000)
+    assert state.scores[0].sum() == 1000
+
+    # 토큰 목록이 아닌 상태는 그대로
+    assert compact_state([1, 2, 3]) == [1, 2, 3]
@@ -0,0 +1,156 @@
+"""
+RAGServiceNeo4j 단위 테스트 (Neo4j/임베딩 모델 없이)
+가짜 세션/트랜잭션으로 청크 배치 쓰기의 트랜잭션 경계를, Cypher 문자열로 배치 검색의 반환 컬럼을 확인
+"""
+
+import re
+import uuid
+
+import pytest
+
+pytest.importorskip("neo4j")
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("llama_cpp")  # document_parser
+
+from rag_service_neo4j import RAGServiceNeo4j  # noqa: E402
+
+
+class FakeTx:
+    """실행한 Cypher와 파라미터를 기록하는 트랜잭션 (지정한 청크 인덱스를 쓰면 실패)"""
+
+    def __init__(self, fail_chunk_index=None):
+        self.runs = []
+        self.fail_chunk_index = fail_chunk_index
+
+    def run(self, cypher, **params):
+        self.runs.append((cypher, params))
+        rows = params.get("rows") or []
+        if cypher == RAGServiceNeo4j.WRITE_CHUNKS_CYPHER and any(
+                row["props"]["chunk_index"] == self.fail_chunk_index for row in rows):
+            raise RuntimeError("write failed")
+        return self
+
+    def consume(self):
+        pass
+
+
+class FakeSession:
+    """execute_write마다 트랜잭션을 만들고, 예외 없이 끝난 트랜잭션만 커밋으로 기록"""
+
+    def __init__(self, fail_chunk_index=None):
+        self.fail_chunk_index = fail_chunk_index
+        self.attempted = []
+        self.committed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_write(self, fn, *args, **kwargs):
+        tx = FakeTx(self.fail_chunk_index)
+        self.attempted.append(tx)
+        fn(tx, *args, **kwargs)
+        self.committed.append(tx)
+
+
+class FakeDriver:
+    def __init__(self, session):
+        self._session = session
+
+    def session(self):
+        return self._session
+
+
+def make_service(session):
+    rag = RAGServiceNeo4j.__new__(RAGServiceNeo4j)
+    rag.driver = FakeDriver(session)
+    rag._write_listeners = []
+    return rag
+
+
+def make_doc(doc_id="doc-1", chunks=5):
+    return {
+        "doc_id": doc_id,
+        "content": "문서 본문",
+        "metadata": {"file_path": "guide.pdf"},
+        "title": "가이드",
+        "category": "pms",
+        "file_type": "pdf",
+        "chunks": [{"content": f"청크 {i}", "metadata": {"page_number": i}} for i in range(chunks)],
+    }
+
+
+def embeddings(count):
+    return [[float(i)] * 4 for i in range(count)]
+
+
+def runs_of(txs, cypher):
+    return [params for tx in txs for text, params in tx.runs if text == cypher]
+
+
+def test_chunk_ids_are_deterministic():
+    doc = make_doc()
+    rows = RAGServiceNeo4j.chunk_rows(doc, embeddings(5))
+    assert rows == RAGServiceNeo4j.chunk_rows(make_doc(), embeddings(5))
+    assert rows[3]["chunk_id"] == str(uuid.uuid5(uuid.NAMESPACE_URL, "pms-rag:doc-1#3"))
+    other = RAGServiceNeo4j.chunk_rows(make_doc("doc-2"), embeddings(5))
+    assert not {row["chunk_id"] for row in rows} & {row["chunk_id"] for row in other}
+
+
+def test_links_carry_across_batches_and_stale_delete_runs_once_in_last_batch():
+    session = FakeSession()
+    assert make_service(session)._write_document(make_doc(), embeddings(5), batch_size=2)
+
+    chunk_txs = session.committed[1:]
+    assert [len(runs_of([tx], RAGServiceNeo4j.WRITE_CHUNKS_CYPHER)[0]["rows"]) for tx in chunk_txs] == [2, 2, 1]
+
+    rows = [row for params in runs_of(chunk_txs, RAGServiceNeo4j.LINK_CHUNKS_CYPHER) for row in params["rows"]]
+    assert rows[0]["prev_chunk_id"] is None
+    # 배치 경계(2번, 4번 행)에서도 직전 배치의 마지막 청크를 가리킴
+    assert [row["prev_chunk_id"] for row in rows[1:]] == [row["chunk_id"] for row in rows[:-1]]
+
+    deletes = runs_of(session.committed, RAGServiceNeo4j.DELETE_STALE_CHUNKS_CYPHER)
+    assert len(deletes) == 1
+    assert runs_of([chunk_txs[-1]], RAGServiceNeo4j.DELETE_STALE_CHUNKS_CYPHER) == deletes
+    assert deletes[0]["chunk_ids"] == [row["chunk_id"] for row in rows]
+
+
+def test_document_without_chunks_still_deletes_stale_chunks():
+    session = FakeSession()
+    assert make_service(session)._write_document(make_doc(chunks=0), [], batch_size=2)
+
+    assert len(session.committed) == 2
+    assert runs_of(session.committed, RAGServiceNeo4j.WRITE_CHUNKS_CYPHER) == [{"doc_id": "doc-1", "rows": []}]
+    assert runs_of(session.committed, RAGServiceNeo4j.DELETE_STALE_CHUNKS_CYPHER) == [
+        {"doc_id": "doc-1", "chunk_ids": []}]
+
+
+def test_failed_batch_never_deletes_previous_chunks():
+    session = FakeSession(fail_chunk_index=2)
+    reports = []
+    ok = make_service(session)._write_document(
+        make_doc(), embeddings(5), report=lambda stage, **counts: reports.append(stage), batch_size=2)
+
+    assert not ok and reports[-1] == "failed"
+    # 두 번째 배치에서 멈추고, 실행을 시도한 트랜잭션을 포함해 삭제는 한 번도 실행되지 않음
+    assert len(session.attempted) == 3 and len(session.committed) == 2
+    assert runs_of(session.attempted, RAGServiceNeo4j.DELETE_STALE_CHUNKS_CYPHER) == []
+
+
+def return_aliases(cypher):
+    """마지막 RETURN 절의 컬럼 별칭"""
+    clause = cypher.rsplit("RETURN", 1)[1].split("ORDER BY")[0]
+    return tuple(re.findall(r"\bAS\s+(\w+)", clause))
+
+
+@pytest.mark.parametrize("use_graph", [True, False])
+def test_batch_search_returns_single_search_columns(use_graph):
+    columns = RAGServiceNeo4j.GRAPH_SEARCH_COLUMNS if use_graph else RAGServiceNeo4j.VECTOR_SEARCH_COLUMNS
+    assert return_aliases(RAGServiceNeo4j.search_cypher(use_graph)) == columns
+
+    batch = RAGServiceNeo4j.search_batch_cypher(use_graph)
+    assert "$embedding" not in batch and "item.embedding" in batch
+    outer = batch.rsplit("RETURN", 1)[1]
+    assert [column.strip() for column in outer.split(",")] == ["item.idx AS idx", *columns]
@@ -0,0 +1,57 @@
+"""
+요청 단위 구간 시간 수집 단위 테스트
+"""
+
+import threading
+import time
+from contextvars import copy_context
+
+import request_timings
+
+
+def test_spans_outside_collector_are_ignored():
+    with request_timings.span("embed_query"):
+        pass
+    request_timings.record("prefill", 10.0)
+    assert request_timings.current() is None
+
+
+def test_nodes_and_steps_accumulate_per_request():
+    with request_timings.collect() as timings:
+        for _ in range(2):
+            with request_timings.span("rag_search", node=True):
+                with request_timings.span("embed_query"):
+                    time.sleep(0.01)
+        request_timings.record("prefill", 120.0)
+        request_timings.record("decode", None)
+        request_timings.record_value("prompt_tokens", 512)
+
+    result = timings.to_dict()
+    assert result["nodes"]["rag_search"]["calls"] == 2
+    assert result["steps"]["embed_query"]["calls"] == 2
+    assert result["steps"]["embed_query"]["ms"] >= 20
+    assert result["nodes"]["rag_search"]["ms"] >= result["steps"]["embed_query"]["ms"]
+    assert result["steps"]["prefill"] == {"ms": 120.0, "calls": 1}
+    assert "decode" not in result["steps"]
+    assert result["prompt_tokens"] == 512
+    assert result["total_ms"] >= result["nodes"]["rag_search"]["ms"]
+    assert request_timings.current() is None
+
+
+def test_collector_is_shared_with_copied_context_threads():
+    # LangGraph는 노드를 copy_context()로 다른 스레드에서 실행할 수 있음
+    with request_timings.collect() as timings:
+        context = copy_context()
+
+        def node():
+            with request_timings.span("generate_response", node=True):
+                pass
+
+        thread = threading.Thread(target=context.run, args=(node,))
+        thread.start()
+        thread.join()
+
+        with request_timings.collect() as nested:
+            assert nested is timings
+
+    assert timings.to_dict()["nodes"]["generate_response"]["calls"] == 1
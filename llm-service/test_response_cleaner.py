@@ -0,0 +1,69 @@
+"""
+응답 정리 엔진 단위 테스트 (LLM 없이)
+"""
+
+import random
+
+from response_cleaner import ResponseCleaner, clean_response
+
+ANSWER = ("스프린트 회고는 스프린트가 끝날 때 팀이 작업 방식을 돌아보는 회의입니다.\n"
+          "1. 잘된 점: 일일 스탠드업으로 이슈를 빠르게 공유했습니다.\n"
+          "2. 개선 방안: 백로그 정제 시간을 주 1회로 고정합니다.")
+
+RAW_REPLIES = [
+    "assistant\n" + ANSWER + "<|im_end|>\n<|im_start|>user\n다음 질문",
+    "Gemma 3\n===\n스프린트 회고가 뭐야?\n" + ANSWER + "\n제공된 정보로 완벽하게 답변했습니다.",
+    "'''\n모델: X\n질문: Y\n'''\n" + ANSWER + "\x07<start",
+    "assistant: " + ANSWER.replace("회의입니다.", "회의입니다 system 답변을 작성해 주세요") + "\n\n\n이후는 버림",
+]
+
+
+def stream(text: str, cleaner: ResponseCleaner, seed: int):
+    rng = random.Random(seed)
+    emitted, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, 6)
+        emitted.append(cleaner.feed(text[i:i + size]))
+        i += size
+    emitted.append(cleaner.flush())
+    return "".join(emitted)
+
+
+def test_full_reply_rules():
+    assert clean_response(RAW_REPLIES[0]) == ANSWER
+    # 모델 이름/구분선 머리말, 되풀이된 질문, 끝의 메타 설명 제거
+    assert clean_response(RAW_REPLIES[1]) == ANSWER
+    # 삼중 따옴표 블록, 제어 문자, 끝에 남은 불완전한 태그 제거
+    assert clean_response(RAW_REPLIES[2]) == ANSWER
+    # assistant: 레이블, 인라인 태그/지침 문구 제거, 빈 줄 두 개 이후 버림
+    reply = clean_response(RAW_REPLIES[3])
+    assert reply.startswith("스프린트 회고는") and "system" not in reply and "작성해" not in reply
+    assert "이후는 버림" not in reply
+
+
+def test_streaming_matches_full_reply_for_any_chunking():
+    for raw in RAW_REPLIES:
+        expected = clean_response(raw, correct_model_name="Gemma 3")
+        for seed in range(20):
+            cleaner = ResponseCleaner(correct_model_name="Gemma 3")
+            emitted = stream(raw, cleaner, seed)
+            assert cleaner.reply() == expected
+            assert emitted.strip() == expected
+
+
+def test_long_lines_are_emitted_before_newline_but_pattern_prefixes_are_held():
+    cleaner = ResponseCleaner()
+    assert cleaner.feed("프로젝트 진척률은 현재 65%이며 일정 대비 sys") == "프로젝트 진척률은 현재 65%이며 일정 대비 "
+    assert cleaner.feed("tem 약간 지연") == " 약간 지연"
+    assert cleaner.feed("되었습니다<|im_") == "되었습니다"
+    assert cleaner.feed("end|>무시") == ""
+    assert cleaner.stopped
+
+
+def test_model_name_check_and_legacy_question_lines():
+    assert clean_response("저는 ChatGPT입니다.", correct_model_name="Gemma 3") == "저는 Gemma 3 모델입니다."
+    assert clean_response("저는 ChatGPT입니다.") == "저는 ChatGPT입니다."
+    assert clean_response("리스크가 뭔가요?\n리스크는 불확실성입니다.\n더 궁금한가요?",
+                          drop_question_lines=True) == "리스크는 불확실성입니다."
+    # 질문 같은 줄뿐이면 그대로 사용
+    assert clean_response("스프린트는?") == "스프린트는?"
@@ -0,0 +1,100 @@
+"""
+서버 측 세션 저장소 단위 테스트 (실제 모델 없이)
+"""
+
+import pytest
+
+import session_store
+from session_store import TURN_END, SessionStore, complete_with_session
+from test_prompt_cache import PREFIX, FakeLlama, ScoredFakeLlama
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = SessionStore(ram_budget_bytes=10_000, disk_budget_bytes=10_000, state_dir=str(tmp_path))
+    monkeypatch.setattr(session_store, "_store", store)
+    return store
+
+
+def turn_prompt(transcript: str, message: str) -> str:
+    return "\n".join([transcript, "<|im_start|>user", message, "<|im_end|>", "<|im_start|>assistant"])
+
+
+def test_follow_up_turn_evaluates_only_new_message(store):
+    llm = FakeLlama()
+    session = store.create("s1")
+
+    prompt1 = turn_prompt(PREFIX, "첫 질문")
+    response, stats = complete_with_session(llm, session, prompt1, PREFIX, model_key="m")
+    session.append_turn("첫 질문", "ok", transcript=prompt1 + response["choices"][0]["text"] + TURN_END)
+    assert stats["session_state"] == "miss"
+
+    # 다른 요청이 KV를 덮어씀
+    llm.reset()
+    llm("다른 세션의 프롬프트")
+    before = llm.evaluated
+
+    prompt2 = turn_prompt(session.transcript, "둘째 질문")
+    _, stats = complete_with_session(llm, session, prompt2, PREFIX, model_key="m")
+
+    assert stats["session_state"] == "ram"
+    assert llm.evaluated - before == len(prompt2.encode("utf-8")) - len(prompt1.encode("utf-8"))
+
+
+def test_states_spill_to_disk_and_restore(store):
+    sessions = [store.create(f"s{i}") for i in range(3)]
+    for session in sessions:
+        store.save_state(session, list(range(1500)), "m")
+
+    stats = store.stats()
+    assert stats["spills"] >= 1
+    assert stats["ram_bytes"] <= store.ram_budget_bytes
+
+    state, source = store.load_state(sessions[0], "m")
+    assert source == "disk"
+    assert state == list(range(1500))
+
+
+def test_disk_budget_evicts_oldest(store):
+    store.disk_budget_bytes = 0
+    sessions = [store.create(f"s{i}") for i in range(3)]
+    for session in sessions:
+        store.save_state(session, list(range(1500)), "m")
+
+    assert store.stats()["evictions"] >= 1
+    assert store.load_state(sessions[0], "m") == (None, "miss")
+
+
+def test_model_change_invalidates_state(store):
+    session = store.create("s1")
+    store.save_state(session, [1, 2, 3], "model-a")
+
+    assert store.load_state(session, "model-b") == (None, "miss")
+
+
+def test_direct_reply_extends_transcript_as_text(store):
+    session = store.create("s1", history=[{"role": "user", "content": "이전"}])
+    session.append_turn("안녕", "안녕하세요")
+    assert session.transcript is None
+    assert session.turns == 1
+    assert session.history[-1] == {"role": "assistant", "content": "안녕하세요"}
+
+    session.transcript = PREFIX
+    session.append_turn("질문", "답변")
+    assert session.transcript.startswith(PREFIX)
+    assert session.transcript.endswith("답변\n<|im_end|>")
+
+
+def test_snapshot_excludes_full_scores(tmp_path, monkeypatch):
+    store = SessionStore(ram_budget_bytes=10_000_000, disk_budget_bytes=0, state_dir=str(tmp_path))
+    monkeypatch.setattr(session_store, "_store", store)
+    llm = ScoredFakeLlama()
+    session = store.create("s1")
+
+    prompt = turn_prompt(PREFIX, "첫 질문")
+    complete_with_session(llm, session, prompt, PREFIX, model_key="m")
+
+    state, size = store._ram_states["s1"]
+    assert state.scores.shape == (1, 1000)
+    # KV 바이트 + input_ids + logits 한 행 (64행 전체였다면 256KB)
+    assert size == state.llama_state_size + state.input_ids.nbytes + 1000 * 4
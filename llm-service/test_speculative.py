@@ -0,0 +1,75 @@
+"""
+투기적 디코딩 설정 / draft 모델 단위 테스트 (llama.cpp 없이)
+"""
+
+import numpy as np
+import pytest
+
+import speculative
+from speculative import GGUFDraftModel, speculative_config
+
+
+def test_config_defaults_off_and_per_model_override(monkeypatch):
+    assert speculative_config("./models/big.gguf") is None
+
+    monkeypatch.setattr(speculative, "SPECULATIVE_MODELS", {
+        "big.gguf": {"mode": "prompt_lookup", "num_pred_tokens": 6},
+        "other.gguf": {"mode": "draft"},
+    })
+    config = speculative_config("/app/models/big.gguf")
+    assert config["mode"] == "prompt_lookup"
+    assert config["num_pred_tokens"] == 6
+    assert config["max_ngram_size"] == speculative.SPECULATIVE_MAX_NGRAM_SIZE
+
+    with pytest.raises(ValueError):
+        speculative_config("./models/other.gguf")
+
+
+class FakeDraftLlama:
+    """다음 토큰 = 마지막 토큰 + 1 인 모델, 평가한 토큰 수 기록"""
+
+    def __init__(self, n_ctx=64, eos=99):
+        self._n_ctx = n_ctx
+        self.eos = eos
+        self.input_ids = np.zeros(n_ctx, dtype=np.intc)
+        self.n_tokens = 0
+        self.evaluated = 0
+
+    def n_ctx(self):
+        return self._n_ctx
+
+    def token_eos(self):
+        return self.eos
+
+    def eval(self, tokens):
+        for token in tokens:
+            self.input_ids[self.n_tokens] = token
+            self.n_tokens += 1
+        self.evaluated += len(tokens)
+
+
+class CountingDraft(GGUFDraftModel):
+    def _next_token(self):
+        return int(self.llm.input_ids[self.llm.n_tokens - 1]) + 1
+
+
+def test_draft_model_reuses_prefix_and_stops_at_budget():
+    llm = FakeDraftLlama()
+    draft = CountingDraft("draft.gguf", num_pred_tokens=3, llm=llm)
+
+    assert draft(np.array([1, 2, 3], dtype=np.intc)).tolist() == [4, 5, 6]
+    assert llm.evaluated == 3 + 2  # 프롬프트 3 + 마지막 후보는 평가하지 않음
+
+    # 대상 모델이 후보 두 개를 받아들이고 다른 토큰을 뽑은 경우: 겹치는 접두부는 다시 평가하지 않음
+    llm.evaluated = 0
+    assert draft(np.array([1, 2, 3, 4, 5, 9], dtype=np.intc)).tolist() == [10, 11, 12]
+    assert llm.evaluated == 1 + 2
+    assert draft.drafted_tokens == 6
+
+
+def test_draft_model_respects_eos_and_context():
+    llm = FakeDraftLlama(n_ctx=8, eos=5)
+    draft = CountingDraft("draft.gguf", num_pred_tokens=4, llm=llm)
+    assert draft(np.array([2, 3], dtype=np.intc)).tolist() == [4]
+    # 컨텍스트에 자리가 없으면 제안하지 않음
+    assert draft(np.arange(7, dtype=np.intc)).tolist() == []
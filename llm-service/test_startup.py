@@ -0,0 +1,66 @@
+"""
+시작 단계 컴포넌트 추적 단위 테스트
+"""
+
+import threading
+
+import pytest
+
+from startup import StartupTracker
+
+
+def test_ready_only_after_required_components_load():
+    tracker = StartupTracker()
+    tracker.begin()
+    tracker.register("llm")
+    tracker.register("neo4j", required=False)
+    assert tracker.in_progress
+    assert not tracker.is_ready()
+
+    assert tracker.run("llm", lambda path: f"model:{path}", "a.gguf") == "model:a.gguf"
+    # 선택 컴포넌트도 끝나기 전(pending/loading)에는 ready 아님
+    assert not tracker.is_ready()
+
+    with pytest.raises(ConnectionError):
+        tracker.run("neo4j", lambda: (_ for _ in ()).throw(ConnectionError("neo4j down")))
+    tracker.finish()
+
+    body = tracker.readiness()
+    assert body["ready"]
+    assert body["components"]["llm"]["status"] == "ready"
+    assert body["components"]["llm"]["duration_ms"] is not None
+    assert body["components"]["neo4j"] == {
+        "status": "failed", "required": False, "duration_ms": body["components"]["neo4j"]["duration_ms"],
+        "error": "neo4j down",
+    }
+    assert not tracker.in_progress
+
+
+def test_failed_required_component_blocks_readiness():
+    tracker = StartupTracker()
+    tracker.begin()
+    tracker.register("llm")
+    tracker.register("chat_workflow")
+    tracker.fail("chat_workflow", "model not loaded")
+    assert tracker.pending_required() == ["llm", "chat_workflow"]
+    assert not tracker.readiness()["ready"]
+
+
+def test_core_done_releases_waiters_before_finish():
+    tracker = StartupTracker()
+    assert not tracker.in_progress  # begin() 전에는 대기하지 않음
+    tracker.begin()
+    released = threading.Event()
+
+    def waiter():
+        tracker.core_done.wait()
+        released.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    assert not released.wait(0.05)
+
+    tracker.mark_core_done()
+    thread.join(1)
+    assert released.is_set()
+    assert tracker.finished_at is None